@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from pgsqltoolsservice.connection.connection_pool import ConnectionPool
 from pgsqltoolsservice.connection.connection_service import ConnectionInfo, ConnectionService
 
-__all__ = ['ConnectionInfo', 'ConnectionService']
+__all__ = ['ConnectionInfo', 'ConnectionPool', 'ConnectionService']
@@ -0,0 +1,361 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Pool of the connections opened by the connection service, shared by every owner URI. Connections are pooled
+by the server, database, user and options they are opened with, so that connections released by one owner
+URI are reused by others instead of paying for a new handshake and another backend on the server
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple  # noqa
+
+import psycopg2
+import psycopg2.extensions
+
+from pgsqltoolsservice.connection.contracts import ConnectionType
+
+
+# Types of connections that only run metadata queries outside of transactions, which can share a connection. Connections
+# whose statements are canceled along with their requests, such as those of metadata lists and of Object Explorer, are
+# not shared, as canceling the backend of a shared connection would cancel the statement of another owner URI
+SHARED_CONNECTION_TYPES = frozenset([ConnectionType.QUERY_CANCEL, ConnectionType.INTELLISENSE])
+
+# Statement that resets the session state left behind by the last holder of a connection before it is reused
+RESET_SESSION_STATEMENT = 'DISCARD ALL'
+
+POOL_EXHAUSTED_ERROR = 'Cannot open more than {0} connections to {1}'
+
+# Transaction statuses of connections that can be leased. Shared connections may be running another holder's query
+_IDLE_STATUSES = frozenset([psycopg2.extensions.TRANSACTION_STATUS_IDLE])
+_SHAREABLE_STATUSES = frozenset([psycopg2.extensions.TRANSACTION_STATUS_IDLE, psycopg2.extensions.TRANSACTION_STATUS_ACTIVE])
+
+PoolKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Tuple[Tuple[str, str], ...]]
+
+
+def get_pool_key(connection_options: dict) -> PoolKey:
+    """
+    Returns the key of the connections opened with the given psycopg2 connection options, which is the host,
+    port, database, user and the rest of the options. Connections are only reused for identical keys
+    """
+    other_options = tuple(sorted(
+        (name, str(value)) for name, value in connection_options.items() if name not in ('host', 'port', 'dbname', 'user')
+    ))
+    port = connection_options.get('port')
+    return (connection_options.get('host'), None if port is None else str(port), connection_options.get('dbname'),
+            connection_options.get('user'), other_options)
+
+
+class PooledConnection:
+    """A connection opened by the pool, with the number of leases held on it"""
+
+    def __init__(self, connection, key: PoolKey):
+        self.connection = connection
+        self.key: PoolKey = key
+        self.lease_count: int = 0
+        self.is_shared: bool = False
+        self.idle_since: float = None
+
+    @property
+    def server_key(self) -> Tuple[Optional[str], Optional[str]]:
+        """Host and port of the server of the connection"""
+        return self.key[:2]
+
+
+class ConnectionPool:
+    """
+    Leases connections to owner URIs. A shared lease is on a connection that other owner URIs lease as well,
+    and is meant for metadata queries run outside of transactions. A dedicated lease is on a connection of its
+    own, for sessions that hold transactions or session state. Released connections are reset and kept idle to
+    be leased again, until they have been idle for longer than the idle timeout. Limits of 0 are unlimited
+    """
+
+    def __init__(self, min_idle_connections: int = 0, max_connections: int = 0, max_server_connections: int = 0,
+                 idle_timeout_seconds: float = 0, wait_timeout_seconds: float = 0) -> None:
+        """
+        :param min_idle_connections: Number of idle connections of each key that are kept past the idle timeout
+        :param max_connections: Number of connections that may be open with the same key
+        :param max_server_connections: Number of connections that may be open to the same host and port
+        :param idle_timeout_seconds: Time after which idle connections are closed, 0 to keep them open
+        :param wait_timeout_seconds: Time to wait for a connection to be released when the limits are reached, 0 to fail at once
+        """
+        self.min_idle_connections = min_idle_connections
+        self.max_connections = max_connections
+        self.max_server_connections = max_server_connections
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+
+        self._condition = threading.Condition()
+        # Connections opened by the pool, keyed by the ID of the psycopg2 connection
+        self._connections: Dict[int, PooledConnection] = {}
+        # Shared connections of each key, and connections that are not leased from the least recently released
+        self._shared: Dict[PoolKey, List[PooledConnection]] = {}
+        self._idle: List[PooledConnection] = []
+        # Number of connections being opened for each key, which count toward the limits
+        self._opening: Dict[PoolKey, int] = {}
+
+    # PROPERTIES ###########################################################
+    @property
+    def open_connection_count(self) -> int:
+        """Number of connections opened by the pool that are still open, leased or idle"""
+        with self._condition:
+            return len(self._connections)
+
+    @property
+    def idle_connection_count(self) -> int:
+        """Number of connections that are open but not leased"""
+        with self._condition:
+            return len(self._idle)
+
+    # METHODS ##############################################################
+    def lease(self, connection_options: dict, shared: bool = False) -> 'psycopg2.extensions.connection':
+        """
+        Leases a connection opened with the given options, opening one if none can be reused. Connections are
+        in autocommit mode
+        :param connection_options: Keyword arguments of psycopg2.connect
+        :param shared: Whether the connection may be shared with other holders of shared leases
+        :raises RuntimeError: If the limits are reached and no connection was released before the wait timeout
+        """
+        return self.lease_with_handshake_time(connection_options, shared)[0]
+
+    def lease_with_handshake_time(self, connection_options: dict, shared: bool = False) \
+            -> Tuple['psycopg2.extensions.connection', Optional[float]]:
+        """
+        Leases a connection like lease does, and returns the time in seconds taken by the handshake of the server
+        if the connection was opened for this lease, or None if an open connection was reused
+        """
+        key = get_pool_key(connection_options)
+        connections_to_close: List[PooledConnection] = []
+        try:
+            with self._condition:
+                pooled = self._lease_open_connection(key, shared, connections_to_close)
+                if pooled is not None:
+                    return pooled.connection, None
+                self._opening[key] = self._opening.get(key, 0) + 1
+        finally:
+            _close_connections(connections_to_close)
+
+        connection = None
+        try:
+            start_time = time.monotonic()
+            connection = psycopg2.connect(**connection_options)
+            handshake_time = time.monotonic() - start_time
+            connection.autocommit = True
+        except Exception:
+            if connection is not None:
+                _close_connection(connection)
+            with self._condition:
+                self._finish_opening(key)
+            raise
+
+        with self._condition:
+            self._finish_opening(key)
+            pooled = self._connections.get(id(connection))
+            if pooled is None:
+                pooled = self._connections[id(connection)] = PooledConnection(connection, key)
+            pooled.lease_count += 1
+            if shared and not pooled.is_shared:
+                pooled.is_shared = True
+                self._shared.setdefault(key, []).append(pooled)
+        return connection, handshake_time
+
+    def release(self, connection: 'psycopg2.extensions.connection') -> None:
+        """
+        Releases a lease on a connection. Once no leases are held on it, the connection is reset and kept idle,
+        or closed if it cannot be reused. Connections that were not opened by the pool are closed
+        """
+        with self._condition:
+            pooled = self._connections.get(id(connection))
+            if pooled is not None:
+                pooled.lease_count -= 1
+                if pooled.lease_count > 0:
+                    return
+                if pooled.is_shared:
+                    pooled.is_shared = False
+                    self._remove_shared_connection(pooled)
+
+        # The connection is not leased by anyone, so it is reset outside of the lock
+        if pooled is None or not _reset_connection(connection):
+            _close_connection(connection)
+            if pooled is None:
+                return
+            with self._condition:
+                self._connections.pop(id(connection), None)
+                self._condition.notify_all()
+            return
+
+        connections_to_close: List[PooledConnection] = []
+        with self._condition:
+            pooled.idle_since = time.monotonic()
+            self._idle.append(pooled)
+            connections_to_close.extend(self._remove_expired_connections())
+            self._condition.notify_all()
+        _close_connections(connections_to_close)
+
+    def close_idle_connections(self) -> int:
+        """
+        Closes the connections that have been idle for longer than the idle timeout
+        :returns: The number of connections closed
+        """
+        with self._condition:
+            connections_to_close = self._remove_expired_connections()
+            if connections_to_close:
+                self._condition.notify_all()
+        _close_connections(connections_to_close)
+        return len(connections_to_close)
+
+    def close(self) -> None:
+        """Closes every connection opened by the pool, including those that are leased"""
+        with self._condition:
+            connections_to_close = list(self._connections.values())
+            self._connections.clear()
+            self._shared.clear()
+            self._idle.clear()
+            self._condition.notify_all()
+        _close_connections(connections_to_close)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _lease_open_connection(self, key: PoolKey, shared: bool, connections_to_close: List[PooledConnection]) -> Optional[PooledConnection]:
+        """
+        Leases a connection that is already open, waiting for one to be released if the limits are reached.
+        Returns None once a new connection can be opened
+        """
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        while True:
+            connections_to_close.extend(self._remove_expired_connections())
+
+            pooled = self._find_open_connection(key, shared, connections_to_close)
+            if pooled is not None:
+                pooled.lease_count += 1
+                return pooled
+
+            server_key = key[:2]
+            if self._has_capacity(key, server_key):
+                return None
+
+            # Idle connections of other keys to the server make way for the new connection
+            evicted = next((pooled for pooled in self._idle if pooled.server_key == server_key), None)
+            if evicted is not None:
+                self._remove_idle_connection(evicted, True)
+                connections_to_close.append(evicted)
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                limit = self.max_connections if not self._has_key_capacity(key) else self.max_server_connections
+                raise RuntimeError(POOL_EXHAUSTED_ERROR.format(limit, ':'.join(str(part) for part in server_key if part is not None)))
+            self._condition.wait(remaining)
+
+    def _find_open_connection(self, key: PoolKey, shared: bool, connections_to_close: List[PooledConnection]) -> Optional[PooledConnection]:
+        """Returns the shared connection with the fewest leases or the most recently released idle connection of a key"""
+        if shared:
+            shared_connections = [pooled for pooled in self._shared.get(key, []) if _is_usable(pooled.connection, _SHAREABLE_STATUSES)]
+            if shared_connections:
+                return min(shared_connections, key=lambda pooled: pooled.lease_count)
+
+        for pooled in reversed(self._idle):
+            if pooled.key != key:
+                continue
+            is_usable = _is_usable(pooled.connection, _IDLE_STATUSES)
+            self._remove_idle_connection(pooled, not is_usable)
+            if not is_usable:
+                connections_to_close.append(pooled)
+                continue
+
+            pooled.idle_since = None
+            if shared:
+                pooled.is_shared = True
+                self._shared.setdefault(key, []).append(pooled)
+            return pooled
+        return None
+
+    def _finish_opening(self, key: PoolKey) -> None:
+        self._opening[key] -= 1
+        if not self._opening[key]:
+            del self._opening[key]
+        self._condition.notify_all()
+
+    def _has_capacity(self, key: PoolKey, server_key: tuple) -> bool:
+        if not self._has_key_capacity(key):
+            return False
+        if self.max_server_connections <= 0:
+            return True
+        server_count = sum(1 for pooled in self._connections.values() if pooled.server_key == server_key)
+        server_count += sum(count for opening_key, count in self._opening.items() if opening_key[:2] == server_key)
+        return server_count < self.max_server_connections
+
+    def _has_key_capacity(self, key: PoolKey) -> bool:
+        if self.max_connections <= 0:
+            return True
+        key_count = sum(1 for pooled in self._connections.values() if pooled.key == key) + self._opening.get(key, 0)
+        return key_count < self.max_connections
+
+    def _remove_expired_connections(self) -> List[PooledConnection]:
+        """Removes the connections idle for longer than the idle timeout, keeping the minimum number of idle connections of each key"""
+        if self.idle_timeout_seconds <= 0:
+            return []
+
+        expiry_time = time.monotonic() - self.idle_timeout_seconds
+        idle_counts: Dict[PoolKey, int] = {}
+        for pooled in self._idle:
+            idle_counts[pooled.key] = idle_counts.get(pooled.key, 0) + 1
+
+        expired = []
+        for pooled in list(self._idle):
+            if pooled.idle_since <= expiry_time and idle_counts[pooled.key] > self.min_idle_connections:
+                idle_counts[pooled.key] -= 1
+                self._remove_idle_connection(pooled, True)
+                expired.append(pooled)
+        return expired
+
+    def _remove_idle_connection(self, pooled: PooledConnection, is_closing: bool) -> None:
+        """Removes a connection from the idle connections, and from the pool if it is about to be closed"""
+        self._idle.remove(pooled)
+        if is_closing:
+            self._connections.pop(id(pooled.connection), None)
+
+    def _remove_shared_connection(self, pooled: PooledConnection) -> None:
+        shared_connections = self._shared.get(pooled.key, [])
+        if pooled in shared_connections:
+            shared_connections.remove(pooled)
+        if not shared_connections:
+            self._shared.pop(pooled.key, None)
+
+
+def _is_usable(connection, statuses: frozenset) -> bool:
+    try:
+        return not connection.closed and connection.get_transaction_status() in statuses
+    except Exception:
+        return False
+
+
+def _reset_connection(connection) -> bool:
+    """Discards the session state of a connection that is not in a transaction, returning whether it can be reused"""
+    if not _is_usable(connection, _IDLE_STATUSES):
+        return False
+    try:
+        connection.autocommit = True
+        cursor = connection.cursor()
+        try:
+            cursor.execute(RESET_SESSION_STATEMENT)
+        finally:
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+def _close_connection(connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        # Ignore errors when disconnecting
+        pass
+
+
+def _close_connections(connections: List[PooledConnection]) -> None:
+    for pooled in connections:
+        _close_connection(pooled.connection)
@@ -7,19 +7,23 @@
 disconnect and holds the current connection, if one is present"""
 
 import threading
+import time
 from typing import Callable, Dict, List, Optional, Tuple  # noqa
 import uuid
 
 import psycopg2
 import psycopg2.extensions
 
+from pgsqltoolsservice.connection.connection_pool import ConnectionPool, SHARED_CONNECTION_TYPES
+from pgsqltoolsservice.connection.connection_supervisor import ConnectionSupervisor, KEEPALIVE_OPTIONS
 from pgsqltoolsservice.connection.contracts import (
     BUILD_CONNECTION_INFO_REQUEST, BuildConnectionInfoParams,
     CANCEL_CONNECT_REQUEST, CancelConnectParams,
     CONNECT_REQUEST, ConnectRequestParams,
     DISCONNECT_REQUEST, DisconnectRequestParams,
     CHANGE_DATABASE_REQUEST, ChangeDatabaseRequestParams,
-    CONNECTION_COMPLETE_METHOD, ConnectionCompleteParams,
+    CONNECTION_CHANGED_METHOD, ConnectionChangedParams,
+    CONNECTION_COMPLETE_METHOD, ConnectionCompleteParams, ConnectionTimings,
     ConnectionDetails, ConnectionSummary, ConnectionType, ServerInfo,
     GET_CONNECTION_STRING_REQUEST, GetConnectionStringParams,
     LIST_DATABASES_REQUEST, ListDatabasesParams, ListDatabasesResponse
@@ -46,6 +50,10 @@ class ConnectionInfo(object):
         """Get all connections held by this object"""
         return self._connection_map.values()
 
+    def get_all_connection_types(self) -> List[ConnectionType]:
+        """Get the types of all connections held by this object"""
+        return list(self._connection_map)
+
     def add_connection(self, connection_type: ConnectionType, connection: psycopg2.extensions.connection):
         """Add a connection to the connection map, associated with the given connection type"""
         self._connection_map[connection_type] = connection
@@ -75,7 +83,10 @@ class ConnectionService:
         self._service_provider = None
         self._cancellation_map: Dict[Tuple[str, ConnectionType], CancellationToken] = {}
         self._cancellation_lock: threading.Lock = threading.Lock()
+        self._connection_info_lock: threading.Lock = threading.Lock()
         self._on_connect_callbacks: List[Callable[[ConnectionInfo], None]] = []
+        self._pool: ConnectionPool = ConnectionPool()
+        self._supervisor: ConnectionSupervisor = ConnectionSupervisor(self, self._pool)
 
     def register(self, service_provider: ServiceProvider):
         self._service_provider = service_provider
@@ -89,6 +100,13 @@ class ConnectionService:
         self._service_provider.server.set_request_handler(BUILD_CONNECTION_INFO_REQUEST, self.handle_build_connection_info_request)
         self._service_provider.server.set_request_handler(GET_CONNECTION_STRING_REQUEST, self.handle_get_connection_string_request)
 
+        # Check the health of connections in the background, and close the pooled connections on shutdown
+        self._supervisor.logger = self._service_provider.logger
+        self._update_pool_options()
+        self._supervisor.start()
+        self._service_provider.server.add_shutdown_handler(self._supervisor.stop)
+        self._service_provider.server.add_shutdown_handler(self._pool.close)
+
     # PUBLIC METHODS #######################################################
     def connect(self, params: ConnectRequestParams) -> Optional[ConnectionCompleteParams]:
         """
@@ -97,62 +115,31 @@ class ConnectionService:
         If a connection was already open, disconnect first. Return a connection response indicating
         whether the connection was successful
         """
+        return self._connect(params, True)
 
-        connection_info: ConnectionInfo = self.owner_to_connection_map.get(params.owner_uri)
-
-        # If there is no saved connection or the saved connection's options do not match, create a new one
-        if connection_info is None or connection_info.details.options != params.connection.options:
-            if connection_info is not None:
-                self._close_connections(connection_info)
-            connection_info = ConnectionInfo(params.owner_uri, params.connection)
-            self.owner_to_connection_map[params.owner_uri] = connection_info
-
-        # Get the connection for the given type and build a response if it is present, otherwise open the connection
-        connection = connection_info.get_connection(params.type)
-        if connection is not None:
-            return _build_connection_response(connection_info, params.type)
-
-        # The connection doesn't exist yet. Cancel any ongoing connection and set up a cancellation token
-        cancellation_key = (params.owner_uri, params.type)
-        cancellation_token = CancellationToken()
-        with self._cancellation_lock:
-            if cancellation_key in self._cancellation_map:
-                self._cancellation_map[cancellation_key].cancel()
-            self._cancellation_map[cancellation_key] = cancellation_token
-
-        # Map the connection options to their psycopg2-specific options
-        connection_options = {CONNECTION_OPTION_KEY_MAP.get(option, option): value for option, value in params.connection.options.items()
-                              if option in PG_CONNECTION_PARAM_KEYWORDS}
-
-        # Use the default database if one was not provided
-        if 'dbname' not in connection_options or not connection_options['dbname']:
-            connection_options['dbname'] = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.default_database
-
-        # Connect using psycopg2
-        try:
-            # Pass connection parameters as keyword arguments to psycopg2.connect by unpacking the connection_options dict
-            connection = psycopg2.connect(**connection_options)
-        except Exception as err:
-            return _build_connection_response_error(connection_info, params.type, err)
-        finally:
-            # Remove this thread's cancellation token if needed
-            with self._cancellation_lock:
-                if (cancellation_key in self._cancellation_map
-                        and cancellation_token is self._cancellation_map[cancellation_key]):
-                    del self._cancellation_map[cancellation_key]
-
-        # If the connection was canceled, close it
-        if cancellation_token.canceled:
-            connection.close()
-            return None
+    def reconnect(self, owner_uri: str, connection_type: ConnectionType, connection: psycopg2.extensions.connection) -> bool:
+        """
+        Replace a connection of an owner URI that is no longer usable with a new connection, and send a connection
+        changed notification. Listeners of new connections are not notified, as the owner URI was already connected
+        :param connection: The connection to replace, which is left alone if it was disconnected or replaced meanwhile
+        :return: True if the connection was replaced, false otherwise
+        """
+        connection_info = self.owner_to_connection_map.get(owner_uri)
+        if connection_info is None or connection_info.get_connection(connection_type) is not connection:
+            return False
 
-        # Set autocommit mode so that users have control over transactions
-        connection.autocommit = True
+        connection_info.remove_connection(connection_type)
+        self._pool.release(connection)
+        response = self._connect(ConnectRequestParams(connection_info.details, owner_uri, connection_type), False)
+        if response is None or response.error_message is not None:
+            if self._service_provider is not None and self._service_provider.logger is not None:
+                self._service_provider.logger.warning(
+                    'Could not replace the {0} connection of {1}: {2}'.format(connection_type.value, owner_uri, response and response.error_message))
+            return False
 
-        # The connection was not canceled, so add the connection and respond
-        connection_info.add_connection(params.type, connection)
-        self._notify_on_connect(params.type, connection_info)
-        return _build_connection_response(connection_info, params.type)
+        self._service_provider.server.send_notification(
+            CONNECTION_CHANGED_METHOD, ConnectionChangedParams(owner_uri, connection_type, response.connection_summary))
+        return True
 
     def disconnect(self, owner_uri: str, connection_type: Optional[ConnectionType]) -> bool:
         """
@@ -181,6 +168,25 @@ class ConnectionService:
             self.connect(ConnectRequestParams(connection_info.details, owner_uri, connection_type))
         return connection_info.get_connection(connection_type)
 
+    def lease_connection(self, owner_uri: str) -> psycopg2.extensions.connection:
+        """
+        Lease a dedicated connection opened with the connection details of an owner URI, for work that does not belong
+        to any of its connection types. The connection is not held by the owner URI, and must be given back with
+        release_connection once the work is done, even if it failed
+
+        :raises ValueError: If there is no connection associated with the provided URI
+        """
+        connection_info = self.owner_to_connection_map.get(owner_uri)
+        if connection_info is None:
+            raise ValueError('No connection associated with given owner URI')
+
+        self._update_pool_options()
+        return self._pool.lease(self._get_connection_options(connection_info.details))
+
+    def release_connection(self, connection: psycopg2.extensions.connection) -> None:
+        """Give back a connection leased with lease_connection, which is reset and kept by the pool to be reused"""
+        self._pool.release(connection)
+
     def register_on_connect_callback(self, task: Callable[[ConnectionInfo], None]) -> None:
         self._on_connect_callbacks.append(task)
 
@@ -256,8 +262,91 @@ class ConnectionService:
         pass
 
     # IMPLEMENTATION DETAILS ###############################################
+    def _connect(self, params: ConnectRequestParams, notify_on_connect: bool) -> Optional[ConnectionCompleteParams]:
+        """
+        Open a connection, or reuse the open connection of the owner URI and type
+        :param notify_on_connect: Whether to notify the listeners of new connections
+        """
+        # If there is no saved connection or the saved connection's options do not match, create a new one. Connections
+        # of several types may be opened for the owner URI at once, and must share the same object
+        with self._connection_info_lock:
+            connection_info: ConnectionInfo = self.owner_to_connection_map.get(params.owner_uri)
+            if connection_info is None or connection_info.details.options != params.connection.options:
+                if connection_info is not None:
+                    self._close_connections(connection_info)
+                connection_info = ConnectionInfo(params.owner_uri, params.connection)
+                self.owner_to_connection_map[params.owner_uri] = connection_info
+
+        # Get the connection for the given type and build a response if it is present, otherwise open the connection
+        connection = connection_info.get_connection(params.type)
+        if connection is not None:
+            return _build_connection_response(connection_info, params.type)
+
+        # The connection doesn't exist yet. Cancel any ongoing connection and set up a cancellation token
+        cancellation_key = (params.owner_uri, params.type)
+        cancellation_token = CancellationToken()
+        with self._cancellation_lock:
+            if cancellation_key in self._cancellation_map:
+                self._cancellation_map[cancellation_key].cancel()
+            self._cancellation_map[cancellation_key] = cancellation_token
+
+        # Lease a connection from the pool, which opens one with psycopg2 if none can be reused. Connections are leased
+        # in autocommit mode so that users have control over transactions
+        self._update_pool_options()
+        start_time = time.monotonic()
+        try:
+            connection, handshake_time = self._pool.lease_with_handshake_time(
+                self._get_connection_options(params.connection), params.type in SHARED_CONNECTION_TYPES)
+        except Exception as err:
+            return _build_connection_response_error(connection_info, params.type, err)
+        finally:
+            # Remove this thread's cancellation token if needed
+            with self._cancellation_lock:
+                if (cancellation_key in self._cancellation_map
+                        and cancellation_token is self._cancellation_map[cancellation_key]):
+                    del self._cancellation_map[cancellation_key]
+
+        timings = ConnectionTimings(_get_milliseconds(handshake_time), _get_milliseconds(time.monotonic() - start_time))
+
+        # If the connection was canceled or the owner URI was connected again with other options meanwhile, give it back to the pool
+        if cancellation_token.canceled or self.owner_to_connection_map.get(params.owner_uri) is not connection_info:
+            self._pool.release(connection)
+            return None
+
+        # The connection was not canceled, so add the connection and respond
+        connection_info.add_connection(params.type, connection)
+        if notify_on_connect:
+            self._notify_on_connect(params.type, connection_info)
+        return _build_connection_response(connection_info, params.type, timings)
+
+    def _get_connection_options(self, details: ConnectionDetails) -> dict:
+        """Get the keyword arguments of psycopg2.connect that open a connection with the given details"""
+        # Map the connection options to their psycopg2-specific options
+        connection_options = {CONNECTION_OPTION_KEY_MAP.get(option, option): value for option, value in details.options.items()
+                              if option in PG_CONNECTION_PARAM_KEYWORDS}
+
+        # Use the default database if one was not provided
+        if 'dbname' not in connection_options or not connection_options['dbname']:
+            connection_options['dbname'] = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.default_database
+
+        # Enable TCP keepalives so that dead connections are detected, unless the options configure them
+        for option, value in KEEPALIVE_OPTIONS.items():
+            connection_options.setdefault(option, value)
+        return connection_options
+
     def _connect_and_respond(self, request_context: RequestContext, params: ConnectRequestParams) -> None:
-        """Open a connection and fire the connection complete notification"""
+        """
+        Open a connection and fire the connection complete notification. The connections that the owner URI goes on
+        to use are opened at the same time, so that their handshakes overlap instead of adding up
+        """
+        for connection_type in self._get_concurrent_connection_types(params.type):
+            thread = threading.Thread(
+                target=self._connect,
+                args=(ConnectRequestParams(params.connection, params.owner_uri, connection_type), False)
+            )
+            thread.daemon = True
+            thread.start()
+
         response = self.connect(params)
 
         # Send the connection complete response unless the connection was canceled
@@ -273,13 +362,43 @@ class ConnectionService:
             for callback in self._on_connect_callbacks:
                 callback(info)
 
-    @staticmethod
-    def _close_connections(connection_info: ConnectionInfo, connection_type=None):
+    def _get_concurrent_connection_types(self, connection_type: ConnectionType) -> List[ConnectionType]:
+        """
+        Gets the types of the connections opened along with a connection of the given type. Other services open their
+        connections once they first need them, often on owner URIs of their own, so only the query connection that the
+        editor's first query runs on may be opened ahead of its first use. It is not by default, since owner URIs that
+        never run a query would hold a server connection for nothing
         """
-        Close the connections in the given ConnectionInfo object matching the passed type, or
-        close all of them if no type is given.
+        try:
+            # Look up workspace config in a try block in case it's not defined / set
+            pool_options = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.connection_pool
+            open_query_connection = pool_options.open_query_connection_on_connect
+        except (AttributeError, KeyError):
+            open_query_connection = False
+        return [ConnectionType.QUERY] if open_query_connection and connection_type == ConnectionType.DEFAULT else []
+
+    def _update_pool_options(self) -> None:
+        """Applies the workspace configuration of the connection pool"""
+        try:
+            # Look up workspace config in a try block in case it's not defined / set
+            pool_options = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.connection_pool
+        except (AttributeError, KeyError):
+            # Indicates the config isn't defined. We are OK with this as the pool has defaults
+            return
 
-        Return False if no matching connections were found to close, otherwise return True.
+        self._pool.min_idle_connections = pool_options.min_idle_connections
+        self._pool.max_connections = pool_options.max_connections
+        self._pool.max_server_connections = pool_options.max_server_connections
+        self._pool.idle_timeout_seconds = pool_options.idle_timeout_seconds
+        self._pool.wait_timeout_seconds = pool_options.wait_timeout_seconds
+        self._supervisor.interval_seconds = pool_options.health_check_interval_seconds
+
+    def _close_connections(self, connection_info: ConnectionInfo, connection_type=None):
+        """
+        Release the connections in the given ConnectionInfo object matching the passed type, or
+        release all of them if no type is given. Released connections are closed or kept by the pool to be reused.
+
+        Return False if no matching connections were found to release, otherwise return True.
         """
         connections_to_close = []
         if connection_type is None:
@@ -294,16 +413,13 @@ class ConnectionService:
             connections_to_close.append(connection)
             connection_info.remove_connection(connection_type)
         for connection in connections_to_close:
-            try:
-                connection.close()
-            except Exception:
-                # Ignore errors when disconnecting
-                pass
+            self._pool.release(connection)
         return True
 
 
-def _build_connection_response(connection_info: ConnectionInfo, connection_type: ConnectionType) -> ConnectionCompleteParams:
-    """Build a connection complete response object"""
+def _build_connection_response(connection_info: ConnectionInfo, connection_type: ConnectionType,
+                               timings: Optional[ConnectionTimings] = None) -> ConnectionCompleteParams:
+    """Build a connection complete response object, with the timings of opening the connection if it was just opened"""
     connection = connection_info.get_connection(connection_type)
     dsn_parameters = connection.get_dsn_parameters()
 
@@ -318,6 +434,7 @@ def _build_connection_response(connection_info: ConnectionInfo, connection_type:
     response.owner_uri = connection_info.owner_uri
     response.type = connection_type
     response.server_info = _get_server_info(connection)
+    response.timings = timings
 
     return response
 
@@ -342,6 +459,10 @@ def _get_server_info(connection):
     return ServerInfo(server_version, is_cloud)
 
 
+def _get_milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
 def _execute_query(connection, query):
     """
     Execute a simple query without arguments for the given connection
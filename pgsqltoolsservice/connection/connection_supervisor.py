@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Supervises the health of the connections held by the connection service, so that connections lost to a server
+restart, a failover or an idle timeout of the network are replaced before they are used instead of failing
+"""
+
+import threading
+from typing import Dict  # noqa
+
+import psycopg2
+import psycopg2.extensions
+
+from pgsqltoolsservice.connection.connection_pool import ConnectionPool
+from pgsqltoolsservice.utils.cancellation import get_statement_lock
+
+
+# TCP keepalive parameters of libpq that connections are opened with unless their options say otherwise. Dead peers
+# are detected after 30 seconds of idleness and 3 unanswered probes 10 seconds apart, including while waiting for
+# the results of a query, so that a dead socket fails within about a minute instead of hanging
+KEEPALIVE_OPTIONS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
+VALIDATION_QUERY = 'SELECT 1'
+
+_TRANSACTION_STATUSES = frozenset([psycopg2.extensions.TRANSACTION_STATUS_INTRANS, psycopg2.extensions.TRANSACTION_STATUS_INERROR])
+
+
+class ConnectionSupervisor:
+    """
+    Checks the connections of a connection service on a background thread. Connections that are not in use are
+    validated with a query that costs a round trip, and those found to be dead are replaced with new connections.
+    A connection that dies in a transaction is left for its next use to fail, so that the loss of the transaction
+    is reported, and is replaced by the following check
+    """
+
+    def __init__(self, connection_service, pool: ConnectionPool, interval_seconds: float = 60, logger=None) -> None:
+        """
+        :param connection_service: Connection service whose connections are checked
+        :param pool: Pool whose connections that have been idle for too long are closed by each check
+        :param interval_seconds: Time between checks, 0 to not check connections
+        """
+        self.interval_seconds = interval_seconds
+        self._connection_service = connection_service
+        self._pool = pool
+        self.logger = logger
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread = None
+        # Transaction status of each connection at the last check, keyed by the ID of the connection
+        self._last_statuses: Dict[int, int] = {}
+
+    # METHODS ##############################################################
+    def start(self) -> None:
+        """Starts checking the connections on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._supervise, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops checking the connections"""
+        self._stop_event.set()
+
+    def check_connections(self) -> int:
+        """
+        Validates the connections of every owner URI and replaces the dead ones
+        :returns: The number of connections replaced
+        """
+        self._pool.close_idle_connections()
+
+        statuses: Dict[int, int] = {}
+        replaced_count = 0
+        for connection_info in list(self._connection_service.owner_to_connection_map.values()):
+            for connection_type in connection_info.get_all_connection_types():
+                connection = connection_info.get_connection(connection_type)
+                if connection is None:
+                    continue
+
+                # Shared connections are held by several owner URIs, and are validated once
+                status = statuses.get(id(connection))
+                if status is None:
+                    status = statuses[id(connection)] = _validate_connection(connection)
+                if status != psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    continue
+
+                if self._last_statuses.get(id(connection)) in _TRANSACTION_STATUSES:
+                    continue
+                if self._connection_service.reconnect(connection_info.owner_uri, connection_type, connection):
+                    replaced_count += 1
+
+        self._last_statuses = statuses
+        return replaced_count
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _supervise(self) -> None:
+        # Checks are skipped while they are disabled, in case they are enabled again
+        while not self._stop_event.wait(self.interval_seconds if self.interval_seconds > 0 else 1):
+            if self.interval_seconds <= 0:
+                continue
+            try:
+                self.check_connections()
+            except Exception:
+                if self.logger is not None:
+                    self.logger.exception('Error while checking the health of connections')
+
+
+def _validate_connection(connection) -> int:
+    """
+    Returns the transaction status of a connection, validating it with a query if it is idle. Connections running
+    a query, in a transaction or holding the statement lock of a request are not validated, as they are in use, and
+    may be between the fetches of a cursor held open on the server. The status is unknown if the connection is dead
+    """
+    if connection.closed:
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+
+    statement_lock = get_statement_lock(connection)
+    if not statement_lock.acquire(blocking=False):
+        return psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+    try:
+        status = connection.get_transaction_status()
+        if status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(VALIDATION_QUERY)
+            finally:
+                cursor.close()
+        return status
+    except psycopg2.extensions.QueryCanceledError:
+        # A cancel meant for a statement of a request leaves the connection usable
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN if connection.closed else psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # Only errors of the connection itself mean that it is dead
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+    except psycopg2.Error:
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN if connection.closed else psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+    finally:
+        statement_lock.release()
@@ -11,8 +11,10 @@ from pgsqltoolsservice.connection.contracts.disconnect_request import DISCONNECT
 from pgsqltoolsservice.connection.contracts.connection_complete_notification import (
     CONNECTION_COMPLETE_METHOD,
     ConnectionCompleteParams,
+    ConnectionTimings,
     ServerInfo
 )
+from pgsqltoolsservice.connection.contracts.connection_changed_notification import CONNECTION_CHANGED_METHOD, ConnectionChangedParams
 from pgsqltoolsservice.connection.contracts.common import (
     ConnectionDetails, ConnectionSummary, ConnectionType
 )
@@ -29,7 +31,8 @@ __all__ = [
     'CONNECT_REQUEST', 'ConnectRequestParams',
     'CHANGE_DATABASE_REQUEST', 'ChangeDatabaseRequestParams',
     'DISCONNECT_REQUEST', 'DisconnectRequestParams',
-    'CONNECTION_COMPLETE_METHOD', 'ConnectionCompleteParams',
+    'CONNECTION_COMPLETE_METHOD', 'ConnectionCompleteParams', 'ConnectionTimings',
+    'CONNECTION_CHANGED_METHOD', 'ConnectionChangedParams',
     'ConnectionDetails', 'ConnectionSummary', 'ConnectionType', 'ServerInfo',
     'GET_CONNECTION_STRING_REQUEST', 'GetConnectionStringParams',
     'LIST_DATABASES_REQUEST', 'ListDatabasesParams', 'ListDatabasesResponse'
@@ -68,10 +68,14 @@ class ConnectionType(enum.Enum):
 
     Default: Connection used by the editor. Opened by the editor upon the initial connection.
     Query: Connection used for executing queries. Opened when the first query is executed.
+    Export: Connection used for exporting query results with COPY. Opened when the first export is requested.
+    Explain: Connection used for running statements with EXPLAIN ANALYZE. Opened when the first execution plan is requested.
     """
     DEFAULT = 'Default'
     QUERY = 'Query'
     EDIT = 'Edit'
     QUERY_CANCEL = 'QueryCancel'
+    EXPORT = 'Export'
+    EXPLAIN = 'Explain'
     OBJECT_EXLPORER = 'ObjectExplorer'
     INTELLISENSE = 'Intellisense'
@@ -0,0 +1,18 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from pgsqltoolsservice.connection.contracts.common import ConnectionSummary, ConnectionType     # noqa
+
+
+class ConnectionChangedParams:
+    """Parameters of the notification sent when a connection of an owner URI has been replaced by a new connection"""
+
+    def __init__(self, owner_uri: str, connection_type: ConnectionType, connection: ConnectionSummary):
+        self.owner_uri: str = owner_uri
+        self.type: ConnectionType = connection_type
+        self.connection: ConnectionSummary = connection
+
+
+CONNECTION_CHANGED_METHOD = 'connection/connectionchanged'
@@ -3,6 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from typing import Optional  # noqa
+
 from pgsqltoolsservice.connection.contracts.common import ConnectionSummary, ConnectionType     # noqa
 
 
@@ -18,6 +20,7 @@ class ConnectionCompleteParams:
         self.server_info: ServerInfo = None
         self.connection_summary: ConnectionSummary = None
         self.type: ConnectionType = ConnectionType.DEFAULT
+        self.timings: ConnectionTimings = None
 
 
 class ServerInfo(object):
@@ -28,4 +31,15 @@ class ServerInfo(object):
         self.is_cloud: bool = is_cloud
 
 
+class ConnectionTimings(object):
+    """
+    Contract for the time taken to open a connection, in milliseconds. The handshake covers the name lookup, TCP
+    connection, TLS negotiation and authentication done by libpq, and is None when an open connection was reused
+    """
+
+    def __init__(self, handshake_ms: Optional[float], total_ms: float):
+        self.handshake_ms: Optional[float] = handshake_ms
+        self.total_ms: float = total_ms
+
+
 CONNECTION_COMPLETE_METHOD = 'connection/complete'
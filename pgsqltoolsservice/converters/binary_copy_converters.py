@@ -0,0 +1,170 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Converters of values in the binary format of COPY ... TO STDOUT (FORMAT binary), which is the binary
+send format of each type. Each converter returns the value the converters of bytes_to_any_converters
+return for the same value read through a cursor, so that rows look the same whichever way they were stored
+"""
+
+import datetime
+import decimal
+import json
+import struct
+from typing import Any, Callable  # noqa
+import uuid
+
+from pgsqltoolsservice.converters.bytes_to_any_converters import convert_bytes_to_memoryview
+from pgsqltoolsservice.parsers import datatypes
+
+# Dates and timestamps are sent as days and microseconds since the PostgreSQL epoch, with the largest and
+# smallest values of their integer types standing for infinity and -infinity
+_POSTGRES_EPOCH_DATE = datetime.date(2000, 1, 1)
+_POSTGRES_EPOCH_DATETIME = datetime.datetime(2000, 1, 1)
+_INT32_INFINITY = 0x7FFFFFFF
+_INT64_INFINITY = 0x7FFFFFFFFFFFFFFF
+
+_NUMERIC_HEADER = struct.Struct('>hhHH')
+_NUMERIC_NEGATIVE = 0x4000
+_NUMERIC_SPECIAL_VALUES = {0xC000: 'NaN', 0xD000: 'Infinity', 0xF000: '-Infinity'}
+_NUMERIC_DIGIT_BASE = 10000
+
+_FLOAT4_STRUCT = struct.Struct('>f')
+_INT32_STRUCT = struct.Struct('>i')
+_INT64_STRUCT = struct.Struct('>q')
+
+_MICROSECONDS_PER_DAY = 24 * 60 * 60 * 1000000
+
+
+def convert_binary_to_float(value) -> float:
+    """
+    Returns the shortest decimal that reads back as the same single precision value, which is how the
+    server formats real values as text
+    """
+    single = _FLOAT4_STRUCT.unpack(value)[0]
+    for precision in range(1, 10):
+        shortest = float('%.*g' % (precision, single))
+        try:
+            if _FLOAT4_STRUCT.pack(shortest) == value:
+                return shortest
+        except OverflowError:
+            # Rounded beyond the largest single precision value
+            continue
+    return single
+
+
+def convert_binary_to_decimal(value) -> str:
+    """
+    Numeric values are sent as base 10000 digits, with the weight of the first digit and the number of
+    decimal digits after the point
+    """
+    digit_count, weight, sign, scale = _NUMERIC_HEADER.unpack_from(value)
+    if sign in _NUMERIC_SPECIAL_VALUES:
+        return _NUMERIC_SPECIAL_VALUES[sign]
+
+    coefficient = 0
+    for digit in struct.unpack_from('>%dH' % digit_count, value, _NUMERIC_HEADER.size):
+        coefficient = coefficient * _NUMERIC_DIGIT_BASE + digit
+
+    # The digits stand for coefficient * 10 ** exponent, which is rescaled to the number of decimal digits
+    exponent = 4 * (weight - digit_count + 1)
+    if exponent + scale >= 0:
+        coefficient *= 10 ** (exponent + scale)
+    else:
+        coefficient //= 10 ** -(exponent + scale)
+
+    digits = str(coefficient)
+    sign_text = '-' if sign == _NUMERIC_NEGATIVE else ''
+    if scale == 0:
+        return sign_text + digits
+    if len(digits) - 1 - scale < -6:
+        # Small values are formatted with an exponent by Decimal
+        return str(decimal.Decimal((1 if sign_text else 0, tuple(map(int, digits)), -scale)))
+
+    digits = digits.rjust(scale + 1, '0')
+    return sign_text + digits[:-scale] + '.' + digits[-scale:]
+
+
+def convert_binary_to_date(value) -> str:
+    days = _INT32_STRUCT.unpack(value)[0]
+    if days == _INT32_INFINITY:
+        return datetime.date.max.isoformat()
+    if days == -_INT32_INFINITY - 1:
+        return datetime.date.min.isoformat()
+    return (_POSTGRES_EPOCH_DATE + datetime.timedelta(days=days)).isoformat()
+
+
+def convert_binary_to_time(value) -> str:
+    microseconds = _INT64_STRUCT.unpack(value)[0] % _MICROSECONDS_PER_DAY
+    seconds, microsecond = divmod(microseconds, 1000000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return datetime.time(hour, minute, second, microsecond).isoformat()
+
+
+def convert_binary_to_datetime(value) -> str:
+    microseconds = _INT64_STRUCT.unpack(value)[0]
+    if microseconds == _INT64_INFINITY:
+        return datetime.datetime.max.isoformat()
+    if microseconds == -_INT64_INFINITY - 1:
+        return datetime.datetime.min.isoformat()
+    return (_POSTGRES_EPOCH_DATETIME + datetime.timedelta(microseconds=microseconds)).isoformat()
+
+
+def convert_binary_to_uuid(value) -> str:
+    return str(uuid.UUID(bytes=bytes(value)))
+
+
+def convert_binary_to_dict(value) -> dict:
+    return json.loads(value.decode())
+
+
+def convert_binary_to_jsonb_dict(value) -> dict:
+    """ The text of a jsonb value follows a byte with the version of the format """
+    return json.loads(value[1:].decode())
+
+
+# Struct format of each type of a fixed width in the binary format, in network byte order. Adjacent values of
+# these types can be unpacked together
+BINARY_COPY_STRUCT_FORMAT_MAP = {
+    datatypes.DATATYPE_BOOL: '?',
+    datatypes.DATATYPE_DOUBLE: 'd',
+    datatypes.DATATYPE_SMALLINT: 'h',
+    datatypes.DATATYPE_INTEGER: 'i',
+    datatypes.DATATYPE_BIGINT: 'q',
+    datatypes.DATATYPE_OID: 'I'
+}
+
+
+def _create_struct_converter(struct_format: str) -> Callable[[bytes], Any]:
+    unpack = struct.Struct('>' + struct_format).unpack
+    return lambda value: unpack(value)[0]
+
+
+BINARY_COPY_READER_MAP = {
+    datatypes.DATATYPE_REAL: convert_binary_to_float,
+    datatypes.DATATYPE_NUMERIC: convert_binary_to_decimal,
+    datatypes.DATATYPE_CHAR: bytes.decode,
+    datatypes.DATATYPE_VARCHAR: bytes.decode,
+    datatypes.DATATYPE_BPCHAR: bytes.decode,
+    datatypes.DATATYPE_TEXT: bytes.decode,
+    datatypes.DATATYPE_NAME: bytes.decode,
+    datatypes.DATATYPE_XML: bytes.decode,
+    datatypes.DATATYPE_BYTEA: convert_bytes_to_memoryview,
+    datatypes.DATATYPE_DATE: convert_binary_to_date,
+    datatypes.DATATYPE_TIME: convert_binary_to_time,
+    datatypes.DATATYPE_TIMESTAMP: convert_binary_to_datetime,
+    datatypes.DATATYPE_UUID: convert_binary_to_uuid,
+    datatypes.DATATYPE_JSON: convert_binary_to_dict,
+    datatypes.DATATYPE_JSONB: convert_binary_to_jsonb_dict
+}
+BINARY_COPY_READER_MAP.update(
+    (data_type, _create_struct_converter(struct_format)) for data_type, struct_format in BINARY_COPY_STRUCT_FORMAT_MAP.items()
+)
+
+
+def get_binary_copy_converter(data_type: str) -> Callable[[bytes], Any]:
+    """ Returns the converter of values of a type in the binary format, None if the type is not supported """
+    return BINARY_COPY_READER_MAP.get(data_type)
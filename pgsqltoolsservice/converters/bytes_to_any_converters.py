@@ -130,6 +130,34 @@ DATATYPE_READER_MAP = {
     datatypes.DATATYPE_BYTEA: convert_bytes_to_memoryview
 }
 
+# Struct format of each type written with a fixed width, so that the values of adjacent columns of these
+# types can be unpacked together
+DATATYPE_STRUCT_FORMAT_MAP = {
+    datatypes.DATATYPE_BOOL: '?',
+    datatypes.DATATYPE_REAL: 'd',
+    datatypes.DATATYPE_DOUBLE: 'd',
+    datatypes.DATATYPE_SMALLINT: 'h',
+    datatypes.DATATYPE_INTEGER: 'i',
+    datatypes.DATATYPE_BIGINT: 'q',
+    datatypes.DATATYPE_OID: 'i'
+}
+
+# Converters that return the text the value was written as
+TEXT_CONVERTERS = frozenset([
+    convert_bytes_to_str,
+    convert_bytes_to_decimal,
+    convert_bytes_to_date,
+    convert_bytes_to_time,
+    convert_bytes_to_time_with_timezone,
+    convert_bytes_to_datetime,
+    convert_bytes_to_timedelta,
+    convert_bytes_to_uuid,
+    convert_bytes_to_numericrange_format_str,
+    convert_bytes_to_datetimerange_format_str,
+    convert_bytes_to_datetimetzrange_format_str,
+    convert_bytes_to_daterange_format_str
+])
+
 
 def get_bytes_to_any_converter(type_value: str) -> Callable[[bytes], Any]:
     """ This method gets the converter based on data type.
@@ -18,7 +18,7 @@ from pgsqltoolsservice.edit_data import DataEditorSession, SmoEditTableMetadataF
 from pgsqltoolsservice.utils import constants
 from pgsqltoolsservice.connection.contracts import ConnectionType
 from pgsqltoolsservice.query.contracts import DbColumn
-from pgsqltoolsservice.query import ResultSetStorageType
+from pgsqltoolsservice.query import ExecutionState, ResultSetStorageType
 from pgsqltoolsservice.query_execution.contracts import (
     ExecuteStringParams, QUERY_COMPLETE_NOTIFICATION, QueryCompleteNotificationParams, ResultSetNotificationParams,
     RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION
@@ -85,7 +85,9 @@ class EditDataService(object):
         def on_failure(error: str):
             request_context.send_notification(SESSION_READY_NOTIFICATION, SessionReadyNotificationParams(params.owner_uri, False, error))
 
-        session.initialize(params, connection, query_executer, on_success, on_failure)
+        # The metadata of the table is loaded while the request runs, and is canceled along with the request
+        with request_context.cancellation_token.canceling_statements(connection):
+            session.initialize(params, connection, query_executer, on_success, on_failure)
         request_context.send_response({})
 
     def _edit_subset(self, request_context: RequestContext, params: EditSubsetParams) -> None:
@@ -144,6 +146,11 @@ class EditDataService(object):
         except KeyError:
             request_context.send_error('Edit data session not found')
 
+        # Cancel the load of the rows if the session is disposed of before they are loaded
+        query = self._query_execution_service.query_results.get(params.owner_uri)
+        if query is not None and query.execution_state is not ExecutionState.EXECUTED:
+            self._query_execution_service.cancel_query(params.owner_uri)
+
         request_context.send_response(DisposeResponse())
 
     def _handle_session_request(self, session_operation_request: SessionOperationRequest,
@@ -9,9 +9,9 @@ from pgsqltoolsservice.hosting.json_rpc_server import (
     IncomingMessageConfiguration,
     RequestContext
 )
-from pgsqltoolsservice.hosting.service_provider import ServiceProvider
+from pgsqltoolsservice.hosting.service_provider import LazyService, ServiceProvider
 
 __all__ = [
     'JSONRPCServer', 'NotificationContext', 'IncomingMessageConfiguration', 'RequestContext',
-    'ServiceProvider'
+    'LazyService', 'ServiceProvider'
 ]
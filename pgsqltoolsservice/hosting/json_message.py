@@ -124,25 +124,44 @@ class JSONRPCMessage:
 
     @property
     def dictionary(self):
+        return self._build_message(utils.serialization.convert_to_dict)
+
+    # METHODS ##############################################################
+    def to_json(self) -> str:
+        """
+        Serializes the message to its JSON wire representation in a single pass. The result is
+        identical to json.dumps(self.dictionary, sort_keys=True) without building the intermediate
+        dictionaries
+        :return: JSON string for the message
+        """
+        return utils.serialization.convert_to_json(self._build_message(lambda payload: payload))
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _build_message(self, convert):
+        """
+        Builds the JSON RPC envelope for the message
+        :param convert: Function to apply to the params, result or error payload of the message
+        :return: Dictionary of the message envelope
+        """
         message_base = {'jsonrpc': '2.0'}
 
         if self._message_type is JSONRPCMessageType.Request:
             message_base['method'] = self._message_method
-            message_base['params'] = utils.serialization.convert_to_dict(self._message_params)
+            message_base['params'] = convert(self._message_params)
             message_base['id'] = self._message_id
             return message_base
 
         if self._message_type is JSONRPCMessageType.ResponseSuccess:
-            message_base['result'] = utils.serialization.convert_to_dict(self._message_result)
+            message_base['result'] = convert(self._message_result)
             message_base['id'] = self._message_id
             return message_base
 
         if self._message_type is JSONRPCMessageType.Notification:
             message_base['method'] = self._message_method
-            message_base['params'] = utils.serialization.convert_to_dict(self._message_params)
+            message_base['params'] = convert(self._message_params)
             return message_base
 
         if self._message_type is JSONRPCMessageType.ResponseError:
-            message_base['error'] = utils.serialization.convert_to_dict(self._message_error)
+            message_base['error'] = convert(self._message_error)
             message_base['id'] = self._message_id
             return message_base
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import codecs
 from enum import Enum
 import json
 
@@ -15,8 +16,7 @@ class JSONRPCReader:
     """
 
     # CONSTANTS ############################################################
-    CR = 13
-    LF = 10
+    HEADER_TERMINATOR = b'\r\n\r\n'
     BUFFER_RESIZE_TRIGGER = 0.25
     DEFAULT_BUFFER_SIZE = 8192
 
@@ -35,6 +35,8 @@ class JSONRPCReader:
         self.stream = stream
         self.encoding = encoding or 'UTF-8'
         self._logger = logger
+        # json.loads decodes UTF-8 content itself, other encodings are decoded before it is parsed
+        self._is_utf8 = codecs.lookup(self.encoding).name == 'utf-8'
 
         self._buffer = bytearray(self.DEFAULT_BUFFER_SIZE)
         # Pointer to end of buffer content
@@ -99,8 +101,13 @@ class JSONRPCReader:
                 self._logger.warn('JSON RPC reader on read_message() encountered exception: {}'.format(ve))
             raise
         finally:
-            # Remove the bytes that have been read
-            self._trim_buffer_and_resize(self._read_offset)
+            self._headers.clear()
+            if self._read_offset == self._buffer_end_offset or len(self._buffer) != self.DEFAULT_BUFFER_SIZE:
+                # Either everything has been read, which makes trimming free, or the buffer was resized for a
+                # large message and should go back to the default size
+                self._trim_buffer_and_resize(self._read_offset)
+            # Otherwise the next message is already partially buffered. It is left in place until more room
+            # is needed, so a chunk holding many small messages is not shifted once per message
 
     # IMPLEMENTATION DETAILS ###############################################
 
@@ -111,17 +118,19 @@ class JSONRPCReader:
         :raises ValueError: Stream was closed externally
         :return: True on successful read of a message chunk
         """
-        # Check if we need to resize the buffer
+        # Check if we need to make room in the buffer, first by moving the unread bytes to the front
+        # and then by growing it
         current_buffer_size = len(self._buffer)
         if (current_buffer_size - self._buffer_end_offset) / current_buffer_size < self.BUFFER_RESIZE_TRIGGER:
-            # Resize the buffer, copy the old contents, and point to the new buffer
-            resized_buffer = bytearray(current_buffer_size * 2)
-            resized_buffer[0:current_buffer_size] = self._buffer
-            self._buffer = resized_buffer
+            if self._read_offset > 0:
+                self._compact_buffer()
+            if (current_buffer_size - self._buffer_end_offset) / current_buffer_size < self.BUFFER_RESIZE_TRIGGER:
+                self._buffer.extend(bytes(current_buffer_size))
 
         # Memory view is required in order to read into a subset of a byte array
         try:
-            length_read = self.stream.readinto(memoryview(self._buffer)[self._buffer_end_offset:])
+            with memoryview(self._buffer) as view:
+                length_read = self.stream.readinto(view[self._buffer_end_offset:])
 
             if not length_read:
                 if self._logger is not None:
@@ -145,18 +154,11 @@ class JSONRPCReader:
         :raises KeyError: The header block was malformed by not having a key:value format
         :return: True on successful read of headers, False on failure to find headers
         """
-        # Scan the buffer up until right before the \r\n\r\n
-        scan_offset = self._read_offset
-        while scan_offset + 3 < self._buffer_end_offset and (
-            self._buffer[scan_offset] != self.CR or
-            self._buffer[scan_offset + 1] != self.LF or
-            self._buffer[scan_offset + 2] != self.CR or
-            self._buffer[scan_offset + 3] != self.LF
-        ):
-            scan_offset += 1
-
-        # If we reached the end of the buffer and haven't found the control sequence, we haven't found the headers
-        if scan_offset + 3 >= self._buffer_end_offset:
+        # Find the \r\n\r\n that ends the header block
+        scan_offset = self._buffer.find(self.HEADER_TERMINATOR, self._read_offset, self._buffer_end_offset)
+
+        # If we haven't found the control sequence, we haven't found the headers
+        if scan_offset == -1:
             return False
 
         # Split the headers by newline
@@ -209,36 +211,51 @@ class JSONRPCReader:
             # We buffered less than the expected content length
             return False
 
-        content[0] = self._buffer[self._read_offset:self._read_offset + self._expected_content_length]\
-            .decode(self.encoding)
+        # Copy the content straight out of the buffer, slicing the bytearray would copy it twice. UTF-8 content is
+        # handed to json.loads as bytes, without being decoded to a string first
+        with memoryview(self._buffer) as view:
+            content_bytes = bytes(view[self._read_offset:self._read_offset + self._expected_content_length])
+        content[0] = content_bytes if self._is_utf8 else str(content_bytes, self.encoding)
         self._read_offset += self._expected_content_length
 
         self._read_state = self.ReadState.Header
 
         return True
 
+    def _compact_buffer(self):
+        """
+        Move the bytes that have not been read yet to the start of the buffer, in place
+        """
+        remaining = self._buffer_end_offset - self._read_offset
+        if remaining > 0:
+            with memoryview(self._buffer) as view:
+                view[:remaining] = view[self._read_offset:self._buffer_end_offset]
+        self._read_offset = 0
+        self._buffer_end_offset = remaining
+
     def _trim_buffer_and_resize(self, bytes_to_remove):
         """
-        Trim the buffer by the passed in bytes_to_remove by creating a new buffer that is at a minimum the
-        default max size
+        Trim the buffer by the passed in bytes_to_remove. The buffer is reused unless it has been resized,
+        in which case it is replaced by a buffer that is at a minimum the default size
         :param bytes_to_remove: Number of bytes to remove from the current buffer
         """
         current_buffer_size = len(self._buffer)
-
-        # Create a new buffer with either minimum size of leftover size
-        new_buffer = bytearray(max(current_buffer_size - bytes_to_remove, self.DEFAULT_BUFFER_SIZE))
-
-        # If we have content we did not read, copy that portion to the new buffer
-        if bytes_to_remove <= current_buffer_size:
-            new_buffer[:self._buffer_end_offset - bytes_to_remove] = \
-                self._buffer[bytes_to_remove:self._buffer_end_offset]
-
-        # Point to the new buffer
-        self._buffer = new_buffer
-
-        # Reset pointers after the shift
-        self._read_offset = 0
-        self._buffer_end_offset -= bytes_to_remove
+        bytes_to_remove = min(bytes_to_remove, self._buffer_end_offset)
+        remaining = self._buffer_end_offset - bytes_to_remove
+
+        if current_buffer_size == self.DEFAULT_BUFFER_SIZE or remaining > self.DEFAULT_BUFFER_SIZE:
+            # Shift the content we did not read to the front of the existing buffer
+            self._read_offset = bytes_to_remove
+            self._compact_buffer()
+        else:
+            # Create a new buffer of the default size and copy the content we did not read to it
+            new_buffer = bytearray(self.DEFAULT_BUFFER_SIZE)
+            new_buffer[:remaining] = self._buffer[bytes_to_remove:self._buffer_end_offset]
+
+            # Point to the new buffer and reset pointers after the shift
+            self._buffer = new_buffer
+            self._read_offset = 0
+            self._buffer_end_offset = remaining
 
         # Reset the headers
-        self._headers = {}
+        self._headers.clear()
@@ -3,13 +3,17 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from queue import Queue
+from queue import Empty
 import threading
+import time
 import uuid
 
 from pgsqltoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
 from pgsqltoolsservice.hosting.json_reader import JSONRPCReader
 from pgsqltoolsservice.hosting.json_writer import JSONRPCWriter
+from pgsqltoolsservice.hosting.message_dispatcher import MessageDispatcher
+from pgsqltoolsservice.hosting.output_queue import OutputQueue
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 
 
 class JSONRPCServer:
@@ -20,18 +24,39 @@ class JSONRPCServer:
     OUTPUT_THREAD_NAME = u"JSON_RPC_Output_Thread"
     INPUT_THREAD_NAME = u"JSON_RPC_Input_Thread"
 
+    # Ordering key for messages that change state shared by every document
+    WORKSPACE_ORDERING_KEY = u"workspace"
+    WORKSPACE_METHODS = frozenset(['workspace/didChangeConfiguration'])
+
+    # Request cancellation, as defined by the language server protocol
+    CANCEL_REQUEST_METHOD = u"$/cancelRequest"
+    REQUEST_CANCELLED_ERROR_CODE = -32800
+
     class Handler:
         def __init__(self, class_, handler):
             self.class_ = class_
             self.handler = handler
 
-    def __init__(self, in_stream, out_stream, logger=None, version='0'):
+    # Defaults for coalescing queued output into a single write
+    DEFAULT_MAX_FLUSH_SIZE = 64 * 1024
+    DEFAULT_MAX_FLUSH_LATENCY = 0
+
+    def __init__(self, in_stream, out_stream, logger=None, version='0', max_dispatch_workers=None, max_pending_dispatch=None,
+                 max_flush_size=None, max_flush_latency=None, max_output_queue_bytes=None):
         """
         Initializes internal state of the server and sets up a few useful built-in request handlers
         :param in_stream: Input stream that will provide messages from the client
         :param out_stream: Output stream that will send message to the client
         :param logger: Optional logger
         :param version: Protocol version. Defaults to 0
+        :param max_dispatch_workers: Optional maximum number of message handlers to run at once
+        :param max_pending_dispatch: Optional maximum number of received messages waiting on a handler
+        :param max_flush_size: Optional number of bytes of queued output after which it is written without
+        waiting for more messages
+        :param max_flush_latency: Optional number of seconds to wait for more output before writing what is
+        queued. Defaults to 0, which writes everything that is already queued without waiting
+        :param max_output_queue_bytes: Optional size of queued output after which sending notifications and
+        requests blocks until the client has read some of it
         """
         self.writer = JSONRPCWriter(out_stream, logger=logger)
         self.reader = JSONRPCReader(in_stream, logger=logger)
@@ -39,7 +64,14 @@ class JSONRPCServer:
         self._version = version
         self._stop_requested = False
 
-        self._output_queue = Queue()
+        self._output_queue = OutputQueue(max_output_queue_bytes, self.writer.frame_message)
+        self._max_flush_size = max_flush_size or self.DEFAULT_MAX_FLUSH_SIZE
+        self._max_flush_latency = max_flush_latency or self.DEFAULT_MAX_FLUSH_LATENCY
+        self._dispatcher = MessageDispatcher(max_dispatch_workers, max_pending_dispatch, logger)
+
+        # Cancellation tokens of the requests that have been received but not responded to, by request ID
+        self._in_flight_requests = {}
+        self._in_flight_lock = threading.Lock()
 
         self._request_handlers = {}
         self._notification_handlers = {}
@@ -63,6 +95,17 @@ class JSONRPCServer:
         exit_config = IncomingMessageConfiguration('exit', None)
         self.set_request_handler(exit_config, self._handle_shutdown_request)
 
+        # 4) Request cancellation
+        cancel_config = IncomingMessageConfiguration(self.CANCEL_REQUEST_METHOD, None)
+        self.set_notification_handler(cancel_config, self._handle_cancel_request)
+
+    # PROPERTIES #########################################################
+
+    @property
+    def dispatch_statistics(self) -> dict:
+        """Queue depth and per-method wait and handler latency counters of the message dispatcher"""
+        return self._dispatcher.statistics
+
     # METHODS ##############################################################
 
     def add_shutdown_handler(self, handler):
@@ -86,6 +129,8 @@ class JSONRPCServer:
         if self._logger is not None:
             self._logger.info("JSON RPC server starting...")
 
+        self._dispatcher.start()
+
         self._output_consumer = threading.Thread(
             target=self._consume_output,
             name=self.OUTPUT_THREAD_NAME
@@ -106,8 +151,11 @@ class JSONRPCServer:
         """
         self._stop_requested = True
 
-        # Enqueue None to optimistically unblock output thread so it can check for the cancellation flag
+        # Release producers waiting for room in the output queue, and enqueue None to optimistically
+        # unblock output thread so it can check for the cancellation flag
+        self._output_queue.close()
         self._output_queue.put(None)
+        self._dispatcher.stop()
 
         if self._logger is not None:
             self._logger.info('JSON RPC server stopping...')
@@ -129,7 +177,7 @@ class JSONRPCServer:
 
     def send_notification(self, method, params):
         """
-        Sends a notification, independent of any request
+        Sends a notification, independent of any request. Blocks while the output queue is full
         :param method: String name of the method for the notification
         :param params: Data to send with the notification
         """
@@ -156,6 +204,22 @@ class JSONRPCServer:
         """
         self._notification_handlers[config.method] = self.Handler(config.parameter_class, handler)
 
+    def get_request_handler(self, method):
+        """
+        Gets the handler that is set for a request method
+        :param method: Method of the request
+        :return: The handler, with the class the parameters are deserialized into, or None if there is no handler
+        """
+        return self._request_handlers.get(method)
+
+    def get_notification_handler(self, method):
+        """
+        Gets the handler that is set for a notification method
+        :param method: Method of the notification
+        :return: The handler, with the class the parameters are deserialized into, or None if there is no handler
+        """
+        return self._notification_handlers.get(method)
+
     def wait_for_exit(self):
         """
         Blocks until both input and output threads return, ie, until the server stops.
@@ -191,6 +255,24 @@ class JSONRPCServer:
 
         self.stop()
 
+    def _handle_cancel_request(self, notification_context, params):
+        request_id = params.get('id') if isinstance(params, dict) else None
+        with self._in_flight_lock:
+            cancellation_token = self._in_flight_requests.pop(request_id, None)
+        if cancellation_token is None:
+            # The request has already been responded to, or was never received
+            return
+
+        if self._logger is not None:
+            self._logger.info('Canceling request id=%s', request_id)
+        cancellation_token.cancel()
+
+        # Respond on behalf of the handler, anything it sends from now on is dropped by its request context.
+        # A response that was being sent at the same moment may still go out, the client ignores whichever
+        # response arrives second
+        message = JSONRPCMessage.create_error(request_id, self.REQUEST_CANCELLED_ERROR_CODE, 'Request canceled', None)
+        self._output_queue.put(message)
+
     # IMPLEMENTATION DETAILS ###############################################
 
     def _consume_input(self):
@@ -206,7 +288,14 @@ class JSONRPCServer:
         while not self._stop_requested:
             try:
                 message = self.reader.read_message()
-                self._dispatch_message(message)
+                cancellation_token = None
+                if message.message_type is JSONRPCMessageType.Request:
+                    # Track the request from now, so it can be canceled while it waits to be dispatched
+                    cancellation_token = CancellationToken()
+                    with self._in_flight_lock:
+                        self._in_flight_requests[message.message_id] = cancellation_token
+                self._dispatcher.submit(self._get_ordering_key(message), message.message_method, self._dispatch_message, message,
+                                        cancellation_token)
 
             except EOFError as error:
                 # Thread fails once we read EOF. Halt the input thread
@@ -233,11 +322,11 @@ class JSONRPCServer:
         while not self._stop_requested:
             try:
                 # Block until queue contains a message to send
-                message = self._output_queue.get()
+                message, frame = self._output_queue.get_framed()
                 if message is not None:
                     # It is necessary to check for None here b/c unblock the queue get by adding
                     # None when we want to stop the service
-                    self.writer.send_message(message)
+                    self._send_queued_output(message, frame)
 
             except ValueError as error:
                 # Stream is closed, break out of the loop
@@ -247,10 +336,87 @@ class JSONRPCServer:
                 # Catch generic exceptions without breaking out of loop
                 self._log_exception(error, self.OUTPUT_THREAD_NAME)
 
-    def _dispatch_message(self, message):
+    def _send_queued_output(self, message, frame=None):
+        """
+        Sends a message along with any output queued behind it as a single write, until the queue is
+        empty, the maximum flush size is reached or the maximum flush latency has passed
+        :param message: The first message to send
+        :param frame: Optional frame of the first message, if it was framed when it was queued
+        """
+        deadline = time.perf_counter() + self._max_flush_latency
+        frames = []
+        sent_messages = []
+        flush_size = 0
+        while message is not None:
+            try:
+                if frame is None:
+                    frame = self.writer.frame_message(message)
+                frames.append(frame)
+                sent_messages.append(message)
+                flush_size += len(frame)
+            except Exception as error:
+                # Drop the message that could not be serialized without losing the rest of the output
+                self._log_exception(error, self.OUTPUT_THREAD_NAME)
+
+            if flush_size >= self._max_flush_size:
+                break
+            message, frame = self._get_queued_output(deadline)
+
+        if frames:
+            self.writer.write_frames(frames)
+            for sent_message in sent_messages:
+                self.writer.log_message_sent(sent_message)
+
+    def _get_queued_output(self, deadline):
+        """
+        Gets the next queued output message, waiting no later than the deadline
+        :param deadline: Time, from time.perf_counter, to stop waiting for a message
+        :return: Tuple of the next message and its frame. The message is None if there is none or the
+        server is stopping
+        """
+        remaining = deadline - time.perf_counter()
+        try:
+            if remaining > 0:
+                return self._output_queue.get_framed(timeout=remaining)
+            return self._output_queue.get_framed(block=False)
+        except Empty:
+            return None, None
+
+    def _get_ordering_key(self, message):
         """
-        Dispatches a message that was received to the necessary handler
+        Gets the key that orders a received message with respect to other messages. Messages for the
+        same owner URI or text document are handled one at a time in the order they were received,
+        so eg a completion request always sees the text changes that were sent before it
         :param message: The message that was received
+        :return: The ordering key, or None if the message can be handled concurrently with any other
+        """
+        if message.message_method in self.WORKSPACE_METHODS:
+            return self.WORKSPACE_ORDERING_KEY
+
+        params = message.message_params
+        if not isinstance(params, dict):
+            return None
+        owner_uri = params.get('ownerUri')
+        if owner_uri is None:
+            text_document = params.get('textDocument')
+            if isinstance(text_document, dict):
+                owner_uri = text_document.get('uri')
+        return owner_uri if isinstance(owner_uri, str) else None
+
+    def _complete_request(self, request_id):
+        """
+        Stops tracking a request once its response has been sent
+        :param request_id: ID of the request
+        """
+        with self._in_flight_lock:
+            self._in_flight_requests.pop(request_id, None)
+
+    def _dispatch_message(self, message, cancellation_token=None):
+        """
+        Dispatches a message that was received to the necessary handler. This is run on a dispatcher
+        worker thread
+        :param message: The message that was received
+        :param cancellation_token: Optional token for canceling a request, created when it was received
         """
         if message.message_type in [JSONRPCMessageType.ResponseSuccess, JSONRPCMessageType.ResponseError]:
             # Responses need to be routed to the handler that requested them
@@ -261,8 +427,15 @@ class JSONRPCServer:
         if message.message_type is JSONRPCMessageType.Request:
             if self._logger is not None:
                 self._logger.info('Received request id=%s method=%s', message.message_id, message.message_method)
+            if cancellation_token is None:
+                cancellation_token = CancellationToken()
+            elif cancellation_token.canceled:
+                # The request was canceled before it was dispatched, and has already been responded to
+                if self._logger is not None:
+                    self._logger.info('Skipping canceled request id=%s', message.message_id)
+                return
             handler = self._request_handlers.get(message.message_method)
-            request_context = RequestContext(message, self._output_queue)
+            request_context = RequestContext(message, self._output_queue, cancellation_token, self._complete_request)
 
             # Make sure we got a handler for the request
             if handler is None:
@@ -272,14 +445,15 @@ class JSONRPCServer:
                     self._logger.warn('Requested method is unsupported: %s', message.message_method)
                 return
 
-            # Call the handler with a request context and the deserialized parameter object
-            if handler.class_ is None:
-                # Don't attempt to do complex deserialization
-                deserialized_object = message.message_params
-            else:
-                # Use the complex deserializer
-                deserialized_object = handler.class_.from_dict(message.message_params)
+            # Call the handler with a request context and the deserialized parameter object. Parameters that cannot be
+            # deserialized are answered with an error like failed handlers, so that the request is completed
             try:
+                if handler.class_ is None:
+                    # Don't attempt to do complex deserialization
+                    deserialized_object = message.message_params
+                else:
+                    # Use the complex deserializer
+                    deserialized_object = handler.class_.from_dict(message.message_params)
                 handler.handler(request_context, deserialized_object)
             except Exception as e:
                 error_message = f'Unhandled exception while handling request method {message.message_method}: "{e}"'  # TODO: Localize
@@ -299,14 +473,13 @@ class JSONRPCServer:
 
             # Call the handler with a notification context
             notification_context = NotificationContext(self._output_queue)
-            deserialized_object = None
-            if handler.class_ is None:
-                # Don't attempt to do complex deserialization
-                deserialized_object = message.message_params
-            else:
-                # Use the complex deserializer
-                deserialized_object = handler.class_.from_dict(message.message_params)
             try:
+                if handler.class_ is None:
+                    # Don't attempt to do complex deserialization
+                    deserialized_object = message.message_params
+                else:
+                    # Use the complex deserializer
+                    deserialized_object = handler.class_.from_dict(message.message_params)
                 handler.handler(notification_context, deserialized_object)
             except Exception:
                 error_message = f'Unhandled exception while handling notification method {message.message_method}'
@@ -346,14 +519,26 @@ class RequestContext:
     Context for a received message
     """
 
-    def __init__(self, message, queue):
+    def __init__(self, message, queue, cancellation_token=None, on_completed=None):
         """
         Initializes a new request context
         :param message: The raw request message
         :param queue: Output queue that any outgoing messages will be added to
+        :param cancellation_token: Optional token that is canceled if the client cancels the request
+        :param on_completed: Optional function called with the request ID when the request is responded to
         """
         self._message = message
         self._queue = queue
+        self._cancellation_token = cancellation_token or CancellationToken()
+        self._on_completed = on_completed
+
+    @property
+    def cancellation_token(self) -> CancellationToken:
+        """
+        Token that is canceled when the client cancels the request. Long running handlers should stop
+        once it is canceled, the server has responded to the request and further responses are dropped
+        """
+        return self._cancellation_token
 
     def send_response(self, params):
         """
@@ -361,11 +546,11 @@ class RequestContext:
         :param params: Data to send back with the response
         """
         message = JSONRPCMessage.create_response(self._message.message_id, params)
-        self._queue.put(message)
+        self._send_final_message(message)
 
     def send_notification(self, method, params):
         """
-        Sends a notification, independent to this request
+        Sends a notification, independent to this request. Blocks while the output queue is full
         :param method: String name of the method for the notification
         :param params: Data to send with the notification
         """
@@ -381,12 +566,20 @@ class RequestContext:
         """
 
         message = JSONRPCMessage.create_error(self._message.message_id, code, message, data)
-        self._queue.put(message)
+        self._send_final_message(message)
 
     def send_unhandled_error_response(self, ex: Exception):
         """Send response for any unhandled exceptions"""
         self.send_error('Unhandled exception: {}'.format(str(ex)))  # TODO: Localize
 
+    def _send_final_message(self, message):
+        if self._cancellation_token.canceled:
+            # The request was answered when it was canceled
+            return
+        if self._on_completed is not None:
+            self._on_completed(self._message.message_id)
+        self._queue.put(message)
+
 
 class NotificationContext:
     """
@@ -402,7 +595,7 @@ class NotificationContext:
 
     def send_notification(self, method, params):
         """
-        Sends a new notification over the JSON RPC channel
+        Sends a new notification over the JSON RPC channel. Blocks while the output queue is full
         :param method: String name of the method of the notification being send
         :param params: Any data to send along with the notification
         """
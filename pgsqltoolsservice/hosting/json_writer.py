@@ -3,8 +3,6 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import json
-
 
 class JSONRPCWriter:
     """
@@ -35,26 +33,40 @@ class JSONRPCWriter:
             if self._logger is not None:
                 self._logger.exception(f'Exception raised when writer stream closed: {e}')
 
+    def frame_message(self, message) -> bytes:
+        """
+        Serializes a JSON RPC message and prefixes it with its header
+        :param message: Message to frame
+        :return: The header and encoded content of the message
+        """
+        content = message.to_json().encode(self.encoding)
+        # Content-Length counts the encoded bytes of the content, not its characters
+        return self.HEADER.format(len(content)).encode(u"ascii") + content
+
     def send_message(self, message):
         """
         Sends JSON RPC message as defined by message object
         :param message: Message to send
         """
-        # Generate the message string and header string
-        json_content = json.dumps(message.dictionary, sort_keys=True)
-        header = self.HEADER.format(str(len(json_content)))
+        self.write_frames([self.frame_message(message)])
+        self.log_message_sent(message)
 
-        # Write the message to the stream
-        self.stream.write(header.encode(u"ascii"))
-        self.stream.write(json_content.encode(self.encoding))
+    def write_frames(self, frames):
+        """
+        Writes framed messages to the stream with a single write and flushes it
+        :param frames: List of framed messages, as created by frame_message
+        """
+        self.stream.write(frames[0] if len(frames) == 1 else b''.join(frames))
         self.stream.flush()
 
+    def log_message_sent(self, message):
+        """
+        Logs that a message was sent
+        :param message: Message that was sent
+        """
         if self._logger is not None:
             self._logger.info("{} message sent id={} method={}".format(
                 message.message_type.name,
                 message.message_id,
                 message.message_method
             ))
-
-            # Uncomment for verbose logging
-            # self._logger.debug(f'{json_content}')
@@ -0,0 +1,199 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from collections import deque
+import threading
+import time
+from typing import Callable, Deque, Dict, Hashable, Optional  # noqa
+
+
+class LatencyCounter:
+    """Accumulates timings for one kind of operation"""
+
+    def __init__(self):
+        self.count: int = 0
+        self.total_ms: float = 0
+        self.max_ms: float = 0
+
+    @property
+    def average_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+
+class DispatchStatistics:
+    """
+    Counters for measuring head-of-line blocking in the dispatcher. Wait time is the time a message
+    spends queued before a worker starts its handler, handler time is how long the handler runs
+    """
+
+    def __init__(self):
+        self.queue_depth: int = 0
+        self.max_queue_depth: int = 0
+        self.in_flight: int = 0
+        self.wait_times: Dict[str, LatencyCounter] = {}
+        self.handler_times: Dict[str, LatencyCounter] = {}
+
+    def to_dict(self) -> dict:
+        """Creates a point in time copy of the counters"""
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': self.in_flight,
+            'wait_times': {method: vars(counter).copy() for method, counter in self.wait_times.items()},
+            'handler_times': {method: vars(counter).copy() for method, counter in self.handler_times.items()}
+        }
+
+
+class MessageDispatcher:
+    """
+    Runs message handlers on a bounded pool of worker threads. Work items that share an ordering
+    key are run one at a time in the order they were submitted, work items without a key run as
+    soon as a worker is available. Submitting blocks when the maximum number of pending items is
+    reached, which pushes back on the input stream instead of queueing without limit
+    """
+    # CONSTANTS ############################################################
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_MAX_PENDING = 512
+    WORKER_THREAD_NAME = u"JSON_RPC_Dispatch_Thread_{}"
+
+    class _WorkItem:
+        def __init__(self, key: Optional[Hashable], name: str, function: Callable, args: tuple):
+            self.key = key
+            self.name = name
+            self.function = function
+            self.args = args
+            self.submit_time = time.perf_counter()
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, logger=None):
+        """
+        Initializes the dispatcher. Worker threads are not created until start is called
+        :param max_workers: Maximum number of handlers that can run at the same time
+        :param max_pending: Maximum number of submitted items that have not completed yet
+        :param logger: Optional destination for logging
+        """
+        self._max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self._max_pending = max_pending or self.DEFAULT_MAX_PENDING
+        self._logger = logger
+
+        self._condition = threading.Condition()
+        self._pending = 0
+        # Items that can run now. Only one item per ordering key is ever in here
+        self._ready: Deque[MessageDispatcher._WorkItem] = deque()
+        # Items waiting behind a running or ready item with the same ordering key
+        self._lanes: Dict[Hashable, Deque[MessageDispatcher._WorkItem]] = {}
+        self._workers = []
+        self._stop_requested = False
+
+        self._statistics = DispatchStatistics()
+
+    # PROPERTIES ###########################################################
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def statistics(self) -> dict:
+        """A point in time copy of the queue depth and latency counters"""
+        with self._condition:
+            return self._statistics.to_dict()
+
+    # METHODS ##############################################################
+    def start(self) -> None:
+        """Starts the worker threads"""
+        for index in range(self._max_workers):
+            worker = threading.Thread(target=self._run_worker, name=self.WORKER_THREAD_NAME.format(index))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """
+        Signals the workers to exit once every item that was already submitted has been handled. Items
+        submitted after stopping are dropped
+        """
+        with self._condition:
+            self._stop_requested = True
+            self._condition.notify_all()
+
+    def submit(self, key: Optional[Hashable], name: str, function: Callable, *args) -> None:
+        """
+        Queues a function to run on a worker thread, blocking while the dispatcher is full
+        :param key: Ordering key. Items with equal keys run sequentially in submission order. None
+        if the item does not need to be ordered with respect to any other item
+        :param name: Name to record the item's timings under, eg the JSON RPC method
+        :param function: Function to run
+        :param args: Arguments to call the function with
+        """
+        item = self._WorkItem(key, name, function, args)
+        with self._condition:
+            while self._pending >= self._max_pending and not self._stop_requested:
+                self._condition.wait()
+            if self._stop_requested:
+                return
+
+            self._pending += 1
+            self._statistics.queue_depth += 1
+            self._statistics.max_queue_depth = max(self._statistics.max_queue_depth, self._statistics.queue_depth)
+
+            if key is None:
+                self._ready.append(item)
+            elif key in self._lanes:
+                # Another item with the key is running or about to, so this one must wait for it
+                self._lanes[key].append(item)
+                return
+            else:
+                self._lanes[key] = deque()
+                self._ready.append(item)
+            self._condition.notify()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _run_worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._ready and not self._stop_requested:
+                    self._condition.wait()
+                if not self._ready:
+                    # Stop was requested and there is nothing left to drain
+                    return
+                item = self._ready.popleft()
+                self._statistics.queue_depth -= 1
+                self._statistics.in_flight += 1
+
+            start_time = time.perf_counter()
+            try:
+                item.function(*item.args)
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.exception(f'Unhandled exception while dispatching {item.name}: {e}')
+            end_time = time.perf_counter()
+
+            with self._condition:
+                self._statistics.in_flight -= 1
+                self._record_latency(self._statistics.wait_times, item.name, start_time - item.submit_time)
+                self._record_latency(self._statistics.handler_times, item.name, end_time - start_time)
+
+                # Release the next item in the lane, or close the lane if it is empty
+                if item.key is not None:
+                    lane = self._lanes[item.key]
+                    if lane:
+                        self._ready.append(lane.popleft())
+                    else:
+                        del self._lanes[item.key]
+
+                self._pending -= 1
+                self._condition.notify_all()
+
+    @staticmethod
+    def _record_latency(counters: Dict[str, LatencyCounter], name: str, elapsed_seconds: float) -> None:
+        counter = counters.get(name)
+        if counter is None:
+            counter = counters[name] = LatencyCounter()
+        counter.add(elapsed_seconds * 1000)
@@ -0,0 +1,184 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from collections import deque
+import enum
+from queue import Full, Queue
+import time
+from typing import Callable, Optional, Tuple  # noqa
+
+from pgsqltoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
+
+
+class MessagePriority(enum.IntEnum):
+    """Lanes of the output queue, messages in a lower numbered lane are always sent first"""
+    RESPONSE = 0
+    INTERACTIVE = 1
+    BULK = 2
+
+
+class OutputQueue(Queue):
+    """
+    Queue of messages waiting to be sent to the client. Messages are sent in priority order, and in
+    the order they were queued within a priority, so responses are never stuck behind a flood of
+    notifications.
+
+    The queue is bounded by the total size of the queued messages. Putting a notification or request
+    blocks while the queue is full, which pushes back on producers such as a query that raises
+    notices faster than the client reads them. Responses are never blocked, so a request can always
+    be answered. Messages are framed when they are queued, which is how their size is known, and the
+    frame is handed to the output thread so they are not serialized twice
+    """
+    # CONSTANTS ############################################################
+    DEFAULT_MAX_QUEUED_BYTES = 8 * 1024 * 1024
+
+    # Notifications that are sent in large numbers while a query or task runs. They share a lane so
+    # their order relative to each other is kept
+    BULK_NOTIFICATION_METHODS = frozenset([
+        'query/batchStart',
+        'query/batchComplete',
+        'query/complete',
+        'query/message',
+        'query/resultSetAvailable',
+        'query/resultSetComplete',
+        'query/resultSetUpdated',
+        'tasks/newtaskcreated',
+        'tasks/statuschanged'
+    ])
+
+    class _QueuedMessage:
+        def __init__(self, message: Optional[JSONRPCMessage], frame: Optional[bytes], priority: MessagePriority):
+            self.message = message
+            self.frame = frame
+            self.priority = priority
+            self.size = len(frame) if frame is not None else 0
+
+    def __init__(self, max_queued_bytes: int = None, frame_message: Callable[[JSONRPCMessage], bytes] = None):
+        """
+        Initializes the output queue
+        :param max_queued_bytes: Optional total size of queued frames after which putting notifications
+        and requests blocks
+        :param frame_message: Optional function that frames a message for sending. If not provided, or if
+        framing fails, the size of the message is not counted and it is framed by the output thread
+        """
+        super().__init__()
+        self._max_queued_bytes = max_queued_bytes or self.DEFAULT_MAX_QUEUED_BYTES
+        self._frame_message = frame_message
+        self._queued_bytes = 0
+        self._closed = False
+
+    # PROPERTIES ###########################################################
+    @property
+    def queued_bytes(self) -> int:
+        """Total size of the frames in the queue"""
+        with self.mutex:
+            return self._queued_bytes
+
+    # METHODS ##############################################################
+    def close(self) -> None:
+        """Stops blocking producers, any that are waiting for room are released"""
+        with self.mutex:
+            self._closed = True
+            self.not_full.notify_all()
+
+    def put(self, item: Optional[JSONRPCMessage], block: bool = True, timeout: float = None) -> None:
+        """
+        Queues a message, waiting for room if it is not a response and the queue is full. A message
+        larger than the queue is accepted once the queue is empty
+        :param item: Message to queue. None can be queued to wake the consumer
+        :param block: Whether to wait for room in the queue
+        :param timeout: Optional number of seconds to wait for room
+        :raises queue.Full: There was no room in the queue within the timeout or without blocking
+        """
+        entry = self._create_entry(item)
+        with self.not_full:
+            if entry.priority is not MessagePriority.RESPONSE:
+                if not block:
+                    if not self._has_room(entry):
+                        raise Full
+                elif timeout is None:
+                    while not self._has_room(entry):
+                        self.not_full.wait()
+                else:
+                    deadline = time.monotonic() + timeout
+                    while not self._has_room(entry):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise Full
+                        self.not_full.wait(remaining)
+            self._put(entry)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float = None) -> Optional[JSONRPCMessage]:
+        """
+        Removes the next message in priority order from the queue
+        :param block: Whether to wait for a message to be queued
+        :param timeout: Optional number of seconds to wait for a message
+        :raises queue.Empty: No message was queued within the timeout or without blocking
+        :return: The message
+        """
+        return super().get(block, timeout).message
+
+    def get_framed(self, block: bool = True, timeout: float = None) -> Tuple[Optional[JSONRPCMessage], Optional[bytes]]:
+        """
+        Removes the next message in priority order from the queue, along with its frame
+        :param block: Whether to wait for a message to be queued
+        :param timeout: Optional number of seconds to wait for a message
+        :raises queue.Empty: No message was queued within the timeout or without blocking
+        :return: Tuple of the message and its frame. The frame is None if the message has not been framed
+        """
+        entry = super().get(block, timeout)
+        return entry.message, entry.frame
+
+    @classmethod
+    def get_priority(cls, message: Optional[JSONRPCMessage]) -> MessagePriority:
+        """
+        Determines the lane a message is sent from
+        :param message: The message to be sent
+        :return: The priority of the message
+        """
+        if message is None:
+            # Wake up messages are not held back by a full queue
+            return MessagePriority.RESPONSE
+        if message.message_type in (JSONRPCMessageType.ResponseSuccess, JSONRPCMessageType.ResponseError):
+            return MessagePriority.RESPONSE
+        if message.message_type is JSONRPCMessageType.Notification and message.message_method in cls.BULK_NOTIFICATION_METHODS:
+            return MessagePriority.BULK
+        return MessagePriority.INTERACTIVE
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _create_entry(self, message: Optional[JSONRPCMessage]) -> 'OutputQueue._QueuedMessage':
+        frame = None
+        if message is not None and self._frame_message is not None:
+            try:
+                frame = self._frame_message(message)
+            except Exception:
+                # Leave the message unframed, the output thread will report the error when it is sent
+                frame = None
+        return self._QueuedMessage(message, frame, self.get_priority(message))
+
+    def _has_room(self, entry: 'OutputQueue._QueuedMessage') -> bool:
+        return self._closed or self._queued_bytes == 0 or self._queued_bytes + entry.size <= self._max_queued_bytes
+
+    # Overrides of the queue.Queue storage hooks, these are called with the mutex held
+    def _init(self, maxsize):
+        self._lanes = [deque() for _ in MessagePriority]
+
+    def _qsize(self):
+        return sum(len(lane) for lane in self._lanes)
+
+    def _put(self, entry):
+        self._lanes[entry.priority].append(entry)
+        self._queued_bytes += entry.size
+
+    def _get(self):
+        for lane in self._lanes:
+            if lane:
+                entry = lane.popleft()
+                self._queued_bytes -= entry.size
+                # Room may have been made for any of the waiting producers, not just the next one
+                self.not_full.notify_all()
+                return entry
@@ -3,18 +3,63 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import importlib
 from logging import Logger
-from typing import Optional
+import threading
+from typing import Callable, Dict, List, Optional  # noqa
 
-from pgsqltoolsservice.hosting import JSONRPCServer
+from pgsqltoolsservice.hosting.json_rpc_server import IncomingMessageConfiguration, JSONRPCServer
+
+
+class LazyService:
+    """
+    Description of a service that is imported and created the first time it is used. The names of
+    the requests and notifications the service handles are given up front so that the service
+    provider can route them to the service before it is loaded
+    """
+
+    def __init__(self, module_name: str, class_name: str, requests: List[str] = None, notifications: List[str] = None,
+                 load_with: List[str] = None):
+        """
+        :param module_name: Full name of the module that defines the service
+        :param class_name: Name of the service class within the module
+        :param requests: Methods of the requests the service registers handlers for
+        :param notifications: Methods of the notifications the service registers handlers for
+        :param load_with: Names of other services that must be loaded along with this one, eg because
+        they register callbacks with it
+        """
+        self.module_name = module_name
+        self.class_name = class_name
+        self.requests = requests or []
+        self.notifications = notifications or []
+        self.load_with = load_with or []
+
+    def load_class(self) -> type:
+        """Imports the module of the service and returns the service class"""
+        module = importlib.import_module(self.module_name)
+        return getattr(module, self.class_name)
 
 
 class ServiceProvider:
     def __init__(self, json_rpc_server: JSONRPCServer, services: dict, logger: Optional[Logger] = None):
+        """
+        Creates the service provider
+        :param json_rpc_server: Server the services register their handlers with
+        :param services: Dictionary of service name to either the service class, which is created
+        immediately, or a LazyService, which is created the first time it is used
+        :param logger: Optional logger
+        """
         self._is_initialized = False
         self._logger = logger
         self._server = json_rpc_server
-        self._services = {service_name: service_class() for (service_name, service_class) in services.items()}
+        self._services = {service_name: service_class() for (service_name, service_class) in services.items()
+                          if not isinstance(service_class, LazyService)}
+        self._lazy_services: Dict[str, LazyService] = {service_name: service for (service_name, service) in services.items()
+                                                       if isinstance(service, LazyService)}
+
+        # Services that are being registered. Only the thread that is loading them can look them up
+        self._loading_services = {}
+        self._load_lock = threading.RLock()
 
     # PROPERTIES ###########################################################
     @property
@@ -27,7 +72,8 @@ class ServiceProvider:
 
     def __getitem__(self, item: str):
         """
-        If the service exists, it is returned by its lookup key
+        If the service exists, it is returned by its lookup key. A lazy service is loaded if it has
+        not been used yet
         :param item: Key for looking up the service
         :raises RuntimeError: Service provider has not been initialized
         :return: The requested service
@@ -35,13 +81,17 @@ class ServiceProvider:
         if not self._is_initialized:
             raise RuntimeError('Service provider must be initialized before retrieving services')
 
-        return self._services[item]
+        service = self._services.get(item)
+        if service is None:
+            service = self._load_service(item)
+        return service
 
     # METHODS ##############################################################
 
     def initialize(self) -> None:
         """
-        Iterates over the services and initializes them with the server
+        Iterates over the services and initializes them with the server. Lazy services are not loaded,
+        handlers that load them are registered for their requests and notifications instead
         :raises RuntimeError: Service provider has been initialized already
         """
         if self._is_initialized:
@@ -51,5 +101,69 @@ class ServiceProvider:
         # other up. This is important since services can register callbacks with each other
         self._is_initialized = True
 
-        for service_key in self._services:
+        for service_key in list(self._services):
             self._services[service_key].register(self)
+
+        for service_name, lazy_service in self._lazy_services.items():
+            for method in lazy_service.requests:
+                self._server.set_request_handler(
+                    IncomingMessageConfiguration(method, None),
+                    self._create_lazy_request_handler(service_name, method)
+                )
+            for method in lazy_service.notifications:
+                self._server.set_notification_handler(
+                    IncomingMessageConfiguration(method, None),
+                    self._create_lazy_notification_handler(service_name, method)
+                )
+
+    def is_loaded(self, service_name: str) -> bool:
+        """
+        Whether a service has been created and registered
+        :param service_name: Key of the service
+        """
+        return service_name in self._services
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _load_service(self, service_name: str):
+        with self._load_lock:
+            # Another thread may have loaded the service while this one waited for the lock, and a
+            # service that is registering may look itself up from the thread that is loading it
+            service = self._services.get(service_name) or self._loading_services.get(service_name)
+            if service is not None:
+                return service
+
+            lazy_service = self._lazy_services[service_name]
+            if self._logger is not None:
+                self._logger.info('Loading service %s', service_name)
+            service = lazy_service.load_class()()
+
+            self._loading_services[service_name] = service
+            try:
+                service.register(self)
+                self._services[service_name] = service
+            finally:
+                del self._loading_services[service_name]
+
+            for dependent_name in lazy_service.load_with:
+                self._load_service(dependent_name)
+            return service
+
+    def _create_lazy_request_handler(self, service_name: str, method: str) -> Callable:
+        def handle_request(request_context, params):
+            handler = self._load_handler(service_name, method, self._server.get_request_handler, handle_request)
+            handler.handler(request_context, params if handler.class_ is None else handler.class_.from_dict(params))
+        return handle_request
+
+    def _create_lazy_notification_handler(self, service_name: str, method: str) -> Callable:
+        def handle_notification(notification_context, params):
+            handler = self._load_handler(service_name, method, self._server.get_notification_handler, handle_notification)
+            handler.handler(notification_context, params if handler.class_ is None else handler.class_.from_dict(params))
+        return handle_notification
+
+    def _load_handler(self, service_name: str, method: str, get_handler: Callable, lazy_handler: Callable):
+        # Loading the service replaces the lazy handler with the one the service registers
+        self._load_service(service_name)
+        handler = get_handler(method)
+        if handler is None or handler.handler is lazy_handler:
+            raise RuntimeError(f'Service {service_name} did not register a handler for {method}')
+        return handler
@@ -127,7 +127,8 @@ class LanguageService:
         operation = QueuedOperation(script_parse_info.connection_key,
                                     functools.partial(self.send_definition_using_connected_completions, request_context, script_parse_info,
                                                       text_document_position),
-                                    functools.partial(do_send_default_empty_response))
+                                    functools.partial(do_send_default_empty_response),
+                                    request_context.cancellation_token)
         self.operations_queue.add_operation(operation)
         request_context.send_notification(STATUS_CHANGE_NOTIFICATION, StatusChangeParams(owner_uri=text_document_position.text_document.uri,
                                                                                          status="DefinitionRequestCompleted"))
@@ -159,7 +160,8 @@ class LanguageService:
             script_parse_info.document = Document(text, cursor_position)
             operation = QueuedOperation(script_parse_info.connection_key,
                                         functools.partial(self.send_connected_completions, request_context, script_parse_info, params),
-                                        functools.partial(self._send_default_completions, request_context, script_file, params))
+                                        functools.partial(self._send_default_completions, request_context, script_file, params),
+                                        request_context.cancellation_token)
             self.operations_queue.add_operation(operation)
 
     def handle_completion_resolve_request(self, request_context: RequestContext, params: CompletionItem) -> None:
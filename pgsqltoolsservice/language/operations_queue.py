@@ -15,6 +15,7 @@ from pgsqltoolsservice.connection.contracts import ConnectRequestParams, Connect
 from pgsqltoolsservice.language.completion import PGCompleter
 from pgsqltoolsservice.language.completion_refresher import CompletionRefresher
 import pgsqltoolsservice.utils as utils
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 
 INTELLISENSE_URI = 'intellisense://'
 
@@ -43,15 +44,18 @@ class ConnectionContext:
 class QueuedOperation:
     """Information about an operation to be queued"""
 
-    def __init__(self, key: str, task: Callable[[PGCompleter], bool], timeout_task: Callable[[None], bool]):
+    def __init__(self, key: str, task: Callable[[PGCompleter], bool], timeout_task: Callable[[None], bool],
+                 cancellation_token: CancellationToken = None):
         """
         Initializes a queued operation with a key defining the connection it maps to,
         a task to be run for a connected queue, and a timeout task. Currently the timeout
-        task is just used if the queue is not yet connected
+        task is just used if the queue is not yet connected. If the optional cancellation
+        token is canceled before the operation runs, neither task is run
         """
         self.key = key
         self.task: Callable[[PGCompleter], bool] = task
         self.timeout_task: Callable[[None], bool] = timeout_task
+        self.cancellation_token: CancellationToken = cancellation_token or CancellationToken()
         self.context: ConnectionContext = None
 
 
@@ -191,7 +195,8 @@ class OperationsQueue:
         """
         Processes an operation. Seperated for test purposes from the threaded logic
         """
-        if operation is not None:
+        # Skip operations whose request was canceled, eg a completion that was superseded by further typing
+        if operation is not None and not operation.cancellation_token.canceled:
             # Try to process the task, falling back to the timeout
             # task if disconnected or regular task failed
             is_connected = operation.context is not None and operation.context.is_connected
@@ -11,6 +11,7 @@ from pgsqltoolsservice.hosting import RequestContext, ServiceProvider
 from pgsqltoolsservice.metadata.contracts import (
     MetadataListParameters, MetadataListResponse, METADATA_LIST_REQUEST, MetadataType, ObjectMetadata)
 from pgsqltoolsservice.utils import constants
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 
 
 class MetadataService:
@@ -41,15 +42,19 @@ class MetadataService:
         thread.start()
 
     def _metadata_list_worker(self, request_context: RequestContext, params: MetadataListParameters) -> None:
+        cancellation_token = request_context.cancellation_token
         try:
-            metadata = self._list_metadata(params.owner_uri)
+            metadata = self._list_metadata(params.owner_uri, cancellation_token)
             request_context.send_response(MetadataListResponse(metadata))
         except Exception:
+            if cancellation_token.canceled:
+                # The query was canceled along with the request, which has already been responded to
+                return
             if self._service_provider.logger is not None:
                 self._service_provider.logger.exception('Unhandled exception while executing the metadata list worker thread')
             request_context.send_error('Unhandled exception while listing metadata')  # TODO: Localize
 
-    def _list_metadata(self, owner_uri: str) -> List[ObjectMetadata]:
+    def _list_metadata(self, owner_uri: str, cancellation_token: CancellationToken = None) -> List[ObjectMetadata]:
         object_query = """SELECT s.nspname AS schema_name,
         p.proname || '(' || COALESCE(pg_catalog.pg_get_function_identity_arguments(p.oid), '') || ')' AS object_name, 'f' as type FROM pg_proc p
     INNER JOIN pg_namespace s ON s.oid = p.pronamespace
@@ -58,8 +63,9 @@ UNION SELECT schemaname AS schema_name, tablename AS object_name, 't' as type FR
     WHERE schemaname NOT ILIKE 'pg_%' AND schemaname != 'information_schema'
 UNION SELECT schemaname AS schema_name, viewname AS object_name, 'v' as type from pg_views
     WHERE schemaname NOT ILIKE 'pg_%' AND schemaname != 'information_schema'"""
+        cancellation_token = cancellation_token or CancellationToken()
         connection = self._service_provider[constants.CONNECTION_SERVICE_NAME].get_connection(owner_uri, ConnectionType.DEFAULT)
-        with connection.cursor() as cursor:
+        with cancellation_token.canceling_statements(connection), connection.cursor() as cursor:
             cursor.execute(object_query)
             results = cursor.fetchall()
         metadata_list = []
@@ -104,6 +104,7 @@ class ObjectExplorerService(object):
             # Try to remove the session
             session = self._session_map.pop(params.session_id, None)
             if session is not None:
+                session.cancellation_token.cancel()
                 self._close_database_connections(session)
                 conn_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
                 connect_result = conn_service.disconnect(session.id, ConnectionType.OBJECT_EXLPORER)
@@ -136,6 +137,7 @@ class ObjectExplorerService(object):
             self._service_provider.logger.info('Closing all the OE sessions')
         conn_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
         for key, session in self._session_map.items():
+            session.cancellation_token.cancel()
             connect_result = conn_service.disconnect(session.id, ConnectionType.OBJECT_EXLPORER)
             self._close_database_connections(session)
             if connect_result:
@@ -185,13 +187,17 @@ class ObjectExplorerService(object):
             self._expand_node_error(request_context, params, str(e))
 
     def _expand_node_thread(self, is_refresh: bool, request_context: RequestContext, params: ExpandParameters, session: ObjectExplorerSession):
+        cancellation_token = session.cancellation_token
         try:
             response = ExpandCompletedParameters(session.id, params.node_path)
-            response.nodes = route_request(is_refresh, session, params.node_path)
+            with cancellation_token.canceling_statements(session.server.connection.connection):
+                response.nodes = route_request(is_refresh, session, params.node_path)
 
-            request_context.send_notification(EXPAND_COMPLETED_METHOD, response)
+            if not cancellation_token.canceled:
+                request_context.send_notification(EXPAND_COMPLETED_METHOD, response)
         except Exception as e:
-            self._expand_node_error(request_context, params, str(e))
+            if not cancellation_token.canceled:
+                self._expand_node_error(request_context, params, str(e))
 
     def _expand_node_error(self, request_context: RequestContext, params: ExpandParameters, message: str):
         if self._service_provider.logger is not None:
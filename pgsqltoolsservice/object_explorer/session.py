@@ -8,6 +8,7 @@ from typing import List, Optional, Dict   # noqa
 
 from pgsmo import Server            # noqa
 from pgsqltoolsservice.connection.contracts import ConnectionDetails
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 
 
 class ObjectExplorerSession:
@@ -20,3 +21,6 @@ class ObjectExplorerSession:
         self.init_task: Optional[threading.Thread] = None
         self.expand_tasks: Dict[str, threading.Thread] = {}
         self.refresh_tasks: Dict[str, threading.Thread] = {}
+
+        # Canceled when the session is closed, to stop expanding nodes that nobody will see
+        self.cancellation_token: CancellationToken = CancellationToken()
@@ -0,0 +1,257 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Splits scripts into statements in a single pass over their text, with the lexical rules of PostgreSQL.
+Semicolons end statements unless they are in a string, quoted identifier, dollar quoted string, comment,
+parentheses or the BEGIN ATOMIC ... END body of a CREATE FUNCTION or CREATE PROCEDURE statement
+"""
+
+from bisect import bisect_right
+import re
+from typing import List, Tuple  # noqa
+
+
+STATEMENT_KIND_SELECT = 'SELECT'
+STATEMENT_KIND_SELECT_INTO = 'SELECT INTO'
+
+# Kinds of the statements a WITH clause can be attached to
+_WITH_STATEMENT_KINDS = frozenset(['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'VALUES', 'TABLE'])
+
+# Tokens are matched at the current position in order. Strings, quoted identifiers and dollar quoted strings
+# are matched whole, up to the end of the text if they are not terminated. Nested block comments are matched
+# separately as a regular expression cannot count their depth
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<word>[eE](?=')|[^\W\d][\w$]*)
+  | (?P<string>'[^']*(?:''[^']*)*'?)
+  | (?P<semicolon>;)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<line_comment>--[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<quoted_identifier>"[^"]*(?:""[^"]*)*"?)
+  | (?P<dollar_string>\$(?P<tag>(?:[^\W\d]\w*)?)\$(?:.*?\$(?P=tag)\$|.*))
+  | (?P<other>[^\s\w;()'"$\-/]+|\w+|.)
+""", re.VERBOSE | re.DOTALL)
+
+# Strings of the form E'...', in which a backslash escapes the next character
+_ESCAPE_STRING_PATTERN = re.compile(r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'?", re.DOTALL)
+_BLOCK_COMMENT_DELIMITER_PATTERN = re.compile(r'/\*|\*/')
+_TRAILING_LINE_COMMENT_PATTERN = re.compile(r'[ \t]*--[^\n]*')
+_NEW_LINE_PATTERN = re.compile(r'\n')
+
+_SPACE = _TOKEN_PATTERN.groupindex['space']
+_WORD = _TOKEN_PATTERN.groupindex['word']
+_SEMICOLON = _TOKEN_PATTERN.groupindex['semicolon']
+_OPEN = _TOKEN_PATTERN.groupindex['open']
+_CLOSE = _TOKEN_PATTERN.groupindex['close']
+_LINE_COMMENT = _TOKEN_PATTERN.groupindex['line_comment']
+_BLOCK_COMMENT = _TOKEN_PATTERN.groupindex['block_comment']
+
+
+class SqlStatement:
+    """Statement of a script, with its location in the script"""
+
+    def __init__(self, text: str, executable_text: str, kind: str, start: int, end: int) -> None:
+        """
+        :param text: Text of the statement in the script, including its comments and terminating semicolon
+        :param executable_text: Text of the statement without its comments or surrounding whitespace
+        :param kind: First keyword of the statement in upper case, that of the statement following the WITH clause
+        for statements with one and SELECT INTO for SELECT statements that create a table. Empty if the statement
+        has no keywords
+        :param start: Offset of the start of the statement in the script
+        :param end: Offset of the end of the statement in the script
+        """
+        self.text = text
+        self.executable_text = executable_text
+        self.kind = kind
+        self.start = start
+        self.end = end
+
+        # Zero based line and column of the start and end of the statement, set once the statements are split
+        self.start_line = 0
+        self.start_column = 0
+        self.end_line = 0
+        self.end_column = 0
+
+    @property
+    def is_empty(self) -> bool:
+        """True if the statement has nothing to execute, as it consists of comments and semicolons only"""
+        return not self.executable_text or self.executable_text == ';'
+
+
+def split_statements(text: str) -> List[SqlStatement]:
+    """
+    Splits a script into its statements. Whitespace between statements is not part of any statement, while
+    comments are part of the statement they precede. A line comment on the line a statement ends on is part
+    of that statement
+    :param text: Text of the script
+    :returns: The statements of the script in order, including those that are empty
+    """
+    statements = _StatementLexer(text).split()
+
+    line_starts = [0]
+    line_starts.extend(match.end() for match in _NEW_LINE_PATTERN.finditer(text))
+    for statement in statements:
+        statement.start_line, statement.start_column = _get_position(line_starts, statement.start)
+        # The end of a statement is on the line of its last character
+        statement.end_line = bisect_right(line_starts, statement.end - 1) - 1
+        statement.end_column = statement.end - line_starts[statement.end_line]
+
+    return statements
+
+
+def get_statement_kind(text: str) -> str:
+    """Returns the kind of the first statement of a script, or an empty string if it has none"""
+    for statement in split_statements(text):
+        if not statement.is_empty:
+            return statement.kind
+    return ''
+
+
+# IMPLEMENTATION DETAILS ###################################################
+def _get_position(line_starts: List[int], offset: int) -> Tuple[int, int]:
+    line = bisect_right(line_starts, offset) - 1
+    return line, offset - line_starts[line]
+
+
+class _StatementLexer:
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._statements: List[SqlStatement] = []
+        self._reset_statement()
+
+    def split(self) -> List[SqlStatement]:
+        text = self._text
+        text_length = len(text)
+        match_token = _TOKEN_PATTERN.match
+        position = 0
+
+        while position < text_length:
+            match = match_token(text, position)
+            token_type = match.lastindex
+            token_end = match.end()
+
+            if token_type == _SPACE:
+                position = token_end
+                continue
+
+            if self._start is None:
+                self._start = position
+
+            if token_type == _WORD:
+                if token_end < text_length and text[token_end] == "'" and token_end - position == 1:
+                    # An E'...' string
+                    token_end = _ESCAPE_STRING_PATTERN.match(text, token_end).end()
+                else:
+                    self._add_word(position, token_end)
+            elif token_type == _SEMICOLON:
+                if self._paren_depth == 0 and self._begin_depth == 0:
+                    self._end = token_end
+                    trailing_comment = _TRAILING_LINE_COMMENT_PATTERN.match(text, token_end)
+                    if trailing_comment is not None:
+                        self._comments.append((token_end, trailing_comment.end()))
+                        token_end = trailing_comment.end()
+                    self._end_statement(token_end)
+                    position = token_end
+                    continue
+            elif token_type == _OPEN:
+                self._paren_depth += 1
+            elif token_type == _CLOSE:
+                self._paren_depth = max(0, self._paren_depth - 1)
+            elif token_type == _LINE_COMMENT:
+                self._comments.append((position, token_end))
+            elif token_type == _BLOCK_COMMENT:
+                token_end = self._find_block_comment_end(token_end)
+                self._comments.append((position, token_end))
+
+            self._end = token_end
+            position = token_end
+
+        if self._start is not None:
+            self._end_statement(self._end)
+
+        return self._statements
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _reset_statement(self) -> None:
+        self._start: int = None
+        self._end: int = None
+        self._comments: List[Tuple[int, int]] = []
+        self._kind = ''
+        self._is_kind_pending = True
+        self._is_create = False
+        self._is_routine = False
+        self._is_begin_pending = False
+        self._paren_depth = 0
+        self._begin_depth = 0
+
+    def _add_word(self, start: int, end: int) -> None:
+        word_length = end - start
+        if self._is_kind_pending:
+            keyword = self._text[start:end].upper()
+            if not self._kind:
+                self._kind = keyword
+                self._is_create = keyword == 'CREATE'
+                self._is_kind_pending = keyword == 'WITH' or keyword == STATEMENT_KIND_SELECT
+            elif self._kind == 'WITH':
+                # The kind of the statement is that of the first keyword after the WITH clause that starts one
+                if self._paren_depth == 0 and keyword in _WITH_STATEMENT_KINDS:
+                    self._kind = keyword
+                    self._is_kind_pending = keyword == STATEMENT_KIND_SELECT
+            elif keyword == 'INTO' and self._paren_depth == 0:
+                self._kind = STATEMENT_KIND_SELECT_INTO
+                self._is_kind_pending = False
+        elif self._is_create:
+            # Only functions and procedures have bodies that can contain semicolons outside of strings
+            keyword = self._text[start:end].upper()
+            if keyword != 'OR' and keyword != 'REPLACE':
+                self._is_create = False
+                self._is_routine = keyword == 'FUNCTION' or keyword == 'PROCEDURE'
+        elif self._is_routine and 3 <= word_length <= 6:
+            # Bodies of routines in the SQL standard syntax are BEGIN ATOMIC ... END blocks, which may contain
+            # CASE ... END expressions and semicolons. BEGIN is not reserved, so it only opens a block when it is
+            # followed by ATOMIC outside of parentheses
+            keyword = self._text[start:end].upper()
+            is_begin_pending = self._is_begin_pending
+            self._is_begin_pending = False
+            if self._begin_depth == 0:
+                if keyword == 'BEGIN' and self._paren_depth == 0:
+                    self._is_begin_pending = True
+                elif keyword == 'ATOMIC' and is_begin_pending:
+                    self._begin_depth = 1
+            elif keyword == 'CASE':
+                self._begin_depth += 1
+            elif keyword == 'END':
+                self._begin_depth -= 1
+        else:
+            self._is_begin_pending = False
+
+    def _find_block_comment_end(self, position: int) -> int:
+        depth = 1
+        for match in _BLOCK_COMMENT_DELIMITER_PATTERN.finditer(self._text, position):
+            depth += 1 if match.group() == '/*' else -1
+            if depth == 0:
+                return match.end()
+        return len(self._text)
+
+    def _end_statement(self, end: int) -> None:
+        self._statements.append(SqlStatement(
+            self._text[self._start:end], self._get_executable_text(self._start, end), self._kind, self._start, end))
+        self._reset_statement()
+
+    def _get_executable_text(self, start: int, end: int) -> str:
+        if not self._comments:
+            return self._text[start:end].strip()
+
+        # Comments are removed along with the whitespace around them, keeping a space between the text on either side
+        pieces = []
+        for comment_start, comment_end in self._comments:
+            pieces.append(self._text[start:comment_start].rstrip())
+            start = comment_end
+        pieces.append(self._text[start:end].lstrip())
+        return ' '.join(piece.strip() for piece in pieces if piece.strip())
@@ -8,22 +8,79 @@ import logging
 import os
 import sys
 
-import ptvsd
-
-from pgsqltoolsservice.admin import AdminService
-from pgsqltoolsservice.capabilities.capabilities_service import CapabilitiesService
-from pgsqltoolsservice.connection import ConnectionService
-from pgsqltoolsservice.disaster_recovery.disaster_recovery_service import DisasterRecoveryService
-from pgsqltoolsservice.hosting import JSONRPCServer, ServiceProvider
-from pgsqltoolsservice.language import LanguageService
-from pgsqltoolsservice.metadata import MetadataService
-from pgsqltoolsservice.object_explorer import ObjectExplorerService
-from pgsqltoolsservice.query_execution import QueryExecutionService
-from pgsqltoolsservice.scripting.scripting_service import ScriptingService
-from pgsqltoolsservice.edit_data.edit_data_service import EditDataService
-from pgsqltoolsservice.tasks import TaskService
+from pgsqltoolsservice.hosting import JSONRPCServer, LazyService, ServiceProvider
 from pgsqltoolsservice.utils import constants
-from pgsqltoolsservice.workspace import WorkspaceService
+
+
+# Services are imported and created when they are first used, which keeps pgsmo, jinja2, sqlparse and
+# the other dependencies of the services out of startup. The methods each service handles must match
+# the handlers it registers
+_LAZY_SERVICES = {
+    constants.ADMIN_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.admin.admin_service', 'AdminService',
+        requests=['admin/getdatabaseinfo']
+    ),
+    constants.CAPABILITIES_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.capabilities.capabilities_service', 'CapabilitiesService',
+        requests=['capabilities/list', 'initialize']
+    ),
+    constants.CONNECTION_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.connection.connection_service', 'ConnectionService',
+        requests=[
+            'connection/buildconnectioninfo', 'connection/cancelconnect', 'connection/changedatabase', 'connection/connect',
+            'connection/disconnect', 'connection/getconnectionstring', 'connection/listdatabases'
+        ],
+        # The language service registers a callback for new connections
+        load_with=[constants.LANGUAGE_SERVICE_NAME]
+    ),
+    constants.DISASTER_RECOVERY_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.disaster_recovery.disaster_recovery_service', 'DisasterRecoveryService',
+        requests=['backup/backup', 'restore/restore']
+    ),
+    constants.LANGUAGE_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.language.language_service', 'LanguageService',
+        requests=[
+            'completionItem/resolve', 'textDocument/completion', 'textDocument/definition', 'textDocument/formatting',
+            'textDocument/rangeFormatting'
+        ],
+        notifications=['connection/languageflavorchanged']
+    ),
+    constants.METADATA_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.metadata.metadata_service', 'MetadataService',
+        requests=['metadata/list']
+    ),
+    constants.OBJECT_EXPLORER_NAME: LazyService(
+        'pgsqltoolsservice.object_explorer.object_explorer_service', 'ObjectExplorerService',
+        requests=['objectexplorer/closesession', 'objectexplorer/createsession', 'objectexplorer/expand', 'objectexplorer/refresh']
+    ),
+    constants.QUERY_EXECUTION_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.query_execution.query_execution_service', 'QueryExecutionService',
+        requests=[
+            'query/cancel', 'query/dispose', 'query/executeDocumentSelection', 'query/executeString',
+            'query/executedocumentstatement', 'query/executionPlan', 'query/exportToFile', 'query/resultStorageUsage', 'query/saveCsv',
+            'query/saveExcel', 'query/saveJson', 'query/simpleexecute', 'query/subset'
+        ]
+    ),
+    constants.SCRIPTING_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.scripting.scripting_service', 'ScriptingService',
+        requests=['scripting/script']
+    ),
+    constants.WORKSPACE_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.workspace.workspace_service', 'WorkspaceService',
+        notifications=['textDocument/didChange', 'textDocument/didClose', 'textDocument/didOpen', 'workspace/didChangeConfiguration']
+    ),
+    constants.EDIT_DATA_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.edit_data.edit_data_service', 'EditDataService',
+        requests=[
+            'edit/commit', 'edit/createRow', 'edit/deleteRow', 'edit/dispose', 'edit/initialize', 'edit/revertCell',
+            'edit/revertRow', 'edit/subset', 'edit/updateCell'
+        ]
+    ),
+    constants.TASK_SERVICE_NAME: LazyService(
+        'pgsqltoolsservice.tasks.task_service', 'TaskService',
+        requests=['tasks/canceltask', 'tasks/listtasks']
+    )
+}
 
 
 def _create_server(input_stream, output_stream, server_logger):
@@ -31,21 +88,7 @@ def _create_server(input_stream, output_stream, server_logger):
     rpc_server = JSONRPCServer(input_stream, output_stream, server_logger)
 
     # Create the service provider and add the providers to it
-    services = {
-        constants.ADMIN_SERVICE_NAME: AdminService,
-        constants.CAPABILITIES_SERVICE_NAME: CapabilitiesService,
-        constants.CONNECTION_SERVICE_NAME: ConnectionService,
-        constants.DISASTER_RECOVERY_SERVICE_NAME: DisasterRecoveryService,
-        constants.LANGUAGE_SERVICE_NAME: LanguageService,
-        constants.METADATA_SERVICE_NAME: MetadataService,
-        constants.OBJECT_EXPLORER_NAME: ObjectExplorerService,
-        constants.QUERY_EXECUTION_SERVICE_NAME: QueryExecutionService,
-        constants.SCRIPTING_SERVICE_NAME: ScriptingService,
-        constants.WORKSPACE_SERVICE_NAME: WorkspaceService,
-        constants.EDIT_DATA_SERVICE_NAME: EditDataService,
-        constants.TASK_SERVICE_NAME: TaskService
-    }
-    service_box = ServiceProvider(rpc_server, services, server_logger)
+    service_box = ServiceProvider(rpc_server, _LAZY_SERVICES, server_logger)
     service_box.initialize()
     return rpc_server
 
@@ -66,6 +109,8 @@ if __name__ == '__main__':
                     port = int(arg_parts[1])
                 except IndexError:
                     pass
+                # Only import the debugger when debugging is enabled, it is slow to import
+                import ptvsd
                 ptvsd.enable_attach(address=('0.0.0.0', port))
                 if arg_parts[0] == '--enable-remote-debugging-wait':
                     wait_for_debugger = True
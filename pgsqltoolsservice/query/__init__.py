@@ -8,9 +8,10 @@ from pgsqltoolsservice.query.query import (
     compute_selection_data_for_batches, ExecutionState, Query, QueryEvents, QueryExecutionSettings
 )
 from pgsqltoolsservice.query.result_set import ResultSet
+from pgsqltoolsservice.query.result_storage_manager import ResultStorageManager
 
 
 __all__ = [
     'Batch', 'BatchEvents', 'compute_selection_data_for_batches', 'create_batch', 'create_result_set',
-    'ExecutionState', 'ResultSet', 'ResultSetStorageType', 'Query', 'QueryEvents', 'QueryExecutionSettings'
+    'ExecutionState', 'ResultSet', 'ResultSetStorageType', 'ResultStorageManager', 'Query', 'QueryEvents', 'QueryExecutionSettings'
 ]
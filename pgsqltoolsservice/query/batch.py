@@ -9,14 +9,19 @@ from datetime import datetime
 
 import psycopg2
 import uuid
-import sqlparse
 
+from pgsqltoolsservice.converters.binary_copy_converters import get_binary_copy_converter
+from pgsqltoolsservice.parsers.statement_splitter import get_statement_kind, STATEMENT_KIND_SELECT
 from pgsqltoolsservice.utils.time import get_time_str, get_elapsed_time_str
+from pgsqltoolsservice.query.column_info import get_columns_info
+from pgsqltoolsservice.query.contracts import DbColumn  # noqa
 from pgsqltoolsservice.query.contracts import BatchSummary, SaveResultsRequestParams, SelectionData
-from pgsqltoolsservice.query.result_set import ResultSet  # noqa
+from pgsqltoolsservice.query.result_set import ResultSet, ResultSetEvents  # noqa
 from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
 from pgsqltoolsservice.query.in_memory_result_set import InMemoryResultSet
+from pgsqltoolsservice.query.copy_export import get_copyable_query
 from pgsqltoolsservice.query.data_storage import FileStreamFactory
+from pgsqltoolsservice.query.type_catalog import TYPE_DDL_COMMAND_TAGS, TypeCatalog
 
 
 class ResultSetStorageType(Enum):
@@ -26,10 +31,13 @@ class ResultSetStorageType(Enum):
 
 class BatchEvents:
 
-    def __init__(self, on_execution_started=None, on_execution_completed=None, on_result_set_completed=None):
+    def __init__(self, on_execution_started=None, on_execution_completed=None, on_result_set_completed=None,
+                 on_result_set_available=None, on_result_set_updated=None):
         self._on_execution_started = on_execution_started
         self._on_execution_completed = on_execution_completed
         self._on_result_set_completed = on_result_set_completed
+        self._on_result_set_available = on_result_set_available
+        self._on_result_set_updated = on_result_set_updated
 
 
 class SelectBatchEvents(BatchEvents):
@@ -47,7 +55,8 @@ class Batch:
             ordinal: int,
             selection: SelectionData,
             batch_events: BatchEvents = None,
-            storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE
+            storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE,
+            type_catalog: TypeCatalog = None
     ) -> None:
         self.id = ordinal
         self.selection = selection
@@ -61,6 +70,8 @@ class Batch:
         self._notices: List[str] = []
         self._batch_events = batch_events
         self._storage_type = storage_type
+        # Cache of the types of the database, used for the types of the columns of the result set
+        self._type_catalog = type_catalog
 
     @property
     def batch_summary(self) -> BatchSummary:
@@ -120,7 +131,11 @@ class Batch:
 
         try:
             cursor = self.get_cursor(connection)
-            cursor.execute(self.batch_text)
+            self.execute_statement(cursor)
+
+            # Types may have been created, renamed or dropped, so the cached types can no longer be trusted
+            if self._type_catalog is not None and cursor.statusmessage in TYPE_DDL_COMMAND_TAGS:
+                self._type_catalog.invalidate()
 
             self.after_execute(cursor)
         except psycopg2.DatabaseError as error:
@@ -142,59 +157,139 @@ class Batch:
             if self._batch_events and self._batch_events._on_execution_completed:
                 self._batch_events._on_execution_completed(self)
 
+    def execute_statement(self, cursor) -> None:
+        cursor.execute(self.batch_text)
+
     def after_execute(self, cursor) -> None:
         if cursor.description is not None:
             self.create_result_set(cursor)
 
     def create_result_set(self, cursor):
-        result_set = create_result_set(self._storage_type, 0, self.id)
-        result_set.read_result_to_end(cursor)
-        self._result_set = result_set
+        self._add_result_set().read_result_to_end(cursor)
 
     def get_subset(self, start_index: int, end_index: int):
         return self._result_set.get_subset(start_index, end_index)
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def _add_result_set(self) -> ResultSet:
+        result_set_events = ResultSetEvents(
+            on_result_set_partially_loaded=self._on_result_set_partially_loaded,
+            on_result_set_available=self._on_result_set_available
+        )
+        result_set = create_result_set(self._storage_type, 0, self.id, result_set_events, self._type_catalog)
+        # Keep the result set before reading it, so that the rows read so far can be retrieved while it is read
+        self._result_set = result_set
+        return result_set
+
+    def _on_result_set_available(self, result_set: ResultSet) -> None:
+        if self._batch_events and self._batch_events._on_result_set_available:
+            self._batch_events._on_result_set_available(self)
+
+    def _on_result_set_partially_loaded(self, result_set: ResultSet) -> None:
+        if self._batch_events and self._batch_events._on_result_set_updated:
+            self._batch_events._on_result_set_updated(self)
+
+    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure, on_progress=None) -> None:
 
         if params.result_set_index != 0:
             raise IndexError('Result set index should be always 0')
 
-        self._result_set.save_as(params, file_factory, on_success, on_failure)
+        self._result_set.save_as(params, file_factory, on_success, on_failure, on_progress)
 
 
 class SelectBatch(Batch):
 
-    def __init__(self, batch_text: str, ordinal: int, selection: SelectionData, batch_events: SelectBatchEvents, storage_type: ResultSetStorageType) -> None:
-        Batch.__init__(self, batch_text, ordinal, selection, batch_events, storage_type)
+    # Query describing the columns of the rows of a query without reading any, and query copying its rows
+    DESCRIBE_QUERY_TEMPLATE = 'SELECT * FROM ({0}) AS described LIMIT 0'
+    BINARY_COPY_QUERY_TEMPLATE = 'COPY ({0}) TO STDOUT (FORMAT binary)'
+
+    def __init__(self, batch_text: str, ordinal: int, selection: SelectionData, batch_events: SelectBatchEvents, storage_type: ResultSetStorageType,
+                 type_catalog: TypeCatalog = None, use_binary_copy: bool = False) -> None:
+        """
+        :param use_binary_copy: Whether to spool the rows of the batch with COPY in the binary format when they are stored
+        in files and all of their columns are of types that can be read from it, rather than through a named cursor
+        """
+        Batch.__init__(self, batch_text, ordinal, selection, batch_events, storage_type, type_catalog)
+        self._use_binary_copy = use_binary_copy and storage_type is ResultSetStorageType.FILE_STORAGE
+
+        # COPY query and columns of the rows when they are spooled with COPY, None when they are read through a cursor
+        self._binary_copy_query: str = None
+        self._binary_copy_columns_info: List[DbColumn] = None
 
     def get_cursor(self, connection: 'psycopg2.extensions.connection'):
+        if self._use_binary_copy and self._prepare_binary_copy(connection):
+            return connection.cursor()
+
         cursor_name = str(uuid.uuid4())
         # Named cursors can be created only in the transaction. As our connection has autocommit set to true
         # there is not transaction concept with it so we need to have withhold to true and as this cursor is local
         # and we explicitly close it we are good
         return connection.cursor(name=cursor_name, withhold=True)
 
+    def execute_statement(self, cursor) -> None:
+        # Rows that are copied are read by the COPY query the result set runs
+        if self._binary_copy_query is None:
+            cursor.execute(self.batch_text)
+
     def after_execute(self, cursor) -> None:
-        super().create_result_set(cursor)
+        if self._binary_copy_query is None:
+            super().create_result_set(cursor)
+        else:
+            self._add_result_set().read_binary_copy_to_end(cursor, self._binary_copy_query, self._binary_copy_columns_info)
 
+    def _prepare_binary_copy(self, connection: 'psycopg2.extensions.connection') -> bool:
+        """
+        Describes the columns of the rows of the batch, returning True if they can be copied in the binary format.
+        The rows are read through a named cursor otherwise, which reports any error of the statement
+        """
+        self._binary_copy_query = None
+        self._binary_copy_columns_info = None
 
-def create_result_set(storage_type: ResultSetStorageType, result_set_id: int, batch_id: int) -> ResultSet:
+        # A failed describe would abort the transaction of the connection
+        if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
 
-    if storage_type is ResultSetStorageType.FILE_STORAGE:
-        return FileStorageResultSet(result_set_id, batch_id)
+        try:
+            query = get_copyable_query(self.batch_text)
+        except ValueError:
+            return False
 
-    return InMemoryResultSet(result_set_id, batch_id)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(SelectBatch.DESCRIBE_QUERY_TEMPLATE.format(query))
+                columns_info = get_columns_info(cursor.description, connection, self._type_catalog)
+        except psycopg2.DatabaseError:
+            return False
+
+        if not columns_info or any(get_binary_copy_converter(column.data_type) is None for column in columns_info):
+            return False
+
+        self._binary_copy_query = SelectBatch.BINARY_COPY_QUERY_TEMPLATE.format(query)
+        self._binary_copy_columns_info = columns_info
+        return True
+
+
+def create_result_set(storage_type: ResultSetStorageType, result_set_id: int, batch_id: int, events: ResultSetEvents = None,
+                      type_catalog: TypeCatalog = None) -> ResultSet:
+
+    if storage_type is ResultSetStorageType.FILE_STORAGE:
+        return FileStorageResultSet(result_set_id, batch_id, events, type_catalog=type_catalog)
 
+    return InMemoryResultSet(result_set_id, batch_id, events, type_catalog)
 
-def create_batch(batch_text: str, ordinal: int, selection: SelectionData, batch_events: BatchEvents, storage_type: ResultSetStorageType) -> Batch:
-    sql = sqlparse.parse(batch_text)
-    statement = sql[0]
 
-    if statement.get_type().lower() == 'select':
-        index = statement.token_index(statement.token_first())
-        second_token = statement.token_next(index)
+def create_batch(batch_text: str, ordinal: int, selection: SelectionData, batch_events: BatchEvents, storage_type: ResultSetStorageType,
+                 type_catalog: TypeCatalog = None, statement_kind: str = None, use_binary_copy: bool = False) -> Batch:
+    """
+    Creates a batch for a statement, reading its results through a named cursor if it is a SELECT statement
+    :param statement_kind: Kind of the statement as determined by the statement splitter, determined from the
+    text of the batch if not provided
+    :param use_binary_copy: Whether the rows of a SELECT statement should be spooled with COPY in the binary format when possible
+    """
+    if statement_kind is None:
+        statement_kind = get_statement_kind(batch_text)
 
-        if second_token[1].value.lower() != 'into':
-            return SelectBatch(batch_text, ordinal, selection, batch_events, storage_type)
+    # SELECT INTO statements create a table rather than return rows, so they are not run through a cursor
+    if statement_kind == STATEMENT_KIND_SELECT:
+        return SelectBatch(batch_text, ordinal, selection, batch_events, storage_type, type_catalog, use_binary_copy)
 
-    return Batch(batch_text, ordinal, selection, batch_events, storage_type)
+    return Batch(batch_text, ordinal, selection, batch_events, storage_type, type_catalog)
@@ -4,13 +4,19 @@
 # --------------------------------------------------------------------------------------------
 
 from typing import List
-from psycopg2 import sql
 
 from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.type_catalog import TypeCatalog, query_types
 
 
-def get_columns_info(description, connection) -> List[DbColumn]:
-
+def get_columns_info(description, connection, type_catalog: TypeCatalog = None) -> List[DbColumn]:
+    """
+    Returns the columns of a cursor description, with the names of their types
+    :param description: Description of the cursor
+    :param connection: Connection the cursor belongs to
+    :param type_catalog: Optional cache of the types of the database of the connection. If not provided the
+    types of the columns are queried every time
+    """
     if description is None:
         raise ValueError('Cursor description is not available')
 
@@ -19,24 +25,16 @@ def get_columns_info(description, connection) -> List[DbColumn]:
         return [DbColumn.from_cursor_description(index, column) for index, column in enumerate(description)]
 
     column_type_oids = [column_info[1] for column_info in description]
+    if type_catalog is not None:
+        types = type_catalog.get_types(connection, column_type_oids)
+    else:
+        types = {type_info.oid: type_info for type_info in query_types(connection, column_type_oids)}
 
-    query_template = sql.SQL('SELECT {}, {} FROM {} WHERE {} IN ({})').format(
-        sql.Identifier('oid'),
-        sql.Identifier('typname'),
-        sql.Identifier('pg_type'),
-        sql.Identifier('oid'),
-        sql.SQL(', ').join(sql.Placeholder() * len(column_type_oids))
-    )
     columns_info = []
-
-    with connection.cursor() as type_cursor:
-        type_cursor.execute(query_template, column_type_oids)
-        rows = type_cursor.fetchall()
-        rows_dict = dict(rows)
-
-        for index, column in enumerate(description):
-            db_column = DbColumn.from_cursor_description(index, column)
-            db_column.data_type = rows_dict.get(column[1])
-            columns_info.append(db_column)
+    for index, column in enumerate(description):
+        db_column = DbColumn.from_cursor_description(index, column)
+        type_info = types.get(column[1])
+        db_column.data_type = type_info.name if type_info is not None else None
+        columns_info.append(db_column)
 
     return columns_info
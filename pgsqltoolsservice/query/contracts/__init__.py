@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from pgsqltoolsservice.query.contracts.column import DbColumn, DbCellValue
+from pgsqltoolsservice.query.contracts.execution_plan import ExecutionPlan, ExecutionPlanNode
 from pgsqltoolsservice.query.contracts.result_set_subset import ResultSetSubset, SubsetResult
 from pgsqltoolsservice.query.contracts.result_set_summary import ResultSetSummary
 from pgsqltoolsservice.query.contracts.selection_data import SelectionData
@@ -12,5 +13,5 @@ from pgsqltoolsservice.query.contracts.save_as_request import SaveResultsRequest
 
 
 __all__ = [
-    'BatchSummary', 'DbColumn', 'DbCellValue', 'ResultSetSummary', 'ResultSetSubset',
+    'BatchSummary', 'DbColumn', 'DbCellValue', 'ExecutionPlan', 'ExecutionPlanNode', 'ResultSetSummary', 'ResultSetSubset',
     'SaveResultsRequestParams', 'SelectionData', 'SubsetResult']
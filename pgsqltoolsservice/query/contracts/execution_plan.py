@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from typing import List  # noqa
+
+
+class ExecutionPlanNode:
+    """
+    Node of an execution plan, with the metrics derived from its actual timings. Times are in milliseconds,
+    and metrics are None if the node was never executed or the server did not report what they depend on
+    Attributes:
+        id:                         Number of the node in the order the nodes are listed in the plan, 0 for its root
+        parent_id:                  ID of the parent of the node, None for the root of the plan
+        node_type:                  Type of the node, such as Seq Scan or Hash Join
+        relation_name:              Name of the table the node scans, if any
+        index_name:                 Name of the index the node scans, if any
+        startup_cost:               Estimated cost before the first row is returned
+        total_cost:                 Estimated cost to return every row
+        plan_rows:                  Estimated number of rows returned per loop
+        actual_startup_time:        Average time before the first row was returned per loop
+        actual_total_time:          Average time to return every row per loop
+        actual_rows:                Average number of rows returned per loop
+        actual_loops:               Number of times the node was executed
+        shared_hit_blocks:          Shared buffer blocks found in the cache by the node and its children
+        shared_read_blocks:         Shared buffer blocks read from disk by the node and its children
+        inclusive_time:             Time spent in the node and its children over every loop
+        self_time:                  Time spent in the node over every loop, without that of its children
+        row_estimate_error_ratio:   Actual rows divided by estimated rows, greater than 1 when the rows were underestimated
+        buffer_hit_rate:            Fraction of the shared buffer blocks of the node and its children found in the cache
+        details:                    Other properties of the node reported by the server, such as its filter or sort key
+        children:                   Nodes whose rows the node consumes
+    """
+
+    def __init__(self, node_id: int, parent_id: int = None):
+        self.id: int = node_id
+        self.parent_id: int = parent_id
+        self.node_type: str = None
+        self.relation_name: str = None
+        self.index_name: str = None
+        self.startup_cost: float = None
+        self.total_cost: float = None
+        self.plan_rows: int = None
+        self.actual_startup_time: float = None
+        self.actual_total_time: float = None
+        self.actual_rows: int = None
+        self.actual_loops: int = None
+        self.shared_hit_blocks: int = None
+        self.shared_read_blocks: int = None
+        self.inclusive_time: float = None
+        self.self_time: float = None
+        self.row_estimate_error_ratio: float = None
+        self.buffer_hit_rate: float = None
+        self.details: dict = {}
+        self.children: List[ExecutionPlanNode] = []
+
+
+class ExecutionPlan:
+    """
+    Actual execution plan of a statement
+    Attributes:
+        format:             Format of the content of the plan
+        content:            Plan as it was returned by the server
+        root:               Root node of the plan
+        planning_time:      Time in milliseconds taken to plan the statement
+        execution_time:     Time in milliseconds taken to execute the statement
+        hot_path:           IDs of the nodes from the root to the node with the largest self time
+    """
+
+    def __init__(self, content: str, root: ExecutionPlanNode, planning_time: float, execution_time: float, hot_path: List[int]):
+        self.format: str = 'json'
+        self.content: str = content
+        self.root: ExecutionPlanNode = root
+        self.planning_time: float = planning_time
+        self.execution_time: float = execution_time
+        self.hot_path: List[int] = hot_path
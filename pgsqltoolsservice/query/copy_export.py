@@ -0,0 +1,64 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Exports the rows of a query to a CSV file with COPY, so that the server formats the rows and they are
+streamed to the file without being parsed, stored or converted by the tools service
+"""
+
+import io
+import os
+
+from pgsqltoolsservice.parsers.statement_splitter import split_statements, STATEMENT_KIND_SELECT
+
+
+COPY_CSV_TEMPLATE = 'COPY ({0}) TO STDOUT WITH (FORMAT csv{1})'
+
+# Kinds of statements that can be the query of a COPY statement
+COPYABLE_STATEMENT_KINDS = frozenset([STATEMENT_KIND_SELECT, 'VALUES', 'TABLE'])
+
+# Number of bytes copied to the file at a time
+COPY_BUFFER_SIZE = 1024 * 1024
+
+COPY_MULTIPLE_STATEMENTS_ERROR = 'Only a single query can be exported'
+COPY_UNSUPPORTED_STATEMENT_ERROR = 'Only SELECT, VALUES and TABLE queries can be exported'
+
+
+def get_copyable_query(query_text: str) -> str:
+    """
+    Returns the text of a query that can be exported with COPY, without its comments or terminating semicolon
+    :raises ValueError: If the text is not a single query whose rows can be copied
+    """
+    statements = [statement for statement in split_statements(query_text) if not statement.is_empty]
+    if len(statements) != 1:
+        raise ValueError(COPY_MULTIPLE_STATEMENTS_ERROR)
+    if statements[0].kind not in COPYABLE_STATEMENT_KINDS:
+        raise ValueError(COPY_UNSUPPORTED_STATEMENT_ERROR)
+
+    return statements[0].executable_text.rstrip(';').rstrip()
+
+
+def copy_query_to_file(connection, query_text: str, file_path: str, include_headers: bool) -> int:
+    """
+    Runs a query as COPY ... TO STDOUT in CSV format and writes its output to a file as it is received
+    :param connection: Connection to run the query on, which should not be used by anything else meanwhile
+    :param query_text: A single SELECT, VALUES or TABLE query
+    :param file_path: Path of the CSV file to write, which is replaced if it exists
+    :param include_headers: Whether the first line of the file should be the names of the columns
+    :returns: The number of rows exported
+    :raises ValueError: If the text is not a single query whose rows can be copied
+    """
+    copy_statement = COPY_CSV_TEMPLATE.format(get_copyable_query(query_text), ', HEADER' if include_headers else '')
+
+    try:
+        with io.open(file_path, 'wb') as file:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(copy_statement, file, COPY_BUFFER_SIZE)
+                return cursor.rowcount
+    except Exception:
+        # Do not leave a partial export behind
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
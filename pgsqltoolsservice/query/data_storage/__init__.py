@@ -6,6 +6,7 @@
 from pgsqltoolsservice.query.data_storage.storage_data_reader import StorageDataReader
 from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
+from pgsqltoolsservice.query.data_storage.binary_copy_stream import BinaryCopyStream
 from pgsqltoolsservice.query.data_storage.file_stream_factory import FileStreamFactory
 from pgsqltoolsservice.query.data_storage.save_as_csv_writer import SaveAsCsvWriter
 from pgsqltoolsservice.query.data_storage.save_as_csv_file_stream_factory import SaveAsCsvFileStreamFactory
@@ -13,9 +14,10 @@ from pgsqltoolsservice.query.data_storage.save_as_json_writer import SaveAsJsonW
 from pgsqltoolsservice.query.data_storage.save_as_json_file_stream_factory import SaveAsJsonFileStreamFactory
 from pgsqltoolsservice.query.data_storage.save_as_excel_writer import SaveAsExcelWriter
 from pgsqltoolsservice.query.data_storage.save_as_excel_writer_factory import SaveAsExcelFileStreamFactory
+from pgsqltoolsservice.query.data_storage.save_as_export import batch_rows, export_rows
 
 __all__ = [
     'FileStreamFactory', 'SaveAsCsvWriter', 'SaveAsJsonWriter', 'SaveAsExcelWriter', 'SaveAsExcelFileStreamFactory',
     'SaveAsJsonFileStreamFactory', 'SaveAsCsvFileStreamFactory', 'ServiceBufferFileStreamWriter',
-    'ServiceBufferFileStreamReader', 'StorageDataReader'
+    'ServiceBufferFileStreamReader', 'StorageDataReader', 'BinaryCopyStream', 'batch_rows', 'export_rows'
 ]
@@ -0,0 +1,141 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import struct
+from typing import Callable, List  # noqa
+
+from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
+
+
+class BinaryCopyStream:
+    """
+    File like object that the output of COPY ... TO STDOUT (FORMAT binary) is copied to, which stores the
+    tuples of the output as rows of a service buffer file as they are received. Only the length of each
+    field is read, the values are copied to the file as they are and converted when the rows are read
+    """
+
+    SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+
+    INVALID_SIGNATURE_ERROR = 'Copy data is not in the binary format'
+    UNSUPPORTED_FLAGS_ERROR = 'Copy data has unsupported flags'
+    FIELD_COUNT_ERROR = 'Copy data has {0} fields per row instead of {1}'
+    INCOMPLETE_DATA_ERROR = 'Copy data ended before its trailer'
+
+    _HEADER = struct.Struct('>11sII')
+    _FIELD_COUNT = struct.Struct('>h')
+    _FIELD_LENGTH = struct.Struct('>i')
+
+    # Flags whose meaning is known. Bit 16 says that OIDs are included in the data, which is never asked for,
+    # and the lower 16 bits are for flags that can be ignored
+    _CRITICAL_FLAGS_MASK = 0xFFFF0000
+
+    def __init__(self, writer: ServiceBufferFileStreamWriter, column_count: int, on_rows_written: Callable[[List[int]], None] = None) -> None:
+        """
+        :param writer: Writer of the file to store the rows in
+        :param column_count: Number of columns of the rows of the query copied
+        :param on_rows_written: Optional callback with the locations of the rows stored from each block of data received
+        """
+        self._writer = writer
+        self._column_count = column_count
+        self._on_rows_written = on_rows_written
+
+        # Data received that has not been stored yet, which is the start of a tuple that is not complete
+        self._buffer = bytearray()
+        self._has_header = False
+        self._has_trailer = False
+
+    @property
+    def is_complete(self) -> bool:
+        """True once the trailer that ends the data has been received"""
+        return self._has_trailer
+
+    def write(self, data: bytes) -> int:
+        """Stores the rows of the tuples completed by a block of data"""
+        data_length = len(data)
+        if self._buffer:
+            self._buffer += data
+            data = self._buffer
+
+        position = 0 if self._has_header else self._read_header(data)
+        locations = []
+        if position is not None:
+            position = self._write_tuples(data, position, locations)
+
+        if position is None:
+            # The header is not complete, it is read again with the next block of data
+            position = 0
+        if data is self._buffer:
+            del self._buffer[:position]
+        else:
+            self._buffer += memoryview(data)[position:]
+
+        if locations and self._on_rows_written is not None:
+            self._on_rows_written(locations)
+
+        return data_length
+
+    def close(self) -> None:
+        """
+        Checks that all of the data has been received
+        :raises ValueError: If the data ended before its trailer
+        """
+        if not self._has_trailer:
+            raise ValueError(BinaryCopyStream.INCOMPLETE_DATA_ERROR)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _read_header(self, data: bytes) -> int:
+        """Reads the header of the data, returning the offset of the first tuple or None if the header is not complete"""
+        if len(data) < self._HEADER.size:
+            return None
+
+        signature, flags, extension_length = self._HEADER.unpack_from(data)
+        if signature != self.SIGNATURE:
+            raise ValueError(BinaryCopyStream.INVALID_SIGNATURE_ERROR)
+        if flags & self._CRITICAL_FLAGS_MASK:
+            raise ValueError(BinaryCopyStream.UNSUPPORTED_FLAGS_ERROR)
+
+        position = self._HEADER.size + extension_length
+        if len(data) < position:
+            return None
+
+        self._has_header = True
+        return position
+
+    def _write_tuples(self, data: bytes, position: int, locations: List[int]) -> int:
+        """Stores the complete tuples of the data from a position, returning the offset of the first incomplete tuple"""
+        data_length = len(data)
+        unpack_field_count = self._FIELD_COUNT.unpack_from
+        unpack_field_length = self._FIELD_LENGTH.unpack_from
+        write_row = self._writer.write_binary_copy_row
+
+        while not self._has_trailer and position + 2 <= data_length:
+            field_count = unpack_field_count(data, position)[0]
+            if field_count == -1:
+                self._has_trailer = True
+                return position + 2
+            if field_count != self._column_count:
+                raise ValueError(BinaryCopyStream.FIELD_COUNT_ERROR.format(field_count, self._column_count))
+
+            cells_start = position + 2
+            cell_end = cells_start
+            cell_ends = []
+            nulls = 0
+            for index in range(field_count):
+                if cell_end + 4 > data_length:
+                    return position
+                field_length = unpack_field_length(data, cell_end)[0]
+                if field_length == -1:
+                    nulls |= 1 << index
+                    field_length = 0
+                cell_end += 4 + field_length
+                cell_ends.append(cell_end - cells_start)
+
+            if cell_end > data_length:
+                return position
+
+            locations.append(write_row(data, cells_start, cell_ends, nulls))
+            position = cell_end
+
+        return position
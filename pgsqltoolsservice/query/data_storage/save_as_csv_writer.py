@@ -16,19 +16,22 @@ class SaveAsCsvWriter(SaveAsWriter):
     def __init__(self, stream: io.BufferedWriter, params: SaveResultsRequestParams) -> None:
         SaveAsWriter.__init__(self, stream, params)
         self._header_written = False
+        self._writer = csv.writer(self._file_stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
 
     def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        self.write_rows([row], columns)
 
-        writer = csv.writer(self._file_stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    def write_rows(self, rows: List[List[DbCellValue]], columns: List[DbColumn]):
+        column_start_index = self.get_start_index()
+        column_end_index = self.get_end_index(columns)
 
         if self._params.include_headers and not self._header_written:
-            selected_column_names = [column.column_name for column in columns[
-                self.get_start_index(): self.get_end_index(columns)]]
-            writer.writerow(selected_column_names)
+            selected_column_names = [column.column_name for column in columns[column_start_index: column_end_index]]
+            self._writer.writerow(selected_column_names)
 
             self._header_written = True
 
-        selected_cells = [cell.display_value for cell in row[
-            self.get_start_index(): self.get_end_index(columns)]]
+        self._writer.writerows([cell.display_value for cell in row[column_start_index: column_end_index]] for row in rows)
 
-        writer.writerow(selected_cells)
+    def complete_write(self):
+        pass
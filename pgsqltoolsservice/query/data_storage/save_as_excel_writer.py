@@ -6,38 +6,42 @@
 import io
 from typing import List
 import xlsxwriter
-import string
 
 from pgsqltoolsservice.query.data_storage.save_as_writer import SaveAsWriter
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue, SaveResultsRequestParams
 
 
 class SaveAsExcelWriter(SaveAsWriter):
+    """
+    Writes rows to an Excel workbook. The workbook is written in constant memory mode, in which each row is
+    flushed to a temporary file once the next row is written rather than kept until the workbook is closed
+    """
 
     def __init__(self, stream: io.BufferedWriter, params: SaveResultsRequestParams) -> None:
         SaveAsWriter.__init__(self, stream, params)
 
         self._header_written = False
-        self._workbook = xlsxwriter.Workbook(self._file_stream.name)
+        self._workbook = xlsxwriter.Workbook(self._file_stream.name, {'constant_memory': True})
         self._worksheet = self._workbook.add_worksheet()
         self._current_row = 1
 
     def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        self.write_rows([row], columns)
 
+    def write_rows(self, rows: List[List[DbCellValue]], columns: List[DbColumn]):
         column_start_index = self.get_start_index()
         column_end_index = self.get_end_index(columns)
 
         if not self._header_written:
             bold = self._workbook.add_format({'bold': 1})
-            for index, column in enumerate(columns[column_start_index: column_end_index]):
-                self._worksheet.write(string.ascii_uppercase[index] + '1', column.column_name, bold)
+            column_names = [column.column_name for column in columns[column_start_index: column_end_index]]
+            self._worksheet.write_row(0, 0, column_names, bold)
 
             self._header_written = True
 
-        for loop_index, column_index in enumerate(range(column_start_index, column_end_index)):
-            self._worksheet.write(self._current_row, loop_index, row[column_index].display_value)
-
-        self._current_row += 1
+        for row in rows:
+            self._worksheet.write_row(self._current_row, 0, [cell.display_value for cell in row[column_start_index: column_end_index]])
+            self._current_row += 1
 
     def complete_write(self):
         self._workbook.close()
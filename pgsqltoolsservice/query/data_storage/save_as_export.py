@@ -0,0 +1,52 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import time
+from typing import Callable, Iterable, List  # noqa
+
+from pgsqltoolsservice.query.data_storage.save_as_writer import SaveAsWriter
+from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue
+
+
+# Number of rows read at a time from results that are not stored in pages
+SAVE_AS_BATCH_SIZE = 1000
+
+# Minimum number of seconds between reports of the progress of a save
+SAVE_AS_PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+def export_rows(writer: SaveAsWriter, row_batches: Iterable[List[List[DbCellValue]]], columns: List[DbColumn], row_count: int,
+                on_progress: Callable[[int, int], None] = None) -> int:
+    """
+    Writes rows to a save as writer a block at a time and completes the write, so that only one block of rows
+    is held in memory however large the result is
+    :param writer: Writer of the saved file
+    :param row_batches: Blocks of rows to save, read as they are written
+    :param columns: Columns of the rows
+    :param row_count: Number of rows to save, reported with the progress
+    :param on_progress: Called with the number of rows written so far and the number of rows to save, at most
+    once every SAVE_AS_PROGRESS_INTERVAL_SECONDS
+    :returns: The number of rows written
+    """
+    rows_written = 0
+    next_progress_time = time.monotonic() + SAVE_AS_PROGRESS_INTERVAL_SECONDS
+
+    for rows in row_batches:
+        writer.write_rows(rows, columns)
+        rows_written += len(rows)
+
+        if on_progress is not None and time.monotonic() >= next_progress_time:
+            on_progress(rows_written, row_count)
+            next_progress_time = time.monotonic() + SAVE_AS_PROGRESS_INTERVAL_SECONDS
+
+    writer.complete_write()
+    return rows_written
+
+
+def batch_rows(get_row: Callable[[int], List[DbCellValue]], row_start_index: int, row_end_index: int,
+               batch_size: int = SAVE_AS_BATCH_SIZE) -> Iterable[List[List[DbCellValue]]]:
+    """Reads the rows in a range with a function that reads a single row, in blocks of batch_size rows"""
+    for batch_start in range(row_start_index, row_end_index, batch_size):
+        yield [get_row(index) for index in range(batch_start, min(batch_start + batch_size, row_end_index))]
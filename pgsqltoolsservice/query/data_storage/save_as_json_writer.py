@@ -10,27 +10,45 @@ from typing import List
 from pgsqltoolsservice.query.data_storage.save_as_writer import SaveAsWriter
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue, SaveResultsRequestParams
 
+_ENCODER = json.JSONEncoder()
+
 
 class SaveAsJsonWriter(SaveAsWriter):
+    """
+    Writes rows as a JSON array of objects keyed by column name. The array is written an element at a time,
+    laid out as json.dump would with an indent of one
+    """
 
     def __init__(self, stream: io.BufferedWriter, params: SaveResultsRequestParams) -> None:
         SaveAsWriter.__init__(self, stream, params)
 
-        self._data = []
+        self._row_written = False
 
     def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        self.write_rows([row], columns)
 
+    def write_rows(self, rows: List[List[DbCellValue]], columns: List[DbColumn]):
         column_start_index = self.get_start_index()
         column_end_index = self.get_end_index(columns)
-
-        json_row = {}
-
-        for index in range(column_start_index, column_end_index):
-            column_name = columns[index].column_name
-            column_value = row[index].display_value
-            json_row[column_name] = column_value
-
-        self._data.append(json_row)
+        column_names = [column.column_name for column in columns[column_start_index: column_end_index]]
+
+        encode = _ENCODER.encode
+        elements = []
+        for row in rows:
+            json_row = {
+                column_name: row[index].display_value
+                for column_name, index in zip(column_names, range(column_start_index, column_end_index))
+            }
+            if json_row:
+                elements.append(' {\n' + ',\n'.join(f'  {encode(key)}: {encode(value)}' for key, value in json_row.items()) + '\n }')
+            else:
+                elements.append(' {}')
+
+        if not elements:
+            return
+
+        self._file_stream.write((',\n' if self._row_written else '[\n') + ',\n'.join(elements))
+        self._row_written = True
 
     def complete_write(self):
-        json.dump(self._data, self._file_stream, indent=True)
+        self._file_stream.write('\n]' if self._row_written else '[]')
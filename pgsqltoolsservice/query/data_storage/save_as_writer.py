@@ -12,6 +12,10 @@ from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue
 
 
 class SaveAsWriter(ServiceBufferFileStream):
+    """
+    Base for the writers of saved results. Writers write each row to their stream as it is given to them,
+    so that results of any size are saved in constant memory
+    """
 
     def __init__(self, stream: io.BufferedWriter, params):
         ServiceBufferFileStream.__init__(self, stream)
@@ -19,12 +23,16 @@ class SaveAsWriter(ServiceBufferFileStream):
         self._params = params
         self._column_start_index: int = params.column_start_index if params.is_save_selection else None
         self._column_end_index: int = params.column_end_index if params.is_save_selection else None
-        self._column_count: int = params.column_end_index - params.column_start_index + 1 if params.is_save_selection else None
 
     @abstractmethod
     def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
         pass
 
+    def write_rows(self, rows: List[List[DbCellValue]], columns: List[DbColumn]):
+        """Writes a block of rows, one row at a time unless the writer can write them together"""
+        for row in rows:
+            self.write_row(row, columns)
+
     @abstractmethod
     def complete_write(self):
         pass
@@ -33,4 +41,4 @@ class SaveAsWriter(ServiceBufferFileStream):
         return self._column_start_index if self._column_start_index else 0
 
     def get_end_index(self, columns: List[DbColumn]):
-        return self._column_count if self._column_count else len(columns)
+        return self._column_end_index + 1 if self._column_end_index is not None else len(columns)
@@ -4,15 +4,52 @@
 # --------------------------------------------------------------------------------------------
 
 import io
+import struct
 
 
 class ServiceBufferFileStream:
+    """
+    Base for the service buffer formatted file streams. Rows are stored in pages of about PAGE_SIZE bytes,
+    a row larger than that being stored in a page of its own. Each page is laid out as:
+
+    - a header with the length of the page in bytes, the number of rows, the number of columns and the
+      format of the cells
+    - a null bitmap for each row, with a bit per column set if the value is NULL
+    - a table of the offsets at which each cell of each row ends, relative to the start of the data
+    - the data of each cell converted to bytes, one after the other
+
+    A row is located by the offset of its page in the file and its slot in the page. The files only live
+    for the length of a session so values are stored in the native byte order, except in pages of rows
+    received with COPY in the binary format, whose cells are stored as received: each is the length of the
+    value as a 32 bit integer followed by the value in network byte order
+    """
+
+    PAGE_SIZE = 64 * 1024
+
+    # Maximum number of rows in a page, limited by the row count field of the page header
+    MAX_PAGE_ROWS = 0xFFFF
+
+    # Formats of the cells of a page
+    CELL_FORMAT_NATIVE = 0
+    CELL_FORMAT_BINARY_COPY = 1
+
+    _PAGE_HEADER = struct.Struct('=IHHB')
+    _SLOT_BITS = 16
+    _SLOT_MASK = (1 << _SLOT_BITS) - 1
 
     def __init__(self, stream: io.BufferedIOBase) -> None:
         self._file_stream = stream
 
+    @classmethod
+    def get_page_offset(cls, location: int) -> int:
+        """Returns the offset in the file of the page of a row from the location of the row"""
+        return location >> cls._SLOT_BITS
+
     def __enter__(self):
         return self
 
     def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
         self._file_stream.close()
@@ -5,23 +5,161 @@
 
 import tempfile
 import io
+import mmap
 import os
+import shutil
+import threading
+import time
+from typing import Tuple  # noqa
+
+try:
+    import fcntl
+except ImportError:
+    # Windows locks byte ranges of files instead
+    fcntl = None
+    import msvcrt
 
 from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
 
 
+# Directory under the temporary directory holding a directory of spool files for each tools service process.
+# Each process holds a lock on a file in its directory for as long as it runs, so that the directories left
+# behind by processes that have exited can be told apart from those of processes that are still running
+STORAGE_ROOT_NAME = 'pgtoolsservice_results'
+LOCK_FILE_NAME = '.lock'
+
+# Directories are created and locked under a pending name before they are renamed into place, so that cleanup never
+# finds a directory of a running process unlocked. Pending directories are only cleaned up once they are old enough to
+# have been locked, in case their process exited before renaming them
+PENDING_DIRECTORY_PREFIX = '.pending_'
+PENDING_DIRECTORY_TIMEOUT_SECONDS = 60
+
+_storage_directory: str = None
+_storage_lock_fd: int = None
+_storage_directory_lock = threading.Lock()
+
+
 def create_file() -> str:
-    return tempfile.mkstemp()[1]
+    file_descriptor, file_name = tempfile.mkstemp(dir=get_storage_directory())
+    os.close(file_descriptor)
+    return file_name
 
 
 def get_reader(file_name: str):
     return ServiceBufferFileStreamReader(io.open(file_name, 'rb'))
 
 
-def get_writer(file_name: str):
-    return ServiceBufferFileStreamWriter(io.open(file_name, 'wb'))
+def get_mapped_reader(file_name: str):
+    """Returns a reader over a read only memory map of the file as it is now, which must not be empty"""
+    with io.open(file_name, 'rb') as file:
+        return ServiceBufferFileStreamReader(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def get_writer(file_name: str, append: bool = False):
+    return ServiceBufferFileStreamWriter(io.open(file_name, 'ab' if append else 'wb'))
 
 
 def delete_file(file_name: str):
-    os.remove(file_name)
+    try:
+        os.remove(file_name)
+    except OSError:
+        # The file may still be open on Windows, in which case it is deleted with the storage directory
+        pass
+
+
+def get_storage_directory() -> str:
+    """Returns the directory of the spool files of this process, creating and locking it if it does not exist"""
+    global _storage_directory, _storage_lock_fd
+
+    with _storage_directory_lock:
+        if _storage_directory is None:
+            root_directory = _get_storage_root()
+            os.makedirs(root_directory, exist_ok=True)
+            _storage_directory, _storage_lock_fd = _create_locked_directory(root_directory)
+
+        return _storage_directory
+
+
+def delete_storage_directory() -> None:
+    """Deletes the directory of the spool files of this process with any files left in it"""
+    global _storage_directory, _storage_lock_fd
+
+    with _storage_directory_lock:
+        if _storage_directory is None:
+            return
+
+        os.close(_storage_lock_fd)
+        shutil.rmtree(_storage_directory, ignore_errors=True)
+        _storage_directory, _storage_lock_fd = None, None
+
+
+def delete_stale_storage_directories() -> int:
+    """
+    Deletes the spool file directories left behind by tools service processes that are no longer running
+    :returns: The number of directories deleted
+    """
+    root_directory = _get_storage_root()
+    if not os.path.isdir(root_directory):
+        return 0
+
+    deleted_count = 0
+    for entry in os.scandir(root_directory):
+        if not entry.is_dir() or entry.path == _storage_directory:
+            continue
+
+        try:
+            # A new pending directory may not have been locked yet by the process creating it
+            if entry.name.startswith(PENDING_DIRECTORY_PREFIX) and time.time() - entry.stat().st_mtime < PENDING_DIRECTORY_TIMEOUT_SECONDS:
+                continue
+            lock_fd = os.open(os.path.join(entry.path, LOCK_FILE_NAME), os.O_RDWR)
+        except OSError:
+            # Either the directory is not one of ours, or its process is yet to create its lock file
+            continue
+
+        try:
+            # The lock can only be taken once the process that owned the directory has exited
+            if not _try_lock(lock_fd):
+                continue
+        finally:
+            os.close(lock_fd)
+
+        shutil.rmtree(entry.path, ignore_errors=True)
+        deleted_count += 1
+
+    return deleted_count
+
+
+# IMPLEMENTATION DETAILS ###################################################
+def _get_storage_root() -> str:
+    return os.path.join(tempfile.gettempdir(), STORAGE_ROOT_NAME)
+
+
+def _create_locked_directory(root_directory: str) -> Tuple[str, int]:
+    """Creates a storage directory for this process with its lock file locked, returning it and the lock file descriptor"""
+    pending_directory = tempfile.mkdtemp(prefix=PENDING_DIRECTORY_PREFIX, dir=root_directory)
+    lock_fd = os.open(os.path.join(pending_directory, LOCK_FILE_NAME), os.O_RDWR | os.O_CREAT)
+    if not _try_lock(lock_fd):
+        os.close(lock_fd)
+        raise RuntimeError(f'Could not lock result storage directory {pending_directory}')
+
+    # The lock is held on the lock file itself, so it is kept when the directory is renamed
+    directory = os.path.join(root_directory, f'{os.getpid()}_{os.path.basename(pending_directory)[len(PENDING_DIRECTORY_PREFIX):]}')
+    try:
+        os.rename(pending_directory, directory)
+    except OSError:
+        # Directories holding open files cannot be renamed on Windows. The directory keeps its pending name, which is
+        # never cleaned up while it is locked
+        directory = pending_directory
+    return directory, lock_fd
+
+
+def _try_lock(file_descriptor: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(file_descriptor, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
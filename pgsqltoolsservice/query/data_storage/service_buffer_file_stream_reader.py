@@ -3,19 +3,22 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import io
-from typing import List, Callable, Any  # noqa
-import struct
+import mmap
+from typing import Dict, List  # noqa
 
-from pgsqltoolsservice.parsers import datatypes
 from pgsqltoolsservice.query.contracts.column import DbColumn, DbCellValue
-from pgsqltoolsservice.converters.bytes_to_any_converters import get_bytes_to_any_converter
-
 from pgsqltoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
+from pgsqltoolsservice.query.data_storage.service_buffer_row_decoder import ServiceBufferRowDecoder
 
 
 class ServiceBufferFileStreamReader(ServiceBufferFileStream):
-    """ Reader for service buffer formatted file streams """
+    """
+    Reader for service buffer formatted file streams. Each page is read with a single read and kept
+    until a row from another page is read, so reading consecutive rows reads each page once. The stream
+    may also be a memory map of the file, in which case pages are sliced from the map
+    """
 
     READER_STREAM_NONE_ERROR = "Stream argument is None"
     READER_STREAM_NOT_SUPPORT_READING_ERROR = "Stream argument doesn't support reading"
@@ -26,60 +29,86 @@ class ServiceBufferFileStreamReader(ServiceBufferFileStream):
         if stream is None:
             raise ValueError(ServiceBufferFileStreamReader.READER_STREAM_NONE_ERROR)
 
-        if not stream.readable():
+        self._is_mapped = isinstance(stream, mmap.mmap)
+        if not self._is_mapped and not stream.readable():
             raise ValueError(ServiceBufferFileStreamReader.READER_STREAM_NOT_SUPPORT_READING_ERROR)
 
         ServiceBufferFileStream.__init__(self, stream)
 
-    def _read_bytes_from_file(self, stream, file_offset, length_to_read) -> bytes:
+        self._page_offset: int = None
+        self._page: bytes = b''
+        self._page_column_count = 0
+        self._page_cell_format = self.CELL_FORMAT_NATIVE
+        self._null_bitmap_size = 0
+        self._null_bitmaps_start = 0
+        self._data_start = 0
+        self._page_cell_ends = array('I')
+
+        # Decoders of the columns of the last rows read, for each format of cells they were read in
+        self._decoders_columns_info: List[DbColumn] = None
+        self._decoders: Dict[int, ServiceBufferRowDecoder] = {}
+
+    def read_row(self, location: int, row_id: int, columns_info: List[DbColumn]) -> List[DbCellValue]:
+        """
+        Read a row from a file
+        :param location: Location of the row returned when it was written
+        :param row_id: ID of the row to set on the cell values
+        :param columns_info: Columns of the row
+        """
+        page_offset = location >> self._SLOT_BITS
+        slot = location & self._SLOT_MASK
+        if page_offset != self._page_offset:
+            self._read_page(page_offset)
+
+        null_bitmap_start = self._null_bitmaps_start + slot * self._null_bitmap_size
+        nulls = int.from_bytes(self._page[null_bitmap_start:null_bitmap_start + self._null_bitmap_size], 'little')
+
+        return self._get_decoder(columns_info).decode_row(
+            self._page, self._data_start, self._page_cell_ends, slot * self._page_column_count, nulls, row_id)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_decoder(self, columns_info: List[DbColumn]) -> ServiceBufferRowDecoder:
+        """
+        Returns the decoder for the columns and the format of the cells of the current page, which is kept for the
+        following rows of the same columns
+        """
+        if columns_info is not self._decoders_columns_info:
+            self._decoders_columns_info = columns_info
+            self._decoders = {}
+
+        decoder = self._decoders.get(self._page_cell_format)
+        if decoder is None:
+            decoder = ServiceBufferRowDecoder(columns_info, self._page_cell_format)
+            self._decoders[self._page_cell_format] = decoder
+
+        return decoder
+
+    def _read_page(self, page_offset: int):
         try:
-            # locate the offset position before read
-            stream.seek(file_offset)
-            # read the bytes data based on the length_to_read
-            read_bytes_result = stream.read(length_to_read)
+            if self._is_mapped:
+                page_length, row_count, column_count, cell_format = self._PAGE_HEADER.unpack_from(self._file_stream, page_offset)
+                page = self._file_stream[page_offset:page_offset + page_length]
+            else:
+                # Most pages fit in PAGE_SIZE, only a page holding a larger row needs a second read
+                self._file_stream.seek(page_offset)
+                page = self._file_stream.read(self.PAGE_SIZE)
+                page_length, row_count, column_count, cell_format = self._PAGE_HEADER.unpack_from(page)
+                if page_length > len(page):
+                    page += self._file_stream.read(page_length - len(page))
         except Exception as exc:
             raise IOError(ServiceBufferFileStreamReader.READER_DATA_READ_ERROR) from exc
-        return read_bytes_result
-
-    def read_row(self, file_offset, row_id, columns_info: List[DbColumn]) -> List[DbCellValue]:
-        """   Read a row from a file   """
-        self._file_stream.seek(file_offset)
-
-        len_columns_info = len(columns_info)
-        current_file_offset = file_offset
-        results = []  # list of DbCellValue as return
 
-        for index in range(0, len_columns_info):
-
-            type_value = columns_info[index].data_type
-
-            # Read the object from the temp file
-            if type_value == datatypes.DATATYPE_NULL:
-                # wrap the NULL value as a DbCellValue
-                value = DbCellValue(display_value=None, is_null=True, raw_object=None, row_id=row_id)
-            else:
-                # read the length of data, then update the offset by plus 4, since the int holds 4 bytes
-                raw_bytes_length_to_read = self._read_bytes_from_file(self._file_stream, current_file_offset, 4)
-                if raw_bytes_length_to_read == b'\x00\x00\x00\x00':
-                    # if byte length to read is 0, then it's a NULL value.
-                    current_file_offset += 4
-                    value = DbCellValue(display_value=str("NULL"), is_null=True, raw_object=None, row_id=row_id)
-                else:
-                    bytes_length_to_read = struct.unpack('i', raw_bytes_length_to_read)[0]
-                    current_file_offset += 4
-
-                    # read the data content based on the length of data
-                    read_bytes_result = self._read_bytes_from_file(self._file_stream, current_file_offset, bytes_length_to_read)
-                    read_bytes_length = len(read_bytes_result)
-                    current_file_offset += read_bytes_length
-
-                    # convert data_bytes to data_obj
-                    object_converter: Callable[[bytes], Any] = get_bytes_to_any_converter(type_value)
-                    result_object = object_converter(read_bytes_result)
-
-                    # wrap the result_object as a DbCellValue
-                    value = DbCellValue(display_value=str(result_object), is_null=False, raw_object=result_object, row_id=row_id)
-
-            results.append(value)
-
-        return results
+        null_bitmap_size = (column_count + 7) // 8
+        cell_ends_start = self._PAGE_HEADER.size + row_count * null_bitmap_size
+        cell_ends = array('I')
+        cell_ends_end = cell_ends_start + row_count * column_count * cell_ends.itemsize
+        cell_ends.frombytes(page[cell_ends_start:cell_ends_end])
+
+        self._page_offset = page_offset
+        self._page = page
+        self._page_column_count = column_count
+        self._page_cell_format = cell_format
+        self._null_bitmap_size = null_bitmap_size
+        self._null_bitmaps_start = self._PAGE_HEADER.size
+        self._data_start = cell_ends_end
+        self._page_cell_ends = cell_ends
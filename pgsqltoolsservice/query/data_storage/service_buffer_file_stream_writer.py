@@ -3,17 +3,21 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import io
-from typing import Callable, Any  # noqa
-import struct
+from typing import Callable, Any, List  # noqa
 
 from pgsqltoolsservice.converters.bytes_converter import get_bytes_converter
+from pgsqltoolsservice.query.contracts import DbColumn
 from pgsqltoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
 from pgsqltoolsservice.query.data_storage import StorageDataReader
 
 
 class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
-    """ Writer for service buffer formatted file streams """
+    """
+    Writer for service buffer formatted file streams. Rows are collected into a page that is written with a
+    single write once it is full, or when the writer is flushed or closed
+    """
 
     WRITER_STREAM_NONE_ERROR = "Stream argument is None"
     WRITER_STREAM_NOT_SUPPORT_WRITING_ERROR = "Stream argument doesn't support writing"
@@ -30,9 +34,132 @@ class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
 
         ServiceBufferFileStream.__init__(self, stream)
 
-    def _write_null(self):
-        val_byte_array = bytearray([])
-        return self._write_to_file(self._file_stream, val_byte_array)
+        # Pages are written from the current position, which is the end of the file when appending
+        self._start_offset = stream.tell()
+        self._page_offset = self._start_offset
+        self._reset_page()
+
+    def __exit__(self, type, value, traceback):
+        try:
+            self._write_page()
+        finally:
+            ServiceBufferFileStream.__exit__(self, type, value, traceback)
+
+    @property
+    def bytes_written(self) -> int:
+        """Number of bytes the rows written so far take in the file, including those not yet flushed"""
+        return self._page_offset - self._start_offset + self._get_page_length()
+
+    def write_row(self, reader: StorageDataReader) -> int:
+        """
+        Write the current row of the reader
+        :param reader: Reader positioned on the row to write
+        :return: Location of the row in the file
+        """
+        values = tuple(None if reader.is_none(index) else reader.get_value(index) for index in range(len(reader.columns_info)))
+        return self.write_rows([values], reader.columns_info)[0]
+
+    def write_rows(self, rows: List[tuple], columns_info: List[DbColumn]) -> List[int]:
+        """
+        Write a block of rows, writing out each page as it is filled
+        :param rows: Rows of values read from the cursor
+        :param columns_info: Columns of the rows
+        :return: Location of each row in the file
+        """
+        converters: List[Callable[[Any], bytearray]] = [get_bytes_converter(column.data_type) for column in columns_info]
+        column_count = len(converters)
+
+        locations = []
+        for row in rows:
+            locations.append(self._add_row(column_count))
+
+            data = self._page_data
+            cell_ends = self._page_cell_ends
+            nulls = 0
+            null_bit = 1
+            for value, converter in zip(row, converters):
+                if value is None:
+                    nulls |= null_bit
+                else:
+                    data += converter(value)
+                cell_ends.append(len(data))
+                null_bit <<= 1
+
+            self._page_null_bitmaps += nulls.to_bytes(self._null_bitmap_size, 'little')
+
+        return locations
+
+    def write_binary_copy_row(self, data: bytes, start: int, cell_ends: List[int], nulls: int) -> int:
+        """
+        Write a row received with COPY in the binary format, copying its cells as they are
+        :param data: Bytes the row was received in
+        :param start: Offset of the first cell of the row in data, after the field count of the tuple
+        :param cell_ends: Offset at which each cell of the row ends, relative to start
+        :param nulls: Null bitmap of the row, with a bit per column set if the value is NULL
+        :return: Location of the row in the file
+        """
+        location = self._add_row(len(cell_ends), self.CELL_FORMAT_BINARY_COPY)
+
+        data_start = len(self._page_data)
+        if cell_ends:
+            self._page_data += data[start:start + cell_ends[-1]]
+        self._page_cell_ends.extend([data_start + cell_end for cell_end in cell_ends])
+        self._page_null_bitmaps += nulls.to_bytes(self._null_bitmap_size, 'little')
+
+        return location
+
+    def flush(self):
+        """ Writes any buffered rows to the file so that readers of the file can see them """
+        self._write_page()
+        self._file_stream.flush()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _add_row(self, column_count: int, cell_format: int = ServiceBufferFileStream.CELL_FORMAT_NATIVE) -> int:
+        """
+        Starts a row in the current page, writing the page first if it is full or holds cells of another format,
+        and returns its location
+        """
+        if self._page_row_count > 0 and (self._page_row_count >= self.MAX_PAGE_ROWS or column_count != self._page_column_count
+                                         or cell_format != self._page_cell_format or self._get_page_length() >= self.PAGE_SIZE):
+            self._write_page()
+
+        if self._page_row_count == 0:
+            self._page_column_count = column_count
+            self._page_cell_format = cell_format
+            self._null_bitmap_size = (column_count + 7) // 8
+
+        slot = self._page_row_count
+        self._page_row_count += 1
+        return (self._page_offset << self._SLOT_BITS) | slot
+
+    def _get_page_length(self) -> int:
+        if self._page_row_count == 0:
+            return 0
+
+        return self._PAGE_HEADER.size + len(self._page_null_bitmaps) + len(self._page_cell_ends) * self._page_cell_ends.itemsize + len(self._page_data)
+
+    def _reset_page(self):
+        self._page_row_count = 0
+        self._page_column_count = 0
+        self._page_cell_format = self.CELL_FORMAT_NATIVE
+        self._null_bitmap_size = 0
+        self._page_null_bitmaps = bytearray()
+        self._page_cell_ends = array('I')
+        self._page_data = bytearray()
+
+    def _write_page(self):
+        if self._page_row_count == 0:
+            return
+
+        page_length = self._get_page_length()
+        page = bytearray(self._PAGE_HEADER.pack(page_length, self._page_row_count, self._page_column_count, self._page_cell_format))
+        page += self._page_null_bitmaps
+        page += self._page_cell_ends.tobytes()
+        page += self._page_data
+
+        self._write_to_file(self._file_stream, page)
+        self._page_offset += page_length
+        self._reset_page()
 
     def _write_to_file(self, stream, byte_array):
         try:
@@ -41,37 +168,3 @@ class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
             raise IOError(ServiceBufferFileStreamWriter.WRITER_DATA_WRITE_ERROR) from exc
 
         return written_byte_number
-
-    def write_row(self, reader: StorageDataReader):
-        """   Write a row to a file   """
-        # Define a object list to store multiple columns in a row
-        len_columns_info = len(reader.columns_info)
-        values = []
-
-        # Loop over all the columns and write the values to the temp file
-        row_bytes = 0
-        for index in range(0, len_columns_info):
-
-            column = reader.columns_info[index]
-
-            values.append(reader.get_value(index))
-            type_value = column.data_type
-
-            # Write the object into the temp file
-            if reader.is_none(index):
-                # if it's a NULL value, the bytes length to write is 0
-                row_bytes += self._write_to_file(self._file_stream, bytearray(struct.pack("i", 0)))
-                row_bytes += self._write_null()
-            else:
-                bytes_converter: Callable[[str], bytearray] = get_bytes_converter(type_value)
-                value_to_write = bytes_converter(values[index])
-
-                bytes_length_to_write = len(value_to_write)
-
-                row_bytes += self._write_to_file(self._file_stream, bytearray(struct.pack("i", bytes_length_to_write)))
-                row_bytes += self._write_to_file(self._file_stream, value_to_write)
-
-        return row_bytes
-
-    def seek(self, offset):
-        self._file_stream.seek(offset, io.SEEK_SET)
@@ -0,0 +1,141 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from array import array
+from itertools import repeat
+import struct
+from typing import Any, Callable, List, Optional, Tuple  # noqa
+
+from pgsqltoolsservice.converters.binary_copy_converters import BINARY_COPY_STRUCT_FORMAT_MAP, get_binary_copy_converter
+from pgsqltoolsservice.converters.bytes_to_any_converters import DATATYPE_STRUCT_FORMAT_MAP, TEXT_CONVERTERS, get_bytes_to_any_converter
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts.column import DbColumn, DbCellValue
+from pgsqltoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
+
+
+class ServiceBufferRowDecoder:
+    """
+    Decodes rows stored in service buffer pages into cell values. The plan for decoding the rows is
+    compiled once for the columns of a result set: each run of adjacent fixed width columns is unpacked
+    with a single precompiled struct, each text column is decoded directly and the remaining columns use
+    the converter for their type
+    """
+
+    def __init__(self, columns_info: List[DbColumn], cell_format: int = ServiceBufferFileStream.CELL_FORMAT_NATIVE) -> None:
+        """
+        :param columns_info: Columns of the rows
+        :param cell_format: Format of the cells of the rows, as stored in the header of their pages
+        """
+        self._columns_info = columns_info
+        self._column_count = len(columns_info)
+
+        if cell_format == ServiceBufferFileStream.CELL_FORMAT_BINARY_COPY:
+            # Cells are the length of their value followed by the value in network byte order
+            self._cell_prefix_size = 4
+            self._struct_formats = BINARY_COPY_STRUCT_FORMAT_MAP
+            self._struct_byte_order = '>'
+            get_converter = get_binary_copy_converter
+        else:
+            self._cell_prefix_size = 0
+            self._struct_formats = DATATYPE_STRUCT_FORMAT_MAP
+            # Values are written in the native byte order with their standard sizes and no padding between them
+            self._struct_byte_order = '='
+            get_converter = _get_converter
+
+        # Converter for each column, None for a column of NULL type, whose values are always NULL
+        self._converters: Tuple[Optional[Callable[[bytes], Any]], ...] = tuple(
+            None if column.data_type == datatypes.DATATYPE_NULL else get_converter(column.data_type) for column in columns_info
+        )
+
+        # Mask of the columns of NULL type in the null bitmap of a row
+        self._null_type_mask = sum(1 << index for index, converter in enumerate(self._converters) if converter is None)
+
+        # Steps of the plan, each of a run of columns as (first column, column count, mask of the columns in the
+        # null bitmap, struct to unpack the columns with, converter of the column). Runs of fixed width columns
+        # have a struct, and the other columns are steps of their own with a converter
+        self._steps: Tuple[Tuple[int, int, int, Optional[struct.Struct], Optional[Callable[[bytes], Any]]], ...] = tuple(
+            self._compile_steps(columns_info))
+
+    @property
+    def columns_info(self) -> List[DbColumn]:
+        return self._columns_info
+
+    def decode_row(self, page: bytes, data_start: int, cell_ends: array, first_cell: int, nulls: int, row_id: int) -> List[DbCellValue]:
+        """
+        Decodes a row of a page
+        :param page: Bytes of the page
+        :param data_start: Offset of the cell data in the page
+        :param cell_ends: Offset at which each cell of the page ends, relative to the start of the data
+        :param first_cell: Index of the first cell of the row in cell_ends
+        :param nulls: Null bitmap of the row
+        :param row_id: ID of the row to set on the cell values
+        """
+        values = [None] * self._column_count
+        nulls |= self._null_type_mask
+        prefix_size = self._cell_prefix_size
+        cell_start = data_start + cell_ends[first_cell - 1] if first_cell > 0 else data_start
+
+        for first_column, column_count, null_mask, row_struct, converter in self._steps:
+            last_cell_end = data_start + cell_ends[first_cell + first_column + column_count - 1]
+
+            if nulls & null_mask:
+                # Convert the cells of the run one at a time, skipping the NULL values
+                for index in range(first_column, first_column + column_count):
+                    cell_end = data_start + cell_ends[first_cell + index]
+                    if not nulls >> index & 1:
+                        values[index] = self._converters[index](page[cell_start + prefix_size:cell_end])
+                    cell_start = cell_end
+            elif row_struct is not None:
+                values[first_column:first_column + column_count] = row_struct.unpack_from(page, cell_start)
+            else:
+                values[first_column] = converter(page[cell_start + prefix_size:last_cell_end])
+
+            cell_start = last_cell_end
+
+        return self._create_cells(values, nulls, row_id)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _compile_steps(self, columns_info: List[DbColumn]):
+        run_formats = []
+        for index, column in enumerate(columns_info):
+            struct_format = self._struct_formats.get(column.data_type)
+            if struct_format is not None:
+                run_formats.append(struct_format)
+                continue
+
+            if run_formats:
+                yield self._create_fixed_width_step(index - len(run_formats), run_formats)
+                run_formats = []
+            yield (index, 1, 1 << index, None, self._converters[index])
+
+        if run_formats:
+            yield self._create_fixed_width_step(len(columns_info) - len(run_formats), run_formats)
+
+    def _create_fixed_width_step(self, first_column: int, struct_formats: List[str]) -> Tuple[int, int, int, struct.Struct, None]:
+        null_mask = ((1 << len(struct_formats)) - 1) << first_column
+        # The prefix of each cell is skipped, and there is no padding between the cells
+        prefix = '%dx' % self._cell_prefix_size if self._cell_prefix_size else ''
+        row_format = self._struct_byte_order + ''.join(prefix + struct_format for struct_format in struct_formats)
+        return (first_column, len(struct_formats), null_mask, struct.Struct(row_format), None)
+
+    def _create_cells(self, values: List[Any], nulls: int, row_id: int) -> List[DbCellValue]:
+        # The display values of the whole row are formatted in one pass, text values being their own string,
+        # and then corrected for the NULL values, which are rare
+        display_values = list(map(str, values))
+        is_nulls = [False] * self._column_count
+
+        null_columns = nulls
+        while null_columns:
+            index = (null_columns & -null_columns).bit_length() - 1
+            null_columns &= null_columns - 1
+            display_values[index] = None if self._converters[index] is None else 'NULL'
+            is_nulls[index] = True
+
+        return list(map(DbCellValue, display_values, is_nulls, values, repeat(row_id, self._column_count)))
+
+
+def _get_converter(data_type: str) -> Callable[[bytes], Any]:
+    converter = get_bytes_to_any_converter(data_type)
+    return bytes.decode if converter in TEXT_CONVERTERS else converter
@@ -7,35 +7,83 @@ from typing import List
 
 from pgsqltoolsservice.query.contracts import DbColumn
 from pgsqltoolsservice.query.column_info import get_columns_info
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
 
 
 class StorageDataReader:
 
-    def __init__(self, cursor) -> None:
+    # Number of rows in the first block fetched from the cursor, which is kept small so that the first
+    # rows are available quickly. Later blocks are sized to hold about TARGET_BLOCK_BYTES, based on the
+    # width of the rows that have been written, within the minimum and maximum fetch sizes
+    MIN_FETCH_SIZE = 100
+    MAX_FETCH_SIZE = 10000
+    TARGET_BLOCK_BYTES = 1024 * 1024
+
+    def __init__(self, cursor, fetch_size: int = None, type_catalog: TypeCatalog = None) -> None:
+        """
+        :param cursor: Cursor to read the rows from
+        :param fetch_size: Optional number of rows to fetch from the cursor at a time. If not provided the
+        fetch size is adapted to the width of the rows
+        :param type_catalog: Optional cache of the types of the database to look up the types of the columns in
+        """
         self._cursor = cursor
+        self._type_catalog = type_catalog
         self._current_row: tuple = None
         self._columns_info = []
 
+        self._fetch_size = fetch_size or self.MIN_FETCH_SIZE
+        self._is_fetch_size_adaptive = fetch_size is None
+        self._block: List[tuple] = []
+        self._block_index = 0
+
     @property
     def columns_info(self) -> List[DbColumn]:
         return self._columns_info
 
-    def read_row(self) -> bool:
+    @property
+    def fetch_size(self) -> int:
+        return self._fetch_size
+
+    def read_rows(self) -> List[tuple]:
         '''
-        read_row uses the cursor to iterate over. It iterates over the cursor one at a time
-        and returns True if it finds the row and False if it doesn’t
+        read_rows fetches the next block of rows from the cursor. It returns an empty list once all
+        rows have been read
         '''
-        row_found = False
+        rows = self._cursor.fetchmany(self._fetch_size)
 
-        for row in self._cursor:
-            self._current_row = row
-            row_found = True
-            break
+        if rows:
+            self._current_row = rows[-1]
 
         if self._current_row is None or len(self._columns_info) == 0:
-            self._columns_info = get_columns_info(self._cursor.description, self._cursor.connection)
+            self._columns_info = get_columns_info(self._cursor.description, self._cursor.connection, self._type_catalog)
+
+        return rows
+
+    def record_block_size(self, row_count: int, byte_count: int) -> None:
+        '''
+        Adapts the number of rows fetched at a time to the size the last block of rows took once written
+        '''
+        if not self._is_fetch_size_adaptive or row_count == 0:
+            return
+
+        bytes_per_row = max(1, byte_count // row_count)
+        self._fetch_size = max(self.MIN_FETCH_SIZE, min(self.MAX_FETCH_SIZE, self.TARGET_BLOCK_BYTES // bytes_per_row))
+
+    def read_row(self) -> bool:
+        '''
+        read_row moves to the next row, fetching the next block of rows from the cursor when the rows
+        that were fetched have been read. It returns True if it finds the row and False if it doesn’t
+        '''
+        if self._block_index >= len(self._block):
+            self._block = self.read_rows()
+            self._block_index = 0
+
+            if not self._block:
+                return False
 
-        return row_found
+        self._current_row = self._block[self._block_index]
+        self._block_index += 1
+        return True
 
     def get_value(self, column_index: int):
         return self._current_row[column_index]
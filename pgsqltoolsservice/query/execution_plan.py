@@ -0,0 +1,155 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Runs queries with EXPLAIN ANALYZE and parses the JSON plans the server returns into a tree of nodes, with
+metrics derived from the actual timings, row counts and buffer usage of each node that point at its hotspots
+"""
+
+import json
+from typing import List, Optional  # noqa
+
+import psycopg2.extensions
+
+from pgsqltoolsservice.parsers.statement_splitter import split_statements
+from pgsqltoolsservice.query.contracts import ExecutionPlan, ExecutionPlanNode
+
+
+EXPLAIN_ANALYZE_TEMPLATE = 'EXPLAIN (ANALYZE, BUFFERS, TIMING, FORMAT JSON) {0}'
+
+EXPLAIN_SAVEPOINT_NAME = 'pgsqltoolsservice_explain'
+
+EXPLAIN_MULTIPLE_STATEMENTS_ERROR = 'Only a single statement can be explained'
+EXPLAIN_FAILED_TRANSACTION_ERROR = 'Cannot explain a statement while the current transaction is aborted'
+EXPLAIN_INVALID_PLAN_ERROR = 'The server returned a plan that could not be read'
+
+# Properties of a plan node that are read into attributes of their own, the rest are kept as its details
+_NODE_ATTRIBUTE_NAMES = {
+    'Node Type': 'node_type',
+    'Relation Name': 'relation_name',
+    'Index Name': 'index_name',
+    'Startup Cost': 'startup_cost',
+    'Total Cost': 'total_cost',
+    'Plan Rows': 'plan_rows',
+    'Actual Startup Time': 'actual_startup_time',
+    'Actual Total Time': 'actual_total_time',
+    'Actual Rows': 'actual_rows',
+    'Actual Loops': 'actual_loops',
+    'Shared Hit Blocks': 'shared_hit_blocks',
+    'Shared Read Blocks': 'shared_read_blocks'
+}
+
+
+def get_explainable_query(query_text: str) -> str:
+    """
+    Returns the text of a statement to explain, without its comments or terminating semicolon
+    :raises ValueError: If the text is not a single statement
+    """
+    statements = [statement for statement in split_statements(query_text) if not statement.is_empty]
+    if len(statements) != 1:
+        raise ValueError(EXPLAIN_MULTIPLE_STATEMENTS_ERROR)
+
+    return statements[0].executable_text.rstrip(';').rstrip()
+
+
+def explain_query(connection, query_text: str) -> ExecutionPlan:
+    """
+    Runs a statement with EXPLAIN ANALYZE and returns its plan. The statement is executed by the server, so it
+    is run in a transaction, or a savepoint of the current transaction, that is rolled back afterwards to
+    discard the changes of data modifying statements
+    :param connection: Connection to run the statement on, which should not be used by anything else meanwhile
+    :param query_text: A single statement that can be explained
+    :raises ValueError: If the text is not a single statement or the current transaction is aborted
+    """
+    explain_statement = EXPLAIN_ANALYZE_TEMPLATE.format(get_explainable_query(query_text))
+
+    transaction_status = connection.get_transaction_status()
+    if transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        raise ValueError(EXPLAIN_FAILED_TRANSACTION_ERROR)
+    in_transaction = transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    with connection.cursor() as cursor:
+        cursor.execute('SAVEPOINT ' + EXPLAIN_SAVEPOINT_NAME if in_transaction else 'BEGIN')
+        try:
+            cursor.execute(explain_statement)
+            plan = cursor.fetchone()[0]
+        finally:
+            if in_transaction:
+                cursor.execute('ROLLBACK TO SAVEPOINT {0}; RELEASE SAVEPOINT {0}'.format(EXPLAIN_SAVEPOINT_NAME))
+            else:
+                cursor.execute('ROLLBACK')
+
+    return parse_execution_plan(plan)
+
+
+def parse_execution_plan(plan) -> ExecutionPlan:
+    """
+    Parses the output of EXPLAIN (ANALYZE, FORMAT JSON) into a tree of plan nodes with their derived metrics
+    :param plan: The JSON text of the plan, or the list psycopg2 parses it into
+    :raises ValueError: If the plan is not the output of EXPLAIN in the JSON format
+    """
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    if not isinstance(plan, list) or not plan or not isinstance(plan[0], dict) or 'Plan' not in plan[0]:
+        raise ValueError(EXPLAIN_INVALID_PLAN_ERROR)
+
+    nodes: List[ExecutionPlanNode] = []
+    root = _parse_node(plan[0]['Plan'], nodes)
+
+    # Servers before 9.4 report the execution time as the total runtime
+    execution_time = plan[0].get('Execution Time', plan[0].get('Total Runtime'))
+    hot_path = _get_hot_path(root, nodes)
+    return ExecutionPlan(json.dumps(plan), root, plan[0].get('Planning Time'), execution_time, hot_path)
+
+
+# IMPLEMENTATION DETAILS ###################################################
+def _parse_node(properties: dict, nodes: List[ExecutionPlanNode], parent_id: int = None) -> ExecutionPlanNode:
+    """Creates the node of a plan and its children, numbering the nodes in the order they are listed"""
+    node = ExecutionPlanNode(len(nodes), parent_id)
+    nodes.append(node)
+    for name, value in properties.items():
+        attribute_name = _NODE_ATTRIBUTE_NAMES.get(name)
+        if attribute_name is not None:
+            setattr(node, attribute_name, value)
+        elif name != 'Plans':
+            node.details[name] = value
+
+    node.children = [_parse_node(child, nodes, node.id) for child in properties.get('Plans', [])]
+    _compute_metrics(node)
+    return node
+
+
+def _compute_metrics(node: ExecutionPlanNode) -> None:
+    """Computes the metrics of a node whose children have had their metrics computed"""
+    if node.actual_loops:
+        # Actual times are averages per loop, and include the time spent in the children of the node
+        node.inclusive_time = node.actual_total_time * node.actual_loops
+        children_time = sum(child.inclusive_time for child in node.children if child.inclusive_time is not None)
+        node.self_time = max(node.inclusive_time - children_time, 0.0)
+
+        # Row counts are per loop as well. Both counts are taken as at least one row so that estimates of
+        # queries returning no rows have a finite ratio
+        if node.plan_rows is not None:
+            node.row_estimate_error_ratio = max(node.actual_rows, 1) / max(node.plan_rows, 1)
+
+    if node.shared_hit_blocks is not None and node.shared_read_blocks is not None:
+        blocks = node.shared_hit_blocks + node.shared_read_blocks
+        if blocks:
+            node.buffer_hit_rate = node.shared_hit_blocks / blocks
+
+
+def _get_hot_path(root: ExecutionPlanNode, nodes: List[ExecutionPlanNode]) -> List[int]:
+    """Returns the IDs of the nodes from the root of a plan to its node with the largest self time"""
+    executed_nodes = [node for node in nodes if node.self_time is not None]
+    if not executed_nodes:
+        return []
+
+    # Nodes are listed with parents before children, so ties go to the node closest to the root
+    hottest = max(executed_nodes, key=lambda node: node.self_time)
+    path = [hottest.id]
+    while nodes[path[-1]].parent_id is not None:
+        path.append(nodes[path[-1]].parent_id)
+    path.reverse()
+    return path
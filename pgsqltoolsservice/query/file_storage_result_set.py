@@ -3,11 +3,19 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from typing import List
+from array import array
+import os
+import threading
+import time
+from typing import Iterable, List  # noqa
 
 from pgsqltoolsservice.query.result_set import ResultSet, ResultSetEvents
-from pgsqltoolsservice.query.data_storage import service_buffer_file_stream as file_stream, FileStreamFactory, StorageDataReader
+from pgsqltoolsservice.query.data_storage import (
+    service_buffer_file_stream as file_stream, export_rows, BinaryCopyStream, FileStreamFactory, StorageDataReader
+)
+from pgsqltoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue, ResultSetSubset, SaveResultsRequestParams  # noqa
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
 import pgsqltoolsservice.utils as utils
 
 
@@ -16,33 +24,68 @@ class FileStorageResultSet(ResultSet):
     RESULT_SET_NOT_READ_ERROR = 'Result set not read'
     RESULT_SET_START_OUT_OF_RANGE_ERROR = 'Result set start row out of range'
     RESULT_SET_ROW_COUNT_OF_RANGE_ERROR = 'Result set row count out of range'
+    RESULT_SET_EVICTED_ERROR = 'Result set was removed from storage to stay within the result storage limits, execute the query again to view it'
+    RESULT_SET_DISPOSED_ERROR = 'Result set has been disposed'
 
-    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None) -> None:
+    # Number of rows spooled before the result set is reported as available, and the minimum number
+    # of seconds between reports of how many rows have been spooled since
+    ROWS_BEFORE_AVAILABLE = 100
+    UPDATE_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None, fetch_size: int = None,
+                 type_catalog: TypeCatalog = None) -> None:
         ResultSet.__init__(self, result_set_id, batch_id, events)
 
-        self._total_bytes_written = 0
+        # Number of rows to fetch from the cursor at a time, None to adapt it to the width of the rows
+        self._fetch_size = fetch_size
+        self._type_catalog = type_catalog
+
         self._output_file_name = file_stream.create_file()
-        self._file_offsets: List[int] = []
+        # Location of each row in the file, as returned by the writer. These are kept in an array as there
+        # are as many as there are rows
+        self._file_offsets = array('q')
+        # Number of bytes the rows take in the file
+        self._file_size = 0
+        # Error to raise on reads once the file has been deleted, None while the rows are stored
+        self._storage_error: str = None
+
+        # Reader over a memory map of the file, shared by the reads of the result set. It is replaced once
+        # the file has been written to, so that the map covers the rows that have been written
+        self._reader = None
+        self._is_reader_stale = False
+        self._reader_lock = threading.Lock()
+
+        # Number of rows that have been flushed to the file while the result is being read. Only these
+        # rows can be read back until the whole result has been read
+        self._available_row_count = 0
+        # Time of the next report of the rows spooled, None until the result set is reported as available
+        self._next_update_time: float = None
 
     @property
     def row_count(self) -> int:
-        return len(self._file_offsets)
+        return len(self._file_offsets) if self._has_been_read else self._available_row_count
+
+    @property
+    def storage_size(self) -> int:
+        return self._file_size + self._file_offsets.itemsize * len(self._file_offsets)
 
     def get_subset(self, start_index: int, end_index: int):
-        if not self._has_been_read:
+        self._check_storage()
+
+        if not self._has_been_read and self._available_row_count == 0:
             raise ValueError(FileStorageResultSet.RESULT_SET_NOT_READ_ERROR)
 
         if start_index < 0 or start_index >= end_index:
             raise KeyError(FileStorageResultSet.RESULT_SET_START_OUT_OF_RANGE_ERROR)
 
-        if end_index < 0:
+        if end_index < 0 or end_index > self.row_count:
             raise KeyError(FileStorageResultSet.RESULT_SET_ROW_COUNT_OF_RANGE_ERROR)
 
-        rows = []
-
-        with file_stream.get_reader(self._output_file_name) as reader:
-            rows_offsets = [self._file_offsets[index] for index in range(start_index, end_index)]
-            rows = [reader.read_row(offset, index, self.columns_info) for index, offset in enumerate(rows_offsets)]
+        with self._reader_lock:
+            # The file may have been deleted by another thread since it was last checked
+            self._check_storage()
+            reader = self._get_reader()
+            rows = [reader.read_row(offset, index, self.columns_info) for index, offset in enumerate(self._file_offsets[start_index:end_index])]
 
         subset = ResultSetSubset()
 
@@ -66,6 +109,7 @@ class FileStorageResultSet(ResultSet):
         self._file_offsets[row_id] = new_offset
 
     def get_row(self, row_id: int) -> List[DbCellValue]:
+        self._check_storage()
 
         if not self._has_been_read:
             raise ValueError(FileStorageResultSet.RESULT_SET_NOT_READ_ERROR)
@@ -73,35 +117,95 @@ class FileStorageResultSet(ResultSet):
         if row_id >= self.row_count:
             raise KeyError(FileStorageResultSet.RESULT_SET_START_OUT_OF_RANGE_ERROR)
 
-        with file_stream.get_reader(self._output_file_name) as reader:
-            return reader.read_row(self._file_offsets[row_id], row_id, self.columns_info)
+        with self._reader_lock:
+            # The file may have been deleted by another thread since it was last checked
+            self._check_storage()
+            return self._get_reader().read_row(self._file_offsets[row_id], row_id, self.columns_info)
 
     def read_result_to_end(self, cursor):
+        """
+        Spools the rows of the cursor to the file a block at a time. The result set is reported as available
+        once the first rows have been spooled, and the number of rows spooled is reported periodically after
+        that. The rows that have been reported can be read while the rest are spooled
+        """
         utils.validate.is_not_none('cursor', cursor)
 
-        self._has_been_read = True
-        storage_data_reader = StorageDataReader(cursor)
+        storage_data_reader = StorageDataReader(cursor, self._fetch_size, self._type_catalog)
 
         with file_stream.get_writer(self._output_file_name) as writer:
 
-            while storage_data_reader.read_row():
-                self._file_offsets.append(self._total_bytes_written)
-                self._total_bytes_written += writer.write_row(storage_data_reader)
+            while True:
+                rows = storage_data_reader.read_rows()
+                if not rows:
+                    break
+
+                bytes_written = writer.bytes_written
+                self._file_offsets.extend(writer.write_rows(rows, storage_data_reader.columns_info))
+                storage_data_reader.record_block_size(len(rows), writer.bytes_written - bytes_written)
+                self._on_rows_spooled(writer, storage_data_reader.columns_info)
 
             self.columns_info = storage_data_reader.columns_info
 
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+        self._complete_read()
+
+    def read_binary_copy_to_end(self, cursor, copy_query: str, columns_info: List[DbColumn]) -> None:
+        """
+        Spools the rows of a COPY ... TO STDOUT (FORMAT binary) query to the file as they are received,
+        storing the values as the server sends them so that they are only converted when rows are read.
+        The result set is reported as available and updated as it is by read_result_to_end
+        :param cursor: Cursor to run the query on
+        :param copy_query: COPY query of the rows of the result set in the binary format
+        :param columns_info: Columns of the rows, which the types of all have converters from the binary format
+        """
+        utils.validate.is_not_none('cursor', cursor)
+
+        with file_stream.get_writer(self._output_file_name) as writer:
+
+            def on_rows_written(locations: List[int]):
+                self._file_offsets.extend(locations)
+                self._on_rows_spooled(writer, columns_info)
+
+            copy_stream = BinaryCopyStream(writer, len(columns_info), on_rows_written)
+            cursor.copy_expert(copy_query, copy_stream)
+            copy_stream.close()
+
+            self.columns_info = columns_info
+
+        self._complete_read()
+
+    def evict(self) -> None:
+        self._delete_file(FileStorageResultSet.RESULT_SET_EVICTED_ERROR)
 
-        with file_factory.get_writer(file_path) as writer:
-            with file_factory.get_reader(self._output_file_name) as reader:
-                for row_index in range(row_start_index, row_end_index):
-                    row = reader.read_row(self._file_offsets[row_index], row_index, self.columns_info)
-                    writer.write_row(row, self.columns_info)
+    def dispose(self) -> None:
+        self._delete_file(FileStorageResultSet.RESULT_SET_DISPOSED_ERROR)
 
-                writer.complete_write()
+    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure,
+                   on_progress=None) -> None:
+        if self._storage_error is not None:
+            if on_failure is not None:
+                on_failure(self._storage_error)
+            return
 
-                if on_success is not None:
-                    on_success()
+        # The locations are copied, as rows may be edited and the result set evicted or disposed while the save runs
+        with self._reader_lock:
+            file_offsets = self._file_offsets[row_start_index:row_end_index]
+
+        try:
+            with file_factory.get_writer(file_path) as writer:
+                with file_factory.get_reader(self._output_file_name) as reader:
+                    row_batches = self._read_page_batches(reader, file_offsets, row_start_index)
+                    export_rows(writer, row_batches, self.columns_info, len(file_offsets), on_progress)
+        except Exception as error:
+            # Do not leave a partial save behind
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            if on_failure is None:
+                raise
+            on_failure(str(error))
+            return
+
+        if on_success is not None:
+            on_success()
 
     def _append_row_to_buffer(self, cursor):
 
@@ -110,10 +214,87 @@ class FileStorageResultSet(ResultSet):
         if not self._has_been_read:
             raise ValueError(FileStorageResultSet.RESULT_SET_NOT_READ_ERROR)
 
-        storage_data_reader = StorageDataReader(cursor)
-
-        with file_stream.get_writer(self._output_file_name) as writer:
-            current_file_offset = self._total_bytes_written
-            writer.seek(current_file_offset)
-            self._total_bytes_written += writer.write_row(storage_data_reader)
-            return current_file_offset
+        storage_data_reader = StorageDataReader(cursor, type_catalog=self._type_catalog)
+
+        with file_stream.get_writer(self._output_file_name, append=True) as writer:
+            location = writer.write_row(storage_data_reader)
+            self._file_size += writer.bytes_written
+
+        self._is_reader_stale = True
+        return location
+
+    def _on_rows_spooled(self, writer, columns_info: List[DbColumn]):
+        """Reports the result set as available once enough rows have been spooled, and the rows spooled periodically after that"""
+        self._file_size = writer.bytes_written
+
+        if self._next_update_time is None:
+            if len(self._file_offsets) >= self.ROWS_BEFORE_AVAILABLE:
+                self.columns_info = columns_info
+                self._make_rows_available(writer)
+                self._next_update_time = time.monotonic() + self.UPDATE_INTERVAL_SECONDS
+                if self.events and self.events._on_result_set_available:
+                    self.events._on_result_set_available(self)
+        elif time.monotonic() >= self._next_update_time:
+            self._make_rows_available(writer)
+            self._next_update_time = time.monotonic() + self.UPDATE_INTERVAL_SECONDS
+            if self.events and self.events._on_result_set_partially_loaded:
+                self.events._on_result_set_partially_loaded(self)
+
+    def _complete_read(self):
+        self._is_reader_stale = True
+        self._has_been_read = True
+        if self.events and self.events._on_result_set_completed:
+            self.events._on_result_set_completed(self)
+
+    def _check_storage(self):
+        if self._storage_error is not None:
+            raise ValueError(self._storage_error)
+
+    def _delete_file(self, storage_error: str):
+        with self._reader_lock:
+            if self._storage_error is not None:
+                return
+
+            self._storage_error = storage_error
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            file_stream.delete_file(self._output_file_name)
+
+            # The locations of the rows are of no use without the file
+            self._file_offsets = array('q')
+            self._file_size = 0
+
+    def _read_page_batches(self, reader, file_offsets, row_start_index: int) -> Iterable[List[List[DbCellValue]]]:
+        """
+        Reads the rows at the given locations in blocks of the consecutive rows stored in the same page. Each block is
+        read while the file is known to be stored, so that a result set evicted or disposed meanwhile fails the read
+        """
+        get_page_offset = ServiceBufferFileStream.get_page_offset
+        batch_start = 0
+        while batch_start < len(file_offsets):
+            page_offset = get_page_offset(file_offsets[batch_start])
+            batch_end = batch_start + 1
+            while batch_end < len(file_offsets) and get_page_offset(file_offsets[batch_end]) == page_offset:
+                batch_end += 1
+
+            with self._reader_lock:
+                self._check_storage()
+                rows = [reader.read_row(file_offsets[index], row_start_index + index, self.columns_info) for index in range(batch_start, batch_end)]
+            yield rows
+            batch_start = batch_end
+
+    def _get_reader(self):
+        """Returns the shared reader, mapping the file again if it has been written to since it was mapped"""
+        if self._reader is None or self._is_reader_stale:
+            self._is_reader_stale = False
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = file_stream.get_mapped_reader(self._output_file_name)
+
+        return self._reader
+
+    def _make_rows_available(self, writer):
+        writer.flush()
+        self._is_reader_stale = True
+        self._available_row_count = len(self._file_offsets)
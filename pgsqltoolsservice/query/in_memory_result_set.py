@@ -8,14 +8,16 @@ from typing import List
 from pgsqltoolsservice.query.result_set import ResultSet, ResultSetEvents
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue, ResultSetSubset, SaveResultsRequestParams  # noqa
 from pgsqltoolsservice.query.column_info import get_columns_info
-from pgsqltoolsservice.query.data_storage import FileStreamFactory
+from pgsqltoolsservice.query.data_storage import batch_rows, export_rows, FileStreamFactory
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
 
 
 class InMemoryResultSet(ResultSet):
 
-    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None) -> None:
+    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None, type_catalog: TypeCatalog = None) -> None:
         ResultSet.__init__(self, result_set_id, batch_id, events)
         self.rows: List[tuple] = []
+        self._type_catalog = type_catalog
 
     @property
     def row_count(self) -> int:
@@ -41,18 +43,16 @@ class InMemoryResultSet(ResultSet):
         rows = cursor.fetchall()
         self.rows.extend(rows or [])
 
-        self.columns_info = get_columns_info(cursor.description, cursor.connection)
+        self.columns_info = get_columns_info(cursor.description, cursor.connection, self._type_catalog)
 
         self._has_been_read = True
 
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure,
+                   on_progress=None) -> None:
 
         with file_factory.get_writer(file_path) as writer:
-            for index in range(row_start_index, row_end_index):
-                row = self.get_row(index)
-                writer.write_row(row, self.columns_info)
-
-            writer.complete_write()
+            row_batches = batch_rows(self.get_row, row_start_index, row_end_index)
+            export_rows(writer, row_batches, self.columns_info, row_end_index - row_start_index, on_progress)
 
             if on_success is not None:
                 on_success()
@@ -3,14 +3,19 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from bisect import bisect_right
 from enum import Enum
+import re
 from typing import Callable, Dict, List, Optional  # noqa
 
-import sqlparse
+import psycopg2
 
+from pgsqltoolsservice.parsers.statement_splitter import split_statements
 from pgsqltoolsservice.query import Batch, BatchEvents, create_batch, ResultSetStorageType
 from pgsqltoolsservice.query.contracts import SaveResultsRequestParams, SelectionData
 from pgsqltoolsservice.query.data_storage import FileStreamFactory
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 
 
 class QueryEvents:
@@ -30,11 +35,15 @@ class QueryExecutionSettings:
 
     def __init__(
             self, execution_plan_options,
-            result_set_storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE
+            result_set_storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE,
+            type_catalog: TypeCatalog = None,
+            use_binary_copy: bool = False
     ) -> None:
 
         self._execution_plan_options = execution_plan_options
         self._result_set_storage_type = result_set_storage_type
+        self._type_catalog = type_catalog
+        self._use_binary_copy = use_binary_copy
 
     @property
     def execution_plan_options(self):
@@ -44,12 +53,21 @@ class QueryExecutionSettings:
     def result_set_storage_type(self):
         return self._result_set_storage_type
 
+    @property
+    def type_catalog(self) -> TypeCatalog:
+        return self._type_catalog
+
+    @property
+    def use_binary_copy(self) -> bool:
+        """Whether the rows of SELECT statements are spooled with COPY in the binary format when possible"""
+        return self._use_binary_copy
+
 
 class Query:
     """Object representing a single query, consisting of one or more batches"""
 
     EXPLAIN_QUERY_TEMPLATE = 'EXPLAIN {0}'
-    ANALYZE_EXPLAIN_QUERY_TEMPLATE = 'ANALYZE EXPLAIN {0}'
+    ANALYZE_EXPLAIN_QUERY_TEMPLATE = 'EXPLAIN ANALYZE {0}'
 
     def __init__(self, owner_uri: str, query_text: str, query_execution_settings: QueryExecutionSettings, query_events: QueryEvents) -> None:
         self._execution_state: ExecutionState = ExecutionState.NOT_STARTED
@@ -61,30 +79,34 @@ class Query:
         self._execution_plan_options = query_execution_settings.execution_plan_options
 
         self.is_canceled = False
+        self._cancellation_token = CancellationToken()
 
         # Initialize the batches
-        statements = sqlparse.split(query_text)
-        selection_data = compute_selection_data_for_batches(statements, query_text)
-
-        for index, batch_text in enumerate(statements):
-            # Skip any empty text
-            formatted_text = sqlparse.format(batch_text, strip_comments=True).strip()
-            if not formatted_text or formatted_text == ';':
+        for statement in split_statements(query_text):
+            # Skip statements consisting only of comments and semicolons
+            if statement.is_empty:
                 continue
+            formatted_text = statement.executable_text
+            statement_kind = statement.kind
             # Create and save the batch
             if bool(self._execution_plan_options):
                 if self._execution_plan_options.include_estimated_execution_plan_xml:
                     formatted_text = Query.EXPLAIN_QUERY_TEMPLATE.format(formatted_text)
+                    statement_kind = None
                 elif self._execution_plan_options.include_actual_execution_plan_xml:
                     self._disable_auto_commit = True
                     formatted_text = Query.ANALYZE_EXPLAIN_QUERY_TEMPLATE.format(formatted_text)
+                    statement_kind = None
 
             batch = create_batch(
                 formatted_text,
                 len(self.batches),
-                selection_data[index],
+                SelectionData(statement.start_line, statement.start_column, statement.end_line, statement.end_column),
                 query_events.batch_events,
-                query_execution_settings.result_set_storage_type)
+                query_execution_settings.result_set_storage_type,
+                query_execution_settings.type_catalog,
+                statement_kind,
+                query_execution_settings.use_binary_copy)
 
             self._batches.append(batch)
 
@@ -124,8 +146,8 @@ class Query:
         self._execution_state = ExecutionState.EXECUTING
 
         # Run each batch sequentially
+        current_auto_commit_status = connection.autocommit
         try:
-            current_auto_commit_status = connection.autocommit
             # When Analyze Explain is used we have to disable auto commit
             if self._disable_auto_commit:
                 connection.autocommit = False
@@ -136,32 +158,49 @@ class Query:
                 if self.is_canceled:
                     break
 
-                batch.execute(connection)
+                with self._cancellation_token.canceling_statements(connection):
+                    # A cancel that lands before the batch runs has no statement to cancel, so the batch is skipped
+                    if self._cancellation_token.canceled:
+                        break
+                    batch.execute(connection)
         finally:
-            connection.autocommit = current_auto_commit_status
+            # Statements explained with ANALYZE are executed, so their changes are rolled back. A connection that cannot
+            # be reset is left to the pool, so that the error of the batch is the one raised
+            if not connection.closed:
+                try:
+                    if self._disable_auto_commit:
+                        connection.rollback()
+                    connection.autocommit = current_auto_commit_status
+                except psycopg2.Error:
+                    pass
             self._execution_state = ExecutionState.EXECUTED
 
+    def cancel(self) -> None:
+        """
+        Cancels the query, so that no further batch is executed and the statement of the running batch is canceled.
+        Statements are canceled with the cancel key of the connection's backend, which libpq sends over a short-lived
+        socket, so that no other session is needed
+        """
+        self.is_canceled = True
+        self._cancellation_token.cancel()
+
     def get_subset(self, batch_index: int, start_index: int, end_index: int):
         if batch_index < 0 or batch_index >= len(self._batches):
             raise IndexError('Batch index cannot be less than 0 or greater than the number of batches')
 
         return self._batches[batch_index].get_subset(start_index, end_index)
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure):
+    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure, on_progress=None):
         if params.batch_index < 0 or params.batch_index >= len(self.batches):
             raise IndexError('Batch index cannot be less than 0 or greater than the number of batches')
 
-        self.batches[params.batch_index].save_as(params, file_factory, on_success, on_failure)
+        self.batches[params.batch_index].save_as(params, file_factory, on_success, on_failure, on_progress)
 
 
 def compute_selection_data_for_batches(batches: List[str], full_text: str) -> List[SelectionData]:
-    # Map the starting index of each line to the line number
-    line_map: Dict[int, int] = {}
-    search_offset = 0
-    for line_num, line in enumerate(full_text.split('\n')):
-        start_index = full_text.index(line, search_offset)
-        line_map[start_index] = line_num
-        search_offset = start_index + len(line)
+    # Find the offset of the start of each line, so that the line of an offset can be found with a binary search
+    line_starts = [0]
+    line_starts.extend(match.end() for match in re.finditer('\n', full_text))
 
     # Iterate through the batches to build selection data
     selection_data: List[SelectionData] = []
@@ -169,15 +208,13 @@ def compute_selection_data_for_batches(batches: List[str], full_text: str) -> Li
     for batch in batches:
         # Calculate the starting line number and column
         start_index = full_text.index(batch, search_offset)
-        start_line_index = max(filter(lambda line_index: line_index <= start_index, line_map.keys()))
-        start_line_num = line_map[start_line_index]
-        start_col_num = start_index - start_line_index
+        start_line_num = bisect_right(line_starts, start_index) - 1
+        start_col_num = start_index - line_starts[start_line_num]
 
-        # Calculate the ending line number and column
+        # Calculate the ending line number and column from the line of the last character of the batch
         end_index = start_index + len(batch)
-        end_line_index = max(filter(lambda line_index: line_index < end_index, line_map.keys()))
-        end_line_num = line_map[end_line_index]
-        end_col_num = end_index - end_line_index
+        end_line_num = bisect_right(line_starts, end_index - 1) - 1
+        end_col_num = end_index - line_starts[end_line_num]
 
         # Create a SelectionData object with the results and update the search offset to exclude batches that have been processed
         selection_data.append(SelectionData(start_line_num, start_col_num, end_line_num, end_col_num))
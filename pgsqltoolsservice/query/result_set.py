@@ -13,9 +13,10 @@ from pgsqltoolsservice.query.data_storage import FileStreamFactory
 
 class ResultSetEvents:
 
-    def __init__(self, on_result_set_completed=None, on_result_set_partially_loaded=None) -> None:
+    def __init__(self, on_result_set_completed=None, on_result_set_partially_loaded=None, on_result_set_available=None) -> None:
         self._on_result_set_completed = on_result_set_completed
         self._on_result_set_partially_loaded = on_result_set_partially_loaded
+        self._on_result_set_available = on_result_set_available
 
 
 class ResultSet(metaclass=ABCMeta):
@@ -41,6 +42,15 @@ class ResultSet(metaclass=ABCMeta):
     def result_set_summary(self) -> ResultSetSummary:
         return ResultSetSummary(self.id, self.batch_id, self.row_count, self._has_been_read, self.columns_info)
 
+    @property
+    def has_been_read(self) -> bool:
+        return self._has_been_read
+
+    @property
+    def storage_size(self) -> int:
+        """Number of bytes the result set keeps in storage outside of memory"""
+        return 0
+
     @abstractproperty
     def row_count(self) -> int:
         pass
@@ -71,11 +81,25 @@ class ResultSet(metaclass=ABCMeta):
     def read_result_to_end(self, cursor):
         pass
 
+    def evict(self) -> None:
+        """Releases the storage of the result set to make room for other results, after which its rows cannot be read"""
+        pass
+
+    def dispose(self) -> None:
+        """Releases the storage of the result set once it is no longer needed"""
+        pass
+
     @abstractmethod
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure,
+                   on_progress=None) -> None:
         pass
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure, on_progress=None) -> None:
+        """
+        Saves the result to a file on a thread of its own
+        :param on_progress: Called with the number of rows saved so far and the number of rows to save while the
+        save is in progress
+        """
 
         if self._has_been_read is False:
             raise RuntimeError('Result cannot be saved until query execution has completed')
@@ -97,7 +121,7 @@ class ResultSet(metaclass=ABCMeta):
 
         new_save_as_thread = threading.Thread(
             target=self.do_save_as,
-            args=(params.file_path, row_start_index, row_end_index, file_factory, on_success, on_failure),
+            args=(params.file_path, row_start_index, row_end_index, file_factory, on_success, on_failure, on_progress),
             daemon=True)
         self._save_as_threads[params.file_path] = new_save_as_thread
         new_save_as_thread.start()
@@ -0,0 +1,121 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from collections import OrderedDict
+import threading
+from typing import Dict, List, Tuple  # noqa
+
+from pgsqltoolsservice.query.data_storage import service_buffer_file_stream as file_stream
+from pgsqltoolsservice.query.result_set import ResultSet
+
+
+class ResultStorageManager:
+    """
+    Tracks the storage used by the result sets of each session, a session being the owner URI of its queries.
+    When a session or all sessions together use more storage than their budget, result sets that have been
+    read are evicted in the order they were last viewed, least recently viewed first
+    """
+
+    def __init__(self, session_budget_bytes: int = 0, total_budget_bytes: int = 0) -> None:
+        """
+        :param session_budget_bytes: Number of bytes the result sets of a session may use, 0 for no limit
+        :param total_budget_bytes: Number of bytes the result sets of all sessions may use, 0 for no limit
+        """
+        self.session_budget_bytes = session_budget_bytes
+        self.total_budget_bytes = total_budget_bytes
+
+        self._lock = threading.Lock()
+        # Session of each result set, ordered from the least to the most recently viewed result set
+        self._result_sets: 'OrderedDict[ResultSet, str]' = OrderedDict()
+        self._evicted_count = 0
+
+    # PROPERTIES ###########################################################
+    @property
+    def evicted_count(self) -> int:
+        """Number of result sets that have been evicted to stay within the budgets"""
+        return self._evicted_count
+
+    # METHODS ##############################################################
+    def update_usage(self, session_id: str, result_set: ResultSet) -> None:
+        """
+        Tracks a result set of a session, or records that a tracked one has grown, and evicts result sets
+        until the storage used is within the budgets. The result set itself is not evicted
+        """
+        with self._lock:
+            if result_set not in self._result_sets:
+                self._result_sets[result_set] = session_id
+            self._enforce_budgets(result_set)
+
+    def mark_viewed(self, result_set: ResultSet) -> None:
+        """Marks a result set as the most recently viewed, making it the last to be evicted"""
+        with self._lock:
+            if result_set in self._result_sets:
+                self._result_sets.move_to_end(result_set)
+
+    def release_session(self, session_id: str) -> None:
+        """Stops tracking the result sets of a session and disposes of them"""
+        with self._lock:
+            result_sets = [result_set for result_set, owner in self._result_sets.items() if owner == session_id]
+            for result_set in result_sets:
+                del self._result_sets[result_set]
+
+        for result_set in result_sets:
+            result_set.dispose()
+
+    def get_usage(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Returns the number of bytes used by the result sets of each session and the number of result sets
+        of each session
+        """
+        with self._lock:
+            bytes_used: Dict[str, int] = {}
+            result_set_counts: Dict[str, int] = {}
+            for result_set, session_id in self._result_sets.items():
+                bytes_used[session_id] = bytes_used.get(session_id, 0) + result_set.storage_size
+                result_set_counts[session_id] = result_set_counts.get(session_id, 0) + 1
+            return bytes_used, result_set_counts
+
+    def delete_stale_storage(self) -> int:
+        """
+        Deletes the storage left behind by tools service processes that have exited
+        :returns: The number of storage directories deleted
+        """
+        return file_stream.delete_stale_storage_directories()
+
+    def close(self) -> None:
+        """Disposes of every result set and deletes the storage of this process"""
+        with self._lock:
+            result_sets = list(self._result_sets)
+            self._result_sets.clear()
+
+        for result_set in result_sets:
+            result_set.dispose()
+        file_stream.delete_storage_directory()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _enforce_budgets(self, protected_result_set: ResultSet) -> None:
+        sizes = {result_set: result_set.storage_size for result_set in self._result_sets}
+        session_sizes: Dict[str, int] = {}
+        for result_set, session_id in self._result_sets.items():
+            session_sizes[session_id] = session_sizes.get(session_id, 0) + sizes[result_set]
+        total_size = sum(session_sizes.values())
+
+        # Sizes only decrease as result sets are evicted, so a single pass from the least recently viewed
+        # result set is enough to bring the sessions within their budgets
+        for result_set, session_id in list(self._result_sets.items()):
+            is_over_total_budget = self.total_budget_bytes > 0 and total_size > self.total_budget_bytes
+            is_over_session_budget = self.session_budget_bytes > 0 and session_sizes[session_id] > self.session_budget_bytes
+            if not is_over_total_budget and not is_over_session_budget:
+                continue
+
+            # Result sets that are still being read cannot be evicted, nor can those that take no storage
+            if result_set is protected_result_set or not result_set.has_been_read or sizes[result_set] == 0:
+                continue
+
+            del self._result_sets[result_set]
+            result_set.evict()
+            self._evicted_count += 1
+            total_size -= sizes[result_set]
+            session_sizes[session_id] -= sizes[result_set]
@@ -0,0 +1,141 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Runs single statements for simple execute and reads their rows in pages, so that callers can stream large
+results in chunks while only one page of rows is held in memory at a time
+"""
+
+import time
+import uuid
+from typing import Any, Callable, List, Optional  # noqa
+
+from pgsqltoolsservice.converters.bytes_converter import get_bytes_converter
+from pgsqltoolsservice.converters.bytes_to_any_converters import get_bytes_to_any_converter
+from pgsqltoolsservice.parsers.statement_splitter import split_statements, STATEMENT_KIND_SELECT
+from pgsqltoolsservice.query.column_info import get_columns_info
+from pgsqltoolsservice.query.contracts import DbCellValue, DbColumn  # noqa
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
+
+
+SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR = 'Only a single statement can be run with simple execute'
+
+# Number of rows fetched at a time when a statement's rows are read without a limit
+FETCH_SIZE = 1000
+
+
+class SimpleExecution:
+    """
+    A statement run on a connection of its own, whose rows are read in pages. The rows of SELECT statements are
+    read through a named cursor held open on the server between pages, like the batches of queries are, while
+    other statements are run through a client cursor as they may not return rows
+    """
+
+    def __init__(self, connection, query_text: str, type_catalog: TypeCatalog = None) -> None:
+        """
+        :param connection: Connection in autocommit mode that is used by nothing else until the execution is closed
+        :param query_text: A single statement
+        :raises ValueError: If the text is not a single statement
+        """
+        statements = [statement for statement in split_statements(query_text) if not statement.is_empty]
+        if len(statements) != 1:
+            raise ValueError(SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR)
+
+        self.continuation_token: str = uuid.uuid4().hex
+        self.last_used: float = time.monotonic()
+        self._connection = connection
+        self._statement = statements[0]
+        self._type_catalog = type_catalog
+        self._cursor = None
+        self._columns_info: List[DbColumn] = []
+        self._converters: List[Callable[[Any], Any]] = []
+        self._row_count = 0
+        self._is_complete = False
+
+    # PROPERTIES ###########################################################
+    @property
+    def columns_info(self) -> List[DbColumn]:
+        """Columns of the rows of the statement, available once it has been executed"""
+        return self._columns_info
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every row of the statement has been read"""
+        return self._is_complete
+
+    @property
+    def connection(self):
+        """Connection the statement is run on"""
+        return self._connection
+
+    # METHODS ##############################################################
+    def execute(self) -> None:
+        """Executes the statement, reading no rows"""
+        if self._statement.kind == STATEMENT_KIND_SELECT:
+            # Connections are in autocommit mode, so the cursor is held past the end of the statement's transaction
+            self._cursor = self._connection.cursor(name=str(uuid.uuid4()), withhold=True)
+        else:
+            self._cursor = self._connection.cursor()
+        self._cursor.execute(self._statement.executable_text)
+
+    def fetch(self, max_rows: Optional[int] = None) -> List[List[DbCellValue]]:
+        """
+        Reads the next page of rows, marking the execution as complete once every row has been read
+        :param max_rows: Maximum number of rows to read, or None to read every remaining row
+        """
+        self.last_used = time.monotonic()
+        rows = []
+        while not self._is_complete and (max_rows is None or len(rows) < max_rows):
+            fetch_size = FETCH_SIZE if max_rows is None else max_rows - len(rows)
+            fetched_rows = self._fetch_rows(fetch_size)
+            rows.extend(fetched_rows)
+            # The end of the rows of a named cursor is only known once fewer rows than asked for are fetched
+            self._is_complete = len(fetched_rows) < fetch_size or self._has_read_client_cursor()
+        return rows
+
+    def close(self) -> None:
+        """Closes the cursor of the statement. The connection is left to its owner"""
+        if self._cursor is None:
+            return
+        try:
+            self._cursor.close()
+        finally:
+            self._cursor = None
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _has_read_client_cursor(self) -> bool:
+        """Returns whether the cursor is a client cursor whose rows have all been read"""
+        if self._cursor.name is not None:
+            return False
+        return self._cursor.description is None or self._cursor.rownumber >= self._cursor.rowcount
+
+    def _fetch_rows(self, fetch_size: int) -> List[List[DbCellValue]]:
+        # Statements run through a client cursor may return no rows, such as data modifying statements without
+        # RETURNING. Named cursors only describe their rows once some have been fetched
+        if self._cursor.name is None and self._cursor.description is None:
+            return []
+
+        rows = self._cursor.fetchmany(fetch_size)
+        if not self._columns_info and self._cursor.description is not None:
+            self._columns_info = get_columns_info(self._cursor.description, self._connection, self._type_catalog)
+            self._converters = [_get_value_converter(column.data_type) for column in self._columns_info]
+
+        first_row_id = self._row_count
+        self._row_count += len(rows)
+        cell_rows = []
+        for row_id, row in enumerate(rows, first_row_id):
+            values = [None if value is None else converter(value) for value, converter in zip(row, self._converters)]
+            cell_rows.append([DbCellValue('NULL' if value is None else value, value is None, value, row_id) for value in values])
+        return cell_rows
+
+
+def _get_value_converter(data_type: str) -> Callable[[Any], Any]:
+    """
+    Returns a function that converts the values of a column to what they are once stored and read back for a query,
+    so that rows sent for simple execute hold the same values, which can be serialized, as the rows of queries
+    """
+    write = get_bytes_converter(data_type)
+    read = get_bytes_to_any_converter(data_type)
+    return lambda value: read(bytes(write(value)))
@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+from typing import Dict, Iterable, List  # noqa
+
+from psycopg2 import sql
+
+
+# Command tags of statements after which the types of a database may have been created, renamed or dropped
+TYPE_DDL_COMMAND_TAGS = frozenset(
+    f'{command} {object_type}'
+    for command in ['CREATE', 'ALTER', 'DROP']
+    for object_type in ['TYPE', 'DOMAIN', 'EXTENSION', 'TABLE', 'VIEW', 'MATERIALIZED VIEW', 'FOREIGN TABLE']
+)
+
+
+class TypeInfo:
+    """Row of pg_type describing a type"""
+
+    def __init__(self, oid: int, name: str, category: str, element_oid: int) -> None:
+        """
+        :param oid: OID of the type
+        :param name: Name of the type, which is the data type of the columns of the type
+        :param category: Single character code of the category of the type, such as 'N' for numeric types
+        :param element_oid: OID of the type of the elements of an array type, 0 for other types
+        """
+        self.oid = oid
+        self.name = name
+        self.category = category
+        self.element_oid = element_oid
+
+
+class TypeCatalog:
+    """
+    Cache of the types of a database, mapping their OIDs to their pg_type rows. The base and array types are
+    loaded the first time types are requested, and the row types of relations and any other type that has not
+    been seen since are loaded when they are requested
+    """
+
+    def __init__(self) -> None:
+        self._types: Dict[int, TypeInfo] = {}
+        self._is_loaded = False
+        self._lock = threading.Lock()
+
+    def get_types(self, connection, oids: Iterable[int]) -> Dict[int, TypeInfo]:
+        """
+        Returns the types of the given OIDs, querying the database for those that are not cached
+        :param connection: Connection to the database of the catalog, used when types are not cached
+        :param oids: OIDs of the types to return
+        :returns: The type of each OID that exists in the database
+        """
+        with self._lock:
+            if not self._is_loaded:
+                self._add_types(query_types(connection))
+                self._is_loaded = True
+
+            missing_oids = [oid for oid in set(oids) if oid not in self._types]
+            if missing_oids:
+                self._add_types(query_types(connection, missing_oids))
+
+            return {oid: self._types[oid] for oid in oids if oid in self._types}
+
+    def invalidate(self) -> None:
+        """Forgets the cached types, so that they are queried again as they are requested"""
+        with self._lock:
+            self._types = {}
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _add_types(self, types: List[TypeInfo]) -> None:
+        for type_info in types:
+            self._types[type_info.oid] = type_info
+
+
+def query_types(connection, oids: List[int] = None) -> List[TypeInfo]:
+    """
+    Queries pg_type for types in a single round trip
+    :param connection: Connection to the database to query
+    :param oids: OIDs of the types to query. If not provided all types other than the row types of relations are queried
+    """
+    columns = sql.SQL(', ').join(sql.Identifier(name) for name in ['oid', 'typname', 'typcategory', 'typelem'])
+    if oids is None:
+        query = sql.SQL('SELECT {} FROM {} WHERE {} = 0').format(columns, sql.Identifier('pg_type'), sql.Identifier('typrelid'))
+    else:
+        query = sql.SQL('SELECT {} FROM {} WHERE {} IN ({})').format(
+            columns,
+            sql.Identifier('pg_type'),
+            sql.Identifier('oid'),
+            sql.SQL(', ').join(sql.Placeholder() * len(oids))
+        )
+
+    with connection.cursor() as type_cursor:
+        type_cursor.execute(query, oids)
+        return [TypeInfo(*row) for row in type_cursor.fetchall()]
@@ -7,6 +7,9 @@ from pgsqltoolsservice.query_execution.contracts.batch_notification import (
     BatchNotificationParams,
     BATCH_COMPLETE_NOTIFICATION, BATCH_START_NOTIFICATION
 )
+from pgsqltoolsservice.query_execution.contracts.export_query_request import (
+    EXPORT_QUERY_TO_FILE_REQUEST, ExportQueryToFileParams, ExportQueryToFileResult
+)
 from pgsqltoolsservice.query_execution.contracts.execute_request import (
     ExecuteDocumentSelectionParams, ExecuteStringParams, ExecuteRequestParamsBase,
     ExecuteResult, ExecutionPlanOptions, EXECUTE_DOCUMENT_SELECTION_REQUEST, EXECUTE_STRING_REQUEST,
@@ -35,12 +38,15 @@ from pgsqltoolsservice.query_execution.contracts.simple_execute_request import (
     SimpleExecuteRequest, SIMPLE_EXECUTE_REQUEST, SimpleExecuteResponse
 )
 from pgsqltoolsservice.query_execution.contracts.query_execution_plan_request import (
-    QUERY_EXECUTION_PLAN_REQUEST, QueryExecutionPlanRequest
+    ExecutionPlan, ExecutionPlanNode, QUERY_EXECUTION_PLAN_REQUEST, QueryExecutionPlanRequest, QueryExecutionResponse
+)
+from pgsqltoolsservice.query_execution.contracts.result_storage_usage_request import (
+    RESULT_STORAGE_USAGE_REQUEST, ResultStorageUsageParams, ResultStorageUsageResult, SessionStorageUsage
 )
 from pgsqltoolsservice.query_execution.contracts.save_result_as_request import (
-    SAVE_AS_CSV_REQUEST, SAVE_AS_JSON_REQUEST, SAVE_AS_EXCEL_REQUEST, SERIALIZATION_OPTIONS,
+    SAVE_AS_CSV_REQUEST, SAVE_AS_JSON_REQUEST, SAVE_AS_EXCEL_REQUEST, SAVE_AS_PROGRESS_NOTIFICATION, SERIALIZATION_OPTIONS,
     SaveResultsAsJsonRequestParams, SaveResultRequestResult,
-    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams
+    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams, SaveResultsProgressParams
 )
 
 __all__ = [
@@ -56,5 +62,8 @@ __all__ = [
     'SIMPLE_EXECUTE_REQUEST', 'SimpleExecuteRequest', 'SimpleExecuteResponse', 'EXECUTE_DOCUMENT_STATEMENT_REQUEST',
     'ExecuteDocumentStatementParams', 'SAVE_AS_CSV_REQUEST', 'SAVE_AS_JSON_REQUEST', 'SERIALIZATION_OPTIONS', 'SAVE_AS_EXCEL_REQUEST',
     'SaveResultRequestResult', 'SaveResultsAsCsvRequestParams', 'SaveResultsAsExcelRequestParams',
-    'SaveResultsAsJsonRequestParams'
+    'SaveResultsAsJsonRequestParams', 'RESULT_STORAGE_USAGE_REQUEST', 'ResultStorageUsageParams', 'ResultStorageUsageResult',
+    'SessionStorageUsage', 'SAVE_AS_PROGRESS_NOTIFICATION', 'SaveResultsProgressParams',
+    'EXPORT_QUERY_TO_FILE_REQUEST', 'ExportQueryToFileParams', 'ExportQueryToFileResult', 'ExecutionPlan', 'ExecutionPlanNode',
+    'QueryExecutionResponse'
 ]
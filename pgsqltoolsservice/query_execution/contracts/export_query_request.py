@@ -0,0 +1,34 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from pgsqltoolsservice.hosting import IncomingMessageConfiguration
+from pgsqltoolsservice.serialization import Serializable
+
+
+class ExportQueryToFileParams(Serializable):
+    """
+    Parameters of a request to export the rows of a query to a CSV file with COPY, without executing it in an editor
+    Attributes:
+        owner_uri:          URI of the connection to run the query on
+        query:              A single SELECT, VALUES or TABLE query
+        file_path:          Path of the CSV file to write
+        include_headers:    Whether the first line of the file should be the names of the columns
+    """
+
+    def __init__(self):
+        self.owner_uri: str = None
+        self.query: str = None
+        self.file_path: str = None
+        self.include_headers: bool = None
+
+
+class ExportQueryToFileResult:
+    """Parameters to return as the result of an export query to file request"""
+
+    def __init__(self, row_count: int):
+        self.row_count: int = row_count
+
+
+EXPORT_QUERY_TO_FILE_REQUEST = IncomingMessageConfiguration('query/exportToFile', ExportQueryToFileParams)
@@ -1,19 +1,37 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from typing import List  # noqa
+
 from pgsqltoolsservice.serialization import Serializable
 from pgsqltoolsservice.hosting import IncomingMessageConfiguration
+from pgsqltoolsservice.query.contracts import ExecutionPlan, ExecutionPlanNode  # noqa
 
 
 class QueryExecutionPlanRequest(Serializable):
+    """
+    Parameters of a request for the actual execution plan of a statement
+    Attributes:
+        owner_uri:          URI of the connection to run the statement on
+        batch_index:        Index of the batch of the owner URI's query whose statement is explained
+        result_set_index:   Index of the result set of the batch, which is not used as the plan is that of the whole batch
+        query:              Statement to explain instead of a batch of the owner URI's query
+    """
 
     def __init__(self):
         self.owner_uri: str = None
         self.batch_index: int = None
         self.result_set_index: int = None
+        self.query: str = None
 
 
 class QueryExecutionResponse:
+    """Parameters to return as the result of a query execution plan request"""
 
-    def __init__(self):
-        self.execution_plan = None
+    def __init__(self, execution_plan: ExecutionPlan):
+        self.execution_plan: ExecutionPlan = execution_plan
 
 
 QUERY_EXECUTION_PLAN_REQUEST = IncomingMessageConfiguration('query/executionPlan', QueryExecutionPlanRequest)
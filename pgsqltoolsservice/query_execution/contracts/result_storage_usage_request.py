@@ -0,0 +1,39 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from typing import List
+
+from pgsqltoolsservice.hosting import IncomingMessageConfiguration
+from pgsqltoolsservice.serialization import Serializable
+
+
+class ResultStorageUsageParams(Serializable):
+
+    def __init__(self):
+        self.owner_uri: str = None
+
+
+class SessionStorageUsage:
+    """Storage used by the result sets of the queries of an owner URI"""
+
+    def __init__(self, owner_uri: str, bytes_used: int, result_set_count: int):
+        self.owner_uri = owner_uri
+        self.bytes_used = bytes_used
+        self.result_set_count = result_set_count
+
+
+class ResultStorageUsageResult:
+    """Parameters to return as the result of a result storage usage request"""
+
+    def __init__(self, bytes_used: int, session_budget_bytes: int, total_budget_bytes: int, evicted_result_set_count: int,
+                 sessions: List[SessionStorageUsage]):
+        self.bytes_used = bytes_used
+        self.session_budget_bytes = session_budget_bytes
+        self.total_budget_bytes = total_budget_bytes
+        self.evicted_result_set_count = evicted_result_set_count
+        self.sessions = sessions
+
+
+RESULT_STORAGE_USAGE_REQUEST = IncomingMessageConfiguration('query/resultStorageUsage', ResultStorageUsageParams)
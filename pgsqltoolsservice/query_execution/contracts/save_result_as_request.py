@@ -19,6 +19,8 @@ class SaveResultsAsCsvRequestParams(SaveResultsRequestParams):
     def __init__(self):
         super().__init__()
         self.include_headers: bool = None
+        # Whether to save the result by running the query again with COPY rather than from the stored rows
+        self.use_server_copy: bool = None
 
 
 class SaveResultsAsJsonRequestParams(SaveResultsRequestParams):
@@ -34,6 +36,23 @@ class SaveResultsAsExcelRequestParams(SaveResultsRequestParams):
         self.include_headers: bool = None
 
 
+class SaveResultsProgressParams:
+    """
+    Parameters of the notification sent periodically while results are being saved
+    Attributes:
+        owner_uri:      URI for the editor that owns the query
+        file_path:      Path of the file the results are being saved to
+        rows_written:   Number of rows saved so far
+        total_rows:     Number of rows being saved
+    """
+
+    def __init__(self, owner_uri: str, file_path: str, rows_written: int, total_rows: int):
+        self.owner_uri: str = owner_uri
+        self.file_path: str = file_path
+        self.rows_written: int = rows_written
+        self.total_rows: int = total_rows
+
+
 SAVE_AS_CSV_REQUEST = IncomingMessageConfiguration(
     'query/saveCsv',
     SaveResultsAsCsvRequestParams
@@ -49,6 +68,8 @@ SAVE_AS_EXCEL_REQUEST = IncomingMessageConfiguration(
     SaveResultsAsExcelRequestParams
 )
 
+SAVE_AS_PROGRESS_NOTIFICATION = 'query/saveProgress'
+
 SERIALIZATION_OPTIONS = FeatureMetadataProvider(
     True,
     'serializationService',
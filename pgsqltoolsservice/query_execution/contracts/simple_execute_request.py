@@ -15,14 +15,20 @@ class SimpleExecuteRequest(Serializable):
     def __init__(self):
         self.owner_uri: str = None
         self.query_string: str = None
+        # Maximum number of rows to send in the response, or None to send every row
+        self.max_rows: int = None
+        # Token of a previous response whose remaining rows are to be sent instead of running the query string
+        self.continuation_token: str = None
 
 
 class SimpleExecuteResponse:
 
-    def __init__(self, rows: List[List[DbCellValue]], row_count: int, column_info: List[DbColumn]):
+    def __init__(self, rows: List[List[DbCellValue]], row_count: int, column_info: List[DbColumn], continuation_token: str = None):
         self.rows = rows
         self.row_count = row_count
         self.column_info = column_info
+        # Token to request the next rows with, or None if every row has been sent
+        self.continuation_token = continuation_token
 
 
 SIMPLE_EXECUTE_REQUEST = IncomingMessageConfiguration('query/simpleexecute', SimpleExecuteRequest)
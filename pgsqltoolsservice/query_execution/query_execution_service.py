@@ -5,51 +5,62 @@
 
 from datetime import datetime
 import threading
-import uuid
 from typing import Callable, Dict, List, Optional  # noqa
-import sqlparse
 import ntpath
 
 import psycopg2
 import psycopg2.errorcodes
 
 from pgsqltoolsservice.hosting import RequestContext, ServiceProvider
+from pgsqltoolsservice.parsers.statement_splitter import split_statements
 from pgsqltoolsservice.query import (
-    Batch, BatchEvents, ExecutionState, QueryExecutionSettings, Query, QueryEvents,
-    compute_selection_data_for_batches as compute_batches
+    Batch, BatchEvents, ExecutionState, QueryExecutionSettings, Query, QueryEvents, ResultStorageManager
 )
+from pgsqltoolsservice.query.copy_export import copy_query_to_file, get_copyable_query
+from pgsqltoolsservice.query.execution_plan import explain_query
+from pgsqltoolsservice.query.simple_execution import SimpleExecution
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
 from pgsqltoolsservice.query.contracts import BatchSummary, ResultSetSubset, SelectionData, SaveResultsRequestParams, SubsetResult  # noqa
 from pgsqltoolsservice.query import ResultSetStorageType
 from pgsqltoolsservice.query_execution.contracts import (
     EXECUTE_STRING_REQUEST, EXECUTE_DOCUMENT_SELECTION_REQUEST, ExecuteRequestParamsBase,
     BATCH_START_NOTIFICATION, BATCH_COMPLETE_NOTIFICATION, EXECUTE_DOCUMENT_STATEMENT_REQUEST,
     ExecuteDocumentStatementParams, ExecutionPlanOptions, ResultSetNotificationParams,
-    MESSAGE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION, MessageNotificationParams,
-    QUERY_COMPLETE_NOTIFICATION, QUERY_EXECUTION_PLAN_REQUEST, QueryCancelResult, QueryExecutionPlanRequest,
+    MESSAGE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION,
+    MessageNotificationParams,
+    QUERY_COMPLETE_NOTIFICATION, QUERY_EXECUTION_PLAN_REQUEST, QueryCancelResult, QueryExecutionPlanRequest, QueryExecutionResponse,
     SUBSET_REQUEST, ExecuteDocumentSelectionParams, CANCEL_REQUEST, QueryCancelParams, ResultMessage, SubsetParams,
     BatchNotificationParams, QueryCompleteNotificationParams, QueryDisposeParams,
-    DISPOSE_REQUEST, SIMPLE_EXECUTE_REQUEST, SimpleExecuteRequest, ExecuteStringParams,
+    DISPOSE_REQUEST, SIMPLE_EXECUTE_REQUEST, SimpleExecuteRequest,
     SimpleExecuteResponse, SAVE_AS_CSV_REQUEST, SAVE_AS_JSON_REQUEST, SAVE_AS_EXCEL_REQUEST,
     SaveResultsAsJsonRequestParams, SaveResultRequestResult,
-    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams
+    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams, SAVE_AS_PROGRESS_NOTIFICATION, SaveResultsProgressParams,
+    EXPORT_QUERY_TO_FILE_REQUEST, ExportQueryToFileParams, ExportQueryToFileResult,
+    RESULT_STORAGE_USAGE_REQUEST, ResultStorageUsageParams, ResultStorageUsageResult, SessionStorageUsage
 )
-from pgsqltoolsservice.connection.contracts import ConnectRequestParams
 from pgsqltoolsservice.connection.contracts import ConnectionType
+from pgsqltoolsservice.workspace.contracts import ResultStorageConfiguration
 import pgsqltoolsservice.utils as utils
 from pgsqltoolsservice.query.data_storage import (
     FileStreamFactory, SaveAsCsvFileStreamFactory, SaveAsJsonFileStreamFactory, SaveAsExcelFileStreamFactory
 )
 
 
-CANCELATION_QUERY = 'SELECT pg_cancel_backend (%s)'
 NO_QUERY_MESSAGE = 'QueryServiceRequestsNoQuery'
+BYTES_PER_MB = 1024 * 1024
+SIMPLE_EXECUTE_MAX_ROWS_ERROR = 'The maximum number of rows must be greater than 0'
+SIMPLE_EXECUTE_CONTINUATION_ERROR = 'The continuation token is not valid, or its rows were discarded after being left unread'
+
+# Time after which the rows left unread by a simple execute are discarded and its connection released
+SIMPLE_EXECUTION_TIMEOUT_SECONDS = 300
 
 
 class ExecuteRequestWorkerArgs():
 
     def __init__(self, owner_uri: str, connection: 'psycopg2.extensions.connection', request_context: RequestContext, result_set_storage_type,
                  before_query_initialize: Callable = None, on_batch_start: Callable = None, on_message_notification: Callable = None,
-                 on_resultset_complete: Callable = None, on_batch_complete: Callable = None, on_query_complete: Callable = None):
+                 on_resultset_complete: Callable = None, on_batch_complete: Callable = None, on_query_complete: Callable = None,
+                 on_resultset_available: Callable = None, on_resultset_updated: Callable = None):
 
         self.owner_uri = owner_uri
         self.connection = connection
@@ -61,6 +72,8 @@ class ExecuteRequestWorkerArgs():
         self.on_resultset_complete = on_resultset_complete
         self.on_batch_complete = on_batch_complete
         self.on_query_complete = on_query_complete
+        self.on_resultset_available = on_resultset_available
+        self.on_resultset_updated = on_resultset_updated
 
 
 class QueryExecutionService(object):
@@ -71,6 +84,15 @@ class QueryExecutionService(object):
         # Dictionary mapping uri to a list of batches
         self.query_results: Dict[str, Query] = {}
         self.owner_to_thread_map: dict = {}  # Only used for testing
+        # Storage of the result sets of the queries, with the budgets of the default configuration until a
+        # query is executed with the workspace configuration
+        self._result_storage = ResultStorageManager()
+        self._apply_result_storage_options(ResultStorageConfiguration())
+        # Cache of the types of each database, shared by the queries of every connection to the database
+        self._type_catalogs: Dict[tuple, TypeCatalog] = {}
+        # Simple executes whose rows have not all been sent, keyed by their continuation token
+        self._simple_executions: Dict[str, SimpleExecution] = {}
+        self._simple_executions_lock = threading.Lock()
 
         self._service_action_mapping: dict = {
             EXECUTE_STRING_REQUEST: self._handle_execute_query_request,
@@ -83,7 +105,9 @@ class QueryExecutionService(object):
             QUERY_EXECUTION_PLAN_REQUEST: self._handle_query_execution_plan_request,
             SAVE_AS_CSV_REQUEST: self._handle_save_as_csv_request,
             SAVE_AS_JSON_REQUEST: self._handle_save_as_json_request,
-            SAVE_AS_EXCEL_REQUEST: self._handle_save_as_excel_request
+            SAVE_AS_EXCEL_REQUEST: self._handle_save_as_excel_request,
+            RESULT_STORAGE_USAGE_REQUEST: self._handle_result_storage_usage_request,
+            EXPORT_QUERY_TO_FILE_REQUEST: self._handle_export_query_to_file_request
         }
 
     def register(self, service_provider: ServiceProvider):
@@ -93,6 +117,11 @@ class QueryExecutionService(object):
         for action in self._service_action_mapping:
             self._service_provider.server.set_request_handler(action, self._service_action_mapping[action])
 
+        # Delete the results left behind by processes that did not shut down cleanly, and this process' results on shutdown
+        utils.thread.run_as_thread(self._result_storage.delete_stale_storage)
+        self._service_provider.server.add_shutdown_handler(self._result_storage.close)
+        self._service_provider.server.add_shutdown_handler(self._close_simple_executions)
+
         if self._service_provider.logger is not None:
             self._service_provider.logger.info('Query execution service successfully initialized')
 
@@ -102,6 +131,15 @@ class QueryExecutionService(object):
     # REQUEST HANDLERS #####################################################
 
     def _handle_save_as_csv_request(self, request_context: RequestContext, params: SaveResultsAsCsvRequestParams) -> None:
+        if params.use_server_copy:
+            # Results that cannot be copied by the server, such as selections, are saved from the stored rows instead
+            query_text = self._get_copyable_batch_text(params)
+            if query_text is not None:
+                self._start_copy_to_file(
+                    request_context, params.owner_uri, query_text, params.file_path, params.include_headers,
+                    lambda row_count: request_context.send_response(SaveResultRequestResult()))
+                return
+
         self._save_result(params, request_context, SaveAsCsvFileStreamFactory(params))
 
     def _handle_save_as_json_request(self, request_context: RequestContext, params: SaveResultsAsJsonRequestParams) -> None:
@@ -110,42 +148,68 @@ class QueryExecutionService(object):
     def _handle_save_as_excel_request(self, request_context: RequestContext, params: SaveResultsAsExcelRequestParams) -> None:
         self._save_result(params, request_context, SaveAsExcelFileStreamFactory(params))
 
-    def _handle_query_execution_plan_request(self, request_context: RequestContext, params: QueryExecutionPlanRequest):
-        raise NotImplementedError()
-
-    def _handle_simple_execute_request(self, request_context: RequestContext, params: SimpleExecuteRequest):
-
-        new_owner_uri = str(uuid.uuid4())
-
-        connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
-        connection_info = connection_service.get_connection_info(params.owner_uri)
-        connection_service.connect(ConnectRequestParams(connection_info.details, new_owner_uri, ConnectionType.QUERY))
-        new_connection = self._get_connection(new_owner_uri, ConnectionType.QUERY)
-
-        execute_params = ExecuteStringParams()
-        execute_params.query = params.query_string
-        execute_params.owner_uri = new_owner_uri
-
-        def on_query_complete(query_complete_params):
-            subset_params = SubsetParams()
-            subset_params.owner_uri = new_owner_uri
-            subset_params.batch_index = 0
-            subset_params.result_set_index = 0
-            subset_params.rows_start_index = 0
-
-            resultset_summary = query_complete_params.batch_summaries[0].result_set_summaries[0]
-
-            subset_params.rows_count = resultset_summary.row_count
+    def _handle_export_query_to_file_request(self, request_context: RequestContext, params: ExportQueryToFileParams) -> None:
+        """Exports the rows of a query to a CSV file with COPY, without the rows passing through result storage"""
+        self._start_copy_to_file(
+            request_context, params.owner_uri, params.query, params.file_path, params.include_headers,
+            lambda row_count: request_context.send_response(ExportQueryToFileResult(row_count)))
+
+    def _handle_result_storage_usage_request(self, request_context: RequestContext, params: ResultStorageUsageParams) -> None:
+        """Sends the storage used by the result sets of each owner URI, or of the given owner URI only"""
+        bytes_used, result_set_counts = self._result_storage.get_usage()
+        sessions = [
+            SessionStorageUsage(owner_uri, session_bytes_used, result_set_counts[owner_uri])
+            for owner_uri, session_bytes_used in bytes_used.items()
+            if params.owner_uri is None or owner_uri == params.owner_uri
+        ]
+        request_context.send_response(ResultStorageUsageResult(
+            sum(session.bytes_used for session in sessions), self._result_storage.session_budget_bytes, self._result_storage.total_budget_bytes,
+            self._result_storage.evicted_count, sessions))
+
+    def _handle_query_execution_plan_request(self, request_context: RequestContext, params: QueryExecutionPlanRequest) -> None:
+        """
+        Sends the actual execution plan of the given statement, or of a batch of the owner URI's query, with the metrics
+        of each of its nodes. The statement is run with EXPLAIN ANALYZE on a connection of its own, so that it neither
+        waits for nor holds up queries run in the editor. Plan requests of one owner URI share that connection and run one
+        at a time, and canceling the request cancels its statement
+        """
+        query_text = params.query
+        if query_text is None:
+            query: Query = self.query_results.get(params.owner_uri)
+            if query is None:
+                request_context.send_error(NO_QUERY_MESSAGE)  # TODO: Localize
+                return
+            if params.batch_index is None or not 0 <= params.batch_index < len(query.batches):
+                request_context.send_error('Batch index cannot be less than 0 or greater than the number of batches')  # TODO: Localize
+                return
+            query_text = query.batches[params.batch_index].batch_text
 
-            subset = self._get_result_subset(request_context, subset_params)
+        thread = threading.Thread(
+            target=self._query_execution_plan_worker,
+            args=(request_context, params.owner_uri, query_text)
+        )
+        thread.daemon = True
+        thread.start()
 
-            simple_execute_response = SimpleExecuteResponse(subset.result_subset.rows, subset.result_subset.row_count, resultset_summary.column_info)
-            request_context.send_response(simple_execute_response)
+    def _handle_simple_execute_request(self, request_context: RequestContext, params: SimpleExecuteRequest):
+        """
+        Runs a single statement on a connection leased for it, sending at most max_rows of its rows. The rows that
+        are left are kept on the server with the connection, and are sent by requests with the continuation token
+        """
+        if params.max_rows is not None and params.max_rows <= 0:
+            request_context.send_error(SIMPLE_EXECUTE_MAX_ROWS_ERROR)
+            return
 
-        worker_args = ExecuteRequestWorkerArgs(new_owner_uri, new_connection, request_context, ResultSetStorageType.FILE_STORAGE,
-                                               on_query_complete=on_query_complete)
+        execution = None
+        if params.continuation_token is not None:
+            with self._simple_executions_lock:
+                execution = self._simple_executions.pop(params.continuation_token, None)
+            if execution is None:
+                request_context.send_error(SIMPLE_EXECUTE_CONTINUATION_ERROR)
+                return
 
-        self._start_query_execution_thread(request_context, execute_params, worker_args)
+        thread = threading.Thread(target=self._simple_execute, args=(request_context, params, execution), daemon=True)
+        thread.start()
 
     def _handle_execute_query_request(
         self, request_context: RequestContext, params: ExecuteRequestParamsBase
@@ -162,8 +226,13 @@ class QueryExecutionService(object):
         def on_message_notification(notice_message_params):
             request_context.send_notification(MESSAGE_NOTIFICATION, notice_message_params)
 
-        def on_resultset_complete(result_set_params):
+        def on_resultset_available(result_set_params):
             request_context.send_notification(RESULT_SET_AVAILABLE_NOTIFICATION, result_set_params)
+
+        def on_resultset_updated(result_set_params):
+            request_context.send_notification(RESULT_SET_UPDATED_NOTIFICATION, result_set_params)
+
+        def on_resultset_complete(result_set_params):
             request_context.send_notification(RESULT_SET_COMPLETE_NOTIFICATION, result_set_params)
 
         def on_batch_complete(batch_event_params):
@@ -184,7 +253,7 @@ class QueryExecutionService(object):
 
         worker_args = ExecuteRequestWorkerArgs(params.owner_uri, conn, request_context, ResultSetStorageType.FILE_STORAGE, before_query_initialize,
                                                on_batch_start, on_message_notification, on_resultset_complete,
-                                               on_batch_complete, on_query_complete)
+                                               on_batch_complete, on_query_complete, on_resultset_available, on_resultset_updated)
 
         self._start_query_execution_thread(request_context, params, worker_args)
 
@@ -195,7 +264,25 @@ class QueryExecutionService(object):
             batch_event_params = BatchNotificationParams(batch.batch_summary, worker_args.owner_uri)
             _check_and_fire(worker_args.on_batch_start, batch_event_params)
 
+        # Batches whose result set has been reported as available while it was being read
+        available_batch_ids = set()
+
+        def _result_set_available_callback(batch: Batch) -> None:
+            available_batch_ids.add(batch.id)
+            self._result_storage.update_usage(worker_args.owner_uri, batch.result_set)
+            # The batch summary has no result sets until the batch has executed, so summarize the result set directly
+            result_set_params = ResultSetNotificationParams(worker_args.owner_uri, batch.result_set.result_set_summary)
+            _check_and_fire(worker_args.on_resultset_available, result_set_params)
+
+        def _result_set_updated_callback(batch: Batch) -> None:
+            self._result_storage.update_usage(worker_args.owner_uri, batch.result_set)
+            result_set_params = ResultSetNotificationParams(worker_args.owner_uri, batch.result_set.result_set_summary)
+            _check_and_fire(worker_args.on_resultset_updated, result_set_params)
+
         def _batch_execution_finished_callback(batch: Batch) -> None:
+            if batch.result_set is not None:
+                self._result_storage.update_usage(worker_args.owner_uri, batch.result_set)
+
             # Send back notices as a separate message to avoid error coloring / highlighting of text
             notices = batch.notices
             if notices:
@@ -204,8 +291,10 @@ class QueryExecutionService(object):
 
             batch_summary = batch.batch_summary
 
-            # send query/resultSetComplete response
+            # send query/resultSetAvailable, unless it was sent while the result set was read, and query/resultSetComplete
             result_set_params = self.build_result_set_complete_params(batch_summary, worker_args.owner_uri)
+            if batch.id not in available_batch_ids:
+                _check_and_fire(worker_args.on_resultset_available, result_set_params)
             _check_and_fire(worker_args.on_resultset_complete, result_set_params)
 
             # If the batch was successful, send a message to the client
@@ -222,8 +311,16 @@ class QueryExecutionService(object):
         if params.owner_uri not in self.query_results or self.query_results[params.owner_uri].execution_state is ExecutionState.EXECUTED:
             query_text = self._get_query_text_from_execute_params(params)
 
-            execution_settings = QueryExecutionSettings(params.execution_plan_options, worker_args.result_set_storage_type)
-            query_events = QueryEvents(None, None, BatchEvents(_batch_execution_started_callback, _batch_execution_finished_callback))
+            # The results of the previous query are replaced by those of the new one
+            self._result_storage.release_session(params.owner_uri)
+            storage_options = self._update_result_storage_budgets()
+
+            type_catalog = self._get_type_catalog(worker_args.connection)
+            execution_settings = QueryExecutionSettings(
+                params.execution_plan_options, worker_args.result_set_storage_type, type_catalog, storage_options.use_binary_copy)
+            batch_events = BatchEvents(_batch_execution_started_callback, _batch_execution_finished_callback,
+                                       on_result_set_available=_result_set_available_callback, on_result_set_updated=_result_set_updated_callback)
+            query_events = QueryEvents(None, None, batch_events)
             self.query_results[params.owner_uri] = Query(params.owner_uri, query_text, execution_settings, query_events)
         elif self.query_results[params.owner_uri].execution_state is ExecutionState.EXECUTING:
             request_context.send_error('Another query is currently executing.')  # TODO: Localize
@@ -239,7 +336,13 @@ class QueryExecutionService(object):
 
     def _handle_subset_request(self, request_context: RequestContext, params: SubsetParams):
         """Sends a response back to the query/subset request"""
-        request_context.send_response(self._get_result_subset(request_context, params))
+        try:
+            result_subset = self._get_result_subset(request_context, params)
+        except ValueError as error:
+            # The rows of the result set cannot be read, such as when it was evicted from storage or disposed
+            request_context.send_error(str(error))
+            return
+        request_context.send_response(result_subset)
 
     def _get_result_subset(self, request_context: RequestContext, params: SubsetParams) -> SubsetResult:
         query: Query = self.get_query(params.owner_uri)
@@ -248,6 +351,7 @@ class QueryExecutionService(object):
             params.batch_index,
             params.rows_start_index,
             params.rows_start_index + params.rows_count)
+        self._result_storage.mark_viewed(query.batches[params.batch_index].result_set)
 
         return SubsetResult(result_set_subset)
 
@@ -265,12 +369,7 @@ class QueryExecutionService(object):
                 request_context.send_response(QueryCancelResult('Query already executed'))  # TODO: Localize
                 return
 
-            query.is_canceled = True
-
-            # Only need to do additional work to cancel the query
-            # if it's currently running
-            if query.execution_state is ExecutionState.EXECUTING:
-                self.cancel_query(params.owner_uri)
+            self.cancel_query(params.owner_uri)
             request_context.send_response(QueryCancelResult())
 
         except Exception as e:
@@ -289,23 +388,21 @@ class QueryExecutionService(object):
             if self.query_results[params.owner_uri].execution_state is not ExecutionState.EXECUTED:
                 self.cancel_query(params.owner_uri)
             del self.query_results[params.owner_uri]
+            self._result_storage.release_session(params.owner_uri)
             request_context.send_response({})
         except Exception as e:
             request_context.send_unhandled_error_response(e)
 
     def cancel_query(self, owner_uri: str):
-        conn = self._get_connection(owner_uri, ConnectionType.QUERY)
-        cancel_conn = self._get_connection(owner_uri, ConnectionType.QUERY_CANCEL)
-        if conn is None or cancel_conn is None:
-            raise LookupError('Could not find associated connection')  # TODO: Localize
-        backend_pid = conn.get_backend_pid()
-        cur = cancel_conn.cursor()
-        try:
-            cur.execute(CANCELATION_QUERY, (backend_pid,))
-        # This exception occurs when we run SELECT pg_cancel_backend on
-        # a query that's currently executing
-        except BaseException:
-            raise
+        """
+        Cancels the query of an owner URI, including the loads of edit data sessions. The statement running on the
+        query's connection is canceled with the cancel key of its backend, so that no other connection is needed
+        :raises LookupError: If the owner URI has no query
+        """
+        query = self.query_results.get(owner_uri)
+        if query is None:
+            raise LookupError('Could not find associated query')  # TODO: Localize
+        query.cancel()
 
     def _execute_query_request_worker(self, worker_args: ExecuteRequestWorkerArgs):
         """Worker method for 'handle execute query request' thread"""
@@ -326,6 +423,21 @@ class QueryExecutionService(object):
             query_complete_params = QueryCompleteNotificationParams(worker_args.owner_uri, batch_summaries)
             _check_and_fire(worker_args.on_query_complete, query_complete_params)
 
+    def _query_execution_plan_worker(self, request_context: RequestContext, owner_uri: str, query_text: str) -> None:
+        try:
+            connection = self._get_connection(owner_uri, ConnectionType.EXPLAIN)
+            # The statement is canceled along with the request. Blocks that cancel statements on a connection run one
+            # at a time, so the transactions of concurrent plan requests of the owner URI do not interleave
+            with request_context.cancellation_token.canceling_statements(connection):
+                execution_plan = explain_query(connection, query_text)
+        except Exception as error:
+            if request_context.cancellation_token.canceled:
+                # The request has already been responded to
+                return
+            request_context.send_error('Failed to get the execution plan: {0}'.format(error))  # TODO: Localize
+            return
+        request_context.send_response(QueryExecutionResponse(execution_plan))
+
     def _get_connection(self, owner_uri: str, connection_type: ConnectionType) -> 'psycopg2.connection':
         """
         Get a connection for the given owner URI and connection type from the connection service
@@ -351,6 +463,29 @@ class QueryExecutionService(object):
         result_message = ResultMessage(batch_id, is_error, utils.time.get_time_str(datetime.now()), message)
         return MessageNotificationParams(owner_uri, result_message)
 
+    def _get_type_catalog(self, connection: 'psycopg2.extensions.connection') -> TypeCatalog:
+        # Types are defined for each database, so connections to the same database of a server share a catalog
+        dsn_parameters = connection.get_dsn_parameters() or {}
+        database_key = (dsn_parameters.get('host'), dsn_parameters.get('port'), dsn_parameters.get('dbname'))
+        return self._type_catalogs.setdefault(database_key, TypeCatalog())
+
+    def _update_result_storage_budgets(self) -> ResultStorageConfiguration:
+        """Applies the budgets of the workspace configuration of the result storage, returning the configuration"""
+        try:
+            # Look up workspace config in a try block in case it's not defined / set
+            workspace_service = self._service_provider[utils.constants.WORKSPACE_SERVICE_NAME]
+            storage_options = workspace_service.configuration.pgsql.result_storage
+        except (AttributeError, KeyError):
+            # Indicates the config isn't defined. We are OK with this as the budgets have defaults
+            return ResultStorageConfiguration()
+
+        self._apply_result_storage_options(storage_options)
+        return storage_options
+
+    def _apply_result_storage_options(self, storage_options: ResultStorageConfiguration) -> None:
+        self._result_storage.session_budget_bytes = storage_options.session_budget_mb * BYTES_PER_MB
+        self._result_storage.total_budget_bytes = storage_options.total_budget_mb * BYTES_PER_MB
+
     def _get_query_text_from_execute_params(self, params: ExecuteRequestParamsBase):
         if isinstance(params, ExecuteDocumentSelectionParams):
             workspace_service = self._service_provider[utils.constants.WORKSPACE_SERVICE_NAME]
@@ -361,7 +496,10 @@ class QueryExecutionService(object):
         elif isinstance(params, ExecuteDocumentStatementParams):
             workspace_service = self._service_provider[utils.constants.WORKSPACE_SERVICE_NAME]
             query = workspace_service.get_text(params.owner_uri, None)
-            selection_data_list: List[SelectionData] = compute_batches(sqlparse.split(query), query)
+            selection_data_list: List[SelectionData] = [
+                SelectionData(statement.start_line, statement.start_column, statement.end_line, statement.end_column)
+                for statement in split_statements(query)
+            ]
 
             for selection_data in selection_data_list:
                 if selection_data.start_line <= params.line and selection_data.end_line >= params.line:
@@ -413,12 +551,126 @@ class QueryExecutionService(object):
             message = 'Failed to save {0}: {1}'.format(ntpath.basename(params.file_path), reason)
             request_context.send_error(message)
 
+        def on_progress(rows_written: int, total_rows: int):
+            progress_params = SaveResultsProgressParams(params.owner_uri, params.file_path, rows_written, total_rows)
+            request_context.send_notification(SAVE_AS_PROGRESS_NOTIFICATION, progress_params)
+
         try:
-            query.save_as(params, file_factory, on_success, on_error)
+            query.save_as(params, file_factory, on_success, on_error, on_progress)
 
         except Exception as error:
             on_error(str(error))
 
+    def _get_copyable_batch_text(self, params: SaveResultsRequestParams) -> Optional[str]:
+        """
+        Returns the query of the batch of a saved result if the whole result can be exported with COPY, None otherwise.
+        The result cannot be exported while a transaction is open on the query connection, as the export connection
+        does not see the changes the transaction made
+        """
+        query: Query = self.query_results.get(params.owner_uri)
+        if query is None or params.is_save_selection or params.batch_index is None or not 0 <= params.batch_index < len(query.batches):
+            return None
+
+        connection_info = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME].get_connection_info(params.owner_uri)
+        query_connection = None if connection_info is None else connection_info.get_connection(ConnectionType.QUERY)
+        if query_connection is not None and query_connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return None
+
+        try:
+            return get_copyable_query(query.batches[params.batch_index].batch_text)
+        except ValueError:
+            return None
+
+    def _simple_execute(self, request_context: RequestContext, params: SimpleExecuteRequest, execution: Optional[SimpleExecution]) -> None:
+        """Sends the next page of rows of a simple execute, starting the execution if it is not given"""
+        connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
+        connection = None if execution is None else execution.connection
+        try:
+            if execution is None:
+                connection = connection_service.lease_connection(params.owner_uri)
+                execution = SimpleExecution(connection, params.query_string, self._get_type_catalog(connection))
+                with request_context.cancellation_token.canceling_statements(connection):
+                    execution.execute()
+            with request_context.cancellation_token.canceling_statements(connection):
+                rows = execution.fetch(params.max_rows)
+        except Exception as error:
+            if connection is not None:
+                self._end_simple_execution(connection, execution)
+            request_context.send_error(str(error))
+            return
+
+        if execution.is_complete:
+            self._end_simple_execution(connection, execution)
+            continuation_token = None
+        else:
+            self._keep_simple_execution(execution)
+            continuation_token = execution.continuation_token
+        request_context.send_response(SimpleExecuteResponse(rows, len(rows), execution.columns_info, continuation_token))
+
+    def _keep_simple_execution(self, execution: SimpleExecution) -> None:
+        """Keeps a simple execute whose rows have not all been sent, ending it if it is not continued before the timeout"""
+        with self._simple_executions_lock:
+            self._simple_executions[execution.continuation_token] = execution
+        timer = threading.Timer(
+            SIMPLE_EXECUTION_TIMEOUT_SECONDS, self._expire_simple_execution, (execution.continuation_token, execution.last_used)
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _expire_simple_execution(self, continuation_token: str, last_used: float) -> None:
+        # The execution is only expired if it has not been continued since the timer was started
+        with self._simple_executions_lock:
+            execution = self._simple_executions.get(continuation_token)
+            if execution is None or execution.last_used != last_used:
+                return
+            del self._simple_executions[continuation_token]
+        self._end_simple_execution(execution.connection, execution)
+
+    def _close_simple_executions(self) -> None:
+        """Ends the simple executes whose rows have not all been sent"""
+        with self._simple_executions_lock:
+            executions = list(self._simple_executions.values())
+            self._simple_executions.clear()
+        for execution in executions:
+            self._end_simple_execution(execution.connection, execution)
+
+    def _end_simple_execution(self, connection: 'psycopg2.extensions.connection', execution: Optional[SimpleExecution]) -> None:
+        """Closes a simple execute, always releasing its connection to the pool"""
+        connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
+        try:
+            if execution is not None:
+                execution.close()
+        except psycopg2.Error:
+            # The connection is closed by the pool if the cursor could not be closed on it
+            pass
+        finally:
+            connection_service.release_connection(connection)
+
+    def _start_copy_to_file(self, request_context: RequestContext, owner_uri: str, query_text: str, file_path: str, include_headers: bool,
+                            on_success: Callable[[int], None]) -> threading.Thread:
+        """
+        Exports the rows of a query to a CSV file with COPY on a thread of its own. The query is run on the export
+        connection of the owner URI so that it neither waits for nor holds up queries run in the editor, and is
+        canceled along with the request
+        :param on_success: Called with the number of rows exported once the file has been written
+        """
+        def copy_to_file():
+            try:
+                connection = self._get_connection(owner_uri, ConnectionType.EXPORT)
+                with request_context.cancellation_token.canceling_statements(connection):
+                    row_count = copy_query_to_file(connection, query_text, file_path, bool(include_headers))
+            except Exception as error:
+                if request_context.cancellation_token.canceled:
+                    # The request has already been responded to
+                    return
+                request_context.send_error('Failed to save {0}: {1}'.format(ntpath.basename(file_path), error))
+                return
+            on_success(row_count)
+
+        thread = threading.Thread(target=copy_to_file, daemon=True)
+        thread.start()
+        return thread
+
 
 def _create_rows_affected_message(batch: Batch) -> str:
     # Only add in rows affected if the batch's row count is not -1.
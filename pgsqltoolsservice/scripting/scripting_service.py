@@ -50,9 +50,13 @@ class ScriptingService(object):
             object_metadata = self.create_metadata(params)
             scripter = Scripter(connection)
 
-            script = scripter.script(scripting_operation, object_metadata)
+            with request_context.cancellation_token.canceling_statements(connection):
+                script = scripter.script(scripting_operation, object_metadata)
             request_context.send_response(ScriptAsResponse(params.owner_uri, script))
         except Exception as e:
+            if request_context.cancellation_token.canceled:
+                # The scripting queries were canceled along with the request, which has already been responded to
+                return
             if self._service_provider.logger is not None:
                 self._service_provider.logger.exception('Scripting operation failed')
             request_context.send_error(str(e), params)
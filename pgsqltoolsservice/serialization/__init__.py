@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from pgsqltoolsservice.serialization.class_serializer import ClassSerializer, get_class_serializer
 from pgsqltoolsservice.serialization.serializable import Serializable
 
-__all__ = ['Serializable']
+__all__ = ['ClassSerializer', 'get_class_serializer', 'Serializable']
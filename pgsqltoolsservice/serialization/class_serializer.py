@@ -0,0 +1,150 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Per-class serialization metadata, computed once per class and reused for every instance"""
+
+import enum
+from typing import Callable, Dict, FrozenSet, Optional  # noqa
+
+import inflection
+
+
+class ClassSerializer:
+    """
+    Caches the attribute name normalization and child type decoders for a class. Name mappings are
+    filled in lazily, so attributes that are only set on some instances are still handled
+    """
+
+    def __init__(self, class_):
+        self.class_ = class_
+        # Maps pythonic attribute names to their camelCased JSON names
+        self._json_names: Dict[str, str] = {}
+        # Maps JSON names received from the client to pythonic attribute names, None if the class lacks the attribute
+        self._attribute_names: Dict[str, Optional[str]] = {}
+        self._attributes: FrozenSet[str] = None
+        self._decoders: Dict[str, Callable] = None
+        self._ignore_extra_attributes: bool = None
+
+    # METHODS ##############################################################
+    def to_json_dict(self, attributes: dict) -> dict:
+        """
+        Renames the keys of an instance's attribute dictionary to their JSON names
+        :param attributes: The __dict__ of an instance of the class
+        :return: Dictionary of the attributes keyed by their camelCased names
+        """
+        json_names = self._json_names
+        result = {}
+        for key, value in attributes.items():
+            json_name = json_names.get(key)
+            if json_name is None:
+                json_name = json_names[key] = inflection.camelize(key, False)
+            result[json_name] = value
+        return result
+
+    def from_dict(self, dictionary: dict, ignore_extra_attributes: bool = False, child_types: dict = None):
+        """
+        Creates an instance of the class from a json-derived dictionary
+        :param dictionary: Dictionary of values to assign attributes with
+        :param ignore_extra_attributes: Whether to ignore extra attributes instead of raising an error
+        :param child_types: Map of attribute name to the class used to deserialize that attribute
+        :raises AttributeError: When the class does not contain an attribute in the dictionary
+        :return: An instance of the class with attributes assigned, or None if dictionary is None
+        """
+        decoders = _compile_decoders(child_types) if child_types else {}
+        return self._create_instance(dictionary, ignore_extra_attributes, decoders)
+
+    def from_serializable_dict(self, dictionary: dict):
+        """
+        Creates an instance of a Serializable class, using the child types and extra attribute
+        handling that the class declares. These are only looked up the first time the class is used
+        :param dictionary: Dictionary of values to assign attributes with
+        :raises AttributeError: When the class does not contain an attribute in the dictionary
+        :return: An instance of the class with attributes assigned, or None if dictionary is None
+        """
+        if self._decoders is None:
+            # Set the flag first, other threads treat the decoders being set as the class being compiled
+            self._ignore_extra_attributes = self.class_.ignore_extra_attributes()
+            self._decoders = _compile_decoders(self.class_.get_child_serializable_types())
+        return self._create_instance(dictionary, self._ignore_extra_attributes, self._decoders)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _create_instance(self, dictionary: dict, ignore_extra_attributes: bool, decoders: Dict[str, Callable]):
+        if dictionary is None:
+            return None
+
+        instance = self.class_()
+        if self._attributes is None:
+            # Instances are created with no constructor arguments, so the attributes are the same for all of them
+            self._attributes = frozenset(dir(instance))
+
+        attribute_names = self._attribute_names
+        for attr, value in dictionary.items():
+            try:
+                pythonic_attr = attribute_names[attr]
+            except KeyError:
+                # Convert the attribute name to a snake-cased, pythonic attribute name
+                pythonic_attr = inflection.underscore(attr)
+                if pythonic_attr not in self._attributes:
+                    pythonic_attr = None
+                attribute_names[attr] = pythonic_attr
+
+            # If an unknown attribute is provided, raise an error unless set to ignore it
+            if pythonic_attr is None:
+                if ignore_extra_attributes:
+                    continue
+                raise AttributeError('Could not deserialize to class {}, {} is not defined as an attribute'
+                                     .format(self.class_, inflection.underscore(attr)))
+
+            if value is not None:
+                decoder = decoders.get(pythonic_attr)
+                if decoder is not None:
+                    value = decoder(value)
+
+            # Store the value in the instance of the object
+            setattr(instance, pythonic_attr, value)
+
+        return instance
+
+
+# Registry of serializers by class. Contract classes are defined at module level, so entries live
+# as long as the process does
+_SERIALIZERS: Dict[type, ClassSerializer] = {}
+
+
+def get_class_serializer(class_) -> ClassSerializer:
+    """
+    Gets the serializer for a class, creating it the first time the class is seen
+    :param class_: Class to get the serializer for
+    :return: The shared serializer for the class
+    """
+    serializer = _SERIALIZERS.get(class_)
+    if serializer is None:
+        serializer = _SERIALIZERS.setdefault(class_, ClassSerializer(class_))
+    return serializer
+
+
+def _compile_decoders(child_types: dict) -> Dict[str, Callable]:
+    """Creates a decoder for each attribute that has a declared child type"""
+    return {attr: _compile_decoder(child_type) for attr, child_type in child_types.items()}
+
+
+def _compile_decoder(child_type) -> Callable:
+    try:
+        is_enum = issubclass(child_type, enum.Enum)
+    except TypeError:
+        # Not a class, e.g. a typing construct. Fall back to from_dict like a singular object
+        is_enum = False
+
+    def decode(value):
+        if isinstance(value, list):
+            # Value is a list. Use a list comprehension to deserialize all instances
+            return [child_type.from_dict(x) for x in value]
+        if is_enum:
+            # Value is an enum. Convert it from a string
+            return child_type(value)
+        # Value is a singlar object. Use the class to deserialize
+        return child_type.from_dict(value)
+
+    return decode
@@ -5,13 +5,113 @@
 
 """Module containing utilities for cancelling requests"""
 
+import contextlib
+import threading
+import weakref
+from typing import Callable, List  # noqa
+
+import psycopg2
+import psycopg2.extensions
+
+
+# Time between checks of whether a token was canceled while waiting for another holder's statements to finish
+_STATEMENT_LOCK_POLL_SECONDS = 0.1
+
+# Lock of each connection held while statements that can be canceled run on it, so that a cancel is only sent to the
+# backend while the statements of the token's own block are the ones running
+_statement_locks = weakref.WeakKeyDictionary()
+_statement_locks_lock = threading.Lock()
+
 
 class CancellationToken:
     """Token used to indicate if an operation has been canceled"""
 
     def __init__(self):
         self.canceled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
 
     def cancel(self):
-        """Mark the cancellation token as canceled"""
-        self.canceled = True
+        """Mark the cancellation token as canceled and run the registered callbacks"""
+        with self._lock:
+            self.canceled = True
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback()
+
+    def register(self, callback: Callable[[], None]) -> None:
+        """
+        Registers a callback to run when the token is canceled. If the token has already been
+        canceled the callback is run immediately
+        :param callback: Function to call, with no arguments
+        """
+        with self._lock:
+            if not self.canceled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback: Callable[[], None]) -> None:
+        """
+        Removes a callback that was registered, if it has not been run yet
+        :param callback: The registered function
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @contextlib.contextmanager
+    def canceling_statements(self, connection: 'psycopg2.extensions.connection'):
+        """
+        Context manager that cancels the statement running on a connection if the token is canceled
+        while the block runs. The canceled statement raises psycopg2.extensions.QueryCanceledError.
+        Blocks on the same connection run one at a time, so that canceling one of them never cancels
+        a statement of another. A block waiting for its turn raises QueryCanceledError without running
+        if the token is canceled, as does entering a block with a canceled token
+        :param connection: Connection the block executes statements on
+        """
+        statement_lock = get_statement_lock(connection)
+        while not statement_lock.acquire(timeout=_STATEMENT_LOCK_POLL_SECONDS):
+            if self.canceled:
+                raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+
+        # The cancel is only sent while the block runs, even if the callback was taken by cancel before the block ended
+        running_lock = threading.Lock()
+        running = [True]
+
+        def cancel_statement():
+            with running_lock:
+                if not running[0]:
+                    return
+                try:
+                    connection.cancel()
+                except psycopg2.Error:
+                    # The connection is closed or the statement already finished
+                    pass
+
+        try:
+            with self._lock:
+                if self.canceled:
+                    raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+                self._callbacks.append(cancel_statement)
+            try:
+                yield
+            finally:
+                self.unregister(cancel_statement)
+                with running_lock:
+                    running[0] = False
+        finally:
+            statement_lock.release()
+
+
+def get_statement_lock(connection) -> threading.RLock:
+    """
+    Returns the lock held while blocks that cancel statements run on a connection, creating it if needed. Other
+    statements that must not be interleaved with those blocks, or be hit by their cancels, are run while holding it
+    """
+    with _statement_locks_lock:
+        statement_lock = _statement_locks.get(connection)
+        if statement_lock is None:
+            statement_lock = _statement_locks[connection] = threading.RLock()
+        return statement_lock
@@ -8,7 +8,7 @@
 import enum
 import json
 
-import inflection
+from pgsqltoolsservice.serialization.class_serializer import get_class_serializer
 
 
 def convert_to_dict(obj):
@@ -21,19 +21,48 @@ def convert_to_dict(obj):
     return json.loads(json.dumps(obj, default=_get_serializable_value))
 
 
+def convert_to_json(obj) -> str:
+    """
+    Serializes an object straight to a JSON string using attribute name normalization. Unlike
+    convert_to_dict, the object graph is only walked once. The output is identical to
+    json.dumps(convert_to_dict(obj), sort_keys=True) for any object graph whose dictionaries are
+    keyed by strings, which holds for all contract classes
+    :param obj: The object to serialize
+    :return: The JSON string representation of the object
+    """
+    return _JSON_ENCODER.encode(obj)
+
+
 def _get_serializable_value(obj):
     """Gets a serializable representation of an object, for use as the default argument to json.dumps"""
     # If the object is an Enum, use its value
     if isinstance(obj, enum.Enum):
-        return _get_serializable_value(obj.value)
+        return _get_serializable_enum_value(obj.value)
     # Try to use the object's dictionary representation if available
     try:
-        return {inflection.camelize(key, False): value for key, value in obj.__dict__.items()}
+        attributes = obj.__dict__
+    except AttributeError:
+        # The encoder only calls this for objects it cannot serialize natively, so there is nothing left to try
+        return None
+    return get_class_serializer(type(obj)).to_json_dict(attributes)
+
+
+def _get_serializable_enum_value(value):
+    """Gets a serializable representation of the value of an Enum member"""
+    if isinstance(value, enum.Enum):
+        return _get_serializable_enum_value(value.value)
+    try:
+        return get_class_serializer(type(value)).to_json_dict(value.__dict__)
     except AttributeError:
         pass
-    # Assume the object can be serialized normally
+    # Unlike other values, enum values may already be natively serializable
     try:
-        json.dumps(obj)
-        return obj
+        json.dumps(value)
+        return value
     except BaseException:
         return None
+
+
+# Shared encoder for convert_to_json. Constructing an encoder per call is what json.dumps does
+# whenever non-default arguments are passed, so reuse a single instance instead
+_JSON_ENCODER = json.JSONEncoder(sort_keys=True, default=_get_serializable_value)
@@ -6,7 +6,7 @@
 from pgsqltoolsservice.workspace.contracts.did_change_config_notification import (
     DID_CHANGE_CONFIG_NOTIFICATION, DidChangeConfigurationParams,
     Configuration, PGSQLConfiguration, SQLConfiguration, IntellisenseConfiguration,
-    FormatterConfiguration
+    FormatterConfiguration, ResultStorageConfiguration, ConnectionPoolConfiguration
 )
 from pgsqltoolsservice.workspace.contracts.did_change_text_doc_notification import (
     DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION, DidChangeTextDocumentParams, TextDocumentChangeEvent
@@ -24,6 +24,7 @@ from pgsqltoolsservice.workspace.contracts.common import (
 __all__ = [
     'DID_CHANGE_CONFIG_NOTIFICATION', 'DidChangeConfigurationParams',
     'Configuration', 'PGSQLConfiguration', 'SQLConfiguration', 'IntellisenseConfiguration', 'FormatterConfiguration',
+    'ResultStorageConfiguration', 'ConnectionPoolConfiguration',
     'DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION', 'DidChangeTextDocumentParams', 'TextDocumentChangeEvent',
     'DID_OPEN_TEXT_DOCUMENT_NOTIFICATION', 'DidOpenTextDocumentParams',
     'DID_CLOSE_TEXT_DOCUMENT_NOTIFICATION', 'DidCloseTextDocumentParams',
@@ -31,7 +31,7 @@ class PGSQLConfiguration(Serializable):
     """
     @classmethod
     def get_child_serializable_types(cls):
-        return {'format': FormatterConfiguration}
+        return {'format': FormatterConfiguration, 'result_storage': ResultStorageConfiguration, 'connection_pool': ConnectionPoolConfiguration}
 
     @classmethod
     def ignore_extra_attributes(cls):
@@ -40,6 +40,8 @@ class PGSQLConfiguration(Serializable):
     def __init__(self):
         self.default_database: str = 'postgres'
         self.format: FormatterConfiguration = FormatterConfiguration()
+        self.result_storage: ResultStorageConfiguration = ResultStorageConfiguration()
+        self.connection_pool: ConnectionPoolConfiguration = ConnectionPoolConfiguration()
 
 
 class Case(Enum):
@@ -64,6 +66,43 @@ class FormatterConfiguration(Serializable):
         self.reindent: bool = True
 
 
+class ResultStorageConfiguration(Serializable):
+    """
+    Configuration for the storage of query results. Budgets are in megabytes, a budget of 0 is unlimited.
+    Rows of SELECT statements can be spooled with COPY in the binary format, which is faster for large results
+    """
+    @classmethod
+    def ignore_extra_attributes(cls):
+        return True
+
+    def __init__(self):
+        self.session_budget_mb: int = 2048
+        self.total_budget_mb: int = 8192
+        self.use_binary_copy: bool = False
+
+
+class ConnectionPoolConfiguration(Serializable):
+    """
+    Configuration for the pool of connections shared by owner URIs. Limits are per server, database, user and options,
+    or per host and port for the server limit, and a limit of 0 is unlimited. Connections idle for longer than the
+    idle timeout are closed, beyond the minimum number of idle connections. Open connections are checked for health
+    at each health check interval, and 0 disables the checks. The query connection of an owner URI is opened along
+    with its default connection if open_query_connection_on_connect is set
+    """
+    @classmethod
+    def ignore_extra_attributes(cls):
+        return True
+
+    def __init__(self):
+        self.min_idle_connections: int = 1
+        self.max_connections: int = 0
+        self.max_server_connections: int = 0
+        self.idle_timeout_seconds: int = 300
+        self.wait_timeout_seconds: int = 30
+        self.health_check_interval_seconds: int = 60
+        self.open_query_connection_on_connect: bool = False
+
+
 class IntellisenseConfiguration(Serializable):
     """
     Configuration for Intellisense settings
@@ -0,0 +1,27 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Microbenchmarks for performance sensitive code paths. These are not collected as unit tests, run
+them as modules from the root of the repo, e.g. python -m tests.benchmarks.serialization_benchmark
+"""
+
+import timeit
+from typing import Callable
+
+
+def time_per_call(function: Callable, number: int, repeat: int = 5) -> float:
+    """
+    Times a function, returning the best observed time per call in microseconds
+    :param function: The function to time
+    :param number: Number of calls per timing run
+    :param repeat: Number of timing runs to take the best of
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def print_comparison(name: str, before: float, after: float) -> None:
+    """Prints the per-call cost of the old and new implementations of a scenario"""
+    print(f'{name:<40} before: {before:>10.1f}us  after: {after:>10.1f}us  speedup: {before / after:>5.1f}x')
@@ -0,0 +1,129 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+CPU time per spooled row of a SELECT result, comparing rows read through a cursor, whose values psycopg2
+parses from text into Python objects that are then converted to bytes for the spool file, with rows received
+with COPY in the binary format, whose values are stored as they are received. The text of each value is
+parsed with the psycopg2 typecaster of its type as the cursor does, and the binary rows are written to the
+copy stream a message at a time as psycopg2 does. Pass a row count to spool fewer than 200000 rows
+"""
+
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import List  # noqa
+
+import psycopg2.extensions
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.data_storage import BinaryCopyStream, ServiceBufferFileStreamReader, ServiceBufferFileStreamWriter
+from tests.utils import create_binary_copy_data
+
+
+ROW_COUNT = 200000
+BLOCK_SIZE = 1000
+SUBSET_SIZE = 200
+
+COLUMN_TYPES = [
+    datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_NUMERIC,
+    datatypes.DATATYPE_TIMESTAMP, datatypes.DATATYPE_BOOL, datatypes.DATATYPE_BIGINT, datatypes.DATATYPE_TEXT
+] * 4
+ROW = (
+    42, 'a somewhat longer text value', 3.14159, Decimal('12345.67'), datetime.datetime(2017, 6, 8, 12, 12, 45, 500000),
+    True, 1234567890123, None
+) * 4
+
+# Text of the values of the row as the server sends them to a cursor, and the typecaster psycopg2 parses them with
+TEXT_ROW = (b'42', b'a somewhat longer text value', b'3.14159', b'12345.67', b'2017-06-08 12:12:45.5', b't', b'1234567890123', None) * 4
+TYPECASTERS = [
+    psycopg2.extensions.INTEGER, None, psycopg2.extensions.FLOAT, psycopg2.extensions.DECIMAL, psycopg2.extensions.PYDATETIME,
+    psycopg2.extensions.BOOLEAN, psycopg2.extensions.LONGINTEGER, None
+] * 4
+
+
+def _create_columns(data_types: List[str]) -> List[DbColumn]:
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+def spool_through_cursor(writer: ServiceBufferFileStreamWriter, columns: List[DbColumn], row_count: int) -> List[int]:
+    """Parses the text of each value into a Python object as the cursor does, and writes the rows in blocks"""
+    locations = []
+    for block_start in range(0, row_count, BLOCK_SIZE):
+        block = []
+        for _ in range(min(BLOCK_SIZE, row_count - block_start)):
+            block.append(tuple(
+                None if text is None else text.decode() if typecaster is None else typecaster(text.decode(), None)
+                for text, typecaster in zip(TEXT_ROW, TYPECASTERS)
+            ))
+        locations.extend(writer.write_rows(block, columns))
+    return locations
+
+
+# BENCHMARK ################################################################
+def spool_binary_copy(writer: ServiceBufferFileStreamWriter, columns: List[DbColumn], row_count: int) -> List[int]:
+    """Writes the header and each tuple of the binary copy as a message of its own"""
+    data = create_binary_copy_data([ROW], COLUMN_TYPES)
+    header, message, trailer = data[:19], data[19:-2], data[-2:]
+
+    locations = []
+    copy_stream = BinaryCopyStream(writer, len(columns), locations.extend)
+    copy_stream.write(header)
+    for _ in range(row_count):
+        copy_stream.write(message)
+    copy_stream.write(trailer)
+    copy_stream.close()
+    return locations
+
+
+def _measure(spool, columns: List[DbColumn], row_count: int) -> (float, float, list):
+    """Spools the rows to a file, returning the CPU microseconds per row, the milliseconds to read a subset and the subset"""
+    file_name = tempfile.mkstemp()[1]
+    try:
+        start_time = time.process_time()
+        with io.open(file_name, 'wb') as stream:
+            writer = ServiceBufferFileStreamWriter(stream)
+            locations = spool(writer, columns, row_count)
+            writer.flush()
+        cpu_per_row = (time.process_time() - start_time) * 1000000 / row_count
+
+        timings = []
+        for _ in range(5):
+            start_time = time.perf_counter()
+            with io.open(file_name, 'rb') as stream:
+                reader = ServiceBufferFileStreamReader(stream)
+                rows = [reader.read_row(locations[index], index, columns) for index in range(SUBSET_SIZE)]
+            timings.append((time.perf_counter() - start_time) * 1000)
+        return cpu_per_row, min(timings), [[cell.display_value for cell in row] for row in rows]
+    finally:
+        os.remove(file_name)
+
+
+def _print_comparison(name: str, before: float, after: float, unit: str) -> None:
+    print(f'{name:<40} before: {before:>10.2f}{unit}  after: {after:>10.2f}{unit}  speedup: {before / after:>5.1f}x')
+
+
+if __name__ == '__main__':
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_COUNT
+    columns = _create_columns(COLUMN_TYPES)
+    print(f'{row_count} rows of {len(columns)} columns')
+
+    before = _measure(spool_through_cursor, columns, row_count)
+    after = _measure(spool_binary_copy, columns, row_count)
+    assert before[2] == after[2], 'Rows copied in the binary format should be read as the rows read through a cursor'
+
+    _print_comparison('spool CPU per row', before[0], after[0], 'us')
+    _print_comparison(f'first {SUBSET_SIZE} rows', before[1], after[1], 'ms')
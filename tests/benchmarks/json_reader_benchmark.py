@@ -0,0 +1,137 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Inbound message throughput, comparing the original byte at a time header scan and per message
+buffer reallocation with the reusable buffer reader. A recorded editing session is fed through
+the reader from memory so only the framing and decoding cost is measured
+"""
+
+import io
+import json
+import time
+
+from pgsqltoolsservice.hosting.json_message import JSONRPCMessage
+from pgsqltoolsservice.hosting.json_reader import JSONRPCReader
+
+
+MESSAGE_COUNT = 100000
+
+
+def _create_recorded_stream(message_count: int) -> bytes:
+    """Creates a stream of didChange notifications interleaved with completion requests"""
+    frames = []
+    for index in range(message_count):
+        if index % 4 == 3:
+            message = {
+                'jsonrpc': '2.0', 'id': str(index), 'method': 'textDocument/completion',
+                'params': {'textDocument': {'uri': 'untitled:Untitled-1'}, 'position': {'line': 12, 'character': index % 80}}
+            }
+        else:
+            message = {
+                'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+                'params': {
+                    'textDocument': {'uri': 'untitled:Untitled-1', 'version': index},
+                    'contentChanges': [{
+                        'range': {'start': {'line': 12, 'character': index % 80}, 'end': {'line': 12, 'character': index % 80}},
+                        'rangeLength': 0,
+                        'text': 'é' if index % 10 == 0 else 's'
+                    }]
+                }
+            }
+        content = json.dumps(message).encode('utf-8')
+        frames.append(b'Content-Length: %d\r\n\r\n%s' % (len(content), content))
+    return b''.join(frames)
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+class _LegacyJSONRPCReader(JSONRPCReader):
+    def read_message(self):
+        content = ['']
+        try:
+            while not self._needs_more_data or self._read_next_chunk():
+                self._needs_more_data = False
+                if self._read_state is self.ReadState.Header and not self._try_read_headers():
+                    self._needs_more_data = True
+                    continue
+                if self._read_state is self.ReadState.Content and not self._try_read_content(content):
+                    self._needs_more_data = True
+                    continue
+                break
+            return JSONRPCMessage.from_dictionary(json.loads(content[0]))
+        finally:
+            self._trim_buffer_and_resize(self._read_offset)
+
+    def _read_next_chunk(self):
+        current_buffer_size = len(self._buffer)
+        if (current_buffer_size - self._buffer_end_offset) / current_buffer_size < self.BUFFER_RESIZE_TRIGGER:
+            resized_buffer = bytearray(current_buffer_size * 2)
+            resized_buffer[0:current_buffer_size] = self._buffer
+            self._buffer = resized_buffer
+        length_read = self.stream.readinto(memoryview(self._buffer)[self._buffer_end_offset:])
+        if not length_read:
+            raise EOFError('End of stream reached, no output.')
+        self._buffer_end_offset += length_read
+        return True
+
+    def _try_read_headers(self):
+        scan_offset = self._read_offset
+        while scan_offset + 3 < self._buffer_end_offset and (
+            self._buffer[scan_offset] != 13 or
+            self._buffer[scan_offset + 1] != 10 or
+            self._buffer[scan_offset + 2] != 13 or
+            self._buffer[scan_offset + 3] != 10
+        ):
+            scan_offset += 1
+        if scan_offset + 3 >= self._buffer_end_offset:
+            return False
+        headers_read = self._buffer[self._read_offset:scan_offset].decode('ascii')
+        for header in headers_read.split('\n'):
+            colon_index = header.find(':')
+            self._headers[header[:colon_index].strip().lower()] = header[colon_index + 1:].strip()
+        self._expected_content_length = int(self._headers['content-length'])
+        self._read_offset = scan_offset + 4
+        self._read_state = self.ReadState.Content
+        return True
+
+    def _try_read_content(self, content):
+        if self._buffer_end_offset - self._read_offset < self._expected_content_length:
+            return False
+        content[0] = self._buffer[self._read_offset:self._read_offset + self._expected_content_length].decode(self.encoding)
+        self._read_offset += self._expected_content_length
+        self._read_state = self.ReadState.Header
+        return True
+
+    def _trim_buffer_and_resize(self, bytes_to_remove):
+        current_buffer_size = len(self._buffer)
+        new_buffer = bytearray(max(current_buffer_size - bytes_to_remove, self.DEFAULT_BUFFER_SIZE))
+        if bytes_to_remove <= current_buffer_size:
+            new_buffer[:self._buffer_end_offset - bytes_to_remove] = self._buffer[bytes_to_remove:self._buffer_end_offset]
+        self._buffer = new_buffer
+        self._read_offset = 0
+        self._buffer_end_offset -= bytes_to_remove
+        self._headers = {}
+
+
+def _read_all(reader_class, recorded_stream: bytes) -> float:
+    """Reads every message in the stream, returning the elapsed time in seconds"""
+    reader = reader_class(io.BytesIO(recorded_stream))
+    start_time = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        reader.read_message()
+    return time.perf_counter() - start_time
+
+
+def main():
+    recorded_stream = _create_recorded_stream(MESSAGE_COUNT)
+    print(f'{MESSAGE_COUNT} messages, {len(recorded_stream) / 2 ** 20:.1f}MB')
+    for name, reader_class in [('before', _LegacyJSONRPCReader), ('after', JSONRPCReader)]:
+        elapsed = min(_read_all(reader_class, recorded_stream) for _ in range(3))
+        print(f'{name:<10} {elapsed:>8.2f}s  {MESSAGE_COUNT / elapsed:>10.0f} messages/s  '
+              f'{len(recorded_stream) / 2 ** 20 / elapsed:>8.1f}MB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Result spooling throughput, comparing the original row at a time cursor iteration and per cell
+writes with fetching and writing blocks of rows. A synthetic cursor serves the rows from memory
+so only the spooling cost is measured, for a narrow and a wide result
+"""
+
+import os
+import time
+from typing import List
+from unittest import mock
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.data_storage import service_buffer_file_stream as file_stream, storage_data_reader, StorageDataReader
+from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
+
+
+class SyntheticCursor:
+    """Cursor that returns the same row a given number of times"""
+
+    def __init__(self, row: tuple, row_count: int):
+        self.description = [(f'column{index}', None, None, None, None, None, None) for index in range(len(row))]
+        self.connection = None
+        self._row = row
+        self._remaining = row_count
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        count = min(size, self._remaining)
+        self._remaining -= count
+        return [self._row] * count
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> tuple:
+        if self._remaining == 0:
+            raise StopIteration
+        self._remaining -= 1
+        return self._row
+
+
+def _create_columns(data_types: List[str]) -> List[DbColumn]:
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+NARROW_COLUMNS = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_BOOL]
+NARROW_ROW = (42, 'narrow row text', True)
+
+WIDE_COLUMNS = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_TEXT] * 25
+WIDE_ROW = (42, 'a somewhat longer text value in a wide row', 3.14159, None) * 25
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+class OriginalStorageDataReader(StorageDataReader):
+    """Reads rows from the cursor by iterating it one row at a time"""
+
+    def read_row(self) -> bool:
+        row_found = False
+
+        for row in self._cursor:
+            self._current_row = row
+            row_found = True
+            break
+
+        if self._current_row is None or len(self._columns_info) == 0:
+            self._columns_info = storage_data_reader.get_columns_info(self._cursor.description, self._cursor.connection)
+
+        return row_found
+
+
+def original_read_result_to_end(result_set: FileStorageResultSet, cursor) -> None:
+    reader = OriginalStorageDataReader(cursor)
+
+    with file_stream.get_writer(result_set._output_file_name) as writer:
+
+        while reader.read_row():
+            result_set._file_offsets.append(writer.write_row(reader))
+
+        result_set.columns_info = reader.columns_info
+    result_set._has_been_read = True
+
+
+# BENCHMARK ################################################################
+def _rows_per_second(read_result_to_end, columns: List[DbColumn], row: tuple, row_count: int) -> float:
+    result_set = FileStorageResultSet(0, 0)
+    cursor = SyntheticCursor(row, row_count)
+    try:
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=columns)):
+            start_time = time.perf_counter()
+            read_result_to_end(result_set, cursor)
+            elapsed = time.perf_counter() - start_time
+    finally:
+        os.remove(result_set._output_file_name)
+    assert result_set.row_count == row_count
+    return row_count / elapsed
+
+
+def _compare(name: str, data_types: List[str], row: tuple, row_count: int) -> None:
+    columns = _create_columns(data_types)
+    before = max(_rows_per_second(original_read_result_to_end, columns, row, row_count) for _ in range(3))
+    after = max(_rows_per_second(FileStorageResultSet.read_result_to_end, columns, row, row_count) for _ in range(3))
+    print(f'{name:<40} before: {before:>10.0f} rows/s  after: {after:>10.0f} rows/s  speedup: {after / before:>5.1f}x')
+
+
+if __name__ == '__main__':
+    _compare(f'narrow ({len(NARROW_COLUMNS)} columns)', NARROW_COLUMNS, NARROW_ROW, 200000)
+    _compare(f'wide ({len(WIDE_COLUMNS)} columns)', WIDE_COLUMNS, WIDE_ROW, 20000)
@@ -0,0 +1,107 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Time to decode a page of rows for a subset request, comparing the original lookup of a converter for each
+cell with the decoder plan compiled for the columns of the result set. The rows are read from a spool in
+memory so only the decoding is measured
+"""
+
+import datetime
+import io
+from typing import Any, Callable, List  # noqa
+
+from pgsqltoolsservice.converters.bytes_to_any_converters import get_bytes_to_any_converter
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbCellValue, DbColumn
+from pgsqltoolsservice.query.data_storage import ServiceBufferFileStreamReader, ServiceBufferFileStreamWriter
+from tests.benchmarks import print_comparison, time_per_call
+
+
+SUBSET_SIZE = 200
+
+NUMERIC_COLUMNS = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_BIGINT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_SMALLINT] * 25
+NUMERIC_ROW = (42, 1234567890123, 3.14159, 7) * 25
+
+TIMESTAMP_COLUMNS = [datatypes.DATATYPE_TIMESTAMP, datatypes.DATATYPE_INTEGER] * 50
+TIMESTAMP_ROW = (datetime.datetime(2017, 6, 8, 12, 12, 45, 123456), 42) * 50
+
+MIXED_COLUMNS = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_TEXT] * 25
+MIXED_ROW = (42, 'a somewhat longer text value in a wide row', 3.14159, None) * 25
+
+
+def _create_columns(data_types: List[str]) -> List[DbColumn]:
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+class OriginalReader(ServiceBufferFileStreamReader):
+    """Looks up the converter for each cell and converts the cells one at a time"""
+
+    def read_row(self, location: int, row_id: int, columns_info: List[DbColumn]) -> List[DbCellValue]:
+        page_offset = location >> self._SLOT_BITS
+        slot = location & self._SLOT_MASK
+        if page_offset != self._page_offset:
+            self._read_page(page_offset)
+
+        page = self._page
+        cell_ends = self._page_cell_ends
+        first_cell = slot * self._page_column_count
+        data_start = self._data_start
+        cell_start = data_start + cell_ends[first_cell - 1] if first_cell > 0 else data_start
+
+        null_bitmap_start = self._null_bitmaps_start + slot * self._null_bitmap_size
+        nulls = int.from_bytes(page[null_bitmap_start:null_bitmap_start + self._null_bitmap_size], 'little')
+
+        results = []
+        for index, column in enumerate(columns_info):
+            cell_end = data_start + cell_ends[first_cell + index]
+            type_value = column.data_type
+
+            if type_value == datatypes.DATATYPE_NULL:
+                value = DbCellValue(display_value=None, is_null=True, raw_object=None, row_id=row_id)
+            elif nulls >> index & 1:
+                value = DbCellValue(display_value=str("NULL"), is_null=True, raw_object=None, row_id=row_id)
+            else:
+                object_converter: Callable[[bytes], Any] = get_bytes_to_any_converter(type_value)
+                result_object = object_converter(page[cell_start:cell_end])
+                value = DbCellValue(display_value=str(result_object), is_null=False, raw_object=result_object, row_id=row_id)
+
+            results.append(value)
+            cell_start = cell_end
+
+        return results
+
+
+# BENCHMARK ################################################################
+def _compare(name: str, data_types: List[str], row: tuple) -> None:
+    columns = _create_columns(data_types)
+    stream = io.BytesIO()
+    writer = ServiceBufferFileStreamWriter(stream)
+    locations = writer.write_rows([row] * SUBSET_SIZE, columns)
+    writer.flush()
+
+    def read_subset(reader_class):
+        reader = reader_class(stream)
+        return [reader.read_row(location, row_id, columns) for row_id, location in enumerate(locations)]
+
+    original_rows = read_subset(OriginalReader)
+    rows = read_subset(ServiceBufferFileStreamReader)
+    assert [[cell.__dict__ for cell in row] for row in rows] == [[cell.__dict__ for cell in row] for row in original_rows]
+
+    before = time_per_call(lambda: read_subset(OriginalReader), 10, 15)
+    after = time_per_call(lambda: read_subset(ServiceBufferFileStreamReader), 10, 15)
+    print_comparison(f'{name} ({len(columns)} columns, {SUBSET_SIZE} rows)', before, after)
+
+
+if __name__ == '__main__':
+    _compare('numeric', NUMERIC_COLUMNS, NUMERIC_ROW)
+    _compare('timestamp', TIMESTAMP_COLUMNS, TIMESTAMP_ROW)
+    _compare('mixed', MIXED_COLUMNS, MIXED_ROW)
@@ -0,0 +1,174 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Peak memory and time of saving a large spooled result as CSV, JSON and Excel, comparing the original
+writers, which kept every JSON row and every Excel cell in memory until the end, with the streaming
+writers. Each save runs in a forked process so that its peak RSS can be measured on its own, and the
+streaming writers are asserted to stay within a fixed memory bound whatever the number of rows.
+Run with the number of rows to save as an argument to try larger results
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import resource
+import string
+import sys
+import tempfile
+import time
+from typing import List
+from unittest import mock
+
+import xlsxwriter
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue
+from pgsqltoolsservice.query.data_storage import (
+    service_buffer_file_stream as file_stream, SaveAsCsvWriter, SaveAsExcelWriter, SaveAsJsonWriter
+)
+from pgsqltoolsservice.query.data_storage.save_as_writer import SaveAsWriter
+from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
+from pgsqltoolsservice.query_execution.contracts import SaveResultsAsCsvRequestParams
+from tests.benchmarks.result_spool_benchmark import SyntheticCursor
+
+
+COLUMN_TYPES = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_BOOL]
+ROW = (42, 'a row of the exported result', 3.14159, True)
+
+# Growth of the peak RSS of a save over the RSS before it that the streaming writers must stay within
+MAX_STREAMING_RSS_GROWTH_MB = 64
+
+
+def _create_columns() -> List[DbColumn]:
+    columns = []
+    for index, data_type in enumerate(COLUMN_TYPES):
+        column = DbColumn()
+        column.column_name = f'column{index}'
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+class OriginalSaveAsCsvWriter(SaveAsWriter):
+    """Creates a csv writer for every row"""
+
+    def __init__(self, stream, params) -> None:
+        SaveAsWriter.__init__(self, stream, params)
+        self._header_written = False
+
+    def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        writer = csv.writer(self._file_stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        if self._params.include_headers and not self._header_written:
+            writer.writerow([column.column_name for column in columns])
+            self._header_written = True
+        writer.writerow([cell.display_value for cell in row])
+
+    def complete_write(self):
+        pass
+
+
+class OriginalSaveAsJsonWriter(SaveAsWriter):
+    """Keeps every row until the write is completed"""
+
+    def __init__(self, stream, params) -> None:
+        SaveAsWriter.__init__(self, stream, params)
+        self._data = []
+
+    def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        self._data.append({columns[index].column_name: row[index].display_value for index in range(len(columns))})
+
+    def complete_write(self):
+        json.dump(self._data, self._file_stream, indent=True)
+
+
+class OriginalSaveAsExcelWriter(SaveAsWriter):
+    """Keeps every cell in the worksheet until the workbook is closed"""
+
+    def __init__(self, stream, params) -> None:
+        SaveAsWriter.__init__(self, stream, params)
+        self._header_written = False
+        self._workbook = xlsxwriter.Workbook(self._file_stream.name)
+        self._worksheet = self._workbook.add_worksheet()
+        self._current_row = 1
+
+    def write_row(self, row: List[DbCellValue], columns: List[DbColumn]):
+        if not self._header_written:
+            bold = self._workbook.add_format({'bold': 1})
+            for index, column in enumerate(columns):
+                self._worksheet.write(string.ascii_uppercase[index] + '1', column.column_name, bold)
+            self._header_written = True
+        for index, cell in enumerate(row):
+            self._worksheet.write(self._current_row, index, cell.display_value)
+        self._current_row += 1
+
+    def complete_write(self):
+        self._workbook.close()
+
+
+def original_save_as(result_set: FileStorageResultSet, writer: SaveAsWriter) -> None:
+    with file_stream.get_reader(result_set._output_file_name) as reader:
+        for row_index in range(result_set.row_count):
+            writer.write_row(reader.read_row(result_set._file_offsets[row_index], row_index, result_set.columns_info), result_set.columns_info)
+        writer.complete_write()
+
+
+# BENCHMARK ################################################################
+def streaming_save_as(result_set: FileStorageResultSet, writer: SaveAsWriter) -> None:
+    file_factory = mock.Mock()
+    file_factory.get_writer = mock.Mock(return_value=writer)
+    file_factory.get_reader = file_stream.get_reader
+    result_set.do_save_as(writer._file_stream.name, 0, result_set.row_count, file_factory, None, None)
+
+
+def _measure(save_as, writer_class, row_count: int, results) -> None:
+    """Spools the rows and saves them in this process, reporting the RSS growth of the save in MB and its duration"""
+    result_set = FileStorageResultSet(0, 0)
+    with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=_create_columns())):
+        result_set.read_result_to_end(SyntheticCursor(ROW, row_count))
+
+    file_descriptor, output_file_name = tempfile.mkstemp()
+    os.close(file_descriptor)
+    try:
+        params = SaveResultsAsCsvRequestParams()
+        params.include_headers = True
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start_time = time.perf_counter()
+        save_as(result_set, writer_class(io.open(output_file_name, 'w', newline=''), params))
+        elapsed = time.perf_counter() - start_time
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        os.remove(output_file_name)
+        result_set.dispose()
+
+    results.put(((peak - baseline) / 1024, elapsed))
+
+
+def _run(save_as, writer_class, row_count: int):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(save_as, writer_class, row_count, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def _compare(name: str, original_writer_class, writer_class, row_count: int) -> None:
+    before_mb, before_seconds = _run(original_save_as, original_writer_class, row_count)
+    after_mb, after_seconds = _run(streaming_save_as, writer_class, row_count)
+    print(f'{name:<6} {row_count:>9} rows  before: {before_mb:>7.1f}MB {before_seconds:>6.2f}s  '
+          f'after: {after_mb:>7.1f}MB {after_seconds:>6.2f}s')
+    assert after_mb < MAX_STREAMING_RSS_GROWTH_MB, f'{name} save grew the RSS by {after_mb:.1f}MB'
+
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method('fork')
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    _compare('csv', OriginalSaveAsCsvWriter, SaveAsCsvWriter, row_count)
+    _compare('json', OriginalSaveAsJsonWriter, SaveAsJsonWriter, row_count)
+    _compare('excel', OriginalSaveAsExcelWriter, SaveAsExcelWriter, row_count // 5)
@@ -0,0 +1,113 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Per-message serialization cost for representative contracts, comparing the original per-key
+inflection implementation with the cached per-class serializers
+"""
+
+import datetime
+import decimal
+import enum
+import json
+
+import inflection
+
+from pgsqltoolsservice.connection.contracts import ConnectRequestParams
+from pgsqltoolsservice.query.contracts import DbCellValue, ResultSetSubset, SubsetResult
+from pgsqltoolsservice.query_execution.contracts import ExecuteDocumentSelectionParams
+import pgsqltoolsservice.utils as utils
+from tests.benchmarks import print_comparison, time_per_call
+
+
+CONNECT_PARAMS = {
+    'ownerUri': 'untitled:Untitled-1',
+    'type': 'Default',
+    'connection': {
+        'options': {
+            'host': 'localhost', 'port': 5432, 'dbname': 'postgres', 'user': 'postgres', 'password': 'password',
+            'connectTimeout': 15, 'sslmode': 'prefer', 'applicationName': 'sqlops'
+        }
+    }
+}
+
+EXECUTE_PARAMS = {
+    'ownerUri': 'untitled:Untitled-1',
+    'executionPlanOptions': {'includeActualExecutionPlanXml': False, 'includeEstimatedExecutionPlanXml': False},
+    'querySelection': {'startLine': 0, 'startColumn': 0, 'endLine': 120, 'endColumn': 42}
+}
+
+
+def _create_subset_result(row_count: int, column_count: int) -> SubsetResult:
+    values = [1, 'some text', decimal.Decimal('12.50'), datetime.datetime(2018, 1, 1, 12, 30), None, True]
+    subset = ResultSetSubset()
+    subset.rows = [
+        [DbCellValue(values[column % len(values)], values[column % len(values)] is None, values[column % len(values)], row)
+         for column in range(column_count)]
+        for row in range(row_count)
+    ]
+    subset.row_count = row_count
+    return SubsetResult(subset)
+
+
+# ORIGINAL IMPLEMENTATIONS #################################################
+def _legacy_get_serializable_value(obj):
+    if isinstance(obj, enum.Enum):
+        return _legacy_get_serializable_value(obj.value)
+    try:
+        return {inflection.camelize(key, False): value for key, value in obj.__dict__.items()}
+    except AttributeError:
+        pass
+    try:
+        json.dumps(obj)
+        return obj
+    except BaseException:
+        return None
+
+
+def _legacy_to_json(obj) -> str:
+    return json.dumps(json.loads(json.dumps(obj, default=_legacy_get_serializable_value)), sort_keys=True)
+
+
+def _legacy_from_dict(class_, dictionary):
+    kwargs = class_.get_child_serializable_types()
+    instance = class_()
+    instance_attributes = dir(instance)
+    for attr in dictionary:
+        pythonic_attr = inflection.underscore(attr)
+        if pythonic_attr not in instance_attributes:
+            raise AttributeError(pythonic_attr)
+        value = dictionary[attr]
+        if pythonic_attr in kwargs and value is not None:
+            if isinstance(value, list):
+                value = [_legacy_from_dict(kwargs[pythonic_attr], x) for x in value]
+            elif issubclass(kwargs[pythonic_attr], enum.Enum):
+                value = kwargs[pythonic_attr](value)
+            else:
+                value = _legacy_from_dict(kwargs[pythonic_attr], value)
+        setattr(instance, pythonic_attr, value)
+    return instance
+
+
+def main():
+    print('Inbound requests')
+    for name, class_, params in [('connection/connect', ConnectRequestParams, CONNECT_PARAMS),
+                                 ('query/executeDocumentSelection', ExecuteDocumentSelectionParams, EXECUTE_PARAMS)]:
+        before = time_per_call(lambda: _legacy_from_dict(class_, params), 20000)
+        after = time_per_call(lambda: class_.from_dict(params), 20000)
+        print_comparison(name, before, after)
+
+    print('Outbound responses')
+    for rows, columns in [(10, 5), (200, 10), (200, 100)]:
+        subset = _create_subset_result(rows, columns)
+        assert _legacy_to_json(subset) == utils.serialization.convert_to_json(subset)
+        number = max(5, 20000 // (rows * columns))
+        before = time_per_call(lambda: _legacy_to_json(subset), number)
+        after = time_per_call(lambda: utils.serialization.convert_to_json(subset), number)
+        print_comparison(f'query/subset {rows}x{columns}', before, after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Spool file format throughput, comparing the original format of a length prefix and value for each cell
+written and read with a call per cell with the paged format. Synthetic rows of 100 columns are spooled
+to a temporary file, then the first rows of the result and a page of rows from the middle of it are read
+back the way the results grid requests them. Pass a row count to spool fewer than a million rows
+"""
+
+import io
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List  # noqa
+
+from pgsqltoolsservice.converters.bytes_converter import get_bytes_converter
+from pgsqltoolsservice.converters.bytes_to_any_converters import get_bytes_to_any_converter
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbCellValue, DbColumn
+from pgsqltoolsservice.query.data_storage import ServiceBufferFileStreamReader, ServiceBufferFileStreamWriter
+
+
+ROW_COUNT = 1000000
+BLOCK_SIZE = 1000
+SUBSET_SIZE = 200
+
+COLUMN_TYPES = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_TEXT] * 25
+ROW = (42, 'a somewhat longer text value in a wide row', 3.14159, None) * 25
+
+
+def _create_columns(data_types: List[str]) -> List[DbColumn]:
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+class OriginalWriter:
+    """Writes each cell as a length followed by the value, with a write call for each"""
+
+    def __init__(self, stream: io.BufferedWriter) -> None:
+        self._file_stream = stream
+        self._offset = 0
+
+    def write_rows(self, rows: List[tuple], columns_info: List[DbColumn]) -> List[int]:
+        offsets = []
+        for row in rows:
+            offsets.append(self._offset)
+            for index, column in enumerate(columns_info):
+                if row[index] is None:
+                    self._offset += self._file_stream.write(bytearray(struct.pack("i", 0)))
+                    self._offset += self._file_stream.write(bytearray([]))
+                else:
+                    bytes_converter: Callable[[Any], bytearray] = get_bytes_converter(column.data_type)
+                    value_to_write = bytes_converter(row[index])
+                    self._offset += self._file_stream.write(bytearray(struct.pack("i", len(value_to_write))))
+                    self._offset += self._file_stream.write(value_to_write)
+        return offsets
+
+    def flush(self):
+        self._file_stream.flush()
+
+
+class OriginalReader:
+    """Reads each cell with a seek and read of its length and a seek and read of its value"""
+
+    def __init__(self, stream: io.BufferedReader) -> None:
+        self._file_stream = stream
+
+    def _read_bytes_from_file(self, stream, file_offset, length_to_read) -> bytes:
+        stream.seek(file_offset)
+        return stream.read(length_to_read)
+
+    def read_row(self, file_offset, row_id, columns_info: List[DbColumn]) -> List[DbCellValue]:
+        self._file_stream.seek(file_offset)
+        current_file_offset = file_offset
+        results = []
+
+        for column in columns_info:
+            raw_bytes_length_to_read = self._read_bytes_from_file(self._file_stream, current_file_offset, 4)
+            if raw_bytes_length_to_read == b'\x00\x00\x00\x00':
+                current_file_offset += 4
+                value = DbCellValue(display_value=str("NULL"), is_null=True, raw_object=None, row_id=row_id)
+            else:
+                bytes_length_to_read = struct.unpack('i', raw_bytes_length_to_read)[0]
+                current_file_offset += 4
+                read_bytes_result = self._read_bytes_from_file(self._file_stream, current_file_offset, bytes_length_to_read)
+                current_file_offset += len(read_bytes_result)
+                object_converter: Callable[[bytes], Any] = get_bytes_to_any_converter(column.data_type)
+                result_object = object_converter(read_bytes_result)
+                value = DbCellValue(display_value=str(result_object), is_null=False, raw_object=result_object, row_id=row_id)
+            results.append(value)
+
+        return results
+
+
+# BENCHMARK ################################################################
+def _spool(writer_class, file_name: str, columns: List[DbColumn], row_count: int) -> (List[int], float):
+    """Spools the rows to the file, returning the location of each row and the rows spooled per second"""
+    locations = []
+    block = [ROW] * BLOCK_SIZE
+    start_time = time.perf_counter()
+    with io.open(file_name, 'wb') as stream:
+        writer = writer_class(stream)
+        for block_start in range(0, row_count, BLOCK_SIZE):
+            locations.extend(writer.write_rows(block[:row_count - block_start], columns))
+        writer.flush()
+    return locations, row_count / (time.perf_counter() - start_time)
+
+
+def _subset_latency_ms(reader_class, file_name: str, columns: List[DbColumn], locations: List[int], start_index: int) -> float:
+    """Reads a subset of rows with a new reader as the result set does, returning the best time in milliseconds"""
+    timings = []
+    for _ in range(5):
+        start_time = time.perf_counter()
+        with io.open(file_name, 'rb') as stream:
+            reader = reader_class(stream)
+            rows = [reader.read_row(locations[index], index, columns) for index in range(start_index, start_index + SUBSET_SIZE)]
+        timings.append((time.perf_counter() - start_time) * 1000)
+        assert rows[-1][1].raw_object == ROW[1]
+    return min(timings)
+
+
+def _print_comparison(name: str, before: float, after: float, unit: str, higher_is_better: bool) -> None:
+    speedup = after / before if higher_is_better else before / after
+    print(f'{name:<40} before: {before:>10.1f}{unit}  after: {after:>10.1f}{unit}  speedup: {speedup:>5.1f}x')
+
+
+if __name__ == '__main__':
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_COUNT
+    columns = _create_columns(COLUMN_TYPES)
+    print(f'{row_count} rows of {len(columns)} columns')
+
+    results = {}
+    implementations = [('before', OriginalWriter, OriginalReader), ('after', ServiceBufferFileStreamWriter, ServiceBufferFileStreamReader)]
+    for name, writer_class, reader_class in implementations:
+        file_name = tempfile.mkstemp()[1]
+        try:
+            locations, rows_per_second = _spool(writer_class, file_name, columns, row_count)
+            results[name] = (
+                rows_per_second,
+                os.path.getsize(file_name) / (1024 * 1024),
+                _subset_latency_ms(reader_class, file_name, columns, locations, 0),
+                _subset_latency_ms(reader_class, file_name, columns, locations, row_count // 2)
+            )
+        finally:
+            os.remove(file_name)
+
+    _print_comparison('spool throughput (rows/s)', results['before'][0], results['after'][0], '', True)
+    _print_comparison('spool file size (MB)', results['before'][1], results['after'][1], '', False)
+    _print_comparison(f'first {SUBSET_SIZE} rows', results['before'][2], results['after'][2], 'ms', False)
+    _print_comparison(f'{SUBSET_SIZE} rows from the middle', results['before'][3], results['after'][3], 'ms', False)
@@ -0,0 +1,104 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Cold start latency of the tools service. The service is started as a new process and the time until
+it responds to its first version and initialize requests is measured, once with the lazily loaded
+services and once with every service imported up front as the original startup did. Exits with a
+non-zero status if the time to the first response is over budget
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+RUNS = 5
+
+# Time to the first response, above which the benchmark fails
+STARTUP_BUDGET_MS = 1000
+
+# ORIGINAL IMPLEMENTATION ##################################################
+# Startup imported every service module before creating the server
+EAGER_IMPORTS = [
+    'pgsqltoolsservice.admin', 'pgsqltoolsservice.capabilities.capabilities_service', 'pgsqltoolsservice.connection',
+    'pgsqltoolsservice.disaster_recovery.disaster_recovery_service', 'pgsqltoolsservice.language', 'pgsqltoolsservice.metadata',
+    'pgsqltoolsservice.object_explorer', 'pgsqltoolsservice.query_execution', 'pgsqltoolsservice.scripting.scripting_service',
+    'pgsqltoolsservice.edit_data.edit_data_service', 'pgsqltoolsservice.tasks', 'pgsqltoolsservice.workspace'
+]
+
+
+def _frame(request_id: int, method: str, params) -> bytes:
+    content = json.dumps({'jsonrpc': '2.0', 'id': str(request_id), 'method': method, 'params': params}).encode('utf-8')
+    return f'Content-Length: {len(content)}\r\n\r\n'.encode('ascii') + content
+
+
+def _read_response(stream) -> dict:
+    content_length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            raise RuntimeError('Tools service exited before responding')
+        if line == b'\r\n':
+            break
+        name, value = line.decode('ascii').split(':', 1)
+        if name.strip() == 'Content-Length':
+            content_length = int(value)
+    return json.loads(stream.read(content_length).decode('utf-8'))
+
+
+def _measure_startup(eager: bool, log_dir: str) -> Dict[str, float]:
+    """Starts the tools service and returns the time to each response in milliseconds"""
+    main_arguments = [f'--log-dir={log_dir}']
+    if eager:
+        imports = '; '.join(f'import {module}' for module in EAGER_IMPORTS)
+        command = [sys.executable, '-c', f"{imports}; import runpy, sys; sys.argv[1:] = {main_arguments!r}; "
+                                         f"runpy.run_module('pgsqltoolsservice.pgtoolsservice_main', run_name='__main__')"]
+    else:
+        command = [sys.executable, '-m', 'pgsqltoolsservice.pgtoolsservice_main'] + main_arguments
+
+    requests = [('version', None), ('initialize', {'processId': os.getpid(), 'capabilities': {}, 'trace': 'off'})]
+    timings = {}
+    start_time = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for request_id, (method, params) in enumerate(requests):
+            process.stdin.write(_frame(request_id, method, params))
+            process.stdin.flush()
+            response = _read_response(process.stdout)
+            if 'error' in response:
+                raise RuntimeError(f'{method} failed: {response["error"]}')
+            timings[method] = (time.perf_counter() - start_time) * 1000
+        process.stdin.write(_frame(len(requests), 'exit', None))
+        process.stdin.close()
+        process.wait(10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return timings
+
+
+def _best_of(runs: List[Dict[str, float]], method: str) -> float:
+    return min(run[method] for run in runs)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as log_dir:
+        eager_runs = [_measure_startup(True, log_dir) for _ in range(RUNS)]
+        lazy_runs = [_measure_startup(False, log_dir) for _ in range(RUNS)]
+
+    for method in ['version', 'initialize']:
+        before = _best_of(eager_runs, method)
+        after = _best_of(lazy_runs, method)
+        print(f'first {method:<34} before: {before:>10.1f}ms  after: {after:>10.1f}ms  speedup: {before / after:>5.1f}x')
+
+    first_response_ms = _best_of(lazy_runs, 'version')
+    if first_response_ms > STARTUP_BUDGET_MS:
+        print(f'Time to first response {first_response_ms:.1f}ms is over the budget of {STARTUP_BUDGET_MS}ms')
+        sys.exit(1)
@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Script splitting cost, comparing the original sqlparse based splitting, comment stripping, statement
+classification and selection computation with the single pass statement splitter. The original selection
+computation is quadratic in the size of the script, so it is compared on a smaller script before the
+splitter is timed on the full generated script
+"""
+
+import time
+from typing import Dict, List
+
+import sqlparse
+
+from pgsqltoolsservice.parsers.statement_splitter import split_statements
+from pgsqltoolsservice.query.contracts import SelectionData
+
+
+STATEMENTS = [
+    'SELECT id, name FROM users WHERE id = {0};',
+    '-- update the counter\nUPDATE counters SET value = value + 1 WHERE id = {0};',
+    "INSERT INTO log (id, message) VALUES ({0}, 'it''s; done');",
+    "SELECT E'line\\n{0};' AS text /* trailing; comment */;",
+    'CREATE FUNCTION f{0}() RETURNS int AS $body$\nBEGIN\n  RETURN {0};\nEND;\n$body$ LANGUAGE plpgsql;',
+    'WITH recent AS (SELECT * FROM events WHERE id > {0}) SELECT count(*) FROM recent;',
+]
+
+
+def generate_script(statement_count: int) -> str:
+    return '\n'.join(STATEMENTS[index % len(STATEMENTS)].format(index) for index in range(statement_count))
+
+
+# ORIGINAL IMPLEMENTATION ##################################################
+def original_compute_selection_data(batches: List[str], full_text: str) -> List[SelectionData]:
+    line_map: Dict[int, int] = {}
+    search_offset = 0
+    for line_num, line in enumerate(full_text.split('\n')):
+        start_index = full_text.index(line, search_offset)
+        line_map[start_index] = line_num
+        search_offset = start_index + len(line)
+
+    selection_data: List[SelectionData] = []
+    search_offset = 0
+    for batch in batches:
+        start_index = full_text.index(batch, search_offset)
+        start_line_index = max(filter(lambda line_index: line_index <= start_index, line_map.keys()))
+        end_index = start_index + len(batch)
+        end_line_index = max(filter(lambda line_index: line_index < end_index, line_map.keys()))
+        selection_data.append(SelectionData(
+            line_map[start_line_index], start_index - start_line_index, line_map[end_line_index], end_index - end_line_index))
+        search_offset = end_index
+
+    return selection_data
+
+
+def original_split(script: str) -> list:
+    statements = sqlparse.split(script)
+    selection_data = original_compute_selection_data(statements, script)
+    batches = []
+    for index, statement in enumerate(statements):
+        formatted_text = sqlparse.format(statement, strip_comments=True).strip()
+        if not formatted_text or formatted_text == ';':
+            continue
+        batches.append((formatted_text, sqlparse.parse(formatted_text)[0].get_type(), selection_data[index]))
+    return batches
+
+
+# BENCHMARK ################################################################
+def new_split(script: str) -> list:
+    return [
+        (statement.executable_text, statement.kind, statement)
+        for statement in split_statements(script) if not statement.is_empty
+    ]
+
+
+def _seconds(split, script: str) -> float:
+    start_time = time.perf_counter()
+    split(script)
+    return time.perf_counter() - start_time
+
+
+def _compare(statement_count: int) -> None:
+    script = generate_script(statement_count)
+    assert len(original_split(script)) == len(new_split(script)) == statement_count
+    before = min(_seconds(original_split, script) for _ in range(3))
+    after = min(_seconds(new_split, script) for _ in range(3))
+    print(f'{statement_count} statements{"":<26} before: {before:>8.3f}s  after: {after:>8.3f}s  speedup: {before / after:>5.1f}x')
+
+
+if __name__ == '__main__':
+    _compare(2000)
+    full_script = generate_script(50000)
+    print(f'50000 statements ({len(full_script) // 1024} KB){"":<14} after: {min(_seconds(new_split, full_script) for _ in range(3)):>8.3f}s')
@@ -0,0 +1,267 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test connection.ConnectionPool"""
+
+import threading
+import unittest
+from unittest import mock
+
+import psycopg2
+import psycopg2.extensions
+
+from pgsqltoolsservice.connection.connection_pool import ConnectionPool, get_pool_key, POOL_EXHAUSTED_ERROR, RESET_SESSION_STATEMENT
+
+
+class FakeCursor:
+    """Cursor that records the statements executed on its connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement):
+        if self.connection.fail_reset:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.connection.statements.append(statement)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Connection returned by the fake psycopg2.connect, with the options it was opened with"""
+
+    def __init__(self, **options):
+        self.options = options
+        self.autocommit = False
+        self.closed = 0
+        self.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.statements = []
+        self.fail_reset = False
+
+    def get_transaction_status(self):
+        return self.transaction_status
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.options = {'host': 'myserver', 'port': 5432, 'dbname': 'postgres', 'user': 'postgres', 'password': 'secret'}
+        self.connections = []
+        self.current_time = 1000.0
+
+        def connect(**options):
+            self.connections.append(FakeConnection(**options))
+            return self.connections[-1]
+
+        patches = [
+            mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect)),
+            mock.patch('pgsqltoolsservice.connection.connection_pool.time.monotonic', new=lambda: self.current_time)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _open_slowly(self, seconds: float, options: dict) -> FakeConnection:
+        self.current_time += seconds
+        return FakeConnection(**options)
+
+    def test_get_pool_key(self):
+        # If: I get the keys of options that differ in the order of their options or the type of their port
+        key = get_pool_key(self.options)
+        reordered_options = dict(reversed(list(self.options.items())), port='5432')
+
+        # Then: The keys should be the same, with the host, port, database and user first
+        self.assertEqual(key, get_pool_key(reordered_options))
+        self.assertEqual(('myserver', '5432', 'postgres', 'postgres', (('password', 'secret'),)), key)
+
+        # ... And any other option should give a different key
+        self.assertNotEqual(key, get_pool_key(dict(self.options, password='other')))
+        self.assertNotEqual(key, get_pool_key(dict(self.options, application_name='app')))
+
+    def test_shared_leases(self):
+        pool = ConnectionPool()
+
+        # If: I lease shared connections with the same options, and with another database
+        first = pool.lease(self.options, shared=True)
+        second = pool.lease(dict(self.options), shared=True)
+        other_database = pool.lease(dict(self.options, dbname='other'), shared=True)
+
+        # Then: The leases with the same options should share a connection in autocommit mode
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_database)
+        self.assertEqual(2, len(self.connections))
+        self.assertTrue(first.autocommit)
+
+        # If: I release one of the shared leases
+        pool.release(first)
+
+        # Then: The connection should stay leased without being reset
+        self.assertEqual([], first.statements)
+        self.assertEqual(0, pool.idle_connection_count)
+
+        # If: The connection is left in a transaction by its holder
+        first.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+        # Then: It should no longer be shared, and should be closed once released
+        self.assertIsNot(first, pool.lease(self.options, shared=True))
+        pool.release(second)
+        self.assertTrue(first.closed)
+        self.assertEqual(2, pool.open_connection_count)
+
+    def test_dedicated_leases(self):
+        pool = ConnectionPool()
+
+        # If: I lease dedicated connections, and a shared one
+        first = pool.lease(self.options)
+        second = pool.lease(self.options)
+        shared = pool.lease(self.options, shared=True)
+
+        # Then: Each lease should have a connection of its own
+        self.assertEqual(3, len({id(first), id(second), id(shared)}))
+
+        # If: I release a dedicated connection and lease another
+        pool.release(first)
+        self.assertEqual(1, pool.idle_connection_count)
+        third = pool.lease(self.options)
+
+        # Then: The released connection should have been reset and reused
+        self.assertIs(first, third)
+        self.assertEqual([RESET_SESSION_STATEMENT], first.statements)
+        self.assertEqual(3, len(self.connections))
+
+    def test_lease_with_handshake_time(self):
+        pool = ConnectionPool()
+
+        # If: I lease a connection that has to be opened
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=lambda **options: self._open_slowly(2.5, options))):
+            connection, handshake_time = pool.lease_with_handshake_time(self.options)
+
+        # Then: The time taken by the handshake should be returned
+        self.assertEqual(2.5, handshake_time)
+
+        # If: I lease the connection again once it was released, then there should be no handshake time
+        pool.release(connection)
+        self.assertEqual((connection, None), pool.lease_with_handshake_time(self.options))
+
+    def test_released_connections_not_reusable(self):
+        pool = ConnectionPool()
+        in_transaction, closed, failing_reset = pool.lease(self.options), pool.lease(self.options), pool.lease(self.options)
+        in_transaction.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        closed.closed = 2
+        failing_reset.fail_reset = True
+
+        # If: I release connections left in a transaction, closed or that cannot be reset
+        for connection in [in_transaction, closed, failing_reset]:
+            pool.release(connection)
+
+        # Then: They should have been closed instead of being kept idle
+        self.assertEqual(0, pool.open_connection_count)
+        self.assertTrue(all(connection.closed for connection in [in_transaction, closed, failing_reset]))
+
+        # If: I release a connection that was not opened by the pool, then it should be closed
+        connection = FakeConnection()
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+
+    def test_max_connections(self):
+        pool = ConnectionPool(max_connections=2)
+        first = pool.lease(self.options)
+        pool.lease(self.options, shared=True)
+
+        # If: I lease more connections with the same options than the limit
+        # Then: An error should be raised, while connections with other options can still be leased
+        with self.assertRaises(RuntimeError) as context:
+            pool.lease(self.options)
+        self.assertEqual(POOL_EXHAUSTED_ERROR.format(2, 'myserver:5432'), str(context.exception))
+        pool.lease(dict(self.options, dbname='other'))
+
+        # ... And shared leases should share the open shared connection
+        pool.lease(self.options, shared=True)
+        self.assertEqual(3, len(self.connections))
+
+        # If: A connection is released while a lease waits for one
+        pool.wait_timeout_seconds = 10
+        release_thread = threading.Timer(0.05, pool.release, (first,))
+        release_thread.start()
+        leased = pool.lease(self.options)
+        release_thread.join()
+
+        # Then: The lease should get the released connection
+        self.assertIs(first, leased)
+
+    def test_max_server_connections(self):
+        pool = ConnectionPool(max_server_connections=2)
+        idle = pool.lease(self.options)
+        pool.lease(dict(self.options, dbname='other'))
+        pool.release(idle)
+
+        # If: I lease a connection to another database of a server that has reached its limit
+        connection = pool.lease(dict(self.options, dbname='third'))
+
+        # Then: The idle connection to the server should have been closed to make way for it
+        self.assertTrue(idle.closed)
+        self.assertEqual('third', connection.options['dbname'])
+        self.assertEqual(2, pool.open_connection_count)
+
+        # ... And other servers should not be limited by it
+        pool.lease(dict(self.options, host='otherserver'))
+
+        # If: I lease another connection to the server with no idle connections, then an error should be raised
+        with self.assertRaises(RuntimeError):
+            pool.lease(dict(self.options, dbname='fourth'))
+
+    def test_idle_timeout(self):
+        pool = ConnectionPool(min_idle_connections=1, idle_timeout_seconds=60)
+        connections = [pool.lease(self.options) for _ in range(3)]
+        other_connection = pool.lease(dict(self.options, dbname='other'))
+        for connection in connections + [other_connection]:
+            pool.release(connection)
+            self.current_time += 10
+
+        # If: I close the idle connections before the timeout
+        # Then: None should be closed
+        self.assertEqual(0, pool.close_idle_connections())
+
+        # If: I close the idle connections once they have all timed out
+        self.current_time += 60
+        self.assertEqual(2, pool.close_idle_connections())
+
+        # Then: The least recently released connections should have been closed, keeping one idle connection of each key
+        self.assertEqual([True, True, False], [bool(connection.closed) for connection in connections])
+        self.assertFalse(other_connection.closed)
+        self.assertEqual(2, pool.idle_connection_count)
+
+    def test_failed_connection(self):
+        pool = ConnectionPool(max_connections=1)
+
+        # If: Opening a connection fails
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=psycopg2.OperationalError('could not connect'))):
+            with self.assertRaises(psycopg2.OperationalError):
+                pool.lease(self.options)
+
+        # Then: The failed connection should not count toward the limits
+        self.assertIsNotNone(pool.lease(self.options))
+
+    def test_close(self):
+        pool = ConnectionPool()
+        leased = pool.lease(self.options)
+        idle = pool.lease(self.options, shared=True)
+        pool.release(idle)
+
+        # If: I close the pool, then every connection should be closed, whether leased or idle
+        pool.close()
+        self.assertTrue(leased.closed and idle.closed)
+        self.assertEqual(0, pool.open_connection_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
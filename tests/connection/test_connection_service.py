@@ -5,11 +5,14 @@
 
 """Test connection.ConnectionService"""
 
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import Mock, MagicMock
 
 import psycopg2
+import psycopg2.extensions
 
 from pgsqltoolsservice.connection.contracts import (
     CONNECTION_COMPLETE_METHOD, ConnectionType, ConnectRequestParams, ConnectionDetails,
@@ -69,6 +72,118 @@ class TestConnectionService(unittest.TestCase):
         self.assertIsNotNone(response.server_info.server_version)
         self.assertFalse(response.server_info.is_cloud)
 
+    def test_connections_leased_from_pool(self):
+        """Test that connections of owner URIs with the same options are leased from a shared pool"""
+        # Setup: Limit the connections per server in the workspace configuration
+        pool_options = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.connection_pool
+        pool_options.max_server_connections = 3
+        pool_options.wait_timeout_seconds = 0
+        details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'})
+        connections = []
+
+        def connect(**kwargs):
+            connections.append(MockConnection({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'}, MockCursor(None)))
+            return connections[-1]
+
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect)):
+            # If: I connect two owner URIs with IntelliSense and query connections
+            for owner_uri in ['uri1', 'uri2']:
+                for connection_type in [ConnectionType.INTELLISENSE, ConnectionType.QUERY]:
+                    self.assertIsNone(self.connection_service.connect(ConnectRequestParams(details, owner_uri, connection_type)).error_message)
+
+            # Then: The IntelliSense connections should share a connection, and each query connection should have its own
+            intellisense_1, intellisense_2, query_1, query_2 = [
+                self.connection_service.get_connection(owner_uri, connection_type)
+                for connection_type in [ConnectionType.INTELLISENSE, ConnectionType.QUERY] for owner_uri in ['uri1', 'uri2']
+            ]
+            self.assertIs(intellisense_1, intellisense_2)
+            self.assertEqual(3, len({id(intellisense_1), id(query_1), id(query_2)}))
+
+            # ... And the server limit of the configuration should have been applied
+            response = self.connection_service.connect(ConnectRequestParams(details, 'uri3', ConnectionType.EDIT))
+            self.assertEqual('Cannot open more than 3 connections to myserver', response.error_message)
+
+            # If: I disconnect an owner URI
+            self.assertTrue(self.connection_service.disconnect('uri1', None))
+
+            # Then: Its query connection should be kept by the pool, and leased by the next owner URI that needs one
+            query_1.close.assert_not_called()
+            self.assertIsNone(self.connection_service.connect(ConnectRequestParams(details, 'uri3', ConnectionType.EDIT)).error_message)
+            self.assertIs(query_1, self.connection_service.get_connection('uri3', ConnectionType.EDIT))
+            self.assertEqual(3, len(connections))
+
+    def test_canceled_connections_not_shared(self):
+        """Test that canceling a statement of one owner URI never cancels the statement of another owner URI"""
+        details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'})
+
+        def connect(**kwargs):
+            return MockConnection({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'}, MockCursor(None))
+
+        # If: I connect two owner URIs with the connections of metadata lists, Object Explorer and IntelliSense
+        connection_types = [ConnectionType.DEFAULT, ConnectionType.OBJECT_EXLPORER, ConnectionType.INTELLISENSE]
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect)):
+            for owner_uri in ['uri1', 'uri2']:
+                for connection_type in connection_types:
+                    self.assertIsNone(self.connection_service.connect(ConnectRequestParams(details, owner_uri, connection_type)).error_message)
+
+        # Then: Only the IntelliSense connections, whose statements are not canceled, should be shared
+        for connection_type in connection_types:
+            connection_1 = self.connection_service.get_connection('uri1', connection_type)
+            connection_2 = self.connection_service.get_connection('uri2', connection_type)
+            self.assertEqual(connection_type == ConnectionType.INTELLISENSE, connection_1 is connection_2)
+
+        # If: A statement of one owner URI runs on the shared connection, and another owner URI's waiting statement is canceled
+        shared = self.connection_service.get_connection('uri1', ConnectionType.INTELLISENSE)
+        running_token, waiting_token = CancellationToken(), CancellationToken()
+        started, finish = threading.Event(), threading.Event()
+
+        def run_statement():
+            with running_token.canceling_statements(shared):
+                started.set()
+                finish.wait(5)
+
+        thread = threading.Thread(target=run_statement, daemon=True)
+        thread.start()
+        started.wait(5)
+        threading.Timer(0.05, waiting_token.cancel).start()
+        with self.assertRaises(psycopg2.extensions.QueryCanceledError):
+            with waiting_token.canceling_statements(self.connection_service.get_connection('uri2', ConnectionType.INTELLISENSE)):
+                pass
+
+        # Then: The running statement should not have been canceled
+        shared.cancel.assert_not_called()
+        finish.set()
+        thread.join(5)
+
+    def test_lease_connection(self):
+        """Test that connections leased for an owner URI are opened with its details and not held by it"""
+        details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'})
+        connections = []
+
+        def connect(**kwargs):
+            connections.append(MockConnection(kwargs, MockCursor(None)))
+            return connections[-1]
+
+        # If: I lease a connection for an owner URI that is not connected, then an error should be raised
+        with self.assertRaises(ValueError):
+            self.connection_service.lease_connection('someUri')
+
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect)):
+            # If: I lease a connection for a connected owner URI
+            self.connection_service.connect(ConnectRequestParams(details, 'someUri', ConnectionType.DEFAULT))
+            leased = self.connection_service.lease_connection('someUri')
+
+            # Then: A dedicated connection should have been opened with the owner URI's details
+            self.assertEqual(2, len(connections))
+            self.assertIs(connections[1], leased)
+            self.assertEqual('myserver', leased.get_dsn_parameters()['host'])
+            self.assertIsNot(leased, self.connection_service.get_connection('someUri', ConnectionType.DEFAULT))
+
+            # If: I release the connection, then it should be kept by the pool to be leased again
+            self.connection_service.release_connection(leased)
+            leased.close.assert_not_called()
+            self.assertIs(leased, self.connection_service.lease_connection('someUri'))
+
     def test_server_info_is_cloud(self):
         """Test that the connection response handles cloud connections correctly"""
         self.server_info_is_cloud_internal('postgres.database.azure.com', True)
@@ -392,6 +507,58 @@ class TestConnectionService(unittest.TestCase):
         # ... An error should not have been called
         rc.send_error.assert_not_called()
 
+    def test_handle_connect_request_opens_connections_concurrently(self):
+        """Test that the query connection of an owner URI is opened at the same time as its default connection"""
+        # Setup: Make each connection wait for the other to be opening, which fails unless they are opened concurrently
+        rc = utils.MockRequestContext()
+        details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'})
+        barrier = threading.Barrier(2, timeout=5)
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection_pool.open_query_connection_on_connect = True
+
+        def connect(**kwargs):
+            barrier.wait()
+            return MockConnection({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'}, MockCursor(None))
+
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect)):
+            # If: I make a request to connect the default connection of an owner URI
+            self.connection_service.handle_connect_request(rc, ConnectRequestParams(details, 'someUri', ConnectionType.DEFAULT))
+            self.connection_service.owner_to_thread_map['someUri'].join()
+            connection_info = self.connection_service.get_connection_info('someUri')
+            for _ in range(500):
+                if connection_info.has_connection(ConnectionType.QUERY):
+                    break
+                time.sleep(0.01)
+
+        # Then: The default and query connections should both have been opened
+        self.assertFalse(barrier.broken)
+        self.assertTrue(connection_info.has_connection(ConnectionType.DEFAULT))
+        self.assertTrue(connection_info.has_connection(ConnectionType.QUERY))
+
+        # ... And the connection complete notification should have the timings of opening the default connection
+        rc.send_notification.assert_called_once()
+        response = rc.last_notification_params
+        self.assertEqual(ConnectionType.DEFAULT, response.type)
+        self.assertIsNotNone(response.timings.handshake_ms)
+        self.assertGreaterEqual(response.timings.total_ms, response.timings.handshake_ms)
+
+        # If: I connect the owner URI again, then there should be no timings as the connection was already open
+        self.assertIsNone(self.connection_service.connect(ConnectRequestParams(details, 'someUri', ConnectionType.DEFAULT)).timings)
+
+    def test_query_connection_not_opened_on_connect_by_default(self):
+        """Test that the query connection is only opened along with the default connection if configured to be"""
+        # If: I get the connections opened along with a default connection with the default configuration
+        # Then: No other connection should be opened
+        self.assertEqual([], self.connection_service._get_concurrent_connection_types(ConnectionType.DEFAULT))
+
+        # If: The query connection is configured to be opened on connect
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection_pool.open_query_connection_on_connect = True
+
+        # Then: It should be opened along with the default connection only
+        self.assertEqual([ConnectionType.QUERY], self.connection_service._get_concurrent_connection_types(ConnectionType.DEFAULT))
+        self.assertEqual([], self.connection_service._get_concurrent_connection_types(ConnectionType.QUERY))
+
     def test_handle_database_change_request_with_empty_connection_info_for_false(self):
         """Test that the handle_connect_request method kicks off a new thread to do the connection"""
         # Setup: Create a mock request context to handle output
@@ -414,6 +581,8 @@ class TestConnectionService(unittest.TestCase):
         connect_response = ConnectionCompleteParams()
         self.connection_service.connect = Mock(return_value=connect_response)
         self.connection_service.get_connection_info = mock.MagicMock()
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection_pool.open_query_connection_on_connect = False
 
         params: ChangeDatabaseRequestParams = ChangeDatabaseRequestParams.from_dict({
             'owner_uri': 'someUri',
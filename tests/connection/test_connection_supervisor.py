@@ -0,0 +1,236 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test connection.ConnectionSupervisor"""
+
+import threading
+import unittest
+from unittest import mock
+
+import psycopg2
+import psycopg2.extensions
+
+from pgsqltoolsservice.connection import ConnectionService
+from pgsqltoolsservice.connection.connection_supervisor import KEEPALIVE_OPTIONS, VALIDATION_QUERY
+from pgsqltoolsservice.connection.contracts import (
+    CONNECTION_CHANGED_METHOD, ConnectionChangedParams, ConnectionDetails, ConnectionType, ConnectRequestParams
+)
+from pgsqltoolsservice.utils import constants
+from pgsqltoolsservice.utils.cancellation import CancellationToken
+from pgsqltoolsservice.workspace import WorkspaceService
+import tests.utils as utils
+
+
+class KillableCursor:
+    """Cursor whose statements fail once the backend of its connection is killed"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement):
+        if self.connection.killed:
+            # psycopg2 marks a connection as closed once it finds that the server closed it
+            self.connection.closed = 2
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.connection.statements.append(statement)
+
+    def close(self):
+        pass
+
+
+class KillableConnection:
+    """Connection returned by the fake psycopg2.connect, whose backend can be killed like by a server restart"""
+
+    def __init__(self, **options):
+        self.options = options
+        self.autocommit = False
+        self.closed = 0
+        self.killed = False
+        self.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.statements = []
+        self.server_version = 90602
+
+    def kill(self):
+        self.killed = True
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN if self.closed else self.transaction_status
+
+    def get_dsn_parameters(self):
+        return {'host': self.options['host'], 'dbname': self.options['dbname'], 'user': self.options['user']}
+
+    def get_parameter_status(self, parameter):
+        return '9.6.2'
+
+    def cursor(self):
+        return KillableCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.connections = []
+
+        def connect(**options):
+            self.connections.append(KillableConnection(**options))
+            return self.connections[-1]
+
+        patch = mock.patch('psycopg2.connect', new=mock.Mock(side_effect=connect))
+        self.mock_connect = patch.start()
+        self.addCleanup(patch.stop)
+
+        self.server = mock.Mock()
+        self.connection_service = ConnectionService()
+        self.connection_service._service_provider = utils.get_mock_service_provider({constants.WORKSPACE_SERVICE_NAME: WorkspaceService()})
+        self.connection_service._service_provider._server = self.server
+        self.supervisor = self.connection_service._supervisor
+        self.details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres'})
+
+    def connect(self, owner_uri: str, connection_type: ConnectionType) -> KillableConnection:
+        response = self.connection_service.connect(ConnectRequestParams(self.details, owner_uri, connection_type))
+        self.assertIsNone(response.error_message)
+        return self.connection_service.get_connection(owner_uri, connection_type)
+
+    def test_keepalive_options(self):
+        # If: I connect without keepalive options, and with one of them
+        connection = self.connect('uri1', ConnectionType.QUERY)
+        self.details.options['keepalives_idle'] = 5
+        other_connection = self.connect('uri2', ConnectionType.QUERY)
+
+        # Then: The connections should have been opened with keepalives, keeping the option that was given
+        for option, value in KEEPALIVE_OPTIONS.items():
+            self.assertEqual(value, connection.options[option])
+        self.assertEqual(5, other_connection.options['keepalives_idle'])
+
+    def test_healthy_connections_kept(self):
+        idle = self.connect('uri1', ConnectionType.QUERY)
+        in_transaction = self.connect('uri1', ConnectionType.EDIT)
+        in_transaction.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+        # If: I check connections that are alive
+        # Then: None should be replaced, and only the idle connection should have been validated
+        self.assertEqual(0, self.supervisor.check_connections())
+        self.assertEqual([VALIDATION_QUERY], idle.statements)
+        self.assertEqual([], in_transaction.statements)
+        self.server.send_notification.assert_not_called()
+
+    def test_dead_connections_replaced(self):
+        callback = mock.Mock()
+        self.connection_service.register_on_connect_callback(callback)
+        shared = self.connect('uri1', ConnectionType.INTELLISENSE)
+        self.assertIs(shared, self.connect('uri2', ConnectionType.INTELLISENSE))
+        default = self.connect('uri1', ConnectionType.DEFAULT)
+        callback.reset_mock()
+
+        # If: The server is restarted, and I check the connections
+        shared.kill()
+        default.kill()
+        self.assertEqual(3, self.supervisor.check_connections())
+
+        # Then: The shared connection should have been validated once, and each dead connection replaced by a new one
+        new_shared = self.connection_service.get_connection('uri1', ConnectionType.INTELLISENSE)
+        self.assertIs(new_shared, self.connection_service.get_connection('uri2', ConnectionType.INTELLISENSE))
+        self.assertNotIn(new_shared, [shared, default])
+        self.assertNotIn(self.connection_service.get_connection('uri1', ConnectionType.DEFAULT), [shared, default, new_shared])
+        self.assertEqual(4, len(self.connections))
+        self.assertTrue(shared.closed and default.closed)
+
+        # ... A connection changed notification should have been sent for each replaced connection
+        notifications = [call[0] for call in self.server.send_notification.call_args_list]
+        self.assertEqual([CONNECTION_CHANGED_METHOD] * 3, [method for method, _ in notifications])
+        self.assertTrue(all(isinstance(params, ConnectionChangedParams) for _, params in notifications))
+        self.assertEqual(
+            {('uri1', ConnectionType.INTELLISENSE), ('uri2', ConnectionType.INTELLISENSE), ('uri1', ConnectionType.DEFAULT)},
+            {(params.owner_uri, params.type) for _, params in notifications})
+        self.assertEqual('myserver', notifications[0][1].connection.server_name)
+
+        # ... And the listeners of new connections should not have been notified
+        callback.assert_not_called()
+
+    def test_connection_dead_in_transaction(self):
+        connection = self.connect('uri1', ConnectionType.QUERY)
+        connection.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        self.supervisor.check_connections()
+
+        # If: A connection in a transaction dies, and I check the connections
+        connection.closed = 2
+        self.assertEqual(0, self.supervisor.check_connections())
+
+        # Then: It should be left for its next use to report the lost transaction, and be replaced by the following check
+        self.assertIs(connection, self.connection_service.get_connection('uri1', ConnectionType.QUERY))
+        self.assertEqual(1, self.supervisor.check_connections())
+        self.assertIsNot(connection, self.connection_service.get_connection('uri1', ConnectionType.QUERY))
+
+    def test_connection_in_use_not_validated(self):
+        connection = self.connect('uri1', ConnectionType.QUERY)
+        started, finish = threading.Event(), threading.Event()
+
+        def run_query():
+            with CancellationToken().canceling_statements(connection):
+                started.set()
+                finish.wait(5)
+
+        # If: I check the connections while a request runs statements on an idle connection, such as between fetches
+        thread = threading.Thread(target=run_query, daemon=True)
+        thread.start()
+        started.wait(5)
+        try:
+            self.assertEqual(0, self.supervisor.check_connections())
+        finally:
+            finish.set()
+            thread.join(5)
+
+        # Then: The connection should not have been validated
+        self.assertEqual([], connection.statements)
+
+    def test_validation_error_of_live_connection(self):
+        connection = self.connect('uri1', ConnectionType.QUERY)
+
+        # If: The validation query of a live connection fails, such as when it is hit by a cancel
+        with mock.patch.object(KillableCursor, 'execute', side_effect=psycopg2.extensions.QueryCanceledError('canceling statement')):
+            self.assertEqual(0, self.supervisor.check_connections())
+
+        # Then: The connection should have been kept
+        self.assertIs(connection, self.connection_service.get_connection('uri1', ConnectionType.QUERY))
+        self.server.send_notification.assert_not_called()
+
+    def test_failed_reconnect(self):
+        connection = self.connect('uri1', ConnectionType.QUERY)
+        connection.kill()
+
+        # If: The server cannot be reached when a dead connection is replaced
+        self.mock_connect.side_effect = psycopg2.OperationalError('could not connect to server')
+        self.assertEqual(0, self.supervisor.check_connections())
+
+        # Then: The dead connection should have been removed without sending a notification
+        self.assertFalse(self.connection_service.get_connection_info('uri1').has_connection(ConnectionType.QUERY))
+        self.server.send_notification.assert_not_called()
+
+        # ... And the next use of the owner URI should open a new connection
+        self.mock_connect.side_effect = None
+        self.mock_connect.return_value = KillableConnection(host='myserver', dbname='postgres', user='postgres')
+        self.assertIs(self.mock_connect.return_value, self.connection_service.get_connection('uri1', ConnectionType.QUERY))
+
+    def test_idle_pool_connections_closed(self):
+        # If: I check the connections, then the pool's connections idle for too long should be closed
+        with mock.patch.object(self.connection_service._pool, 'close_idle_connections') as mock_close:
+            self.supervisor.check_connections()
+        mock_close.assert_called_once_with()
+
+    def test_health_check_interval_configuration(self):
+        # If: I disable health checks in the workspace configuration and connect
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection_pool.health_check_interval_seconds = 0
+        self.connect('uri1', ConnectionType.QUERY)
+
+        # Then: The interval should have been applied to the supervisor
+        self.assertEqual(0, self.supervisor.interval_seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,8 +15,9 @@ from pgsqltoolsservice.edit_data.edit_data_service import EditDataService
 from tests.mocks.service_provider_mock import ServiceProviderMock
 from pgsqltoolsservice.edit_data.contracts import (
     UpdateCellRequest, CreateRowRequest, SessionOperationRequest, DeleteRowRequest, RevertCellRequest,
-    RevertRowRequest, EditCommitRequest, DisposeRequest, InitializeEditParams
+    RevertRowRequest, EditCommitRequest, DisposeRequest, DisposeResponse, InitializeEditParams
 )
+from pgsqltoolsservice.query import ExecutionState
 from pgsqltoolsservice.hosting.json_message import JSONRPCMessage
 from pgsqltoolsservice.hosting import RequestContext
 from pgsqltoolsservice.connection import ConnectionService
@@ -170,6 +171,22 @@ class TestEditDataService(unittest.TestCase):
 
         self.assertEqual(0, len(self._service_under_test._active_sessions))
 
+    def test_dispose_cancels_loading_rows(self):
+        request_context = utils.MockRequestContext()
+        request = DisposeRequest()
+        request.owner_uri = 'owner_uri'
+        self._service_under_test._active_sessions[request.owner_uri] = mock.MagicMock()
+        self._service_under_test._query_execution_service = self.query_execution_service
+        query = mock.MagicMock(execution_state=ExecutionState.EXECUTING)
+        self.query_execution_service.query_results[request.owner_uri] = query
+
+        # If: I dispose of a session whose rows are still loading
+        self._service_under_test._dispose(request_context, request)
+
+        # Then: The load should have been canceled
+        query.cancel.assert_called_once_with()
+        self.assertIsInstance(request_context.last_response_params, DisposeResponse)
+
     def test_dispose_when_edit_session_is_not_available(self):
         request_context = utils.MockRequestContext()
 
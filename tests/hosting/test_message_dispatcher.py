@@ -0,0 +1,132 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+from pgsqltoolsservice.hosting.message_dispatcher import MessageDispatcher
+import tests.utils as utils
+
+
+class MessageDispatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatcher = MessageDispatcher(max_workers=4, max_pending=16, logger=utils.get_mock_logger())
+        self.dispatcher.start()
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def test_same_key_runs_in_order(self):
+        # If: I submit many items with the same ordering key
+        results = []
+        done = threading.Event()
+
+        def record(value):
+            # Sleep for a moment so that out of order execution would be observable
+            time.sleep(0.001)
+            results.append(value)
+            if value == 9:
+                done.set()
+
+        for index in range(10):
+            self.dispatcher.submit('uri', 'test', record, index)
+
+        # Then: They should have run one at a time in submission order
+        self.assertTrue(done.wait(5))
+        self.assertEqual(results, list(range(10)))
+
+    def test_slow_key_does_not_block_other_keys(self):
+        # If: A handler for one key is blocked
+        release = threading.Event()
+        other_done = threading.Event()
+        self.dispatcher.submit('slow', 'slow', release.wait, 5)
+        self.dispatcher.submit('slow', 'slow', other_done.set)
+
+        # ... and I submit work for another key and without a key
+        keyed_done = threading.Event()
+        unkeyed_done = threading.Event()
+        self.dispatcher.submit('fast', 'fast', keyed_done.set)
+        self.dispatcher.submit(None, 'unkeyed', unkeyed_done.set)
+
+        # Then: The other work should complete while the slow key is still blocked
+        self.assertTrue(keyed_done.wait(5))
+        self.assertTrue(unkeyed_done.wait(5))
+        self.assertFalse(other_done.is_set())
+
+        # ... and the slow key should continue once it is released
+        release.set()
+        self.assertTrue(other_done.wait(5))
+
+    def test_submit_blocks_when_full(self):
+        # Setup: Create a dispatcher that can only hold one item and fill it
+        dispatcher = MessageDispatcher(max_workers=1, max_pending=1)
+        dispatcher.start()
+        release = threading.Event()
+        dispatcher.submit(None, 'blocking', release.wait, 5)
+
+        # If: I submit another item from another thread
+        submitted = threading.Event()
+        submitter = threading.Thread(target=lambda: (dispatcher.submit(None, 'next', lambda: None), submitted.set()))
+        submitter.start()
+
+        # Then: The submission should block until the first item completes
+        self.assertFalse(submitted.wait(0.1))
+        release.set()
+        self.assertTrue(submitted.wait(5))
+        submitter.join()
+        dispatcher.stop()
+
+    def test_handler_exception_is_logged(self):
+        # If: A handler raises an exception
+        done = threading.Event()
+
+        def raise_error():
+            raise ValueError('error')
+
+        self.dispatcher.submit('uri', 'error', raise_error)
+        self.dispatcher.submit('uri', 'after', done.set)
+
+        # Then: The exception should be logged and the next item in the lane should still run
+        self.assertTrue(done.wait(5))
+        self.dispatcher._logger.exception.assert_called_once()
+
+    def test_statistics(self):
+        # If: I run a few handlers
+        done = threading.Event()
+        self.dispatcher.submit('uri', 'method', lambda: None)
+        self.dispatcher.submit('uri', 'method', done.set)
+        self.assertTrue(done.wait(5))
+        self.dispatcher.stop()
+        for worker in self.dispatcher._workers:
+            worker.join(5)
+
+        # Then: The counters should reflect the handled items
+        statistics = self.dispatcher.statistics
+        self.assertEqual(statistics['queue_depth'], 0)
+        self.assertEqual(statistics['in_flight'], 0)
+        self.assertGreaterEqual(statistics['max_queue_depth'], 1)
+        self.assertEqual(statistics['handler_times']['method']['count'], 2)
+        self.assertEqual(statistics['wait_times']['method']['count'], 2)
+
+    def test_stop_drains_submitted_items(self):
+        # If: I submit items and stop the dispatcher before they run
+        dispatcher = MessageDispatcher(max_workers=1)
+        results = []
+        for index in range(3):
+            dispatcher.submit('uri', 'test', results.append, index)
+        dispatcher.stop()
+        dispatcher.submit('uri', 'test', results.append, 3)
+        dispatcher.start()
+        for worker in dispatcher._workers:
+            worker.join(5)
+
+        # Then: Only the items submitted before stopping should have run
+        self.assertEqual(results, [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from queue import Empty, Full
+import threading
+import unittest
+import unittest.mock as mock
+
+from pgsqltoolsservice.hosting.json_message import JSONRPCMessage
+from pgsqltoolsservice.hosting.json_writer import JSONRPCWriter
+from pgsqltoolsservice.hosting.output_queue import MessagePriority, OutputQueue
+
+
+class OutputQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = JSONRPCWriter(None)
+
+    def test_priority(self):
+        test_cases = [
+            (JSONRPCMessage.create_response('1', {}), MessagePriority.RESPONSE),
+            (JSONRPCMessage.create_error('1', 0, 'error', None), MessagePriority.RESPONSE),
+            (None, MessagePriority.RESPONSE),
+            (JSONRPCMessage.create_request('1', 'test/request', {}), MessagePriority.INTERACTIVE),
+            (JSONRPCMessage.create_notification('textDocument/publishDiagnostics', {}), MessagePriority.INTERACTIVE),
+            (JSONRPCMessage.create_notification('query/message', {}), MessagePriority.BULK),
+            (JSONRPCMessage.create_notification('tasks/statuschanged', {}), MessagePriority.BULK)
+        ]
+        for message, expected_priority in test_cases:
+            self.assertIs(OutputQueue.get_priority(message), expected_priority)
+
+    def test_get_in_priority_order(self):
+        # Setup: Queue bulk notifications, an interactive notification and a response in that order
+        queue = OutputQueue()
+        bulk_messages = [JSONRPCMessage.create_notification('query/message', {'index': index}) for index in range(3)]
+        interactive_message = JSONRPCMessage.create_notification('connection/complete', {})
+        response = JSONRPCMessage.create_response('1', {})
+        for message in bulk_messages + [interactive_message, response]:
+            queue.put(message)
+
+        # If: I get all of the messages
+        messages = [queue.get_nowait() for _ in range(queue.qsize())]
+
+        # Then: The response should come first, then the interactive notification, then the bulk notifications in order
+        self.assertEqual(messages, [response, interactive_message] + bulk_messages)
+        self.assertTrue(queue.empty())
+
+    def test_frames_when_queued(self):
+        # If: I queue a message with a queue that frames messages
+        queue = OutputQueue(frame_message=self.writer.frame_message)
+        message = JSONRPCMessage.create_notification('test/test', {'value': 'ü'})
+        queue.put(message)
+
+        # Then:
+        # ... The size of the frame should be counted
+        frame = self.writer.frame_message(message)
+        self.assertEqual(queue.queued_bytes, len(frame))
+
+        # ... The frame should be returned with the message and no longer counted
+        self.assertEqual(queue.get_framed(), (message, frame))
+        self.assertEqual(queue.queued_bytes, 0)
+
+    def test_unframeable_message_queued(self):
+        # If: I queue a message that fails to serialize
+        queue = OutputQueue(frame_message=self.writer.frame_message)
+        message = JSONRPCMessage.create_notification('test/test', {})
+        message.to_json = mock.MagicMock(side_effect=ValueError)
+        queue.put(message)
+
+        # Then: The message should be queued without a frame for the output thread to report
+        self.assertEqual(queue.get_framed(), (message, None))
+
+    def test_put_blocks_when_full(self):
+        # Setup: Fill a queue with a notification
+        queue = OutputQueue(max_queued_bytes=1, frame_message=self.writer.frame_message)
+        queue.put(JSONRPCMessage.create_notification('query/message', {}))
+
+        # If: I put another notification from another thread
+        put_done = threading.Event()
+        producer = threading.Thread(target=lambda: (queue.put(JSONRPCMessage.create_notification('query/message', {})), put_done.set()))
+        producer.start()
+
+        # Then:
+        # ... The producer should wait for room in the queue
+        self.assertFalse(put_done.wait(0.1))
+
+        # ... A response should still be queued without waiting
+        queue.put(JSONRPCMessage.create_response('1', {}), block=False)
+
+        # ... Putting a notification without blocking or with a timeout should fail
+        with self.assertRaises(Full):
+            queue.put(JSONRPCMessage.create_notification('query/message', {}), block=False)
+        with self.assertRaises(Full):
+            queue.put(JSONRPCMessage.create_notification('query/message', {}), timeout=0.01)
+
+        # ... The producer should continue once the queued notification has been taken
+        queue.get()
+        self.assertFalse(put_done.wait(0.1))
+        queue.get()
+        self.assertTrue(put_done.wait(5))
+        producer.join()
+        self.assertEqual(queue.qsize(), 1)
+
+    def test_close_releases_producers(self):
+        # Setup: Fill a queue and start a producer waiting for room
+        queue = OutputQueue(max_queued_bytes=1, frame_message=self.writer.frame_message)
+        queue.put(JSONRPCMessage.create_notification('query/message', {}))
+        producer = threading.Thread(target=queue.put, args=(JSONRPCMessage.create_notification('query/message', {}),))
+        producer.start()
+
+        # If: I close the queue
+        queue.close()
+
+        # Then: The producer should have been released and the queue should no longer block
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+        queue.put(JSONRPCMessage.create_notification('query/message', {}), block=False)
+        self.assertEqual(queue.qsize(), 3)
+
+    def test_get_empty(self):
+        # If: I get from an empty queue without blocking
+        # Then: I should get an exception
+        with self.assertRaises(Empty):
+            OutputQueue().get_framed(block=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
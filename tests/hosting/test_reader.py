@@ -266,15 +266,33 @@ class JSONRPCReaderTests(unittest.TestCase):
         result = reader._try_read_content(output)
 
         # Then:
-        # ... The message should be successfully read
+        # ... The message should be successfully read, as bytes that json.loads decodes itself
         self.assertTrue(result)
-        self.assertEqual(output[0], 'messa')
+        self.assertEqual(output[0], b'messa')
 
         # ... The state of the reader should have been updated
         self.assertEqual(reader._read_state, JSONRPCReader.ReadState.Header)
         self.assertEqual(reader._read_offset, 5)
         self.assertEqual(reader._buffer_end_offset, len(reader._buffer))
 
+    def test_read_content_nonstandard_encoding(self):
+        # Setup: Create a reader of a non-standard encoding that has all of a message buffered
+        test_buffer = bytearray('{"id": "\u00e9"}'.encode('latin-1'))
+        reader = JSONRPCReader(None, encoding='latin-1', logger=utils.get_mock_logger())
+        reader._buffer = test_buffer
+        reader._buffer_end_offset = len(reader._buffer)
+        reader._read_offset = 0
+        reader._read_state = JSONRPCReader.ReadState.Content
+        reader._expected_content_length = len(test_buffer)
+
+        # If: I read a message from the buffer
+        output = ['']
+        result = reader._try_read_content(output)
+
+        # Then: The message should have been decoded with the encoding of the reader
+        self.assertTrue(result)
+        self.assertEqual(output[0], '{"id": "\u00e9"}')
+
     def test_read_content_not_enough_buffer(self):
         # Setup: Create a reader that has read in headers and has part of a message buffered
         test_buffer = bytearray(b'message')
@@ -400,6 +418,63 @@ class JSONRPCReaderTests(unittest.TestCase):
             # ... The buffer should have been trashed
             self.assertEqual(len(reader._buffer), reader.DEFAULT_BUFFER_SIZE)
 
+    def test_read_many_messages_reuses_buffer(self):
+        # Setup: Create a stream with more messages than fit in the buffer at once
+        test_string = b'Content-Length: 32\r\n\r\n{"method":"test", "params":null}'
+        with io.BytesIO(test_string * 1000) as stream:
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            original_buffer = reader._buffer
+
+            # If: I read all of the messages
+            messages = [reader.read_message() for _ in range(1000)]
+
+            # Then:
+            # ... Every message should have been read
+            self.assertTrue(all(message.message_method == 'test' for message in messages))
+
+            # ... The same buffer should have been used for all of them
+            self.assertIs(reader._buffer, original_buffer)
+            self.assertEqual(reader._read_offset, reader._buffer_end_offset)
+
+    def test_read_message_larger_than_buffer(self):
+        # Setup: Create a stream with a message that is larger than the default buffer, followed by a small message
+        large_content = '{{"method":"test", "params":"{}"}}'.format('ü' * JSONRPCReader.DEFAULT_BUFFER_SIZE).encode('utf-8')
+        small_content = b'{"method":"small", "params":null}'
+        test_bytes = b'Content-Length: ' + str(len(large_content)).encode('ascii') + b'\r\n\r\n' + large_content + \
+            b'Content-Length: ' + str(len(small_content)).encode('ascii') + b'\r\n\r\n' + small_content
+        with io.BytesIO(test_bytes) as stream:
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+
+            # If: I read both messages
+            large_message = reader.read_message()
+            small_message = reader.read_message()
+
+            # Then:
+            # ... The large message should have been decoded in full
+            self.assertEqual(large_message.message_params, 'ü' * JSONRPCReader.DEFAULT_BUFFER_SIZE)
+            self.assertEqual(small_message.message_method, 'small')
+
+            # ... The buffer should be back to the default size
+            self.assertEqual(len(reader._buffer), JSONRPCReader.DEFAULT_BUFFER_SIZE)
+
+    def test_read_next_chunk_compacts(self):
+        # Setup: Create a reader with a full buffer that has been partially read
+        with io.BytesIO(b'67890') as stream:
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            reader._buffer = bytearray(b'xxxxx12345')
+            original_buffer = reader._buffer
+            reader._buffer_end_offset = 10
+            reader._read_offset = 5
+
+            # If: I read a chunk from the stream
+            reader._read_next_chunk()
+
+            # Then: The unread bytes should have been moved to the front of the same buffer instead of growing it
+            self.assertIs(reader._buffer, original_buffer)
+            self.assertEqual(reader._read_offset, 0)
+            self.assertEqual(reader._buffer_end_offset, 10)
+            self.assertEqual(reader._buffer, bytearray(b'1234567890'))
+
     def test_read_recover_from_header_message(self):
         test_string = b'Content-Type: application/json\r\n\r\n' +\
                       b'Content-Length: 32\r\n\r\n{"method":"test", "params":null}'
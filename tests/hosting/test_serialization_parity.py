@@ -0,0 +1,184 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Tests that single pass message serialization produces the same wire output as the dictionary round trip"""
+
+import datetime
+import decimal
+import enum
+import importlib
+import inspect
+import json
+import pkgutil
+import unittest
+import uuid
+
+import pgsqltoolsservice
+from pgsqltoolsservice.hosting.json_message import JSONRPCMessage
+from pgsqltoolsservice.metadata.contracts import MetadataType, ObjectMetadata
+from pgsqltoolsservice.object_explorer.contracts import NodeInfo
+from pgsqltoolsservice.query.contracts import DbCellValue, ResultSetSubset, SubsetResult
+
+
+class SerializationParityTests(unittest.TestCase):
+
+    def test_contract_classes(self):
+        # Setup: Find every class defined in a contracts module
+        contract_classes = _get_contract_classes()
+        self.assertGreater(len(contract_classes), 50)
+
+        for class_ in contract_classes:
+            with self.subTest(contract=f'{class_.__module__}.{class_.__name__}'):
+                # If: I serialize a populated instance of the contract in every kind of message
+                instance = _create_contract_instance(class_)
+
+                # Then: The single pass output should match the legacy output
+                self._assert_parity(instance)
+
+    def test_subset_result(self):
+        # If: I serialize a subset result containing values json cannot natively serialize
+        rows = [
+            [
+                DbCellValue(1, False, 1, 0),
+                DbCellValue(None, True, None, 0),
+                DbCellValue('ünïcødé ☃', False, 'ünïcødé ☃', 0),
+                DbCellValue(decimal.Decimal('1.50'), False, decimal.Decimal('1.50'), 0),
+                DbCellValue(datetime.datetime(2017, 1, 2, 3, 4, 5), False, datetime.datetime(2017, 1, 2, 3, 4, 5), 0),
+                DbCellValue(b'\x00\x01', False, memoryview(b'\x00\x01'), 0),
+                DbCellValue(uuid.UUID(int=1), False, uuid.UUID(int=1), 0),
+                DbCellValue(1.5, False, float('nan'), 0),
+                DbCellValue([1, 2], False, (1, 'two', None), 0)
+            ] for _ in range(5)
+        ]
+        subset = ResultSetSubset()
+        subset.rows = rows
+        subset.row_count = len(rows)
+
+        # Then: The single pass output should match the legacy output
+        self._assert_parity(SubsetResult(subset))
+
+    def test_node_info_list(self):
+        # If: I serialize a list of object explorer nodes containing nested contracts and enums
+        nodes = []
+        for index in range(10):
+            node = NodeInfo()
+            node.label = f'node{index}'
+            node.node_path = f'/server/db/{index}/'
+            node.metadata = ObjectMetadata(f'//urn/{index}', MetadataType.TABLE, 'Table', f'node{index}', 'public')
+            nodes.append(node)
+
+        # Then: The single pass output should match the legacy output
+        self._assert_parity(nodes)
+
+    def test_builtin_values(self):
+        values = [
+            None, True, 0, -1, 2 ** 70, 1.1, float('inf'), '', 'text', '\x00\n"', [], (), {},
+            {'b': 1, 'a': {'d': [1, {'z': None, 'y': 2}], 'c': 'x'}},
+            _TestEnum.OBJECT, _TestEnum.NESTED, _TestEnum.LIST, _TestEnum.UNSERIALIZABLE, _TestIntEnum.ONE,
+            [_TestEnum.OBJECT, {'key': _TestObject()}], _TestObject(), object(), {1, 2}
+        ]
+        for value in values:
+            with self.subTest(value=repr(value)):
+                self._assert_parity(value)
+
+    def test_circular_reference(self):
+        # If: I serialize an object that contains itself
+        instance = _TestObject()
+        instance.test_value = [instance]
+
+        # Then: Both serialization paths should fail the same way
+        message = JSONRPCMessage.create_response(1, instance)
+        with self.assertRaises(ValueError):
+            json.dumps(message.dictionary, sort_keys=True)
+        with self.assertRaises(ValueError):
+            message.to_json()
+
+    def _assert_parity(self, payload):
+        messages = [
+            JSONRPCMessage.create_request('1', 'test/request', payload),
+            JSONRPCMessage.create_response(2, payload),
+            JSONRPCMessage.create_notification('test/notification', payload),
+            JSONRPCMessage.create_error('3', 4, 'message', payload)
+        ]
+        for message in messages:
+            self.assertEqual(message.to_json(), json.dumps(message.dictionary, sort_keys=True))
+
+
+class _TestObject:
+    def __init__(self):
+        self.test_value = 'value'
+        self.test_none = None
+        self._private_value = 1
+        self.camelCaseValue = datetime.date(2017, 1, 1)
+
+
+class _TestEnum(enum.Enum):
+    OBJECT = _TestObject()
+    NESTED = MetadataType.VIEW
+    LIST = [1, 'two']
+    UNSERIALIZABLE = datetime.date(2017, 1, 1)
+
+
+class _TestIntEnum(enum.IntEnum):
+    ONE = 1
+
+
+# Values assigned in rotation to the attributes of contracts that are not set by their constructor
+_SAMPLE_VALUES = ['sample ✓', 7, 2.5, True, [1, 'a', None], {'key': 'value'}, MetadataType.FUNCTION, _TestObject()]
+
+
+def _get_contract_classes() -> list:
+    classes = []
+    for module_info in pkgutil.walk_packages(pgsqltoolsservice.__path__, 'pgsqltoolsservice.'):
+        if '.contracts' not in module_info.name:
+            continue
+        module = importlib.import_module(module_info.name)
+        for _, member in inspect.getmembers(module, inspect.isclass):
+            if member.__module__ == module.__name__:
+                classes.append(member)
+    return classes
+
+
+def _create_contract_instance(class_):
+    if issubclass(class_, enum.Enum):
+        return list(class_)
+
+    try:
+        instance = class_()
+    except TypeError:
+        # Constructor requires arguments, provide a sample for each of them
+        parameters = list(inspect.signature(class_.__init__).parameters.values())[1:]
+        args = [
+            _get_sample_argument(parameter) for parameter in parameters
+            if parameter.default is inspect.Parameter.empty and parameter.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD
+        ]
+        try:
+            instance = class_(*args)
+        except TypeError:
+            # Some contracts cannot be constructed directly, bypass the constructor and use the sample attributes
+            instance = class_.__new__(class_)
+            for index in range(len(_SAMPLE_VALUES)):
+                setattr(instance, f'sample_attribute_{index}', None)
+
+    # Fill in anything the constructor left empty
+    for index, (key, value) in enumerate(list(vars(instance).items())):
+        if value is None:
+            setattr(instance, key, _SAMPLE_VALUES[index % len(_SAMPLE_VALUES)])
+    return instance
+
+
+def _get_sample_argument(parameter: inspect.Parameter):
+    if parameter.annotation is int:
+        return 1
+    if parameter.annotation is bool:
+        return False
+    if inspect.isclass(parameter.annotation) and parameter.annotation.__module__.startswith('pgsqltoolsservice.'):
+        # Contract constructors may take other contracts
+        return _create_contract_instance(parameter.annotation)
+    return 'argument'
+
+
+if __name__ == '__main__':
+    unittest.main()
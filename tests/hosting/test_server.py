@@ -17,6 +17,7 @@ from pgsqltoolsservice.hosting.json_rpc_server import (
 from pgsqltoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
 from pgsqltoolsservice.hosting.json_reader import JSONRPCReader
 from pgsqltoolsservice.hosting.json_writer import JSONRPCWriter
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 import tests.utils as utils
 
 
@@ -49,7 +50,6 @@ class JSONRPCServerTests(unittest.TestCase):
         # ... The output queue should be empty
         self.assertIsInstance(server._output_queue, Queue)
         self.assertTrue(server._output_queue.all_tasks_done)
-        self.assertDictEqual(server._notification_handlers, {})
         self.assertListEqual(server._shutdown_handlers, [])
 
         # ... The threads shouldn't be assigned yet
@@ -65,6 +65,8 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIsNotNone(server._request_handlers['shutdown'].handler)
         self.assertTrue('exit' in server._request_handlers)
         self.assertIsNotNone(server._request_handlers['exit'].handler)
+        self.assertListEqual(list(server._notification_handlers), [JSONRPCServer.CANCEL_REQUEST_METHOD])
+        self.assertIsNotNone(server._notification_handlers[JSONRPCServer.CANCEL_REQUEST_METHOD].handler)
 
     def test_add_shutdown_handler(self):
         # If: I add a shutdown handler
@@ -308,6 +310,106 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIs(handler.mock_calls[0][1][0]._message, message)
         self.assertIsInstance(handler.mock_calls[0][1][1], _TestParams)
 
+    # CANCELLATION TESTS ###################################################
+    def test_cancel_request_before_dispatch(self):
+        # Setup: Create a server that has received a request that has not been dispatched yet
+        handler = mock.MagicMock()
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        server.set_request_handler(IncomingMessageConfiguration('test/test', None), handler)
+        message = JSONRPCMessage.create_request('123', 'test/test', {})
+        cancellation_token = self._receive_request(server, message)
+
+        # If: The client cancels the request and then the request is dispatched
+        server._dispatch_message(JSONRPCMessage.create_notification(JSONRPCServer.CANCEL_REQUEST_METHOD, {'id': '123'}))
+        server._dispatch_message(message, cancellation_token)
+
+        # Then:
+        # ... The handler should not have been called
+        handler.assert_not_called()
+        self.assertTrue(cancellation_token.canceled)
+
+        # ... The request should have been responded to with a cancellation error
+        self._assert_canceled_response(server, '123')
+
+    def test_cancel_running_request(self):
+        # Setup: Create a server with a handler that is cancelled while it runs
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        cancel_message = JSONRPCMessage.create_notification(JSONRPCServer.CANCEL_REQUEST_METHOD, {'id': '123'})
+        canceled_callback = mock.MagicMock()
+
+        def handler(request_context, params):
+            request_context.cancellation_token.register(canceled_callback)
+            server._dispatch_message(cancel_message)
+            request_context.send_response('too late')
+
+        server.set_request_handler(IncomingMessageConfiguration('test/test', None), handler)
+        message = JSONRPCMessage.create_request('123', 'test/test', {})
+
+        # If: I dispatch the request
+        server._dispatch_message(message, self._receive_request(server, message))
+
+        # Then:
+        # ... The handler's cancellation callback should have been called
+        canceled_callback.assert_called_once_with()
+
+        # ... Only the cancellation error should have been sent
+        self._assert_canceled_response(server, '123')
+
+    def test_dispatch_request_invalid_params(self):
+        # Setup: Create a server with a handler whose parameters fail to deserialize
+        config = IncomingMessageConfiguration('test/test', _TestParams)
+        handler = mock.MagicMock()
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        server.set_request_handler(config, handler)
+        message = JSONRPCMessage.create_request('123', 'test/test', {})
+        cancellation_token = self._receive_request(server, message)
+
+        # If: I dispatch the request
+        with mock.patch.object(_TestParams, 'from_dict', side_effect=ValueError('bad params')):
+            server._dispatch_message(message, cancellation_token)
+
+        # Then: The handler should not have been called, and an internal error should have been sent
+        handler.assert_not_called()
+        self.assertEqual(server._output_queue.qsize(), 1)
+        response = server._output_queue.get_nowait()
+        self.assertEqual(response.message_type, JSONRPCMessageType.ResponseError)
+        self.assertEqual(response.message_error['code'], -32603)
+
+        # ... And the request should no longer be in flight
+        self.assertDictEqual(server._in_flight_requests, {})
+
+    def test_cancel_completed_request(self):
+        # Setup: Create a server that has responded to a request
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        server.set_request_handler(IncomingMessageConfiguration('test/test', None), lambda context, params: context.send_response(params))
+        message = JSONRPCMessage.create_request('123', 'test/test', {})
+        cancellation_token = self._receive_request(server, message)
+        server._dispatch_message(message, cancellation_token)
+
+        # If: The client cancels the request after it has been responded to
+        server._dispatch_message(JSONRPCMessage.create_notification(JSONRPCServer.CANCEL_REQUEST_METHOD, {'id': '123'}))
+
+        # Then: Only the response should have been sent
+        self.assertFalse(cancellation_token.canceled)
+        self.assertDictEqual(server._in_flight_requests, {})
+        self.assertEqual(server._output_queue.qsize(), 1)
+        self.assertEqual(server._output_queue.get_nowait().message_type, JSONRPCMessageType.ResponseSuccess)
+
+    @staticmethod
+    def _receive_request(server, message):
+        # Track the request like the input thread does when it reads it
+        cancellation_token = CancellationToken()
+        server._in_flight_requests[message.message_id] = cancellation_token
+        return cancellation_token
+
+    def _assert_canceled_response(self, server, request_id):
+        self.assertEqual(server._output_queue.qsize(), 1)
+        response = server._output_queue.get_nowait()
+        self.assertEqual(response.message_type, JSONRPCMessageType.ResponseError)
+        self.assertEqual(response.message_id, request_id)
+        self.assertEqual(response.message_error['code'], JSONRPCServer.REQUEST_CANCELLED_ERROR_CODE)
+        self.assertDictEqual(server._in_flight_requests, {})
+
     @staticmethod
     def test_dispatch_notification_no_handler():
         # If: I dispatch a message that has no handler
@@ -396,6 +498,90 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertEqual(out_message.message_params, params)
         self.assertEqual(out_message.message_method, method)
 
+    # OUTPUT TESTS #########################################################
+    def test_queued_output_coalesced(self):
+        # Setup: Create a server with several messages queued behind the one being sent
+        output_stream = mock.MagicMock()
+        server = JSONRPCServer(None, output_stream, logger=utils.get_mock_logger())
+        messages = [JSONRPCMessage.create_notification('test/test', {'index': index}) for index in range(4)]
+        for message in messages[1:]:
+            server._output_queue.put(message)
+
+        # If: I send the first message
+        server._send_queued_output(messages[0])
+
+        # Then: All the messages should have been written in order with a single write
+        output_stream.write.assert_called_once_with(b''.join(server.writer.frame_message(message) for message in messages))
+        self.assertTrue(server._output_queue.empty())
+
+    def test_queued_output_max_flush_size(self):
+        # Setup: Create a server that flushes after every message
+        output_stream = mock.MagicMock()
+        server = JSONRPCServer(None, output_stream, logger=utils.get_mock_logger(), max_flush_size=1)
+        messages = [JSONRPCMessage.create_notification('test/test', {'index': index}) for index in range(3)]
+        for message in messages[1:]:
+            server._output_queue.put(message)
+
+        # If: I send the first message
+        server._send_queued_output(messages[0])
+
+        # Then: Only the first message should have been written and the rest should still be queued
+        output_stream.write.assert_called_once_with(server.writer.frame_message(messages[0]))
+        self.assertEqual(server._output_queue.qsize(), 2)
+
+    def test_queued_output_skips_unserializable(self):
+        # Setup: Create a server with an unserializable message queued between two valid ones
+        output_stream = mock.MagicMock()
+        server = JSONRPCServer(None, output_stream, logger=utils.get_mock_logger())
+        bad_message = JSONRPCMessage.create_notification('test/bad', {'value': float('nan')})
+        bad_message.to_json = mock.MagicMock(side_effect=ValueError)
+        good_message = JSONRPCMessage.create_notification('test/good', {})
+        server._output_queue.put(bad_message)
+        server._output_queue.put(good_message)
+
+        # If: I send a valid message
+        server._send_queued_output(good_message)
+
+        # Then: The valid messages should have been written without the unserializable one
+        frame = server.writer.frame_message(good_message)
+        output_stream.write.assert_called_once_with(frame + frame)
+
+    def test_queued_output_prioritized(self):
+        # Setup: Create a server with bulk notifications queued ahead of a response
+        output_stream = mock.MagicMock()
+        server = JSONRPCServer(None, output_stream, logger=utils.get_mock_logger())
+        notifications = [JSONRPCMessage.create_notification('query/message', {'index': index}) for index in range(3)]
+        response = JSONRPCMessage.create_response('1', {})
+        for message in notifications[1:] + [response]:
+            server._output_queue.put(message)
+
+        # If: I send the first notification
+        server._send_queued_output(notifications[0])
+
+        # Then: The response should have been written ahead of the notifications that were queued before it
+        expected_messages = [notifications[0], response] + notifications[1:]
+        output_stream.write.assert_called_once_with(b''.join(server.writer.frame_message(message) for message in expected_messages))
+
+    # ORDERING KEY TESTS ###################################################
+    def test_ordering_key(self):
+        server = JSONRPCServer(None, None)
+        test_cases = [
+            # Owner URI parameter
+            (JSONRPCMessage.create_request('1', 'query/executeString', {'ownerUri': 'file:///a.sql'}), 'file:///a.sql'),
+            # Text document parameter
+            (JSONRPCMessage.create_notification('textDocument/didChange', {'textDocument': {'uri': 'file:///a.sql'}}),
+             'file:///a.sql'),
+            # Workspace wide notification
+            (JSONRPCMessage.create_notification('workspace/didChangeConfiguration', {'settings': {}}),
+             JSONRPCServer.WORKSPACE_ORDERING_KEY),
+            # Unordered messages
+            (JSONRPCMessage.create_request('1', 'version', None), None),
+            (JSONRPCMessage.create_request('1', 'capabilities/list', {'hostName': 'host'}), None),
+            (JSONRPCMessage.create_request('1', 'test', [1, 2]), None)
+        ]
+        for message, expected_key in test_cases:
+            self.assertEqual(server._get_ordering_key(message), expected_key)
+
     # END-TO-END TESTS #####################################################
 
     def test_request_enqueued(self):
@@ -7,10 +7,41 @@ import unittest
 import unittest.mock as mock
 
 from pgsqltoolsservice.hosting.json_rpc_server import JSONRPCServer
-from pgsqltoolsservice.hosting.service_provider import ServiceProvider
+from pgsqltoolsservice.hosting.json_rpc_server import IncomingMessageConfiguration
+from pgsqltoolsservice.hosting.service_provider import LazyService, ServiceProvider
+import pgsqltoolsservice.pgtoolsservice_main as pgtoolsservice_main
+from pgsqltoolsservice.utils import constants
 import tests.utils as utils
 
 
+class _LazyTestParams:
+    def __init__(self, value):
+        self.value = value
+
+    @classmethod
+    def from_dict(cls, dictionary: dict):
+        return cls(dictionary['value'])
+
+
+class _LazyTestService:
+    def __init__(self):
+        self.service_provider = None
+        self.request_params = None
+        self.notification_params = None
+
+    def register(self, service_provider):
+        self.service_provider = service_provider
+        service_provider.server.set_request_handler(IncomingMessageConfiguration('test/request', _LazyTestParams), self.handle_request)
+        service_provider.server.set_notification_handler(IncomingMessageConfiguration('test/notification', None), self.handle_notification)
+
+    def handle_request(self, request_context, params):
+        self.request_params = params
+        request_context.send_response(params.value)
+
+    def handle_notification(self, notification_context, params):
+        self.notification_params = params
+
+
 class TestServiceProvider(unittest.TestCase):
     def test_init(self):
         # If: I create a new service provider
@@ -75,6 +106,106 @@ class TestServiceProvider(unittest.TestCase):
         # Then: I should get the service back
         self.assertIsInstance(service, TestServiceProvider._TestService)
 
+    def test_lazy_service_not_loaded_on_initialize(self):
+        # Setup: Create a service provider with a lazy service
+        server = JSONRPCServer(None, None)
+        lazy_service = LazyService('tests.hosting.test_service_provider', '_LazyTestService', requests=['test/request'],
+                                   notifications=['test/notification'])
+        sp = ServiceProvider(server, {'lazy': lazy_service}, utils.get_mock_logger())
+
+        # If: I initialize the service provider
+        with mock.patch.object(lazy_service, 'load_class') as mock_load_class:
+            sp.initialize()
+
+            # Then:
+            # ... The service should not have been imported or created
+            mock_load_class.assert_not_called()
+            self.assertFalse(sp.is_loaded('lazy'))
+
+        # ... Handlers should have been set for the methods of the service
+        self.assertIsNotNone(server.get_request_handler('test/request'))
+        self.assertIsNotNone(server.get_notification_handler('test/notification'))
+
+    def test_lazy_service_loaded_on_lookup(self):
+        # Setup: Create an initialized service provider with a lazy service that is loaded with another
+        server = JSONRPCServer(None, None)
+        services = {
+            'lazy': LazyService('tests.hosting.test_service_provider', '_LazyTestService', load_with=['dependent']),
+            'dependent': LazyService('tests.hosting.test_service_provider', '_LazyTestService')
+        }
+        sp = ServiceProvider(server, services)
+        sp.initialize()
+
+        # If: I look up the lazy service twice
+        service = sp['lazy']
+
+        # Then:
+        # ... The same registered service should be returned each time
+        self.assertIsInstance(service, _LazyTestService)
+        self.assertIs(service.service_provider, sp)
+        self.assertIs(sp['lazy'], service)
+
+        # ... The service it is loaded with should have been loaded too
+        self.assertTrue(sp.is_loaded('dependent'))
+
+    def test_lazy_service_loaded_on_request(self):
+        # Setup: Create an initialized service provider with a lazy service
+        server = JSONRPCServer(None, None)
+        lazy_service = LazyService('tests.hosting.test_service_provider', '_LazyTestService', requests=['test/request'],
+                                   notifications=['test/notification'])
+        sp = ServiceProvider(server, {'lazy': lazy_service})
+        sp.initialize()
+
+        # If: I call the handlers that were set for the service
+        request_context = utils.MockRequestContext()
+        server.get_request_handler('test/request').handler(request_context, {'value': 1})
+        server.get_notification_handler('test/notification').handler(None, {'value': 2})
+
+        # Then:
+        # ... The service should have been loaded and its handlers called with the deserialized parameters
+        service = sp['lazy']
+        self.assertEqual(service.request_params.value, 1)
+        self.assertEqual(service.notification_params, {'value': 2})
+        request_context.send_response.assert_called_once_with(1)
+
+        # ... The service's handlers should have replaced the lazy handlers
+        self.assertEqual(server.get_request_handler('test/request').handler, service.handle_request)
+        self.assertEqual(server.get_notification_handler('test/notification').handler, service.handle_notification)
+
+    def test_lazy_service_missing_handler(self):
+        # Setup: Create an initialized service provider with a lazy service that lists a method it doesn't handle
+        server = JSONRPCServer(None, None)
+        lazy_service = LazyService('tests.hosting.test_service_provider', '_LazyTestService', requests=['test/missing'])
+        sp = ServiceProvider(server, {'lazy': lazy_service})
+        sp.initialize()
+
+        # If: I call the handler for the method
+        # Then: An exception should be raised
+        with self.assertRaises(RuntimeError):
+            server.get_request_handler('test/missing').handler(utils.MockRequestContext(), None)
+
+    def test_service_methods_match_handlers(self):
+        # Setup: Create the lazy services of the tools service
+        lazy_services = pgtoolsservice_main._LAZY_SERVICES
+
+        # If: I create and register all of the services eagerly
+        server = JSONRPCServer(None, None)
+        sp = ServiceProvider(server, {name: lazy_service.load_class() for name, lazy_service in lazy_services.items()})
+        sp.initialize()
+
+        # Then: Each lazy service should list the methods the service registers handlers for
+        for name, lazy_service in lazy_services.items():
+            # Handlers may be static methods, so match them to the service by their qualified name
+            class_name = type(sp[name]).__name__ + '.'
+            requests = [method for method, handler in server._request_handlers.items() if handler.handler.__qualname__.startswith(class_name)]
+            notifications = [method for method, handler in server._notification_handlers.items()
+                             if handler.handler.__qualname__.startswith(class_name)]
+            self.assertCountEqual(lazy_service.requests, requests, name)
+            self.assertCountEqual(lazy_service.notifications, notifications, name)
+
+        # Clean up: Stop the threads the services started
+        sp[constants.LANGUAGE_SERVICE_NAME].operations_queue.stop()
+
     # IMPLEMENTATION DETAILS ###############################################
     class _TestService:
         def __init__(self):
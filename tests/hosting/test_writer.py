@@ -92,3 +92,29 @@ class JSONRPCWriterTests(unittest.TestCase):
             message_str = str.join(os.linesep, [x.decode('UTF-8') for x in stream.readlines()])
             message_dict = json.loads(message_str)
             self.assertDictEqual(message_dict, message.dictionary)
+
+    def test_send_message_non_ascii(self):
+        with io.BytesIO(b'') as stream:
+            # If: I send a message whose content contains non-ASCII characters
+            writer = JSONRPCWriter(stream, logger=utils.get_mock_logger())
+            message = JSONRPCMessage.create_notification('test/test', {'text': 'ünïcødé ☃'})
+            writer.send_message(message)
+
+            # Then: The content length should be the number of encoded bytes in the content
+            header, content = stream.getvalue().split(b'\r\n\r\n', 1)
+            self.assertEqual(header, 'Content-Length: {}'.format(len(content)).encode('ascii'))
+            self.assertDictEqual(json.loads(content.decode('UTF-8')), message.dictionary)
+
+    def test_write_frames_single_write(self):
+        # Setup: Create a writer over a stream that records writes
+        stream = mock.MagicMock()
+        writer = JSONRPCWriter(stream, logger=utils.get_mock_logger())
+        messages = [JSONRPCMessage.create_notification('test/test', {'index': index}) for index in range(3)]
+
+        # If: I write several framed messages
+        frames = [writer.frame_message(message) for message in messages]
+        writer.write_frames(frames)
+
+        # Then: They should have been sent with one write and one flush
+        stream.write.assert_called_once_with(b''.join(frames))
+        stream.flush.assert_called_once()
@@ -91,9 +91,10 @@ class JSONRPCTestCase:
 
         # Send all messages to the server
         for message in self.messages:
-            expected_write_calls = output_info[0] + 2 * ((len(message.notification_verifiers) if message.notification_verifiers is not None else 0) +
-                                                         (1 if message.message_type is JSONRPCMessageType.Request else 0))
-            bytes_message = b'Content-Length: ' + str.encode(str(len(str(message)))) + b'\r\n\r\n' + str.encode(str(message))
+            expected_write_calls = output_info[0] + ((len(message.notification_verifiers) if message.notification_verifiers is not None else 0) +
+                                                     (1 if message.message_type is JSONRPCMessageType.Request else 0))
+            message_content = str.encode(str(message))
+            bytes_message = b'Content-Length: ' + str.encode(str(len(message_content))) + b'\r\n\r\n' + message_content
             output_info[1].acquire()
             input_stream.write(bytes_message)
             input_stream.flush()
@@ -178,15 +179,16 @@ class JSONRPCTestCase:
         test_input_stream = open(input_w, 'wb', buffering=0, closefd=False)
         server_output_stream = io.BytesIO()
         server_output_stream.close = mock.Mock()
-        output_info = [0, threading.Condition()]  # Number of times write called, Condition variable for monitoring info
+        output_info = [0, threading.Condition()]  # Number of messages written, Condition variable for monitoring info
 
-        # Mock the server output stream's write method so that the test knows how many messages have been written
+        # Mock the server output stream's write method so that the test knows how many messages have been written.
+        # The server may write several messages at once, so count their headers
         old_write_method = server_output_stream.write
 
         def mock_write(message):
             output_info[1].acquire()
             bytes_written = old_write_method(message)
-            output_info[0] += 1
+            output_info[0] += bytes(message).count(b'Content-Length: ')
             output_info[1].notify()
             output_info[1].release()
             return bytes_written
@@ -6,6 +6,8 @@
 import unittest
 import unittest.mock as mock
 
+import psycopg2.extensions
+
 from pgsqltoolsservice.connection import ConnectionService
 from pgsqltoolsservice.connection.contracts import ConnectionType
 from pgsqltoolsservice.metadata import MetadataService
@@ -80,6 +82,27 @@ class TestMetadataService(unittest.TestCase):
             self.assertEqual(actual_metadata.name, expected_metadata[index].name)
             self.assertEqual(actual_metadata.metadata_type, expected_metadata[index].metadata_type)
 
+    def test_metadata_list_request_canceled(self):
+        """Test that canceling a metadata list request cancels its query without sending an error"""
+        # Set up a query that is running when the request is canceled
+        request_context = MockRequestContext()
+        mock_cursor = MockCursor(None)
+        mock_cursor.execute.side_effect = lambda query: request_context.cancellation_token.cancel()
+        mock_cursor.fetchall = mock.Mock(side_effect=psycopg2.extensions.QueryCanceledError)
+        mock_connection = MockConnection(cursor=mock_cursor)
+        self.connection_service.get_connection = mock.Mock(return_value=mock_connection)
+        params = MetadataListParameters()
+        params.owner_uri = self.test_uri
+
+        # If I run the metadata list worker
+        self.metadata_service._metadata_list_worker(request_context, params)
+
+        # Then the query should have been canceled on the connection
+        mock_connection.cancel.assert_called_once_with()
+        # And no response or error should have been sent, the server responds to canceled requests
+        request_context.send_response.assert_not_called()
+        request_context.send_error.assert_not_called()
+
     def test_metadata_list_request_error(self):
         """Test that the proper error response is sent if there is an error while handling a metadata list request"""
         request_context = MockRequestContext()
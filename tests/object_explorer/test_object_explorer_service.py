@@ -578,6 +578,30 @@ class TestObjectExplorer(unittest.TestCase):
         self.assertEqual(len(get_tasks(session)), 1)
         testevent.set()
 
+    def test_expand_canceled_by_closed_session(self):
+        # Setup: Create an OE service with a session that is closed while a node is being expanded
+        oe, session, session_uri = self._preloaded_oe_service()
+
+        def close_session(is_refresh, expanding_session, node_path):
+            expanding_session.cancellation_token.cancel()
+            raise Exception('canceling statement due to user request')
+
+        patch_path = 'pgsqltoolsservice.object_explorer.object_explorer_service.route_request'
+        with mock.patch(patch_path, mock.MagicMock(side_effect=close_session)):
+            # If: I expand a node
+            rc = RequestFlowValidator().add_expected_response(bool, self.assertTrue)
+            params = ExpandParameters.from_dict({'session_id': session_uri, 'node_path': '/'})
+            oe._handle_expand_request(rc.request_context, params)
+            for task in session.expand_tasks.values():
+                task.join()
+
+        # Then:
+        # ... The statement running on the session's connection should have been canceled
+        session.server.connection.connection.cancel.assert_called_once_with()
+
+        # ... No expand completed notification should have been sent for the closed session
+        rc.validate()
+
     # IMPLEMENTATION DETAILS ###############################################
     def _preloaded_oe_service(self) -> Tuple[ObjectExplorerService, ObjectExplorerSession, str]:
         oe = ObjectExplorerService()
@@ -710,6 +734,9 @@ class SessionTestCase(unittest.TestCase):
         # ... The session should no longer be in the
         self.assertDictEqual(self.oe._session_map, {})
 
+        # ... Any node expansion for the session should have been canceled
+        self.assertTrue(self.session.cancellation_token.canceled)
+
     # SHUTDOWN NODE #########################################################
 
     def test_handle_shutdown_successfulWithSessions(self):
@@ -0,0 +1,123 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from typing import List  # noqa
+
+from pgsqltoolsservice.parsers.statement_splitter import get_statement_kind, split_statements, SqlStatement  # noqa
+
+
+class TestStatementSplitter(unittest.TestCase):
+
+    def test_split_simple_statements(self):
+        # If: I split a script of statements on separate lines and one without a terminating semicolon
+        statements = split_statements('select 1;\n  insert into t values (1);\nselect 2')
+
+        # Then: Each statement should be returned with its location
+        self.assertEqual([statement.text for statement in statements], ['select 1;', 'insert into t values (1);', 'select 2'])
+        self.assertEqual(_locations(statements), [(0, 0, 0, 9), (1, 2, 1, 27), (2, 0, 2, 8)])
+
+    def test_split_ignores_semicolons_in_literals(self):
+        # If: I split a script with semicolons in strings, escape strings, quoted identifiers and dollar quotes
+        script = (
+            "select 'a;''b', E'c\\';d', \"e;\"\"f\";\n"
+            "create function f() returns int as $body$ select 1; $body$ language sql;\n"
+            "do $$ begin perform 1; end $$;"
+        )
+        statements = split_statements(script)
+
+        # Then: The script should only be split at the semicolons ending each line
+        self.assertEqual([statement.text for statement in statements], script.split('\n'))
+
+    def test_split_unterminated_literals(self):
+        # If: I split scripts ending in literals that are not terminated
+        for script in ["select 'a; select 2", "select $$a; select 2", 'select /* a; select 2', "select E'\\'; select 2"]:
+            statements = split_statements(script)
+
+            # Then: The literal should run to the end of the script
+            self.assertEqual([statement.text for statement in statements], [script])
+
+    def test_split_nested_block_comments(self):
+        # If: I split a script with a nested block comment containing semicolons
+        statements = split_statements('select /* a; /* b; */ c; */ 1; select 2;')
+
+        # Then: The comment should end at its outermost terminator and be removed from the executable text
+        self.assertEqual([statement.executable_text for statement in statements], ['select 1;', 'select 2;'])
+
+    def test_split_atomic_function_body(self):
+        # If: I split a CREATE statement with a BEGIN ATOMIC body followed by another statement
+        body = 'create function f() returns int language sql begin atomic select case when true then 1 end; select 2; end;'
+        statements = split_statements(body + ' select 3;')
+
+        # Then: The body should not be split
+        self.assertEqual([statement.text for statement in statements], [body, 'select 3;'])
+
+    def test_split_begin_outside_atomic_body(self):
+        # If: I split CREATE statements using BEGIN as an identifier, and a procedure with a BEGIN ATOMIC body
+        procedure = 'create or replace procedure p(begin int) language sql begin atomic insert into t values (begin); end;'
+        script = f'create table t (begin int); select 1; create function begin() returns int as $$ select 1 $$ language sql; {procedure} select 2;'
+        statements = split_statements(script)
+
+        # Then: Only the BEGIN ATOMIC body should keep the statements following it from being split
+        self.assertEqual([statement.text for statement in statements], [
+            'create table t (begin int);', 'select 1;', 'create function begin() returns int as $$ select 1 $$ language sql;', procedure, 'select 2;'
+        ])
+
+    def test_split_does_not_split_in_parentheses(self):
+        # If: I split a rule with several actions in parentheses
+        statements = split_statements('create rule r as on insert to t do also (insert into a values (1); insert into b values (1)); select 1;')
+
+        # Then: The actions should not be split
+        self.assertEqual(len(statements), 2)
+
+    def test_comments_belong_to_statements(self):
+        # If: I split a script with leading, trailing and comment only statements
+        script = 'select 1; -- trailing\n-- leading\nselect 2;\n-- only a comment'
+        statements = split_statements(script)
+
+        # Then: A comment on the line a statement ends belongs to it, and others to the statement they precede
+        self.assertEqual([statement.text for statement in statements], ['select 1; -- trailing', '-- leading\nselect 2;', '-- only a comment'])
+        self.assertEqual([statement.executable_text for statement in statements], ['select 1;', 'select 2;', ''])
+        self.assertEqual([statement.is_empty for statement in statements], [False, False, True])
+        self.assertEqual(_locations(statements), [(0, 0, 0, 21), (1, 0, 2, 9), (3, 0, 3, 17)])
+
+    def test_empty_statements(self):
+        # If: I split a script with stray semicolons
+        statements = split_statements(';\n;select 1;')
+
+        # Then: The stray semicolons should be empty statements
+        self.assertEqual([statement.is_empty for statement in statements], [True, True, False])
+
+    def test_statement_kinds(self):
+        # If: I determine the kind of statements
+        # Then: The first keyword or the statement after a WITH clause determines the kind
+        expected_kinds = {
+            'Select * from t': 'SELECT',
+            'select a into b from t': 'SELECT INTO',
+            'select (select a into b) from t': 'SELECT',
+            'with x as (select 1) select * from x': 'SELECT',
+            'with x as (select 1) select * into y from x': 'SELECT INTO',
+            'with x as (select 1) insert into t select * from x': 'INSERT',
+            '/* comment */ update t set a = 1': 'UPDATE',
+            '-- only a comment': '',
+            '(1)': '',
+        }
+        for script, expected_kind in expected_kinds.items():
+            self.assertEqual(get_statement_kind(script), expected_kind, script)
+
+    def test_split_crlf_line_endings(self):
+        # If: I split a script with windows line endings
+        statements = split_statements('select 1;\r\nselect\r\n 2;')
+
+        # Then: The locations should count the carriage returns as part of the lines
+        self.assertEqual(_locations(statements), [(0, 0, 0, 9), (1, 0, 2, 3)])
+
+
+def _locations(statements: List[SqlStatement]) -> list:
+    return [(statement.start_line, statement.start_column, statement.end_line, statement.end_column) for statement in statements]
+
+
+if __name__ == '__main__':
+    unittest.main()
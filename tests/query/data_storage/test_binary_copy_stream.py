@@ -0,0 +1,172 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import datetime
+import io
+import struct
+import unittest
+import uuid
+from decimal import Decimal
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.data_storage import BinaryCopyStream, ServiceBufferFileStreamReader, ServiceBufferFileStreamWriter
+from tests.utils import create_binary_copy_data
+
+
+class TestBinaryCopyStream(unittest.TestCase):
+
+    def setUp(self):
+        self._data_types = [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_BIGINT]
+        self._rows = [(1, 'one', 10), (2, None, None), (None, '', 30)]
+        self._file_stream = io.BytesIO()
+        self._writer = ServiceBufferFileStreamWriter(self._file_stream)
+
+    def read_rows(self, locations):
+        self._writer.flush()
+        reader = ServiceBufferFileStreamReader(self._file_stream)
+        columns = _create_columns(*self._data_types)
+        return [[cell.raw_object for cell in reader.read_row(location, row_id, columns)] for row_id, location in enumerate(locations)]
+
+    def test_write_in_chunks(self):
+        data = create_binary_copy_data(self._rows, self._data_types)
+        for chunk_size in [1, 7, len(data)]:
+            # If: I write the data in chunks of any size, splitting the header, tuples and fields
+            locations = []
+            copy_stream = BinaryCopyStream(self._writer, len(self._data_types), locations.extend)
+            for start in range(0, len(data), chunk_size):
+                self.assertEqual(len(data[start:start + chunk_size]), copy_stream.write(data[start:start + chunk_size]))
+            copy_stream.close()
+
+            # Then: Each tuple should have been stored once it was complete, and read back as it was copied
+            self.assertTrue(copy_stream.is_complete)
+            self.assertEqual([list(row) for row in self._rows], self.read_rows(locations), chunk_size)
+
+    def test_tuples_stored_as_received(self):
+        # If: I write the data of a row
+        copy_stream = BinaryCopyStream(self._writer, len(self._data_types))
+        copy_stream.write(create_binary_copy_data([(1, 'one', None)], self._data_types))
+        self._writer.flush()
+
+        # Then: The page should be in the binary copy format, holding the fields of the tuple as they were received
+        page = self._file_stream.getvalue()
+        page_length, row_count, column_count, cell_format = struct.unpack_from('=IHHB', page)
+        self.assertEqual((len(page), 1, 3, ServiceBufferFileStreamWriter.CELL_FORMAT_BINARY_COPY), (page_length, row_count, column_count, cell_format))
+        self.assertEqual(0b100, page[9])
+        self.assertEqual(struct.pack('>ii', 4, 1) + struct.pack('>i', 3) + b'one' + struct.pack('>i', -1), page[-19:])
+
+    def test_empty_result(self):
+        # If: I write the data of a query without rows
+        locations = []
+        copy_stream = BinaryCopyStream(self._writer, len(self._data_types), locations.extend)
+        copy_stream.write(create_binary_copy_data([], self._data_types))
+        copy_stream.close()
+
+        # Then: No rows should have been stored
+        self.assertEqual([], locations)
+        self.assertEqual(0, self._writer.bytes_written)
+
+    def test_header_extension_skipped(self):
+        # If: I write data whose header has an extension area
+        data = create_binary_copy_data(self._rows, self._data_types)
+        data = data[:15] + struct.pack('>I', 3) + b'ext' + data[19:]
+        locations = []
+        copy_stream = BinaryCopyStream(self._writer, len(self._data_types), locations.extend)
+        copy_stream.write(data)
+
+        # Then: The rows after the extension should be stored
+        self.assertEqual([list(row) for row in self._rows], self.read_rows(locations))
+
+    def test_invalid_data(self):
+        data = create_binary_copy_data(self._rows, self._data_types)
+        invalid_data = [
+            (b'COPY' + data[4:], BinaryCopyStream.INVALID_SIGNATURE_ERROR),
+            (data[:11] + struct.pack('>I', 1 << 16) + data[15:], BinaryCopyStream.UNSUPPORTED_FLAGS_ERROR),
+            (create_binary_copy_data([(1, 'one')], self._data_types[:2]), BinaryCopyStream.FIELD_COUNT_ERROR.format(2, 3))
+        ]
+        for data, error in invalid_data:
+            # If: I write data that is not the binary copy of the columns
+            copy_stream = BinaryCopyStream(ServiceBufferFileStreamWriter(io.BytesIO()), len(self._data_types))
+
+            # Then: An error should be raised
+            with self.assertRaises(ValueError) as context:
+                copy_stream.write(data)
+            self.assertEqual(error, str(context.exception))
+
+    def test_close_before_trailer(self):
+        # If: I close a stream that has not received all of the data
+        copy_stream = BinaryCopyStream(self._writer, len(self._data_types))
+        copy_stream.write(create_binary_copy_data(self._rows, self._data_types)[:-2])
+
+        # Then: An error should be raised
+        self.assertFalse(copy_stream.is_complete)
+        with self.assertRaises(ValueError):
+            copy_stream.close()
+
+    def test_rows_read_as_if_read_from_a_cursor(self):
+        # Setup: Create rows of every type with a converter from the binary format, as they would be read from a cursor
+        data_types = [
+            datatypes.DATATYPE_BOOL, datatypes.DATATYPE_SMALLINT, datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_BIGINT,
+            datatypes.DATATYPE_OID, datatypes.DATATYPE_REAL, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_NUMERIC,
+            datatypes.DATATYPE_TEXT, datatypes.DATATYPE_VARCHAR, datatypes.DATATYPE_BYTEA, datatypes.DATATYPE_DATE,
+            datatypes.DATATYPE_TIME, datatypes.DATATYPE_TIMESTAMP, datatypes.DATATYPE_UUID, datatypes.DATATYPE_JSON,
+            datatypes.DATATYPE_JSONB
+        ]
+        rows = [
+            (True, 1, -2, 3 << 40, 8, 1.1, 6.25, Decimal('-12345.678900'), 'text', 'ünicode', b'\x00bytes',
+             datetime.date(2017, 6, 8), datetime.time(12, 30, 15, 250), datetime.datetime(2017, 6, 8, 12, 12, 45, 500),
+             uuid.UUID('c2d29867-3d0b-d497-9191-18a9d8ee7830'), {'key': ['value', 1]}, {'key': None}),
+            (False, None, 0, -1, 0, 3.4028234663852886e+38, None, Decimal('0.00'), '', None, b'',
+             datetime.date(1999, 12, 31), datetime.time(0, 0), datetime.datetime(1970, 1, 1), None, [1, 2], None),
+            (None, -32768, None, None, None, 1e-45, -0.5, Decimal('0.0000001'), None, 'x', None,
+             None, None, None, None, None, []),
+            (None, None, None, None, None, 0.1, None, Decimal('123456789012345678901234567890.5'), None, None, None,
+             None, None, None, None, None, None),
+            (None, None, None, None, None, None, None, Decimal('10000'), None, None, None,
+             None, None, None, None, None, None)
+        ]
+        columns = _create_columns(*data_types)
+
+        # ... Write the rows as they are spooled from a cursor, with bytea values as memoryviews
+        native_writer = ServiceBufferFileStreamWriter(io.BytesIO())
+        native_rows = [tuple(memoryview(value) if isinstance(value, bytes) else value for value in row) for row in rows]
+        native_locations = native_writer.write_rows(native_rows, columns)
+        native_writer.flush()
+
+        # If: I copy the same rows in the binary format and read both back
+        copy_locations = []
+        copy_stream = BinaryCopyStream(self._writer, len(data_types), copy_locations.extend)
+        copy_stream.write(create_binary_copy_data(rows, data_types))
+        self._writer.flush()
+
+        native_reader = ServiceBufferFileStreamReader(native_writer._file_stream)
+        copy_reader = ServiceBufferFileStreamReader(self._file_stream)
+        for row_id, (native_location, copy_location) in enumerate(zip(native_locations, copy_locations)):
+            native_row = native_reader.read_row(native_location, row_id, columns)
+            copy_row = copy_reader.read_row(copy_location, row_id, columns)
+
+            # Then: The rows should have the same values, except for real values, which are read from the cursor as doubles
+            for index, (native_cell, copy_cell) in enumerate(zip(native_row, copy_row)):
+                self.assertEqual(native_cell.is_null, copy_cell.is_null, (row_id, index))
+                if data_types[index] != datatypes.DATATYPE_REAL:
+                    self.assertEqual(native_cell.display_value, copy_cell.display_value, (row_id, index))
+                    self.assertEqual(native_cell.raw_object, copy_cell.raw_object, (row_id, index))
+
+        # ... Real values should be the shortest decimals that round trip as single precision values, as the server formats them
+        real_values = [copy_reader.read_row(location, 0, columns)[5].raw_object for location in copy_locations]
+        self.assertEqual([1.1, 3.4028235e+38, 1e-45, 0.1, None], real_values)
+
+
+def _create_columns(*data_types):
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+if __name__ == '__main__':
+    unittest.main()
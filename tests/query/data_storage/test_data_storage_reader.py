@@ -36,11 +36,46 @@ class TestDataStorageReader(unittest.TestCase):
             self.assertEqual(self._reader.get_value(0), self._rows[read_row_count][0])
             self.assertEqual(self._reader.get_values(), self._rows[read_row_count])
 
-            self._get_columns_info_mock.assert_called_once_with(self._cursor.description, self._cursor.connection)
+            self._get_columns_info_mock.assert_called_once_with(self._cursor.description, self._cursor.connection, None)
             read_row_count += 1
 
         self.assertEqual(read_row_count, total_rows)
 
+    def test_read_rows(self):
+        # If: I read blocks of rows with a fixed fetch size
+        self._reader = StorageDataReader(self._cursor, 1)
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=self._get_columns_info_mock):
+            blocks = [self._reader.read_rows() for _ in range(3)]
+
+        # Then: The rows should have been fetched one block at a time until they ran out
+        self.assertEqual(blocks, [self._rows[:1], self._rows[1:], []])
+        self._cursor.fetchmany.assert_called_with(1)
+
+        # ... The last row read should be the current row
+        self.assertEqual(self._reader.get_values(), self._rows[1])
+
+    def test_record_block_size(self):
+        # If: I record the size of blocks of rows of different widths
+        # Then: The fetch size should be adapted to the width of the rows, within the bounds
+        self.assertEqual(self._reader.fetch_size, StorageDataReader.MIN_FETCH_SIZE)
+
+        self._reader.record_block_size(100, 100 * 1024)
+        self.assertEqual(self._reader.fetch_size, StorageDataReader.TARGET_BLOCK_BYTES // 1024)
+
+        self._reader.record_block_size(100, 100)
+        self.assertEqual(self._reader.fetch_size, StorageDataReader.MAX_FETCH_SIZE)
+
+        self._reader.record_block_size(100, 100 * StorageDataReader.TARGET_BLOCK_BYTES)
+        self.assertEqual(self._reader.fetch_size, StorageDataReader.MIN_FETCH_SIZE)
+
+    def test_record_block_size_fixed_fetch_size(self):
+        # If: I record the size of a block with a fixed fetch size
+        self._reader = StorageDataReader(self._cursor, 10)
+        self._reader.record_block_size(100, 100)
+
+        # Then: The fetch size should not change
+        self.assertEqual(self._reader.fetch_size, 10)
+
     def test_is_none(self):
 
         self.execute_read_row_with_patch()
@@ -3,8 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import io
 import unittest
-from unittest import mock
 
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue
 from pgsqltoolsservice.query.data_storage import SaveAsCsvWriter
@@ -18,7 +18,7 @@ class TestSaveAsCsvWriter(unittest.TestCase):
         self.request.file_path = 'TestPath'
         self.request.include_headers = True
 
-        self.mock_io = mock.MagicMock()
+        self.stream = io.StringIO(newline='')
 
         self.row = [
             DbCellValue('Test', False, None, 0),
@@ -41,37 +41,38 @@ class TestSaveAsCsvWriter(unittest.TestCase):
             is_valid_column
         ]
 
-        self.writer = SaveAsCsvWriter(self.mock_io, self.request)
+        self.writer = SaveAsCsvWriter(self.stream, self.request)
 
     def test_write_row(self):
 
-        writer_mock = mock.MagicMock()
-        csv_writer_mock = mock.Mock(return_value=writer_mock)
-        with mock.patch('csv.writer', new=csv_writer_mock):
-            self.writer.write_row(self.row, self.columns)
+        self.writer.write_row(self.row, self.columns)
 
-            csv_writer_mock.assert_called_once_with(self.mock_io, delimiter=',', quotechar='"', quoting=0)
-
-            self.assertEqual(writer_mock.writerow.call_count, 2)
-            write_row_args = writer_mock.writerow.call_args_list
-
-            self.assertEqual(['Name', 'Id', 'Valid'], write_row_args[0][0][0])
-            self.assertEqual(['Test', '1023', 'False'], write_row_args[1][0][0])
+        self.assertEqual('Name,Id,Valid\r\nTest,1023,False\r\n', self.stream.getvalue())
 
     def test_write_row_for_few_columns(self):
 
         self.writer._column_start_index = 1
         self.writer._column_end_index = 2
 
-        writer_mock = mock.MagicMock()
-        csv_writer_mock = mock.Mock(return_value=writer_mock)
-        with mock.patch('csv.writer', new=csv_writer_mock):
-            self.writer.write_row(self.row, self.columns)
+        self.writer.write_row(self.row, self.columns)
+
+        self.assertEqual('Id,Valid\r\n1023,False\r\n', self.stream.getvalue())
+
+    def test_write_row_without_headers(self):
+
+        self.request.include_headers = False
+
+        self.writer.write_row(self.row, self.columns)
+
+        self.assertEqual('Test,1023,False\r\n', self.stream.getvalue())
 
-            csv_writer_mock.assert_called_once_with(self.mock_io, delimiter=',', quotechar='"', quoting=0)
+    def test_write_rows_writes_header_once(self):
 
-            self.assertEqual(writer_mock.writerow.call_count, 2)
-            write_row_args = writer_mock.writerow.call_args_list
+        # If: I write rows in several blocks, one of them with a value that needs quoting
+        quoted_row = [DbCellValue('a, "b"', False, None, 1), DbCellValue(1, False, None, 1), DbCellValue(True, False, None, 1)]
+        self.writer.write_rows([self.row, quoted_row], self.columns)
+        self.writer.write_rows([self.row], self.columns)
+        self.writer.complete_write()
 
-            self.assertEqual(['Id', 'Valid'], write_row_args[0][0][0])
-            self.assertEqual(['1023', 'False'], write_row_args[1][0][0])
+        # Then: The header should have been written once, followed by every row
+        self.assertEqual('Name,Id,Valid\r\nTest,1023,False\r\n"a, ""b""",1,True\r\nTest,1023,False\r\n', self.stream.getvalue())
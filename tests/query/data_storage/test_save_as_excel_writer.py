@@ -51,7 +51,7 @@ class TestSaveAsExcelWriter(unittest.TestCase):
             self.writer = SaveAsExcelWriter(self.mock_io, self.request)
 
     def test_construction(self):
-        self.xlsxwriter_mock.assert_called_once_with(self.mock_io.name)
+        self.xlsxwriter_mock.assert_called_once_with(self.mock_io.name, {'constant_memory': True})
         self.workbook_mock.add_worksheet.assert_called_once()
 
     def test_write_row_column_headers(self):
@@ -60,36 +60,30 @@ class TestSaveAsExcelWriter(unittest.TestCase):
         self.writer.write_row(self.row, self.columns)
         self.workbook_mock.add_format.assert_called_once_with({'bold': 1})
 
-        write_column_header_args = self.worksheet_mock.write.call_args_list
-
-        self.assertEqual('A1', write_column_header_args[0][0][0])
-        self.assertEqual('Name', write_column_header_args[0][0][1])
-        self.assertEqual(bold, write_column_header_args[0][0][2])
-
-        self.assertEqual('B1', write_column_header_args[1][0][0])
-        self.assertEqual('Id', write_column_header_args[1][0][1])
-        self.assertEqual(bold, write_column_header_args[1][0][2])
-
-        self.assertEqual('C1', write_column_header_args[2][0][0])
-        self.assertEqual('Valid', write_column_header_args[2][0][1])
-        self.assertEqual(bold, write_column_header_args[2][0][2])
+        self.worksheet_mock.write_row.assert_any_call(0, 0, ['Name', 'Id', 'Valid'], bold)
 
     def test_write_row(self):
         self.writer.write_row(self.row, self.columns)
 
-        write_column_value_args = self.worksheet_mock.write.call_args_list
-
-        self.assertEqual(1, write_column_value_args[3][0][0])
-        self.assertEqual(0, write_column_value_args[3][0][1])
-        self.assertEqual('Test', write_column_value_args[3][0][2])
-
-        self.assertEqual(1, write_column_value_args[4][0][0])
-        self.assertEqual(1, write_column_value_args[4][0][1])
-        self.assertEqual('1023', write_column_value_args[4][0][2])
-
-        self.assertEqual(1, write_column_value_args[5][0][0])
-        self.assertEqual(2, write_column_value_args[5][0][1])
-        self.assertEqual('False', write_column_value_args[5][0][2])
+        self.worksheet_mock.write_row.assert_called_with(1, 0, ['Test', '1023', 'False'])
+
+    def test_write_rows_with_more_than_26_columns(self):
+        # If: I write rows with more columns than there are letters
+        columns = []
+        for index in range(30):
+            column = DbColumn()
+            column.column_name = f'Column{index}'
+            columns.append(column)
+        row = [DbCellValue(index, False, None, 0) for index in range(30)]
+        self.writer.write_rows([row, row], columns)
+
+        # Then: Every column should have a header, and each row should be written below the previous one
+        write_row_args = self.worksheet_mock.write_row.call_args_list
+        self.assertEqual(3, len(write_row_args))
+        self.assertEqual([column.column_name for column in columns], write_row_args[0][0][2])
+        self.assertEqual((1, 0), write_row_args[1][0][:2])
+        self.assertEqual((2, 0), write_row_args[2][0][:2])
+        self.assertEqual(30, len(write_row_args[2][0][2]))
 
     def test_complete_write(self):
         self.writer.complete_write()
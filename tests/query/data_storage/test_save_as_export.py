@@ -0,0 +1,49 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from pgsqltoolsservice.query.data_storage import batch_rows, export_rows
+
+
+class TestSaveAsExport(unittest.TestCase):
+
+    def test_batch_rows(self):
+        # If: I batch a range of rows that is not a multiple of the batch size
+        batches = list(batch_rows(lambda index: [index], 3, 10, batch_size=3))
+
+        # Then: The rows should be read in order in blocks of at most the batch size
+        self.assertEqual(batches, [[[3], [4], [5]], [[6], [7], [8]], [[9]]])
+
+    def test_export_rows(self):
+        # Setup: Create a writer and blocks of rows
+        writer = mock.MagicMock()
+        columns = [mock.Mock()]
+        row_batches = [[['a'], ['b']], [['c']]]
+
+        # If: I export the rows
+        rows_written = export_rows(writer, iter(row_batches), columns, 3)
+
+        # Then: Each block should be written as it is and the write completed once
+        self.assertEqual(rows_written, 3)
+        self.assertEqual(writer.write_rows.call_args_list, [mock.call(row_batches[0], columns), mock.call(row_batches[1], columns)])
+        writer.complete_write.assert_called_once()
+
+    def test_export_rows_reports_progress_at_intervals(self):
+        # Setup: Create a clock that advances half a progress interval every time it is read
+        times = iter(index * 0.5 for index in range(100))
+        on_progress = mock.Mock()
+
+        # If: I export blocks of rows with a progress callback
+        with mock.patch('pgsqltoolsservice.query.data_storage.save_as_export.time.monotonic', new=lambda: next(times)):
+            export_rows(mock.MagicMock(), ([['row']] for _ in range(4)), [], 4, on_progress)
+
+        # Then: Progress should only be reported once an interval has passed since it was last reported
+        self.assertEqual(on_progress.call_args_list, [mock.call(2, 4), mock.call(4, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,9 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import io
+import json
 import unittest
-from unittest import mock
 
 from pgsqltoolsservice.query.contracts import DbColumn, DbCellValue
 from pgsqltoolsservice.query.data_storage import SaveAsJsonWriter
@@ -18,7 +19,7 @@ class TestSaveAsJsonWriter(unittest.TestCase):
         self.request.file_path = 'TestPath'
         self.request.include_headers = True
 
-        self.mock_io = mock.MagicMock()
+        self.stream = io.StringIO()
 
         self.row = [
             DbCellValue('Test', False, None, 0),
@@ -41,27 +42,31 @@ class TestSaveAsJsonWriter(unittest.TestCase):
             is_valid_column
         ]
 
-        self.worksheet_mock = mock.MagicMock()
-        self.workbook_mock = mock.MagicMock()
-        self.workbook_mock.add_worksheet = mock.Mock(return_value=self.worksheet_mock)
-        self.xlsxwriter_mock = mock.Mock(return_value=self.workbook_mock)
-        self.mock_io.name = 'SomeName'
-
-        with mock.patch('xlsxwriter.Workbook', new=self.xlsxwriter_mock):
-            self.writer = SaveAsJsonWriter(self.mock_io, self.request)
+        self.writer = SaveAsJsonWriter(self.stream, self.request)
 
     def test_write_row(self):
         self.writer.write_row(self.row, self.columns)
+        self.writer.complete_write()
+
+        data = json.loads(self.stream.getvalue())
+        self.assertEqual(1, len(data))
+
+        self.assertEqual('Test', data[0]['Name'])
+        self.assertEqual('1023', data[0]['Id'])
+        self.assertEqual('False', data[0]['Valid'])
 
-        self.assertEqual(1, len(self.writer._data))
+    def test_write_rows_matches_json_dump(self):
+        # If: I write rows in several blocks
+        self.writer.write_rows([self.row, self.row], self.columns)
+        self.writer.write_rows([], self.columns)
+        self.writer.write_rows([self.row], self.columns)
+        self.writer.complete_write()
 
-        self.assertEqual('Test', self.writer._data[0]['Name'])
-        self.assertEqual('1023', self.writer._data[0]['Id'])
-        self.assertEqual('False', self.writer._data[0]['Valid'])
+        # Then: The output should be laid out as if all the rows had been dumped together
+        expected_row = {'Name': 'Test', 'Id': '1023', 'Valid': 'False'}
+        self.assertEqual(json.dumps([expected_row] * 3, indent=True), self.stream.getvalue())
 
-    def test_complete_write(self):
-        json_dump_mock = mock.MagicMock()
+    def test_complete_write_without_rows(self):
+        self.writer.complete_write()
 
-        with mock.patch('json.dump', new=json_dump_mock):
-            self.writer.complete_write()
-            json_dump_mock.assert_called_once_with(self.writer._data, self.mock_io, indent=True)
+        self.assertEqual('[]', self.stream.getvalue())
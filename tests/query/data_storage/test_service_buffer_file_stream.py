@@ -3,6 +3,9 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import contextlib
+import os
+import tempfile
 import unittest
 from unittest import mock
 
@@ -16,11 +19,117 @@ class TestServiceBufferFileStream(unittest.TestCase):
         self._file_name = 'testFile'
 
     def test_get_file_name(self):
-        tempfile_mock = mock.MagicMock()
-        tempfile_mock.mkstemp = mock.Mock(return_value=(1, self._file_name))
-        with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.tempfile', new=tempfile_mock):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # If: I create a file
+            file_name = stream.create_file()
+
+            # Then: It should be an empty file in the storage directory of the process, under the storage root
+            storage_directory = stream.get_storage_directory()
+            self.assertEqual(os.path.dirname(file_name), storage_directory)
+            self.assertEqual(os.path.dirname(storage_directory), storage_root)
+            self.assertEqual(os.path.getsize(file_name), 0)
+            stream.delete_storage_directory()
+
+    def test_delete_file_missing(self):
+        # If: I delete a file that does not exist, there should be no error
+        stream.delete_file(os.path.join(tempfile.gettempdir(), 'missing_spool_file'))
+
+    def test_delete_storage_directory(self):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # Setup: Create a file in the storage directory
+            file_name = stream.create_file()
+            storage_directory = stream.get_storage_directory()
+
+            # If: I delete the storage directory
+            stream.delete_storage_directory()
+
+            # Then: The directory and its files should have been deleted, and a new one is created on demand
+            self.assertFalse(os.path.exists(file_name))
+            self.assertFalse(os.path.exists(storage_directory))
+            self.assertNotEqual(stream.get_storage_directory(), storage_directory)
+            stream.delete_storage_directory()
+
+    def test_delete_stale_storage_directories(self):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # Setup: Create the storage directory of this process, one left behind by a process that has exited
+            # and a directory that is not a storage directory
             stream.create_file()
-            tempfile_mock.mkstemp.assert_called_once()
+            stale_directory = os.path.join(storage_root, '1_stale')
+            os.mkdir(stale_directory)
+            open(os.path.join(stale_directory, stream.LOCK_FILE_NAME), 'w').close()
+            open(os.path.join(stale_directory, 'spool'), 'w').close()
+            other_directory = os.path.join(storage_root, 'other')
+            os.mkdir(other_directory)
+
+            # If: I delete the stale storage directories
+            deleted_count = stream.delete_stale_storage_directories()
+
+            # Then: Only the directory left behind should have been deleted, as this process holds the lock on its own
+            self.assertEqual(deleted_count, 1)
+            self.assertFalse(os.path.exists(stale_directory))
+            self.assertTrue(os.path.exists(other_directory))
+            self.assertTrue(os.path.exists(stream.get_storage_directory()))
+            stream.delete_storage_directory()
+
+    def test_delete_stale_storage_directories_locked(self):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # Setup: Create the storage directory of this process and forget about it, as if it belonged to another process
+            storage_directory = stream.get_storage_directory()
+            lock_fd = stream._storage_lock_fd
+            stream._storage_directory, stream._storage_lock_fd = None, None
+
+            try:
+                # If: I delete the stale storage directories
+                deleted_count = stream.delete_stale_storage_directories()
+
+                # Then: The directory should not have been deleted as it is still locked
+                self.assertEqual(deleted_count, 0)
+                self.assertTrue(os.path.exists(storage_directory))
+            finally:
+                os.close(lock_fd)
+
+    def test_storage_directory_locked_before_visible(self):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # Setup: Clean up the storage root right before the lock file of the new directory is locked, as another
+            # process could
+            real_try_lock = stream._try_lock
+            deleted_counts = []
+
+            def clean_up_and_lock(file_descriptor):
+                if not deleted_counts:
+                    deleted_counts.append(stream.delete_stale_storage_directories())
+                return real_try_lock(file_descriptor)
+
+            # If: I create the storage directory of this process
+            with mock.patch.object(stream, '_try_lock', new=clean_up_and_lock):
+                storage_directory = stream.get_storage_directory()
+
+            # Then: The cleanup should have left the directory being created alone, which is locked once it is visible
+            self.assertEqual([0], deleted_counts)
+            self.assertTrue(os.path.isdir(storage_directory))
+            self.assertTrue(os.path.basename(storage_directory).startswith(f'{os.getpid()}_'))
+            self.assertEqual(0, stream.delete_stale_storage_directories())
+            self.assertTrue(os.path.isdir(storage_directory))
+            stream.delete_storage_directory()
+
+    def test_delete_stale_pending_directories(self):
+        with tempfile.TemporaryDirectory() as storage_root, self._patch_storage(storage_root):
+            # Setup: Create pending directories left behind by processes that exited before locking them, one of them new
+            new_directory = os.path.join(storage_root, stream.PENDING_DIRECTORY_PREFIX + 'new')
+            old_directory = os.path.join(storage_root, stream.PENDING_DIRECTORY_PREFIX + 'old')
+            for directory in [new_directory, old_directory]:
+                os.mkdir(directory)
+                open(os.path.join(directory, stream.LOCK_FILE_NAME), 'w').close()
+            old_time = os.stat(old_directory).st_mtime - stream.PENDING_DIRECTORY_TIMEOUT_SECONDS - 1
+            os.utime(old_directory, (old_time, old_time))
+
+            # If: I delete the stale storage directories
+            deleted_count = stream.delete_stale_storage_directories()
+
+            # Then: Only the old pending directory should have been deleted
+            self.assertEqual(deleted_count, 1)
+            self.assertFalse(os.path.exists(old_directory))
+            self.assertTrue(os.path.exists(new_directory))
 
     def test_get_reader(self):
         io_mock = mock.MagicMock()
@@ -40,6 +149,23 @@ class TestServiceBufferFileStream(unittest.TestCase):
             self.assertIsInstance(writer, ServiceBufferFileStreamWriter)
             io_mock.open.assert_called_once_with(self._file_name, 'wb')
 
+    def test_get_writer_append(self):
+        io_mock = mock.MagicMock()
+
+        with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.io', new=io_mock):
+            writer = stream.get_writer(self._file_name, append=True)
+
+            self.assertIsInstance(writer, ServiceBufferFileStreamWriter)
+            io_mock.open.assert_called_once_with(self._file_name, 'ab')
+
+    def _patch_storage(self, storage_root: str) -> contextlib.ExitStack:
+        """Patches the storage root, and the storage directory so that the one of this process is not used"""
+        patches = contextlib.ExitStack()
+        patches.enter_context(mock.patch.object(stream, '_get_storage_root', new=mock.Mock(return_value=storage_root)))
+        patches.enter_context(mock.patch.object(stream, '_storage_directory', new=None))
+        patches.enter_context(mock.patch.object(stream, '_storage_lock_fd', new=None))
+        return patches
+
 
 if __name__ == '__main__':
     unittest.main()
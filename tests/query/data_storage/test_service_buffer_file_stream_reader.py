@@ -3,18 +3,48 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
+import mmap
+import os
+import tempfile
 import unittest
+from typing import List, Optional
+from unittest import mock
 import struct
 import io
 import json
 
 from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
+from pgsqltoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from pgsqltoolsservice.query.contracts.column import DbColumn
 from pgsqltoolsservice.parsers import datatypes
 
 DECODING_METHOD = 'utf-8'
 
 
+def create_page_stream(rows: List[List[Optional[bytes]]], stream: io.BytesIO = None) -> io.BytesIO:
+    """Creates a stream holding a page of rows of cell bytes, None being a NULL value"""
+    column_count = len(rows[0])
+    null_bitmaps = bytearray()
+    cell_ends = array('I')
+    data = bytearray()
+    for row in rows:
+        nulls = 0
+        for index, cell in enumerate(row):
+            if cell is None:
+                nulls |= 1 << index
+            else:
+                data += cell
+            cell_ends.append(len(data))
+        null_bitmaps += nulls.to_bytes((column_count + 7) // 8, 'little')
+
+    page = null_bitmaps + cell_ends.tobytes() + data
+    stream = stream or io.BytesIO()
+    stream.write(struct.pack('=IHHB', 9 + len(page), len(rows), column_count, 0))
+    stream.write(page)
+    return stream
+
+
 class TestServiceBufferFileStreamReader(unittest.TestCase):
 
     def setUp(self):
@@ -36,118 +66,26 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         self._daterange_test_value = "[2015-06-06,2016-08-08)"
 
         # file_streams
-        self._bool_file_stream = io.BytesIO()
-        bool_val = bytearray(struct.pack("?", self._bool_test_value))
-        bool_len = len(bool_val)
-        bool_len_to_write = bytearray(struct.pack("i", bool_len))
-        self._bool_file_stream.write(bool_len_to_write)
-        self._bool_file_stream.write(bool_val)
-
-        self._float_file_stream1 = io.BytesIO()
-        float_val1 = bytearray(struct.pack("d", self._float_test_value1))
-        float_len1 = len(float_val1)
-        float_len_to_write1 = bytearray(struct.pack("i", float_len1))
-        self._float_file_stream1.write(float_len_to_write1)
-        self._float_file_stream1.write(float_val1)
-
-        self._float_file_stream2 = io.BytesIO()
-        float_val2 = bytearray(struct.pack("d", self._float_test_value2))
-        float_len2 = len(float_val2)
-        float_len_to_write2 = bytearray(struct.pack("i", float_len2))
-        self._float_file_stream2.write(float_len_to_write2)
-        self._float_file_stream2.write(float_val2)
-
-        self._short_file_stream = io.BytesIO()
-        short_val = bytearray(struct.pack("h", self._short_test_value))
-        short_len = len(short_val)
-        short_len_to_write = bytearray(struct.pack("i", short_len))
-        self._short_file_stream.write(short_len_to_write)
-        self._short_file_stream.write(short_val)
-
-        self._int_file_stream = io.BytesIO()
-        int_val = bytearray(struct.pack("i", self._int_test_value))
-        int_len = len(int_val)
-        int_len_to_write = bytearray(struct.pack("i", int_len))
-        self._int_file_stream.write(int_len_to_write)
-        self._int_file_stream.write(int_val)
-
-        self._long_long_file_stream = io.BytesIO()
-        long_long_val = bytearray(struct.pack("q", self._long_long_test_value))
-        long_long_len = len(long_long_val)
-        long_long_len_to_write = bytearray(struct.pack("i", long_long_len))
-        self._long_long_file_stream.write(long_long_len_to_write)
-        self._long_long_file_stream.write(long_long_val)
-
-        self._bytea_file_stream = io.BytesIO()
-        bytea_val = bytes(self._bytea_test_value)
-        bytea_len = len(bytea_val)
-        bytea_len_to_write = bytearray(struct.pack("i", bytea_len))
-        self._bytea_file_stream.write(bytea_len_to_write)
-        self._bytea_file_stream.write(bytea_val)
-
-        self._dict_file_stream = io.BytesIO()
-        dict_val = bytearray(json.dumps(self._dict_test_value).encode())
-        dict_len = len(dict_val)
-        dict_len_to_write = bytearray(struct.pack("i", dict_len))
-        self._dict_file_stream.write(dict_len_to_write)
-        self._dict_file_stream.write(dict_val)
-
-        self._list_file_stream = io.BytesIO()
-        list_val = bytearray(json.dumps(self._list_test_value).encode())
-        list_len = len(list_val)
-        list_len_to_write = bytearray(struct.pack("i", list_len))
-        self._list_file_stream.write(list_len_to_write)
-        self._list_file_stream.write(list_val)
-
-        self._numericrange_file_stream = io.BytesIO()
-        numericrange_val = bytearray(str(self._numericrange_test_value).encode())
-        numericrange_len = len(numericrange_val)
-        numericrange_len_to_write = bytearray(struct.pack("i", numericrange_len))
-        self._numericrange_file_stream.write(numericrange_len_to_write)
-        self._numericrange_file_stream.write(numericrange_val)
-
-        self._datetimerange_file_stream = io.BytesIO()
-        datetimerange_val = bytearray(str(self._datetimerange_test_value).encode())
-        datetimerange_len = len(datetimerange_val)
-        datetimerange_len_to_write = bytearray(struct.pack("i", datetimerange_len))
-        self._datetimerange_file_stream.write(datetimerange_len_to_write)
-        self._datetimerange_file_stream.write(datetimerange_val)
-
-        self._datetimetzrange_file_stream = io.BytesIO()
-        datetimetzrange_val = bytearray(str(self._datetimetzrange_test_value).encode())
-        datetimetzrange_len = len(datetimetzrange_val)
-        datetimetzrange_len_to_write = bytearray(struct.pack("i", datetimetzrange_len))
-        self._datetimetzrange_file_stream.write(datetimetzrange_len_to_write)
-        self._datetimetzrange_file_stream.write(datetimetzrange_val)
-
-        self._daterange_file_stream = io.BytesIO()
-        daterange_val = bytearray(str(self._daterange_test_value).encode())
-        daterange_len = len(daterange_val)
-        daterange_len_to_write = bytearray(struct.pack("i", daterange_len))
-        self._daterange_file_stream.write(daterange_len_to_write)
-        self._daterange_file_stream.write(daterange_val)
-
-        self._multiple_cols_file_stream = io.BytesIO()
-        val0 = bytearray(struct.pack("d", self._float_test_value1))
-        len0 = len(val0)
-        len0_to_write = bytearray(struct.pack("i", len0))
-        val1 = bytearray(struct.pack("i", self._int_test_value))
-        len1 = len(val1)
-        len1_to_write = bytearray(struct.pack("i", len1))
-        val2 = bytearray(self._str_test_value.encode())
-        len2 = len(val2)
-        len2_to_write = bytearray(struct.pack("i", len2))
-        val3 = bytearray(struct.pack("d", self._float_test_value2))
-        len3 = len(val3)
-        len3_to_write = bytearray(struct.pack("i", len3))
-        self._multiple_cols_file_stream.write(len0_to_write)
-        self._multiple_cols_file_stream.write(val0)
-        self._multiple_cols_file_stream.write(len1_to_write)
-        self._multiple_cols_file_stream.write(val1)
-        self._multiple_cols_file_stream.write(len2_to_write)
-        self._multiple_cols_file_stream.write(val2)
-        self._multiple_cols_file_stream.write(len3_to_write)
-        self._multiple_cols_file_stream.write(val3)
+        self._bool_file_stream = create_page_stream([[struct.pack("?", self._bool_test_value)]])
+        self._float_file_stream1 = create_page_stream([[struct.pack("d", self._float_test_value1)]])
+        self._float_file_stream2 = create_page_stream([[struct.pack("d", self._float_test_value2)]])
+        self._short_file_stream = create_page_stream([[struct.pack("h", self._short_test_value)]])
+        self._int_file_stream = create_page_stream([[struct.pack("i", self._int_test_value)]])
+        self._long_long_file_stream = create_page_stream([[struct.pack("q", self._long_long_test_value)]])
+        self._bytea_file_stream = create_page_stream([[bytes(self._bytea_test_value)]])
+        self._dict_file_stream = create_page_stream([[json.dumps(self._dict_test_value).encode()]])
+        self._list_file_stream = create_page_stream([[json.dumps(self._list_test_value).encode()]])
+        self._numericrange_file_stream = create_page_stream([[str(self._numericrange_test_value).encode()]])
+        self._datetimerange_file_stream = create_page_stream([[str(self._datetimerange_test_value).encode()]])
+        self._datetimetzrange_file_stream = create_page_stream([[str(self._datetimetzrange_test_value).encode()]])
+        self._daterange_file_stream = create_page_stream([[str(self._daterange_test_value).encode()]])
+
+        self._multiple_cols_file_stream = create_page_stream([[
+            struct.pack("d", self._float_test_value1),
+            struct.pack("i", self._int_test_value),
+            self._str_test_value.encode(),
+            struct.pack("d", self._float_test_value2)
+        ]])
 
         # Readers
         self._bool_reader = ServiceBufferFileStreamReader(self._bool_file_stream)
@@ -310,6 +248,109 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         self.assertEqual(self._str_test_value, res[2].raw_object)
         self.assertEqual(self._float_test_value2, res[3].raw_object)
 
+    def test_read_null_and_empty_values(self):
+        # Setup: Create a page with a NULL and an empty text value
+        reader = ServiceBufferFileStreamReader(create_page_stream([[None, b'']]))
+
+        # If: I read the row
+        res = reader.read_row(0, 1, self._create_columns(datatypes.DATATYPE_TEXT, datatypes.DATATYPE_TEXT))
+
+        # Then: Only the NULL value should be reported as NULL
+        self.assertTrue(res[0].is_null)
+        self.assertEqual('NULL', res[0].display_value)
+        self.assertFalse(res[1].is_null)
+        self.assertEqual('', res[1].raw_object)
+
+    def test_read_rows_by_slot(self):
+        # Setup: Create two pages of rows, the second starting after the first
+        stream = create_page_stream([[b'row 0', b'a'], [b'row 1', None], [b'row 2', b'c']])
+        second_page_offset = len(stream.getvalue())
+        create_page_stream([[b'row 3', b'd']], stream)
+        reader = ServiceBufferFileStreamReader(stream)
+        columns = self._create_columns(datatypes.DATATYPE_TEXT, datatypes.DATATYPE_TEXT)
+
+        # If: I read each row by the offset of its page and its slot
+        locations = [0, 1, 2, second_page_offset << 16]
+        rows = [reader.read_row(location, row_id, columns) for row_id, location in enumerate(locations)]
+
+        # Then: Each row should be read, with its row ID
+        self.assertEqual([['row 0', 'a'], ['row 1', None], ['row 2', 'c'], ['row 3', 'd']], [[cell.raw_object for cell in row] for row in rows])
+        self.assertEqual([0, 1, 2, 3], [row[0].row_id for row in rows])
+
+    def test_read_rows_reads_page_once(self):
+        # Setup: Create a page of rows and a reader that counts its reads
+        stream = create_page_stream([[str(index).encode()] for index in range(100)])
+        stream.read = mock.Mock(side_effect=stream.read)
+        reader = ServiceBufferFileStreamReader(stream)
+        columns = self._create_columns(datatypes.DATATYPE_TEXT)
+
+        # If: I read all the rows of the page
+        rows = [reader.read_row(slot, slot, columns) for slot in range(100)]
+
+        # Then: The page should have been read with a single read
+        self.assertEqual([str(index) for index in range(100)], [row[0].raw_object for row in rows])
+        stream.read.assert_called_once_with(ServiceBufferFileStreamReader.PAGE_SIZE)
+
+    def test_read_page_larger_than_page_size(self):
+        # Setup: Create a page holding a row larger than the page size
+        large_value = 'a' * (ServiceBufferFileStreamReader.PAGE_SIZE * 2)
+        reader = ServiceBufferFileStreamReader(create_page_stream([[large_value.encode()]]))
+
+        # If: I read the row
+        res = reader.read_row(0, 0, self._create_columns(datatypes.DATATYPE_TEXT))
+
+        # Then: The whole value should be read
+        self.assertEqual(large_value, res[0].raw_object)
+
+    def test_read_rows_written_by_writer(self):
+        # Setup: Write rows that span several pages
+        columns = self._create_columns(datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_REAL)
+        rows = [(index, None if index % 7 == 0 else 'text value ' * (index % 13), index / 4) for index in range(5000)]
+        stream = io.BytesIO()
+        writer = ServiceBufferFileStreamWriter(stream)
+        locations = writer.write_rows(rows, columns)
+        writer.flush()
+
+        # If: I read the rows back
+        reader = ServiceBufferFileStreamReader(stream)
+        res = [reader.read_row(location, row_id, columns) for row_id, location in enumerate(locations)]
+
+        # Then: The rows should be the ones that were written
+        self.assertGreater(len(set(location >> 16 for location in locations)), 1)
+        self.assertEqual(rows, [tuple(cell.raw_object for cell in row) for row in res])
+
+    def test_read_rows_from_mapped_file(self):
+        # Setup: Write two pages of rows to a file and map it
+        stream = create_page_stream([[b'row 0'], [None]])
+        second_page_offset = len(stream.getvalue())
+        create_page_stream([[b'row 2']], stream)
+        file_descriptor, file_name = tempfile.mkstemp()
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(stream.getvalue())
+
+            with open(file_name, 'rb') as file:
+                reader = ServiceBufferFileStreamReader(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+            # If: I read the rows from the map
+            with reader:
+                columns = self._create_columns(datatypes.DATATYPE_TEXT)
+                rows = [reader.read_row(location, row_id, columns) for row_id, location in enumerate([0, 1, second_page_offset << 16])]
+
+            # Then: The rows should be read
+            self.assertEqual(['row 0', None, 'row 2'], [row[0].raw_object for row in rows])
+        finally:
+            os.remove(file_name)
+
+    @staticmethod
+    def _create_columns(*data_types):
+        columns = []
+        for data_type in data_types:
+            col = DbColumn()
+            col.data_type = data_type
+            columns.append(col)
+        return columns
+
 
 if __name__ == '__main__':
     unittest.main()
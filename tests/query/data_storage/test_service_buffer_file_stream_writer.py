@@ -21,7 +21,8 @@ import tests.utils as utils
 
 class TestServiceBufferFileStreamWriter(unittest.TestCase):
 
-    SIZE_BUFFER_LENGTH = 4
+    # Page header, a one byte null bitmap and the end offset of the cell for a page with one single column row
+    SINGLE_CELL_PAGE_OVERHEAD = 9 + 1 + 4
 
     def setUp(self):
 
@@ -29,8 +30,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         self._writer = ServiceBufferFileStreamWriter(self._file_stream)
         self._cursor = utils.MockCursor([tuple([11, 22, 33]), tuple([55, 66, 77])])
 
-    def get_expected_length_with_additional_buffer_for_size(self, test_value_length: int):
-        return TestServiceBufferFileStreamWriter.SIZE_BUFFER_LENGTH + test_value_length
+    def get_expected_page_length(self, test_value_length: int):
+        return TestServiceBufferFileStreamWriter.SINGLE_CELL_PAGE_OVERHEAD + test_value_length
 
     def test_write_to_file(self):
         val = 5
@@ -39,8 +40,20 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         self.assertEqual(res, 4)
 
     def test_write_null(self):
-        res = self._writer._write_null()
-        self.assertEqual(res, 0)
+        test_columns_info = []
+        col = DbColumn()
+        col.data_type = datatypes.DATATYPE_TEXT
+        test_columns_info.append(col)
+
+        # If: I write a NULL value
+        self._writer.write_rows([(None,)], test_columns_info)
+        self._writer.flush()
+
+        # Then: No data should be written for it, only its bit in the null bitmap
+        page = self._file_stream.getvalue()
+        self.assertEqual(self.get_expected_page_length(0), len(page))
+        self.assertEqual(struct.pack('=IHHB', len(page), 1, 1, 0), page[:9])
+        self.assertEqual(1, page[9])
 
     def test_write_bool(self):
         test_value = True
@@ -51,8 +64,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(1), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(1), self._writer.bytes_written)
 
     def test_write_float(self):
         test_value = 123.456
@@ -63,8 +76,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(8), self._writer.bytes_written)
 
     def test_write_double(self):
         test_value = 12345678.90123456
@@ -75,8 +88,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(8), self._writer.bytes_written)
 
     def test_write_short(self):
         test_value = 12345
@@ -87,8 +100,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(2), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(2), self._writer.bytes_written)
 
     def test_write_int(self):
         test_value = 1234567890
@@ -99,8 +112,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(4), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(4), self._writer.bytes_written)
 
     def test_write_long_long(self):
         test_value = 123456789012
@@ -111,8 +124,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(8), self._writer.bytes_written)
 
     def test_write_decimal(self):
         test_val = Decimal(123)
@@ -123,8 +136,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_val)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_val))), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(str(test_val))), self._writer.bytes_written)
 
     def test_write_char(self):
         test_value = 'a'
@@ -135,8 +148,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(1), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(1), self._writer.bytes_written)
 
     def test_write_str(self):
         test_value = 'TestString'
@@ -147,8 +160,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value)), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value)), self._writer.bytes_written)
 
     def test_write_date(self):
         test_value = datetime.date(2004, 10, 19)
@@ -159,8 +172,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value.isoformat())), self._writer.bytes_written)
 
     def test_write_time(self):
         test_value = datetime.time(10, 23, 54)
@@ -171,8 +184,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value.isoformat())), self._writer.bytes_written)
 
     def test_write_time_with_timezone(self):
         test_value = datetime.time(10, 23, 54, tzinfo=None)
@@ -183,8 +196,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value.isoformat())), self._writer.bytes_written)
 
     def test_write_datetime(self):
         test_value = datetime.datetime(2004, 10, 19, 10, 23, 54)
@@ -195,8 +208,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value.isoformat())), self._writer.bytes_written)
 
     def test_write_timedelta(self):
         test_value = datetime.timedelta(days=3, hours=4, minutes=5, seconds=6)
@@ -207,8 +220,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_value))), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(str(test_value))), self._writer.bytes_written)
 
     def test_write_uuid(self):
         test_value = uuid.uuid4()
@@ -219,8 +232,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(36), res)  # UUID standard len is 36
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(36), self._writer.bytes_written)  # UUID standard len is 36
 
     def test_write_bytea(self):
         test_value = memoryview(b'TestString')
@@ -231,8 +244,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.tobytes())), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value.tobytes())), self._writer.bytes_written)
 
     def test_write_json(self):
         test_value = {"Name": "TestName", "Schema": "TestSchema"}
@@ -243,8 +256,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_value))), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(str(test_value))), self._writer.bytes_written)
 
     def test_write_int4range(self):
         test_value = NumericRange(10, 20)
@@ -255,8 +268,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[10,20)")), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len("[10,20)")), self._writer.bytes_written)
 
     def test_write_tsrange(self):
         test_value = DateTimeRange(datetime.datetime(2014, 6, 8, 12, 12, 45), datetime.datetime(2016, 7, 6, 14, 12, 8))
@@ -267,8 +280,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2014-06-08T12:12:45,2016-07-06T14:12:08)")), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len("[2014-06-08T12:12:45,2016-07-06T14:12:08)")), self._writer.bytes_written)
 
     def test_write_tstzrange(self):
         test_value = DateTimeTZRange(datetime.datetime(2014, 6, 8, 12, 12, 45, tzinfo=psycopg2.tz.FixedOffsetTimezone(offset=720, name=None)),
@@ -280,8 +293,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2014-06-08T12:12:45+12:00,2016-07-06T14:12:08+12:00)")), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len("[2014-06-08T12:12:45+12:00,2016-07-06T14:12:08+12:00)")), self._writer.bytes_written)
 
     def test_write_daterange(self):
         test_value = DateRange(datetime.date(2015, 6, 6), datetime.date(2016, 8, 8))
@@ -292,8 +305,8 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2015-06-06,2016-08-08)")), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len("[2015-06-06,2016-08-08)")), self._writer.bytes_written)
 
     def test_write_udt(self):
         test_value = "TestUserDefinedTypes"
@@ -304,8 +317,115 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
         mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value)), res)
+        self.assertEqual(0, self._writer.write_row(mock_storage_data_reader))
+        self.assertEqual(self.get_expected_page_length(len(test_value)), self._writer.bytes_written)
+
+    def test_write_rows_matches_write_row(self):
+        # Setup: Create a block of rows with a NULL value
+        test_columns_info = []
+        for data_type in [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT]:
+            col = DbColumn()
+            col.data_type = data_type
+            test_columns_info.append(col)
+        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
+        rows = [(1, 'Text 1'), (2, None), (3, 'Text ü')]
+
+        # If: I write the rows one at a time, and as a block
+        row_stream = io.BytesIO()
+        row_writer = ServiceBufferFileStreamWriter(row_stream)
+        expected_locations = []
+        for row in rows:
+            mock_storage_data_reader.get_value = lambda index, row=row: row[index]
+            mock_storage_data_reader.is_none = lambda index, row=row: row[index] is None
+            expected_locations.append(row_writer.write_row(mock_storage_data_reader))
+        row_writer.flush()
+
+        res = self._writer.write_rows(rows, test_columns_info)
+        self._writer.flush()
+
+        # Then:
+        # ... The rows should be in slots of the first page
+        self.assertEqual(res, [0, 1, 2])
+        self.assertEqual(res, expected_locations)
+
+        # ... The block should be written in the same format, as a single page
+        self.assertEqual(self._file_stream.getvalue(), row_stream.getvalue())
+        self.assertEqual(len(self._file_stream.getvalue()), self._writer.bytes_written)
+
+    def test_write_rows_buffers_page(self):
+        # If: I write fewer rows than fill a page
+        test_columns_info = self._create_columns(datatypes.DATATYPE_TEXT)
+        self._writer.write_rows([('value',)] * 10, test_columns_info)
+
+        # Then: Nothing should be written until the writer is flushed
+        self.assertEqual(b'', self._file_stream.getvalue())
+        self._writer.flush()
+        self.assertEqual(self._writer.bytes_written, len(self._file_stream.getvalue()))
+
+    def test_write_rows_fills_pages(self):
+        # If: I write more rows than fit in a page
+        test_columns_info = self._create_columns(datatypes.DATATYPE_TEXT)
+        value = 'a' * 1000
+        row_count = ServiceBufferFileStreamWriter.PAGE_SIZE // len(value) + 10
+        locations = self._writer.write_rows([(value,)] * row_count, test_columns_info)
+
+        # Then:
+        # ... The full pages should have been written, with a header holding their length, row count and column count
+        page_length, rows_per_page, column_count, _ = struct.unpack_from('=IHHB', self._file_stream.getvalue())
+        self.assertEqual(page_length, len(self._file_stream.getvalue()))
+        self.assertGreaterEqual(page_length, ServiceBufferFileStreamWriter.PAGE_SIZE)
+        self.assertEqual(1, column_count)
+
+        # ... The rows should be located by the offset of their page and their slot in it
+        self.assertEqual(list(range(rows_per_page)), locations[:rows_per_page])
+        self.assertEqual((page_length << 16) + 1, locations[rows_per_page + 1])
+
+    def test_write_rows_oversized_row(self):
+        # If: I write a row larger than a page between two small rows
+        test_columns_info = self._create_columns(datatypes.DATATYPE_TEXT)
+        large_value = 'a' * (ServiceBufferFileStreamWriter.PAGE_SIZE * 2)
+        locations = self._writer.write_rows([('small',), (large_value,), ('small',)], test_columns_info)
+        self._writer.flush()
+
+        # Then: The page should grow to hold the large row, and the row after it start the next page
+        self.assertEqual([0, 1], locations[:2])
+        second_page_offset = locations[2] >> 16
+        self.assertEqual(9 + 2 * (1 + 4) + len('small') + len(large_value), second_page_offset)
+        self.assertEqual(second_page_offset + self.get_expected_page_length(len('small')), len(self._file_stream.getvalue()))
+
+    def test_close_writes_page(self):
+        # If: I write a row and close the writer
+        stream = mock.MagicMock()
+        stream.tell = mock.Mock(return_value=0)
+        with ServiceBufferFileStreamWriter(stream) as writer:
+            writer.write_rows([('value',)], self._create_columns(datatypes.DATATYPE_TEXT))
+            stream.write.assert_not_called()
+
+        # Then: The page should have been written before the stream was closed
+        stream.write.assert_called_once()
+        stream.close.assert_called_once()
+
+    def test_write_rows_appending(self):
+        # Setup: Create a writer for a stream that already holds data
+        self._file_stream.write(b'existing data')
+
+        # If: I write a row
+        writer = ServiceBufferFileStreamWriter(self._file_stream)
+        location = writer.write_rows([('value',)], self._create_columns(datatypes.DATATYPE_TEXT))[0]
+        writer.flush()
+
+        # Then: The row should be located in a page after the existing data
+        self.assertEqual(len(b'existing data') << 16, location)
+        self.assertEqual(len(b'existing data') + self.get_expected_page_length(len('value')), len(self._file_stream.getvalue()))
+
+    @staticmethod
+    def _create_columns(*data_types):
+        columns = []
+        for data_type in data_types:
+            col = DbColumn()
+            col.data_type = data_type
+            columns.append(col)
+        return columns
 
 
 class MockType:
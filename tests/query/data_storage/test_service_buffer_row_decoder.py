@@ -0,0 +1,112 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import datetime
+import io
+import struct
+import unittest
+from decimal import Decimal
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.data_storage import ServiceBufferFileStreamReader, ServiceBufferFileStreamWriter
+from pgsqltoolsservice.query.data_storage.service_buffer_row_decoder import ServiceBufferRowDecoder
+
+
+class TestServiceBufferRowDecoder(unittest.TestCase):
+
+    def test_plan_groups_fixed_width_columns(self):
+        # If: I create a decoder for columns with runs of fixed width columns
+        decoder = ServiceBufferRowDecoder(_create_columns(
+            datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_BIGINT, datatypes.DATATYPE_TEXT,
+            datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_BOOL, datatypes.DATATYPE_NULL
+        ))
+
+        # Then: Each run should be unpacked with a single struct, and the other columns be steps of their own
+        steps = [(first_column, column_count, row_struct.format if row_struct else None) for first_column, column_count, _, row_struct, _ in decoder._steps]
+        self.assertEqual([(0, 2, struct.Struct('=iq').format), (2, 1, None), (3, 2, struct.Struct('=d?').format), (5, 1, None)], steps)
+
+        # ... The text column should be decoded directly, and the NULL type column have no converter
+        self.assertIs(bytes.decode, decoder._steps[1][4])
+        self.assertIsNone(decoder._steps[3][4])
+
+    def test_decode_rows(self):
+        # Setup: Create rows of every kind of column, with NULL values in and out of the fixed width runs
+        data_types = [
+            datatypes.DATATYPE_SMALLINT, datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_BIGINT, datatypes.DATATYPE_REAL,
+            datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_BOOL, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_NUMERIC,
+            datatypes.DATATYPE_TIMESTAMP, datatypes.DATATYPE_JSON, datatypes.DATATYPE_NULL, datatypes.DATATYPE_OID
+        ]
+        rows = [
+            (1, 2, 3, 4.5, 6.25, True, 'text', Decimal('7.5'), datetime.datetime(2017, 6, 8, 12, 12, 45), {'key': 'value'}, None, 8),
+            (1, None, 3, 4.5, 6.25, False, None, None, None, None, None, None),
+            (None, None, None, None, None, None, '', Decimal('0'), datetime.datetime(2017, 6, 8), [1, 2], None, 0)
+        ]
+        columns = _create_columns(*data_types)
+
+        # If: I write the rows and read them back
+        stream = io.BytesIO()
+        writer = ServiceBufferFileStreamWriter(stream)
+        locations = writer.write_rows(rows, columns)
+        writer.flush()
+        reader = ServiceBufferFileStreamReader(stream)
+        results = [reader.read_row(location, row_id, columns) for row_id, location in enumerate(locations)]
+
+        # Then:
+        # ... The values should be decoded, with the ones written as text as their text
+        expected_values = [
+            [1, 2, 3, 4.5, 6.25, True, 'text', '7.5', '2017-06-08T12:12:45', {'key': 'value'}, None, 8],
+            [1, None, 3, 4.5, 6.25, False, None, None, None, None, None, None],
+            [None, None, None, None, None, None, '', '0', '2017-06-08T00:00:00', [1, 2], None, 0]
+        ]
+        self.assertEqual(expected_values, [[cell.raw_object for cell in row] for row in results])
+
+        # ... The display values should be the values as strings, NULL for NULL values and empty for the NULL type column
+        self.assertEqual(
+            ['1', '2', '3', '4.5', '6.25', 'True', 'text', '7.5', '2017-06-08T12:12:45', "{'key': 'value'}", '', '8'],
+            [cell.display_value for cell in results[0]]
+        )
+        self.assertEqual(['NULL', ''], [results[1][1].display_value, results[1][10].display_value])
+        self.assertEqual([False, True, False, False, False, False, True, True, True, True, True, True], [cell.is_null for cell in results[1]])
+
+        # ... The cells should have the ID of their row
+        self.assertEqual([[row_id] * len(columns) for row_id in range(3)], [[cell.row_id for cell in row] for row in results])
+
+    def test_decoder_kept_for_columns(self):
+        # Setup: Write rows and create a reader for them
+        columns = _create_columns(datatypes.DATATYPE_INTEGER)
+        stream = io.BytesIO()
+        writer = ServiceBufferFileStreamWriter(stream)
+        locations = writer.write_rows([(1,), (2,)], columns)
+        writer.flush()
+        reader = ServiceBufferFileStreamReader(stream)
+
+        # If: I read rows of the same columns
+        reader.read_row(locations[0], 0, columns)
+        decoder = reader._get_decoder(columns)
+        reader.read_row(locations[1], 1, columns)
+
+        # Then: The decoder should have been compiled once
+        self.assertIs(decoder, reader._get_decoder(columns))
+
+        # If: I read a row with other columns
+        other_columns = _create_columns(datatypes.DATATYPE_INTEGER)
+        reader.read_row(locations[1], 1, other_columns)
+
+        # Then: A decoder should be compiled for them
+        self.assertIsNot(decoder, reader._get_decoder(other_columns))
+
+
+def _create_columns(*data_types):
+    columns = []
+    for data_type in data_types:
+        column = DbColumn()
+        column.data_type = data_type
+        columns.append(column)
+    return columns
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,13 +6,16 @@
 import unittest
 from unittest import mock
 
+import psycopg2
+
 import tests.utils as utils
 from pgsqltoolsservice.query.batch import (
     Batch, BatchEvents, create_batch, create_result_set, ResultSetStorageType, SelectBatch
 )
-from pgsqltoolsservice.query.contracts import SaveResultsRequestParams, SelectionData
+from pgsqltoolsservice.query.contracts import DbColumn, SaveResultsRequestParams, SelectionData
 from pgsqltoolsservice.query.in_memory_result_set import InMemoryResultSet
 from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
 
 
 class TestBatch(unittest.TestCase):
@@ -50,6 +53,66 @@ class TestBatch(unittest.TestCase):
         self.assertEqual(batch._result_set, self._result_set)
         self._result_set.read_result_to_end.assert_called_once_with(self._cursor)
 
+    def test_execute_sets_result_set_before_reading(self):
+        # Setup: Record the batch's result set when it is read
+        result_sets_when_read = []
+        batch = None
+        self._result_set.read_result_to_end.side_effect = lambda cursor: result_sets_when_read.append(batch.result_set)
+
+        # If: I execute the batch
+        with mock.patch('pgsqltoolsservice.query.batch.create_result_set', new=mock.Mock(return_value=self._result_set)):
+            batch = self.create_batch_with(Batch, ResultSetStorageType.IN_MEMORY)
+            batch.execute(self._connection)
+
+        # Then: The result set should be retrievable from the batch while it is read
+        self.assertEqual(result_sets_when_read, [self._result_set])
+
+    def test_result_set_events_fire_batch_events(self):
+        # Setup: Create a batch with result set callbacks
+        on_result_set_available = mock.Mock()
+        on_result_set_updated = mock.Mock()
+        self._batch_events = BatchEvents(on_result_set_available=on_result_set_available, on_result_set_updated=on_result_set_updated)
+        mock_create_result_set = mock.Mock(return_value=self._result_set)
+
+        # If: I execute the batch and the result set reports that it is available and then updated
+        with mock.patch('pgsqltoolsservice.query.batch.create_result_set', new=mock_create_result_set):
+            batch = self.create_batch_with(Batch, ResultSetStorageType.IN_MEMORY)
+            batch.execute(self._connection)
+        result_set_events = mock_create_result_set.call_args[0][3]
+        result_set_events._on_result_set_available(self._result_set)
+        result_set_events._on_result_set_partially_loaded(self._result_set)
+
+        # Then: The batch callbacks should have been called with the batch
+        on_result_set_available.assert_called_once_with(batch)
+        on_result_set_updated.assert_called_once_with(batch)
+
+    def test_execute_passes_type_catalog_to_result_set(self):
+        # Setup: Create a batch with a type catalog
+        type_catalog = TypeCatalog()
+        mock_create_result_set = mock.Mock(return_value=self._result_set)
+
+        # If: I execute the batch
+        with mock.patch('pgsqltoolsservice.query.batch.create_result_set', new=mock_create_result_set):
+            batch = Batch(self._batch_text, self._batch_id, self._selection_data, self._batch_events, ResultSetStorageType.IN_MEMORY, type_catalog)
+            batch.execute(self._connection)
+
+        # Then: The result set should have been created with the catalog
+        self.assertIs(mock_create_result_set.call_args[0][4], type_catalog)
+
+    def test_execute_type_ddl_invalidates_type_catalog(self):
+        for status_message, is_invalidated in [('CREATE TYPE', True), ('ALTER TABLE', True), ('DROP DOMAIN', True), ('INSERT 0 1', False), (None, False)]:
+            # Setup: Create a batch with a type catalog, whose statement completes with the status message
+            type_catalog = mock.Mock()
+            self._cursor.execute.side_effect = lambda *args, status_message=status_message: setattr(self._cursor, 'statusmessage', status_message)
+
+            # If: I execute the batch
+            with mock.patch('pgsqltoolsservice.query.batch.create_result_set', new=mock.Mock(return_value=self._result_set)):
+                batch = Batch(self._batch_text, self._batch_id, self._selection_data, self._batch_events, ResultSetStorageType.IN_MEMORY, type_catalog)
+                batch.execute(self._connection)
+
+            # Then: The catalog should have been invalidated only after statements that change types
+            self.assertEqual(type_catalog.invalidate.called, is_invalidated, status_message)
+
     def test_execute_sets_has_executed(self):
         batch = self.create_and_execute_batch(Batch)
 
@@ -62,6 +125,73 @@ class TestBatch(unittest.TestCase):
 
         self._connection.cursor.assert_called_once_with(name=cursor_name, withhold=True)
 
+    def execute_binary_copy_batch(self, data_types, describe_cursor=None, storage_type=ResultSetStorageType.FILE_STORAGE):
+        """Executes a SELECT batch that uses binary copies, describing columns of the given types"""
+        columns = []
+        for data_type in data_types:
+            column = DbColumn()
+            column.data_type = data_type
+            columns.append(column)
+        describe_cursor = describe_cursor or utils.MockCursor(None)
+        self._connection.cursor.side_effect = [describe_cursor, self._cursor]
+
+        with mock.patch('pgsqltoolsservice.query.batch.get_columns_info', new=mock.Mock(return_value=columns)):
+            with mock.patch('pgsqltoolsservice.query.batch.create_result_set', new=mock.Mock(return_value=self._result_set)):
+                with mock.patch('uuid.uuid4', new=mock.Mock(return_value='Test')):
+                    batch = SelectBatch(self._batch_text + ';', self._batch_id, self._selection_data, self._batch_events, storage_type,
+                                        use_binary_copy=True)
+                    batch.execute(self._connection)
+
+        return batch, columns
+
+    def test_select_batch_copies_rows_in_binary_format(self):
+        # If: I execute a SELECT batch that uses binary copies, whose columns can all be read from the binary format
+        describe_cursor = utils.MockCursor(None)
+        batch, columns = self.execute_binary_copy_batch(['int4', 'text', 'numeric'], describe_cursor)
+
+        # Then:
+        # ... The columns should have been described without reading any rows
+        describe_cursor.execute.assert_called_once_with('SELECT * FROM (Select * from t1) AS described LIMIT 0')
+
+        # ... The rows should have been copied into the result set through a client side cursor, without running the statement otherwise
+        self.assertEqual([mock.call(), mock.call()], self._connection.cursor.call_args_list)
+        self._cursor.execute.assert_not_called()
+        self._result_set.read_binary_copy_to_end.assert_called_once_with(
+            self._cursor, 'COPY (Select * from t1) TO STDOUT (FORMAT binary)', columns)
+        self._result_set.read_result_to_end.assert_not_called()
+        self.assertIs(self._result_set, batch.result_set)
+
+    def test_select_batch_reads_rows_through_cursor_when_they_cannot_be_copied(self):
+        failing_cursor = utils.MockCursor(None)
+        failing_cursor.execute.side_effect = failing_cursor.execute_failure_side_effects
+        cases = [
+            ('column of a type without a binary converter', ['int4', 'interval'], None),
+            ('error describing the columns', ['int4'], failing_cursor),
+        ]
+        for case, data_types, describe_cursor in cases:
+            # If: I execute a SELECT batch that uses binary copies, whose rows cannot be copied
+            self._cursor = utils.MockCursor(None)
+            self._result_set = mock.MagicMock()
+            self._connection.cursor.reset_mock()
+            self.execute_binary_copy_batch(data_types, describe_cursor)
+
+            # Then: The rows should be read through a named cursor
+            self.assertEqual(mock.call(name='Test', withhold=True), self._connection.cursor.call_args, case)
+            self._cursor.execute.assert_called_once_with(self._batch_text + ';')
+            self._result_set.read_result_to_end.assert_called_once_with(self._cursor)
+            self._result_set.read_binary_copy_to_end.assert_not_called()
+
+    def test_select_batch_not_described_when_rows_cannot_be_copied(self):
+        # If: I execute SELECT batches that use binary copies in a transaction, or whose rows are stored in memory
+        self._connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        self.execute_binary_copy_batch(['int4'])
+        self._connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.execute_binary_copy_batch(['int4'], storage_type=ResultSetStorageType.IN_MEMORY)
+
+        # Then: The columns should not have been described, and the rows been read through named cursors
+        self.assertEqual([mock.call(name='Test', withhold=True)] * 2, self._connection.cursor.call_args_list)
+        self._result_set.read_binary_copy_to_end.assert_not_called()
+
     def test_prop_batch_summary(self):
         batch_summary = mock.MagicMock()
 
@@ -110,6 +240,23 @@ class TestBatch(unittest.TestCase):
         self.assertFalse(isinstance(batch, SelectBatch))
         self.assertTrue(isinstance(batch, Batch))
 
+    def test_create_batch_for_select_into_after_columns(self):
+
+        batch_text = 'select a, b into temptable from t1'
+
+        batch = create_batch(batch_text, 0, self._selection_data, self._batch_events, ResultSetStorageType.IN_MEMORY)
+
+        self.assertFalse(isinstance(batch, SelectBatch))
+
+    def test_create_batch_with_statement_kind(self):
+
+        # If: I create a batch with the kind the statement splitter determined
+        batch = create_batch('explain select 1', 0, self._selection_data, self._batch_events, ResultSetStorageType.IN_MEMORY,
+                             statement_kind='SELECT')
+
+        # Then: The kind should be used rather than that of the text
+        self.assertTrue(isinstance(batch, SelectBatch))
+
     def test_create_batch_for_non_select(self):
 
         batch_text = 'Insert into t1 values(1)'
@@ -151,7 +298,7 @@ class TestBatch(unittest.TestCase):
 
         batch.save_as(params, file_factory, on_success, on_error)
 
-        result_set_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error)
+        result_set_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error, None)
 
     def test_save_as_with_invalid_batch_index(self):
         batch = self.create_and_execute_batch(Batch)
@@ -13,7 +13,7 @@ import tests.utils as utils
 class TestGetColumnsInfo(unittest.TestCase):
 
     def setUp(self):
-        self._rows = [(1, 'int4', ), (2, 'bool')]
+        self._rows = [(1, 'int4', 'N', 0), (2, 'bool', 'B', 0)]
         self._cursor = utils.MockCursor(self._rows)
 
         column = namedtuple('Column', ['name', 'type_code', 'display_size', 'internal_size', 'precision', 'scale', 'null_ok'])
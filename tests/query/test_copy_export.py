@@ -0,0 +1,107 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pgsqltoolsservice.query.copy_export import (
+    copy_query_to_file, get_copyable_query, COPY_MULTIPLE_STATEMENTS_ERROR, COPY_UNSUPPORTED_STATEMENT_ERROR
+)
+
+
+class CopyCursor:
+    """Cursor whose copy_expert writes fixed CSV output to the file it is given in chunks"""
+
+    def __init__(self, chunks, error: Exception = None):
+        self.chunks = chunks
+        self.error = error
+        self.statements = []
+        self.rowcount = -1
+
+    def copy_expert(self, sql, file, size=8192):
+        self.statements.append(sql)
+        for chunk in self.chunks:
+            file.write(chunk)
+        if self.error is not None:
+            raise self.error
+        self.rowcount = len(b''.join(self.chunks).splitlines())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class TestCopyExport(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_path = os.path.join(self._directory, 'export.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_get_copyable_query(self):
+        # If: I get the copyable text of queries with comments and semicolons
+        # Then: The text should be the query alone
+        self.assertEqual(get_copyable_query('-- rows\nselect * from t; -- all of them'), 'select * from t')
+        self.assertEqual(get_copyable_query('with x as (select 1) select * from x'), 'with x as (select 1) select * from x')
+        self.assertEqual(get_copyable_query('table t;;'), 'table t')
+
+    def test_get_copyable_query_invalid(self):
+        # If: I get the copyable text of scripts that are not a single query
+        # Then: A ValueError should be raised
+        for query_text, expected_error in [
+                ('select 1; select 2', COPY_MULTIPLE_STATEMENTS_ERROR),
+                ('', COPY_MULTIPLE_STATEMENTS_ERROR),
+                ('insert into t values (1)', COPY_UNSUPPORTED_STATEMENT_ERROR),
+                ('select 1 into t', COPY_UNSUPPORTED_STATEMENT_ERROR)]:
+            with self.assertRaises(ValueError) as context_manager:
+                get_copyable_query(query_text)
+            self.assertEqual(context_manager.exception.args[0], expected_error)
+
+    def test_copy_query_to_file(self):
+        # Setup: Create a connection whose cursor copies two rows and a header
+        cursor = CopyCursor([b'a,b\n', b'1,2\n3,4\n'])
+        connection = mock.Mock()
+        connection.cursor = mock.Mock(return_value=cursor)
+
+        # If: I copy a query to a file with headers
+        row_count = copy_query_to_file(connection, 'select a, b from t;', self._file_path, True)
+
+        # Then: The query should have been wrapped in a COPY statement and its output written to the file as is
+        self.assertEqual(cursor.statements, ['COPY (select a, b from t) TO STDOUT WITH (FORMAT csv, HEADER)'])
+        self.assertEqual(row_count, 3)
+        with open(self._file_path, 'rb') as file:
+            self.assertEqual(file.read(), b'a,b\n1,2\n3,4\n')
+
+    def test_copy_query_to_file_without_headers(self):
+        cursor = CopyCursor([])
+        connection = mock.Mock()
+        connection.cursor = mock.Mock(return_value=cursor)
+
+        copy_query_to_file(connection, 'select 1', self._file_path, False)
+
+        self.assertEqual(cursor.statements, ['COPY (select 1) TO STDOUT WITH (FORMAT csv)'])
+
+    def test_copy_query_to_file_error_removes_file(self):
+        # Setup: Create a connection whose copy fails part way through
+        connection = mock.Mock()
+        connection.cursor = mock.Mock(return_value=CopyCursor([b'1,2\n'], RuntimeError('connection lost')))
+
+        # If: I copy a query to a file
+        with self.assertRaises(RuntimeError):
+            copy_query_to_file(connection, 'select 1, 2', self._file_path, False)
+
+        # Then: The partial file should have been removed
+        self.assertFalse(os.path.exists(self._file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import psycopg2
+import psycopg2.extensions
+
+from pgsqltoolsservice.query.execution_plan import (
+    explain_query, parse_execution_plan, EXPLAIN_FAILED_TRANSACTION_ERROR, EXPLAIN_INVALID_PLAN_ERROR, EXPLAIN_MULTIPLE_STATEMENTS_ERROR
+)
+import tests.utils as utils
+
+
+EXECUTION_PLANS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'execution_plans')
+
+
+def load_execution_plan(name: str) -> list:
+    """Loads a plan stored as the server returns it for EXPLAIN (ANALYZE, BUFFERS, TIMING, FORMAT JSON)"""
+    with io.open(os.path.join(EXECUTION_PLANS_DIRECTORY, name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+class ExplainCursor:
+    """Cursor that returns a plan for an EXPLAIN statement, or raises an error for it"""
+
+    def __init__(self, plan, error: Exception = None):
+        self.plan = plan
+        self.error = error
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        if statement.startswith('EXPLAIN') and self.error is not None:
+            raise self.error
+
+    def fetchone(self):
+        return (self.plan,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class TestExecutionPlan(unittest.TestCase):
+
+    def test_import_without_query_execution(self):
+        # If: I import the module in a fresh interpreter, before anything imports the query execution service
+        result = subprocess.run(
+            [sys.executable, '-c', 'import pgsqltoolsservice.query.execution_plan'],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # Then: It should import without a cycle through the query execution contracts
+        self.assertEqual(0, result.returncode, result.stderr.decode())
+
+    def test_parse_hash_join_plan(self):
+        # If: I parse a plan whose nodes were each executed once
+        plan = parse_execution_plan(load_execution_plan('hash_join.json'))
+
+        # Then: The nodes should be numbered in the order they are listed, with the properties of the server
+        nodes = _get_nodes(plan.root)
+        self.assertEqual([(0, None), (1, 0), (2, 0), (3, 2)], [(node.id, node.parent_id) for node in nodes])
+        self.assertEqual(['Hash Join', 'Seq Scan', 'Hash', 'Seq Scan'], [node.node_type for node in nodes])
+        self.assertEqual([None, 'orders', None, 'customers'], [node.relation_name for node in nodes])
+        self.assertEqual('(orders.customer_id = customers.id)', plan.root.details['Hash Cond'])
+        self.assertNotIn('Plans', plan.root.details)
+        self.assertEqual((0.35, 25.6), (plan.planning_time, plan.execution_time))
+        self.assertEqual(load_execution_plan('hash_join.json'), json.loads(plan.content))
+
+        # ... The self time of each node should exclude the time of its children
+        self.assertEqual([25.0, 12.0, 5.0, 3.0], [node.inclusive_time for node in nodes])
+        self.assertEqual([8.0, 12.0, 2.0, 3.0], [node.self_time for node in nodes])
+
+        # ... The row estimates of the join should be 10 times too low, and those of the scans right
+        self.assertEqual([10.0, 1.0, 1.0, 1.0], [node.row_estimate_error_ratio for node in nodes])
+
+        # ... The hit rates should be of the buffers of the nodes and their children
+        self.assertEqual([0.8, 50 / 70, 1.0, 1.0], [node.buffer_hit_rate for node in nodes])
+
+        # ... The hot path should lead to the scan of the orders table
+        self.assertEqual([0, 1], plan.hot_path)
+
+    def test_parse_nested_loop_plan(self):
+        # If: I parse a plan with a node executed in a loop and a node never executed, without buffer usage
+        plan = parse_execution_plan(json.dumps(load_execution_plan('nested_loop.json')))
+        nodes = _get_nodes(plan.root)
+
+        # Then: The times of the node executed in a loop should be of all of its loops
+        index_scan = nodes[3]
+        self.assertEqual(('Index Scan', 'b_pkey', 20), (index_scan.node_type, index_scan.index_name, index_scan.actual_loops))
+        self.assertAlmostEqual(39.0, index_scan.inclusive_time)
+        self.assertAlmostEqual(39.0, index_scan.self_time)
+        self.assertAlmostEqual(0.5, nodes[1].self_time)
+
+        # ... The row estimates should be compared per loop, with no rows counted as one row
+        self.assertEqual(1.0, index_scan.row_estimate_error_ratio)
+        self.assertEqual(0.02, nodes[2].row_estimate_error_ratio)
+
+        # ... The node never executed should have no metrics
+        never_executed = nodes[4]
+        self.assertEqual('SubPlan 1', never_executed.details['Subplan Name'])
+        self.assertEqual((None, None, None), (never_executed.self_time, never_executed.row_estimate_error_ratio, never_executed.buffer_hit_rate))
+
+        # ... There should be no hit rates without buffer usage, and the execution time should be the total runtime of old servers
+        self.assertEqual([None] * 5, [node.buffer_hit_rate for node in nodes])
+        self.assertEqual((None, 40.9), (plan.planning_time, plan.execution_time))
+        self.assertEqual([0, 1, 3], plan.hot_path)
+
+    def test_parse_invalid_plan(self):
+        for plan in ['[]', '{"Plan": {}}', [{'Query Text': 'select 1'}], 1]:
+            # If: I parse output that is not a plan in the JSON format, then an error should be raised
+            with self.assertRaises(ValueError) as context:
+                parse_execution_plan(plan)
+            self.assertEqual(EXPLAIN_INVALID_PLAN_ERROR, str(context.exception))
+
+    def test_explain_query(self):
+        # If: I explain a statement on a connection that is not in a transaction
+        cursor = ExplainCursor(load_execution_plan('hash_join.json'))
+        connection = utils.MockConnection(cursor=cursor)
+        plan = explain_query(connection, '-- orders\nselect * from orders join customers on customer_id = customers.id;')
+
+        # Then: The statement should have been explained in a transaction that is rolled back
+        self.assertEqual([
+            'BEGIN',
+            'EXPLAIN (ANALYZE, BUFFERS, TIMING, FORMAT JSON) select * from orders join customers on customer_id = customers.id',
+            'ROLLBACK'
+        ], cursor.statements)
+        self.assertEqual('Hash Join', plan.root.node_type)
+
+    def test_explain_query_in_transaction(self):
+        # If: I explain a statement that fails on a connection in a transaction
+        cursor = ExplainCursor(None, psycopg2.ProgrammingError('syntax error'))
+        connection = utils.MockConnection(cursor=cursor)
+        connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        with self.assertRaises(psycopg2.ProgrammingError):
+            explain_query(connection, 'delete from t')
+
+        # Then: The statement should have been explained in a savepoint that is rolled back, leaving the transaction open
+        self.assertEqual([
+            'SAVEPOINT pgsqltoolsservice_explain',
+            'EXPLAIN (ANALYZE, BUFFERS, TIMING, FORMAT JSON) delete from t',
+            'ROLLBACK TO SAVEPOINT pgsqltoolsservice_explain; RELEASE SAVEPOINT pgsqltoolsservice_explain'
+        ], cursor.statements)
+
+    def test_explain_query_invalid(self):
+        connection = utils.MockConnection(cursor=ExplainCursor(None))
+        aborted_connection = utils.MockConnection(cursor=ExplainCursor(None))
+        aborted_connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+
+        for explained_connection, query_text, error in [
+                (connection, 'select 1; select 2', EXPLAIN_MULTIPLE_STATEMENTS_ERROR),
+                (connection, '-- nothing', EXPLAIN_MULTIPLE_STATEMENTS_ERROR),
+                (aborted_connection, 'select 1', EXPLAIN_FAILED_TRANSACTION_ERROR)]:
+            # If: I explain text that is not a single statement, or explain on a connection whose transaction is aborted
+            with self.assertRaises(ValueError) as context:
+                explain_query(explained_connection, query_text)
+
+            # Then: An error should be raised without running anything
+            self.assertEqual(error, str(context.exception))
+            self.assertEqual([], explained_connection.cursor().statements)
+
+
+def _get_nodes(root) -> list:
+    nodes = [root]
+    for child in root.children:
+        nodes.extend(_get_nodes(child))
+    return nodes
+
+
+if __name__ == '__main__':
+    unittest.main()
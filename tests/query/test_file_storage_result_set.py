@@ -3,6 +3,9 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
+import os
+import tempfile
 import unittest
 from unittest import mock
 from typing import Callable, List
@@ -10,7 +13,9 @@ from typing import Callable, List
 import tests.utils as utils
 from pgsqltoolsservice.query.result_set import ResultSetEvents
 from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
-from pgsqltoolsservice.query.contracts import DbCellValue, SaveResultsRequestParams
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbCellValue, DbColumn, SaveResultsRequestParams
+from pgsqltoolsservice.query.data_storage import StorageDataReader
 
 
 class TestFileStorageResultSet(unittest.TestCase):
@@ -20,30 +25,33 @@ class TestFileStorageResultSet(unittest.TestCase):
         self._id = 1
         self._batch_id = 1
         self._events = ResultSetEvents()
-        self._bytes_to_write = 10
-        self._writer = MockWriter(self._bytes_to_write)
+        self._location = 10
+        self._writer = MockWriter(self._location)
+        self._get_writer = mock.Mock(return_value=self._writer)
         self._row: List[DbCellValue] = ['Column_Val1', 'Column_Val2']
         self._reader = MockReader(self._row)
+        self._get_reader = mock.Mock(return_value=self._reader)
         self._file = 'TestFile'
-        self._cursor = utils.MockCursor([tuple([1, 2, 3]), tuple([5, 6, 7])])
+        self._rows = [tuple([1, 2, 3]), tuple([5, 6, 7])]
+        self._cursor = utils.MockCursor(self._rows)
 
         self._result_set = None
 
     def execute_with_patch(self, test: Callable):
 
         with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.create_file', new=mock.Mock(return_value=self._file)):
-            with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.get_writer', new=mock.Mock(return_value=self._writer)):
-                with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.get_reader', new=mock.Mock(return_value=self._reader)):
+            with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.get_writer', new=self._get_writer):
+                with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.get_mapped_reader', new=self._get_reader):
                     with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
                         self._result_set = FileStorageResultSet(self._id, self._batch_id, self._events)
                         test()
 
     def test_construction(self):
         def validate():
-            self.assertEqual(self._result_set._total_bytes_written, 0)
             self.assertEqual(self._result_set._has_been_read, False)
             self.assertEqual(self._result_set._output_file_name, self._file)
             self.assertEqual(len(self._result_set._file_offsets), 0)
+            self.assertEqual(self._result_set._file_offsets.typecode, 'q')
 
         self.execute_with_patch(validate)
 
@@ -103,14 +111,36 @@ class TestFileStorageResultSet(unittest.TestCase):
     def test_add_row(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._total_bytes_written = 10
             self._result_set.add_row(self._cursor)
 
-            self._writer.seek.assert_called_once_with(10)
-            self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write + 10)
+            # The row should be appended to the file rather than overwriting it
+            self._get_writer.assert_called_once_with(self._file, append=True)
             self._writer.write_row.assert_called_once()
 
-            self.assertEqual(self._result_set._file_offsets[0], 10)
+            self.assertEqual(list(self._result_set._file_offsets), [self._location])
+
+        self.execute_with_patch(test)
+
+    def test_reader_shared_until_file_written(self):
+        def test():
+            self._result_set._has_been_read = True
+            self._result_set._file_offsets = [5, 6, 3]
+
+            # If: I read rows several times
+            self._result_set.get_subset(0, 2)
+            self._result_set.get_subset(1, 3)
+            self._result_set.get_row(0)
+
+            # Then: The file should have been mapped once
+            self._get_reader.assert_called_once_with(self._file)
+
+            # If: I add a row and read again
+            self._result_set.add_row(self._cursor)
+            self._result_set.get_subset(0, 1)
+
+            # Then: The file should have been mapped again, and the previous map closed
+            self.assertEqual(self._get_reader.call_count, 2)
+            self._reader.close.assert_called_once()
 
         self.execute_with_patch(test)
 
@@ -138,17 +168,15 @@ class TestFileStorageResultSet(unittest.TestCase):
     def test_update_row(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._total_bytes_written = 10
 
             self._result_set._file_offsets = [5, 6, 3]
 
             self._result_set.update_row(1, self._cursor)
 
-            self._writer.seek.assert_called_once_with(10)
-            self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write + 10)
+            self._get_writer.assert_called_once_with(self._file, append=True)
             self._writer.write_row.assert_called_once()
 
-            self.assertEqual(self._result_set._file_offsets[1], 10)
+            self.assertEqual(self._result_set._file_offsets, [5, self._location, 3])
 
         self.execute_with_patch(test)
 
@@ -203,9 +231,212 @@ class TestFileStorageResultSet(unittest.TestCase):
             self.assertTrue(self._result_set._has_been_read)
 
             self.assertEqual(len(self._result_set._file_offsets), 2)
-            self.assertEqual(self._result_set._file_offsets[1], 10)
+            self.assertEqual(list(self._result_set._file_offsets), [self._location, self._location])
+
+            # The rows should have been fetched and written as a block, and the next fetch sized from their width
+            self.assertEqual(self._cursor.fetchmany.call_args_list, [mock.call(StorageDataReader.MIN_FETCH_SIZE), mock.call(StorageDataReader.MAX_FETCH_SIZE)])
+            self._writer.write_rows.assert_called_once_with(self._rows, self._result_set.columns_info)
+
+        self.execute_with_patch(test)
+
+    def test_read_result_to_end_reports_progress(self):
+        def test():
+            # Setup: Record the state of the result set each time an event fires
+            events = []
+
+            def record_event(name):
+                def on_event(result_set):
+                    # The rows reported so far should be readable, but not the rows after them
+                    subset = result_set.get_subset(0, result_set.row_count)
+                    with self.assertRaises(KeyError):
+                        result_set.get_subset(0, result_set.row_count + 1)
+                    events.append((name, result_set.row_count, subset.row_count, result_set.result_set_summary.complete))
+                return on_event
+
+            self._result_set.events = ResultSetEvents(record_event('completed'), record_event('updated'), record_event('available'))
+            self._result_set.ROWS_BEFORE_AVAILABLE = 1
+            self._result_set.UPDATE_INTERVAL_SECONDS = 0
+            self._result_set._fetch_size = 1
+
+            # If: I read the result
+            self._result_set.read_result_to_end(self._cursor)
+
+            # Then:
+            # ... The result set should be available after the first row, updated after the second, and then completed
+            self.assertEqual(events, [('available', 1, 1, False), ('updated', 2, 2, False), ('completed', 2, 2, True)])
+
+            # ... The rows should have been flushed before they were reported
+            self.assertEqual(self._writer.flush.call_count, 2)
+
+        self.execute_with_patch(test)
+
+    def test_read_result_to_end_small_result(self):
+        def test():
+            # Setup: Create a result set with events, where the result has fewer rows than are needed to report it early
+            events = ResultSetEvents(mock.Mock(), mock.Mock(), mock.Mock())
+            self._result_set.events = events
+
+            # If: I read the result
+            self._result_set.read_result_to_end(self._cursor)
+
+            # Then: Only the completed event should have fired
+            events._on_result_set_available.assert_not_called()
+            events._on_result_set_partially_loaded.assert_not_called()
+            events._on_result_set_completed.assert_called_once_with(self._result_set)
+
+        self.execute_with_patch(test)
+
+    def test_read_result_and_subset_from_file(self):
+        # Setup: Create a result set that spools a result wider than a page to a file
+        columns = []
+        for data_type in [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT]:
+            column = DbColumn()
+            column.data_type = data_type
+            columns.append(column)
+        rows = [(index, 'value {}'.format(index) * 100) for index in range(1000)]
+        result_set = FileStorageResultSet(self._id, self._batch_id)
+
+        try:
+            # If: I read the result and then a subset of it
+            with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=columns)):
+                result_set.read_result_to_end(utils.MockCursor(rows))
+            subset = result_set.get_subset(500, 600)
+
+            # Then: The rows of the subset should be read from the map of the file
+            self.assertEqual(rows[500:600], [tuple(cell.raw_object for cell in row) for row in subset.rows])
+
+            # If: I update a row
+            with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=columns)):
+                cursor = utils.MockCursor([(-1, 'updated')])
+                storage_data_reader = StorageDataReader(cursor)
+                storage_data_reader.read_row()
+                with mock.patch('pgsqltoolsservice.query.file_storage_result_set.StorageDataReader', new=mock.Mock(return_value=storage_data_reader)):
+                    result_set.update_row(550, cursor)
+
+            # Then: The updated row should be read, along with the others
+            subset = result_set.get_subset(549, 552)
+            self.assertEqual([rows[549], (-1, 'updated'), rows[551]], [tuple(cell.raw_object for cell in row) for row in subset.rows])
+        finally:
+            result_set._reader.close()
+            os.remove(result_set._output_file_name)
+
+    def test_read_binary_copy_to_end(self):
+        # Setup: Create a result set with events, and a cursor copying rows in the binary format a few bytes at a time
+        columns = []
+        for data_type in [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT]:
+            column = DbColumn()
+            column.data_type = data_type
+            columns.append(column)
+        rows = [(index, 'value {}'.format(index) * 10) for index in range(1000)]
+        cursor = utils.MockCopyCursor(utils.create_binary_copy_data(rows, [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT]), 100)
+        events = ResultSetEvents(mock.Mock(), mock.Mock(), mock.Mock())
+        result_set = FileStorageResultSet(self._id, self._batch_id, events)
+
+        try:
+            # If: I read the result with a COPY query
+            copy_query = 'COPY (SELECT 1) TO STDOUT (FORMAT binary)'
+            result_set.read_binary_copy_to_end(cursor, copy_query, columns)
+
+            # Then:
+            # ... The query should have been copied into the result set
+            self.assertEqual(copy_query, cursor.copy_expert.call_args[0][0])
+            self.assertTrue(result_set.has_been_read)
+            self.assertIs(columns, result_set.columns_info)
+            self.assertEqual(1000, result_set.row_count)
+
+            # ... The result set should have been reported as available once enough rows were spooled, and then completed
+            events._on_result_set_available.assert_called_once_with(result_set)
+            events._on_result_set_completed.assert_called_once_with(result_set)
+
+            # ... The rows should be decoded as they are read
+            subset = result_set.get_subset(500, 600)
+            self.assertEqual(rows[500:600], [tuple(cell.raw_object for cell in row) for row in subset.rows])
+        finally:
+            result_set.dispose()
+
+    def test_read_binary_copy_to_end_incomplete(self):
+        def test():
+            # If: I read a COPY whose data ends before its trailer
+            cursor = utils.MockCopyCursor(utils.create_binary_copy_data([(1,)], [datatypes.DATATYPE_INTEGER])[:-2])
+            column = DbColumn()
+            column.data_type = datatypes.DATATYPE_INTEGER
+
+            # Then: An error should be raised and the result set not be read
+            with self.assertRaises(ValueError):
+                self._result_set.read_binary_copy_to_end(cursor, 'COPY', [column])
+            self.assertFalse(self._result_set.has_been_read)
+
+        self.execute_with_patch(test)
+
+    def test_evict(self):
+        # Setup: Create a result set that has spooled a result to a file
+        columns = []
+        for data_type in [datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT]:
+            column = DbColumn()
+            column.data_type = data_type
+            columns.append(column)
+        rows = [(index, 'value {}'.format(index)) for index in range(10)]
+        result_set = FileStorageResultSet(self._id, self._batch_id)
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=columns)):
+            result_set.read_result_to_end(utils.MockCursor(rows))
+        result_set.get_subset(0, 5)
+
+        # ... The storage size should include the file and the locations of the rows
+        self.assertEqual(result_set.storage_size, os.path.getsize(result_set._output_file_name) + 8 * len(rows))
+
+        # If: I evict the result set
+        result_set.evict()
+
+        # Then:
+        # ... The file should have been deleted and the result set should use no storage
+        self.assertFalse(os.path.exists(result_set._output_file_name))
+        self.assertEqual(result_set.storage_size, 0)
+
+        # ... Reading the rows should fail with the eviction error
+        with self.assertRaises(ValueError) as context_manager:
+            result_set.get_subset(0, 5)
+        self.assertEqual(FileStorageResultSet.RESULT_SET_EVICTED_ERROR, context_manager.exception.args[0])
+        with self.assertRaises(ValueError) as context_manager:
+            result_set.get_row(0)
+        self.assertEqual(FileStorageResultSet.RESULT_SET_EVICTED_ERROR, context_manager.exception.args[0])
+
+        # ... Saving the rows should fail with the eviction error
+        on_failure = mock.Mock()
+        result_set.do_save_as('somepath', 0, 5, mock.MagicMock(), None, on_failure)
+        on_failure.assert_called_once_with(FileStorageResultSet.RESULT_SET_EVICTED_ERROR)
+
+        # If: I dispose of the evicted result set, the error should still be the eviction error
+        result_set.dispose()
+        with self.assertRaises(ValueError) as context_manager:
+            result_set.get_subset(0, 5)
+        self.assertEqual(FileStorageResultSet.RESULT_SET_EVICTED_ERROR, context_manager.exception.args[0])
+
+    def test_dispose(self):
+        def test():
+            # Setup: Read the result and a subset of it, so that the file is mapped
+            self._result_set.read_result_to_end(self._cursor)
+            self._result_set.get_subset(0, 1)
+
+            # If: I dispose of the result set
+            with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.delete_file') as delete_file_mock:
+                self._result_set.dispose()
+
+            # Then: The reader should have been closed, the file deleted and rows can no longer be read
+            self._reader.close.assert_called_once()
+            delete_file_mock.assert_called_once_with(self._file)
+            with self.assertRaises(ValueError) as context_manager:
+                self._result_set.get_subset(0, 1)
+            self.assertEqual(FileStorageResultSet.RESULT_SET_DISPOSED_ERROR, context_manager.exception.args[0])
 
-            self.assertEqual(self._writer.write_row.call_count, 2)
+        self.execute_with_patch(test)
+
+    def test_get_subset_end_index_out_of_range(self):
+        def test():
+            self._result_set._has_been_read = True
+            self._result_set._file_offsets = [5, 6, 3]
+
+            with self.assertRaises(KeyError):
+                self._result_set.get_subset(0, 4)
 
         self.execute_with_patch(test)
 
@@ -233,13 +464,70 @@ class TestFileStorageResultSet(unittest.TestCase):
             mock_file_factory.get_writer.assert_called_once_with(params.file_path)
 
             mock_reader.read_row.assert_called_once_with(self._result_set._file_offsets[0], 0, self._result_set.columns_info)
-            mock_writer.write_row.assert_called_once_with(self._row, self._result_set.columns_info)
+            mock_writer.write_rows.assert_called_once_with([self._row], self._result_set.columns_info)
 
             mock_writer.complete_write.assert_called_once()
             on_success.assert_called_once()
 
         self.execute_with_patch(test)
 
+    def test_do_save_as_writes_rows_a_page_at_a_time(self):
+        def test():
+            # Setup: Store rows in two pages, the second of which holds a row updated after the others
+            writer = MockWriter(10)
+            reader = MockReader(self._row)
+            file_factory = mock.MagicMock()
+            file_factory.get_writer = mock.Mock(return_value=writer)
+            file_factory.get_reader = mock.Mock(return_value=reader)
+            page_size = 1 << 16
+            self._result_set._has_been_read = True
+            self._result_set._file_offsets = [0, 1, 2 * page_size, 2]
+
+            # If: I save all of the rows
+            self._result_set.do_save_as('somepath', 0, 4, file_factory, None, None)
+
+            # Then: The consecutive rows of each page should have been written together
+            self.assertEqual([len(call[0][0]) for call in writer.write_rows.call_args_list], [2, 1, 1])
+            writer.complete_write.assert_called_once()
+
+        self.execute_with_patch(test)
+
+    def test_do_save_as_evicted_during_save(self):
+        def test():
+            # Setup: Store rows in two pages, and evict the result set once the rows of the first page are written
+            reader = MockReader(self._row)
+            page_size = 1 << 16
+            self._result_set._has_been_read = True
+            self._result_set._file_offsets = array('q', [0, 2 * page_size])
+
+            with tempfile.TemporaryDirectory() as directory:
+                file_path = os.path.join(directory, 'saved.csv')
+                writer = MockWriter(10)
+
+                def write_rows_and_evict(rows, columns_info):
+                    open(file_path, 'w').close()
+                    with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.delete_file'):
+                        self._result_set.evict()
+
+                writer.write_rows.side_effect = write_rows_and_evict
+                file_factory = mock.MagicMock()
+                file_factory.get_writer = mock.Mock(return_value=writer)
+                file_factory.get_reader = mock.Mock(return_value=reader)
+                on_success, on_failure = mock.Mock(), mock.Mock()
+
+                # If: I save all of the rows
+                self._result_set.do_save_as(file_path, 0, 2, file_factory, on_success, on_failure)
+
+                # Then: The save should have failed with the eviction error, without reading the evicted rows
+                on_failure.assert_called_once_with(FileStorageResultSet.RESULT_SET_EVICTED_ERROR)
+                on_success.assert_not_called()
+                reader.read_row.assert_called_once_with(0, 0, self._result_set.columns_info)
+
+                # ... And the partial file should have been removed
+                self.assertFalse(os.path.exists(file_path))
+
+        self.execute_with_patch(test)
+
 
 class MockType:
     def __enter__(cls):
@@ -252,12 +540,16 @@ class MockType:
 class MockReader(MockType):
     def __init__(self, row: List[DbCellValue]) -> None:
         self.read_row = mock.Mock(return_value=row)
+        self.close = mock.MagicMock()
 
 
 class MockWriter(MockType):
-    def __init__(self, bytes_written: int) -> None:
-        self.write_row = mock.Mock(return_value=bytes_written)
-        self.seek = mock.MagicMock()
+    def __init__(self, location: int) -> None:
+        self.bytes_written = 0
+        self.write_row = mock.Mock(return_value=location)
+        self.write_rows = mock.Mock(side_effect=lambda rows, columns_info: [location] * len(rows))
+        self.write_binary_copy_row = mock.Mock(return_value=location)
+        self.flush = mock.MagicMock()
         self.complete_write = mock.MagicMock()
 
 
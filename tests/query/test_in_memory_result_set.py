@@ -76,7 +76,7 @@ class TestInMemoryResultSet(unittest.TestCase):
         self.assertEqual(self._result_set.rows[0], self._first_row)
         self.assertEqual(self._result_set.rows[1], self._second_row)
 
-        get_column_info_mock.assert_called_once_with(self._cursor.description, self._cursor.connection)
+        get_column_info_mock.assert_called_once_with(self._cursor.description, self._cursor.connection, None)
 
     def test_save_as_result_set_when_not_read(self):
         params = SaveResultsRequestParams()
@@ -119,7 +119,7 @@ class TestInMemoryResultSet(unittest.TestCase):
 
         mock_file_factory.get_writer.assert_called_once_with(params.file_path)
 
-        mock_writer.write_row.assert_called_once_with(self._first_row, self._result_set.columns_info)
+        mock_writer.write_rows.assert_called_once_with([self._first_row], self._result_set.columns_info)
 
         mock_writer.complete_write.assert_called_once()
         on_success.assert_called_once()
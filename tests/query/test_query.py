@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import contextlib
 import unittest
 from unittest import mock
 
@@ -86,6 +87,88 @@ class TestQuery(unittest.TestCase):
         # And the query is marked as executed
         self.assertIs(self.query.execution_state, ExecutionState.EXECUTED)
 
+    def test_cancel_during_execution(self):
+        """Test that canceling a query cancels the running statement on its connection and skips the remaining batches"""
+        # Set up the first statement to be canceled while it runs, like the server does once it gets the cancel key
+        def cancel_statement(statement):
+            self.query.cancel()
+            self.connection.cancel.assert_called_once_with()
+            raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+        self.cursor.execute.side_effect = cancel_statement
+
+        # If I execute the query, then the error of the canceled statement is raised
+        with self.assertRaises(psycopg2.DatabaseError):
+            self.query.execute(self.connection)
+
+        # And the second batch is not executed, with the query marked as canceled and executed
+        self.cursor.execute.assert_called_once_with(self.statement_list[0])
+        self.assertTrue(self.query.is_canceled)
+        self.assertIs(self.query.execution_state, ExecutionState.EXECUTED)
+
+        # And canceling the query once it was executed does not cancel the connection's next statement
+        self.query.cancel()
+        self.connection.cancel.assert_called_once_with()
+
+    def test_cancel_before_batch_runs(self):
+        """Test that a cancel landing after the query checked for it, before the batch runs, skips the batch"""
+        # Set up the query to be canceled once the cancellation of the first batch's statements is set up
+        canceling_statements = self.query._cancellation_token.canceling_statements
+
+        @contextlib.contextmanager
+        def cancel_on_enter(connection):
+            with canceling_statements(connection):
+                self.query.cancel()
+                yield
+
+        # If I execute the query
+        with mock.patch.object(self.query._cancellation_token, 'canceling_statements', new=cancel_on_enter):
+            self.query.execute(self.connection)
+
+        # Then no batch is executed, and the query is marked as canceled and executed
+        self.cursor.execute.assert_not_called()
+        self.assertTrue(self.query.is_canceled)
+        self.assertIs(self.query.execution_state, ExecutionState.EXECUTED)
+
+    def test_actual_execution_plan_is_rolled_back(self):
+        """Test that statements explained with ANALYZE run in a transaction that is rolled back"""
+        # If I execute a query with the actual execution plan of its statements
+        options = ExecutionPlanOptions()
+        options.include_actual_execution_plan_xml = True
+        query = Query(self.query_uri, 'delete from t1;', QueryExecutionSettings(options, ResultSetStorageType.FILE_STORAGE), QueryEvents())
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=self.get_columns_info_mock):
+            query.execute(self.connection)
+
+        # Then the statement was explained with valid syntax, and its changes were rolled back before auto commit was restored
+        self.cursor.execute.assert_called_once_with('EXPLAIN ANALYZE delete from t1;')
+        self.connection.rollback.assert_called_once_with()
+        self.assertTrue(self.connection.autocommit)
+
+    def test_batch_failure_on_lost_connection(self):
+        """Test that the error of a batch is raised when the connection cannot be reset after it"""
+        options = ExecutionPlanOptions()
+        options.include_actual_execution_plan_xml = True
+        for connection_closed in [True, False]:
+            # Set up the statement to fail, either closing the connection or leaving it unable to roll back
+            cursor = utils.MockCursor(self.mock_query_results)
+            connection = utils.MockConnection(cursor=cursor)
+            connection.rollback.side_effect = psycopg2.InterfaceError('connection already closed')
+
+            def fail_statement(statement, connection=connection, connection_closed=connection_closed):
+                if connection_closed:
+                    connection.close()
+                raise psycopg2.OperationalError('server closed the connection unexpectedly')
+            cursor.execute.side_effect = fail_statement
+
+            # If I execute a query with the actual execution plan of its statements, then the error of the statement is raised
+            query = Query(self.query_uri, 'delete from t1;', QueryExecutionSettings(options, ResultSetStorageType.FILE_STORAGE), QueryEvents())
+            with self.assertRaises(psycopg2.DatabaseError) as context:
+                query.execute(connection)
+            self.assertIsInstance(context.exception.__cause__, psycopg2.OperationalError)
+
+            # And the connection is only rolled back if it is open, with the query marked as executed
+            self.assertEqual(0 if connection_closed else 1, connection.rollback.call_count)
+            self.assertIs(query.execution_state, ExecutionState.EXECUTED)
+
     def test_batch_selections(self):
         """Test that the query sets up batch objects with correct selection information"""
         full_query = '''select * from
@@ -213,7 +296,7 @@ select * from t1;'''
 
         self.query.save_as(params, file_factory, on_success, on_error)
 
-        batch_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error)
+        batch_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error, None)
 
 
 def _tuple_from_selection_data(data: SelectionData):
@@ -0,0 +1,129 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from pgsqltoolsservice.query import ResultStorageManager
+
+
+class TestResultStorageManager(unittest.TestCase):
+
+    def test_update_usage_within_budgets(self):
+        # Setup: Create a manager with budgets the result sets fit in
+        manager = ResultStorageManager(100, 200)
+        first = MockResultSet(40)
+        second = MockResultSet(50)
+
+        # If: I record the usage of result sets of two sessions
+        manager.update_usage('session1', first)
+        manager.update_usage('session2', second)
+
+        # Then: Nothing should have been evicted and the usage of each session should be reported
+        first.evict.assert_not_called()
+        second.evict.assert_not_called()
+        self.assertEqual(manager.evicted_count, 0)
+        self.assertEqual(manager.get_usage(), ({'session1': 40, 'session2': 50}, {'session1': 1, 'session2': 1}))
+
+    def test_update_usage_over_session_budget(self):
+        # Setup: Create a manager with a session budget the result sets of a session do not fit in together
+        manager = ResultStorageManager(100, 0)
+        first = MockResultSet(60)
+        second = MockResultSet(60)
+        other_session = MockResultSet(60)
+        manager.update_usage('session1', first)
+        manager.update_usage('session2', other_session)
+
+        # If: Another result set of the session is recorded
+        manager.update_usage('session1', second)
+
+        # Then: The older result set of the session should have been evicted, and not the one of the other session
+        first.evict.assert_called_once()
+        second.evict.assert_not_called()
+        other_session.evict.assert_not_called()
+        self.assertEqual(manager.evicted_count, 1)
+        self.assertEqual(manager.get_usage(), ({'session1': 60, 'session2': 60}, {'session1': 1, 'session2': 1}))
+
+    def test_update_usage_over_total_budget_evicts_least_recently_viewed(self):
+        # Setup: Create a manager with a total budget that fits two result sets, the first of which has been viewed last
+        manager = ResultStorageManager(0, 100)
+        first = MockResultSet(50)
+        second = MockResultSet(50)
+        manager.update_usage('session1', first)
+        manager.update_usage('session2', second)
+        manager.mark_viewed(first)
+
+        # If: A third result set is recorded
+        third = MockResultSet(50)
+        manager.update_usage('session3', third)
+
+        # Then: The result set viewed least recently should have been evicted
+        first.evict.assert_not_called()
+        second.evict.assert_called_once()
+        third.evict.assert_not_called()
+
+    def test_update_usage_does_not_evict_result_sets_being_read(self):
+        # Setup: Create a manager with a result set that is still being read
+        manager = ResultStorageManager(0, 100)
+        being_read = MockResultSet(80, has_been_read=False)
+        manager.update_usage('session1', being_read)
+
+        # If: The result set grows past the budget, and another one is recorded
+        being_read.storage_size = 120
+        manager.update_usage('session1', being_read)
+        other = MockResultSet(10, has_been_read=False)
+        manager.update_usage('session2', other)
+
+        # Then: Neither result set should have been evicted
+        being_read.evict.assert_not_called()
+        other.evict.assert_not_called()
+        self.assertEqual(manager.evicted_count, 0)
+
+    def test_release_session(self):
+        # Setup: Create a manager with result sets of two sessions
+        manager = ResultStorageManager()
+        first = MockResultSet(10)
+        second = MockResultSet(10)
+        other_session = MockResultSet(10)
+        manager.update_usage('session1', first)
+        manager.update_usage('session1', second)
+        manager.update_usage('session2', other_session)
+
+        # If: I release the first session
+        manager.release_session('session1')
+
+        # Then: Only the result sets of the session should have been disposed of and stop being tracked
+        first.dispose.assert_called_once()
+        second.dispose.assert_called_once()
+        other_session.dispose.assert_not_called()
+        self.assertEqual(manager.get_usage(), ({'session2': 10}, {'session2': 1}))
+
+    def test_close(self):
+        # Setup: Create a manager with a result set
+        manager = ResultStorageManager()
+        result_set = MockResultSet(10)
+        manager.update_usage('session1', result_set)
+
+        # If: I close the manager
+        with mock.patch('pgsqltoolsservice.query.data_storage.service_buffer_file_stream.delete_storage_directory') as delete_mock:
+            manager.close()
+
+        # Then: The result set should have been disposed of and the storage of the process deleted
+        result_set.dispose.assert_called_once()
+        delete_mock.assert_called_once()
+        self.assertEqual(manager.get_usage(), ({}, {}))
+
+
+class MockResultSet:
+
+    def __init__(self, storage_size: int, has_been_read: bool = True) -> None:
+        self.storage_size = storage_size
+        self.has_been_read = has_been_read
+        self.evict = mock.Mock()
+        self.dispose = mock.Mock()
+
+
+if __name__ == '__main__':
+    unittest.main()
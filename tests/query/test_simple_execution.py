@@ -0,0 +1,141 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test query.SimpleExecution"""
+
+import datetime
+import decimal
+import json
+import unittest
+from unittest import mock
+import uuid
+
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.query.contracts import DbColumn
+from pgsqltoolsservice.query.simple_execution import SimpleExecution, SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR
+
+
+class FakeCursor:
+    """Cursor that returns fixed rows, with the attributes psycopg2 gives named and client cursors"""
+
+    def __init__(self, rows, name: str = None, returns_rows: bool = True):
+        self.name = name
+        self.statements = []
+        self.fetch_sizes = []
+        self.description = None
+        self.rowcount = -1
+        self.rownumber = 0
+        self.closed = False
+        self._rows = rows
+        self._returns_rows = returns_rows
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        # Client cursors describe their rows once executed, while named cursors do so once rows are fetched
+        if self.name is None:
+            self.rowcount = len(self._rows)
+            self.description = [('id', 23)] if self._returns_rows else None
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        self.description = [('id', 23)]
+        rows = self._rows[self.rownumber:self.rownumber + size]
+        self.rownumber += len(rows)
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class TestSimpleExecution(unittest.TestCase):
+
+    def setUp(self):
+        self.columns_info = [DbColumn()]
+        self.columns_info[0].data_type = datatypes.DATATYPE_INTEGER
+        self.get_columns_info = mock.Mock(return_value=self.columns_info)
+        patch = mock.patch('pgsqltoolsservice.query.simple_execution.get_columns_info', new=self.get_columns_info)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def _execute(self, query_text: str, cursor: FakeCursor) -> SimpleExecution:
+        connection = mock.Mock()
+        connection.cursor = mock.Mock(return_value=cursor)
+        execution = SimpleExecution(connection, query_text)
+        execution.execute()
+        return execution
+
+    def test_select_paged(self):
+        cursor = FakeCursor([(1,), (2,), (3,), (4,)], name='cursor')
+
+        # If: I read the rows of a SELECT in pages of 2 rows
+        execution = self._execute('SELECT id FROM t;', cursor)
+        pages = [execution.fetch(2), execution.fetch(2)]
+
+        # Then: Each page should have been fetched from the server as it was read, continuing the row IDs
+        self.assertEqual([[0, 1], [2, 3]], [[row[0].row_id for row in page] for page in pages])
+        self.assertEqual([2, 2], cursor.fetch_sizes)
+        self.assertEqual(self.columns_info, execution.columns_info)
+
+        # ... And the execution should only be complete once a fetch returns fewer rows than asked for
+        self.assertFalse(execution.is_complete)
+        self.assertEqual([], execution.fetch(2))
+        self.assertTrue(execution.is_complete)
+
+    def test_select_without_limit(self):
+        # If: I read the rows of a SELECT without a maximum number of rows
+        cursor = FakeCursor([(1,), (None,)], name='cursor')
+        execution = self._execute('SELECT id FROM t', cursor)
+        rows = execution.fetch()
+
+        # Then: Every row should have been read, with NULL displayed for null values
+        self.assertEqual([('1', False), ('NULL', True)], [(str(row[0].display_value), row[0].is_null) for row in rows])
+        self.assertTrue(execution.is_complete)
+
+        # If: I close the execution, then its cursor should have been closed
+        execution.close()
+        self.assertTrue(cursor.closed)
+
+    def test_values_as_stored(self):
+        # Setup: Columns whose values psycopg2 returns as objects that cannot be serialized to JSON
+        columns_info = []
+        for data_type in [datatypes.DATATYPE_NUMERIC, datatypes.DATATYPE_DATE, datatypes.DATATYPE_UUID]:
+            column = DbColumn()
+            column.data_type = data_type
+            columns_info.append(column)
+        self.get_columns_info.return_value = columns_info
+        row_id = uuid.UUID('0d4d0bfa-92b8-4c61-9e4b-4b1c3f8f23a8')
+        cursor = FakeCursor([(decimal.Decimal('12.50'), datetime.date(2020, 2, 29), row_id), (None, None, None)], name='cursor')
+
+        # If: I read the rows of a SELECT of the columns
+        rows = self._execute('SELECT amount, day, id FROM t', cursor).fetch()
+
+        # Then: The values should be the ones read back from stored rows, which serialize to JSON unchanged
+        self.assertEqual(['12.50', '2020-02-29', str(row_id)], [cell.raw_object for cell in rows[0]])
+        self.assertEqual(['12.50', '2020-02-29', str(row_id)], json.loads(json.dumps([cell.raw_object for cell in rows[0]])))
+        self.assertEqual(['12.50', '2020-02-29', str(row_id)], [cell.display_value for cell in rows[0]])
+
+        # ... And NULL values should stay NULL
+        self.assertEqual([(None, True, 'NULL')] * 3, [(cell.raw_object, cell.is_null, cell.display_value) for cell in rows[1]])
+
+    def test_statement_without_rows(self):
+        # If: I run a statement that returns no rows
+        cursor = FakeCursor([], returns_rows=False)
+        execution = self._execute("UPDATE t SET id = 1", cursor)
+
+        # Then: It should have been run on a client cursor, and be complete without fetching
+        self.assertEqual([], execution.fetch(10))
+        self.assertTrue(execution.is_complete)
+        self.assertEqual([], cursor.fetch_sizes)
+        self.assertEqual([], execution.columns_info)
+
+    def test_multiple_statements(self):
+        # If: I create an execution with more than one statement, then an error should be raised
+        with self.assertRaises(ValueError) as context:
+            SimpleExecution(mock.Mock(), 'SELECT 1; SELECT 2')
+        self.assertEqual(SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR, str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
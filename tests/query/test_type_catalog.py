@@ -0,0 +1,114 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from pgsqltoolsservice.query.column_info import get_columns_info
+from pgsqltoolsservice.query.type_catalog import TypeCatalog
+import tests.utils as utils
+
+
+# Rows of pg_type as (oid, typname, typcategory, typelem, typrelid)
+PG_TYPE_ROWS = [
+    (16, 'bool', 'B', 0, 0),
+    (23, 'int4', 'N', 0, 0),
+    (25, 'text', 'S', 0, 0),
+    (1007, '_int4', 'A', 23, 0),
+    (16390, 'my_table', 'C', 0, 16388)
+]
+
+Column = namedtuple('Column', ['name', 'type_code', 'display_size', 'internal_size', 'precision', 'scale', 'null_ok'])
+
+
+class TypeCursor(utils.MockCursor):
+    """Cursor over pg_type that answers the queries for all types and for types by OID, counting the round trips"""
+
+    def __init__(self):
+        utils.MockCursor.__init__(self, [])
+        self.execute = mock.Mock(side_effect=self._execute)
+        self.fetchall = mock.Mock(side_effect=lambda: self._rows)
+        self._rows = []
+
+    def _execute(self, query, oids):
+        if oids is None:
+            self._rows = [row[:4] for row in PG_TYPE_ROWS if row[4] == 0]
+        else:
+            self._rows = [row[:4] for row in PG_TYPE_ROWS if row[0] in oids]
+
+
+class TestTypeCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self._cursor = TypeCursor()
+        self._connection = utils.MockConnection(cursor=self._cursor)
+        self._catalog = TypeCatalog()
+
+    def test_get_types_loads_types_once(self):
+        # If: I get types twice
+        types = self._catalog.get_types(self._connection, [23, 1007])
+        self._catalog.get_types(self._connection, [16, 25])
+
+        # Then: The types should have been loaded in a single query, with their names, categories and element types
+        self._cursor.execute.assert_called_once()
+        self.assertEqual(sorted(types), [23, 1007])
+        self.assertEqual((types[1007].name, types[1007].category, types[1007].element_oid), ('_int4', 'A', 23))
+
+    def test_get_types_queries_types_not_loaded(self):
+        # If: I get the row type of a table, which is not loaded up front, twice
+        types = self._catalog.get_types(self._connection, [23, 16390])
+        self._catalog.get_types(self._connection, [16390])
+
+        # Then: The row type should have been queried once, after the types were loaded
+        self.assertEqual(self._cursor.execute.call_count, 2)
+        self.assertEqual(self._cursor.execute.call_args_list[1][0][1], [16390])
+        self.assertEqual(types[16390].name, 'my_table')
+
+    def test_get_types_missing_type(self):
+        # If: I get a type that does not exist
+        types = self._catalog.get_types(self._connection, [23, 99999])
+
+        # Then: Only the types that exist should be returned
+        self.assertEqual(sorted(types), [23])
+
+    def test_invalidate(self):
+        # Setup: Load the types
+        self._catalog.get_types(self._connection, [23])
+
+        # If: I invalidate the catalog and get types again
+        self._catalog.invalidate()
+        types = self._catalog.get_types(self._connection, [23, 25])
+
+        # Then: Only the requested types should have been queried again
+        self.assertEqual(self._cursor.execute.call_count, 2)
+        self.assertEqual(sorted(self._cursor.execute.call_args_list[1][0][1]), [23, 25])
+        self.assertEqual(types[25].name, 'text')
+
+    def test_round_trips_for_many_result_sets(self):
+        # Setup: Describe the columns of a small result set
+        description = [Column('id', 23, None, None, None, None, True), Column('name', 25, None, None, None, None, True)]
+        result_set_count = 1000
+
+        # If: I get the columns of many result sets without a catalog
+        for _ in range(result_set_count):
+            columns_info = get_columns_info(description, self._connection)
+        round_trips_without_catalog = self._cursor.execute.call_count
+
+        # ... and with a catalog
+        self._cursor.execute.reset_mock()
+        for _ in range(result_set_count):
+            cached_columns_info = get_columns_info(description, self._connection, self._catalog)
+        round_trips_with_catalog = self._cursor.execute.call_count
+
+        # Then: Every result set should have queried its types without the catalog, and only the first one with it
+        self.assertEqual(round_trips_without_catalog, result_set_count)
+        self.assertEqual(round_trips_with_catalog, 1)
+        self.assertEqual([column.data_type for column in cached_columns_info], ['int4', 'text'])
+        self.assertEqual([column.data_type for column in columns_info], ['int4', 'text'])
+
+
+if __name__ == '__main__':
+    unittest.main()
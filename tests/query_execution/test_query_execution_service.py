@@ -16,30 +16,38 @@ import os
 from os import listdir
 from os.path import isfile, join
 
-from pgsqltoolsservice.connection import ConnectionService, ConnectionInfo
+from pgsqltoolsservice.connection import ConnectionInfo, ConnectionService
 from pgsqltoolsservice.query_execution.query_execution_service import (
-    QueryExecutionService, CANCELATION_QUERY, NO_QUERY_MESSAGE, ExecuteRequestWorkerArgs)
+    QueryExecutionService, NO_QUERY_MESSAGE, ExecuteRequestWorkerArgs, SIMPLE_EXECUTE_CONTINUATION_ERROR, SIMPLE_EXECUTE_MAX_ROWS_ERROR,
+    SIMPLE_EXECUTION_TIMEOUT_SECONDS)
 from pgsqltoolsservice.query_execution.contracts import (
     ExecuteDocumentSelectionParams, ExecuteStringParams, ExecuteRequestParamsBase)
 from pgsqltoolsservice.utils import constants
 from pgsqltoolsservice.hosting import JSONRPCServer, ServiceProvider, IncomingMessageConfiguration
 from pgsqltoolsservice.query_execution.contracts import (
     ExecutionPlanOptions, MESSAGE_NOTIFICATION, SubsetParams, BATCH_COMPLETE_NOTIFICATION,
-    BATCH_START_NOTIFICATION, QUERY_COMPLETE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION,
-    QueryCancelResult, QueryDisposeParams, SimpleExecuteRequest, ExecuteDocumentStatementParams,
+    BATCH_START_NOTIFICATION, QUERY_COMPLETE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION,
+    RESULT_SET_UPDATED_NOTIFICATION,
+    QueryCancelResult, QueryDisposeParams, SimpleExecuteRequest, SimpleExecuteResponse, ExecuteDocumentStatementParams,
     SaveResultsAsJsonRequestParams, SaveResultRequestResult,
-    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams
+    SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams, ResultStorageUsageParams,
+    SAVE_AS_PROGRESS_NOTIFICATION, SaveResultsProgressParams,
+    ExportQueryToFileParams, ExportQueryToFileResult, QueryExecutionPlanRequest, QueryExecutionResponse
 )
-from pgsqltoolsservice.query.contracts import DbColumn, ResultSetSubset, SelectionData, SubsetResult
+from pgsqltoolsservice.query.contracts import DbColumn, ResultSetSubset, SelectionData
+from pgsqltoolsservice.query.simple_execution import SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR
+from pgsqltoolsservice.query.file_storage_result_set import FileStorageResultSet
 from pgsqltoolsservice.query import (
     Batch, create_result_set, ExecutionState, Query, QueryEvents, QueryExecutionSettings,
     ResultSetStorageType
 )
-from pgsqltoolsservice.connection.contracts import ConnectionType, ConnectionDetails
+from pgsqltoolsservice.connection.contracts import ConnectionType
+from pgsqltoolsservice.parsers import datatypes
+from pgsqltoolsservice.workspace.contracts import Configuration
 from tests.integration import get_connection_details, integration_test
 import tests.utils as utils
 from pgsqltoolsservice.query.data_storage import (
-    SaveAsCsvFileStreamFactory, SaveAsJsonFileStreamFactory, SaveAsExcelFileStreamFactory
+    StorageDataReader, SaveAsCsvFileStreamFactory, SaveAsJsonFileStreamFactory, SaveAsExcelFileStreamFactory
 )
 
 
@@ -63,17 +71,13 @@ class TestQueryService(unittest.TestCase):
         self.query_execution_service._service_provider = self.service_provider
         self.request_context = utils.MockRequestContext()
 
-        self.cursor_cancel = utils.MockCursor(None)
-        self.connection_cancel = utils.MockConnection(cursor=self.cursor_cancel)
-        self.cursor_cancel.connection = self.connection_cancel
-
-        def connection_side_effect(owner_uri: str, connection_type: ConnectionType):
-            if connection_type is ConnectionType.QUERY_CANCEL:
-                return self.connection_cancel
-            else:
-                return self.connection
-
-        self.connection_service.get_connection = mock.Mock(side_effect=connection_side_effect)
+        self.connection_service.get_connection = mock.Mock(return_value=self.connection)
+        self.connection_service.lease_connection = mock.Mock(return_value=self.connection)
+        self.connection_service.release_connection = mock.Mock()
+        self.cursor.name = 'simple_execute'
+        self.columns_info = [DbColumn(), DbColumn()]
+        self.columns_info[0].data_type = datatypes.DATATYPE_INTEGER
+        self.columns_info[1].data_type = datatypes.DATATYPE_TEXT
 
     def tearDown(self):
         generated_files_path = '.'
@@ -85,6 +89,18 @@ class TestQueryService(unittest.TestCase):
         for file_to_remove in files_to_remove:
             os.remove(file_to_remove)
 
+    def _send_simple_execute(self, query_string: str = None, max_rows: int = None, continuation_token: str = None) -> None:
+        """Sends a simple execute request for the test URI, running it to completion before returning"""
+        params = SimpleExecuteRequest()
+        params.owner_uri = 'test_uri'
+        params.query_string = query_string
+        params.max_rows = max_rows
+        params.continuation_token = continuation_token
+        self.request_context = utils.MockRequestContext()
+        with mock.patch('threading.Thread', new=SynchronousThread), \
+                mock.patch('pgsqltoolsservice.query.simple_execution.get_columns_info', new=mock.Mock(return_value=self.columns_info)):
+            self.query_execution_service._handle_simple_execute_request(self.request_context, params)
+
     def test_initialization(self):
         # Setup: Create a capabilities service with a mocked out service
         # provider
@@ -429,16 +445,13 @@ class TestQueryService(unittest.TestCase):
 
         query = self.query_execution_service.query_results['test_uri']
 
-        # Then we must have ran execute for a batch, and executed 'SELECTED pg_cancel_backend(pid)
-        # to cancel the query
+        # Then we must have ran execute for a batch, and canceled the statement with the cancel key of the
+        # query's connection, without using another connection
         self.cursor.execute.assert_called_once()
-        self.cursor_cancel.execute.assert_called_once()
+        self.connection.cancel.assert_called_once_with()
         self.assertTrue(isinstance(self.request_context.last_response_params, QueryCancelResult))
         self.assertEqual(self.request_context.last_response_params.messages, None)
-
-        # Check the positional args for the first arg of of the first (and only) call
-        # is the query string to cancel the ongoing query
-        self.assertEqual(self.cursor_cancel.execute.call_args_list[0][0][0], CANCELATION_QUERY)
+        self.assertNotIn(ConnectionType.QUERY_CANCEL, [call[0][1] for call in self.connection_service.get_connection.call_args_list])
 
         # The batch is also marked as canceled and executed. There should have been no commits and
         # we should have rolled back. During execute_query call,
@@ -474,16 +487,11 @@ class TestQueryService(unittest.TestCase):
         self.query_execution_service.owner_to_thread_map[execute_params.owner_uri].join()
         query = self.query_execution_service.query_results[execute_params.owner_uri]
 
-        # Then the execute request handler's execute is not called,
-        # as well as the cancel query's execute of 'SELECT pg_cancel_backend(pid) is called,
-        # but doesn't do anything
+        # Then the execute request handler's execute is not called, and no statement had to be canceled
         self.cursor.execute.assert_not_called()
-        self.cursor_cancel.execute.assert_called_once()
+        self.connection.cancel.assert_not_called()
         self.assertTrue(isinstance(self.request_context.last_response_params, QueryCancelResult))
         self.assertEqual(self.request_context.last_response_params.messages, None)
-        # Check the positional args for the first arg of of the first (and only) call
-        # is the query string to cancel the ongoing query
-        self.assertEqual(self.cursor_cancel.execute.call_args_list[0][0][0], CANCELATION_QUERY)
 
         # The batch should be marked as canceled, the state should be executed, and we should have rolled back
         self.assertTrue(query.is_canceled)
@@ -510,9 +518,9 @@ class TestQueryService(unittest.TestCase):
         query = self.query_execution_service.query_results['test_uri']
 
         # Then execute() in the execute query handler should have been called and
-        # the cancel cursor's execute() should not have been called
+        # the connection should not have been canceled
         self.cursor.execute.assert_called_once()
-        self.cursor_cancel.execute.assert_not_called()
+        self.connection.cancel.assert_not_called()
         self.assertTrue(isinstance(self.request_context.last_response_params, QueryCancelResult))
         self.assertIsNotNone(self.request_context.last_response_params.messages)
 
@@ -547,6 +555,127 @@ class TestQueryService(unittest.TestCase):
         self.assertEqual(call_methods_list.count(BATCH_COMPLETE_NOTIFICATION), 1)
         self.assertEqual(call_methods_list.count(QUERY_COMPLETE_NOTIFICATION), 1)
 
+    def test_query_execution_streams_result_set(self):
+        """Test that a result set is reported as available and updated while its rows are read"""
+        # Set up params that are sent as part of a query execution request, and fetch and report the result set one row at a time
+        params = get_execute_string_params()
+
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])), \
+                mock.patch.object(StorageDataReader, 'MIN_FETCH_SIZE', 1), mock.patch.object(StorageDataReader, 'MAX_FETCH_SIZE', 1), \
+                mock.patch.object(FileStorageResultSet, 'ROWS_BEFORE_AVAILABLE', 1), \
+                mock.patch.object(FileStorageResultSet, 'UPDATE_INTERVAL_SECONDS', 0):
+            # If we handle an execute query request
+            self.query_execution_service._handle_execute_query_request(self.request_context, params)
+            self.query_execution_service.owner_to_thread_map[params.owner_uri].join()
+
+        # Then the result set was reported as available after the first row, updated after the second row, and then completed
+        result_set_calls = [call[1] for call in self.request_context.send_notification.mock_calls
+                            if call[1][0] in [RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION]]
+        self.assertEqual([call[0] for call in result_set_calls],
+                         [RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION])
+        self.assertEqual([(call[1].result_set_summary.row_count, call[1].result_set_summary.complete) for call in result_set_calls],
+                         [(1, False), (2, False), (2, True)])
+
+    def test_query_execution_tracks_result_storage(self):
+        """Test that the result sets of queries are tracked until the query is executed again or disposed"""
+        params = get_execute_string_params()
+
+        def execute_query():
+            with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
+                self.query_execution_service._handle_execute_query_request(self.request_context, params)
+                self.query_execution_service.owner_to_thread_map[params.owner_uri].join()
+            return self.query_execution_service.query_results[params.owner_uri].batches[0].result_set
+
+        # If I execute a query
+        first_result_set = execute_query()
+
+        # Then the result set of the query should be tracked
+        bytes_used, result_set_counts = self.query_execution_service._result_storage.get_usage()
+        self.assertEqual(result_set_counts, {params.owner_uri: 1})
+        self.assertEqual(bytes_used, {params.owner_uri: first_result_set.storage_size})
+        self.assertTrue(os.path.exists(first_result_set._output_file_name))
+
+        # If I execute the query again
+        second_result_set = execute_query()
+
+        # Then the file of the first result set should have been deleted, and only the new one tracked
+        self.assertFalse(os.path.exists(first_result_set._output_file_name))
+        self.assertEqual(self.query_execution_service._result_storage.get_usage()[1], {params.owner_uri: 1})
+
+        # If I dispose of the query
+        dispose_params = QueryDisposeParams()
+        dispose_params.owner_uri = params.owner_uri
+        self.query_execution_service._handle_dispose_request(self.request_context, dispose_params)
+
+        # Then the file of the second result set should have been deleted, and nothing tracked
+        self.assertFalse(os.path.exists(second_result_set._output_file_name))
+        self.assertEqual(self.query_execution_service._result_storage.get_usage(), ({}, {}))
+
+    def test_query_execution_applies_result_storage_configuration(self):
+        """Test that the result storage budgets are taken from the workspace configuration when a query is executed"""
+        # Set up a workspace service with result storage budgets
+        configuration = Configuration()
+        configuration.pgsql.result_storage.session_budget_mb = 1
+        configuration.pgsql.result_storage.total_budget_mb = 3
+        configuration.pgsql.result_storage.use_binary_copy = True
+        workspace_service = mock.Mock()
+        workspace_service.configuration = configuration
+        self.service_provider._services[constants.WORKSPACE_SERVICE_NAME] = workspace_service
+        params = get_execute_string_params()
+
+        # If I execute a query
+        with mock.patch('pgsqltoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
+            self.query_execution_service._handle_execute_query_request(self.request_context, params)
+            self.query_execution_service.owner_to_thread_map[params.owner_uri].join()
+
+        # Then the budgets of the configuration should be used, and the rows of SELECT statements be copied in the binary format
+        self.assertEqual(self.query_execution_service._result_storage.session_budget_bytes, 1024 * 1024)
+        self.assertEqual(self.query_execution_service._result_storage.total_budget_bytes, 3 * 1024 * 1024)
+        self.assertTrue(self.query_execution_service.query_results[params.owner_uri].batches[0]._use_binary_copy)
+        self.query_execution_service._result_storage.release_session(params.owner_uri)
+
+    def test_type_catalog_shared_by_database(self):
+        """Test that the connections to a database share a type catalog, and that other databases have their own"""
+        dsn_parameters = {'host': 'localhost', 'port': '5432', 'dbname': 'postgres', 'user': 'postgres'}
+        connection = utils.MockConnection(dsn_parameters)
+        other_user_connection = utils.MockConnection(dict(dsn_parameters, user='other'))
+        other_database_connection = utils.MockConnection(dict(dsn_parameters, dbname='other'))
+
+        catalog = self.query_execution_service._get_type_catalog(connection)
+
+        self.assertIs(self.query_execution_service._get_type_catalog(other_user_connection), catalog)
+        self.assertIsNot(self.query_execution_service._get_type_catalog(other_database_connection), catalog)
+
+    def test_handle_result_storage_usage_request(self):
+        """Test that the result storage usage request reports the usage of each owner URI"""
+        # Set up the result storage with the usage of two owner URIs
+        result_storage = mock.Mock()
+        result_storage.get_usage = mock.Mock(return_value=({'uri1': 100, 'uri2': 50}, {'uri1': 2, 'uri2': 1}))
+        result_storage.session_budget_bytes = 1000
+        result_storage.total_budget_bytes = 2000
+        result_storage.evicted_count = 3
+        self.query_execution_service._result_storage = result_storage
+
+        # If I request the usage of every owner URI
+        self.query_execution_service._handle_result_storage_usage_request(self.request_context, ResultStorageUsageParams())
+
+        # Then the usage of both should be sent along with the budgets
+        response = self.request_context.last_response_params
+        self.assertEqual(response.bytes_used, 150)
+        self.assertEqual((response.session_budget_bytes, response.total_budget_bytes, response.evicted_result_set_count), (1000, 2000, 3))
+        self.assertEqual(sorted((session.owner_uri, session.bytes_used, session.result_set_count) for session in response.sessions),
+                         [('uri1', 100, 2), ('uri2', 50, 1)])
+
+        # If I request the usage of one owner URI
+        params = ResultStorageUsageParams()
+        params.owner_uri = 'uri2'
+        self.query_execution_service._handle_result_storage_usage_request(self.request_context, params)
+
+        # Then only its usage should be sent
+        response = self.request_context.last_response_params
+        self.assertEqual(response.bytes_used, 50)
+        self.assertEqual([session.owner_uri for session in response.sessions], ['uri2'])
+
     def test_handle_subset_request(self):
         """Test that the query execution service handles subset requests correctly"""
         # Set up the test with the proper parameters and query results
@@ -590,6 +719,27 @@ class TestQueryService(unittest.TestCase):
         self.assertEqual(result_subset.rows[1][0].display_value, str(batch_rows[2][0]))
         self.assertEqual(result_subset.rows[1][1].display_value, str(batch_rows[2][1]))
 
+    def test_handle_subset_request_evicted(self):
+        """Test that a subset request of a result set that was evicted from storage sends back why it cannot be read"""
+        # Set up a query whose result set was evicted from storage
+        params = SubsetParams.from_dict({
+            'owner_uri': 'test_uri',
+            'batch_index': 0,
+            'result_set_index': 0,
+            'rows_start_index': 0,
+            'rows_count': 1
+        })
+        test_query = mock.MagicMock()
+        test_query.get_subset = mock.Mock(side_effect=ValueError(FileStorageResultSet.RESULT_SET_EVICTED_ERROR))
+        self.query_execution_service.query_results = {params.owner_uri: test_query}
+
+        # If I call the subset request handler
+        self.query_execution_service._handle_subset_request(self.request_context, params)
+
+        # Then the eviction should be sent back as the error
+        self.assertEqual(FileStorageResultSet.RESULT_SET_EVICTED_ERROR, self.request_context.last_error_message)
+        self.assertIsNone(self.request_context.last_response_params)
+
     def test_time(self):
         """Test to see that the start, end, and execution times are properly set"""
 
@@ -649,7 +799,7 @@ class TestQueryService(unittest.TestCase):
         self.assertTrue(uri not in self.query_execution_service.query_results)
         self.request_context.send_response.assert_called_once_with({})
         self.request_context.send_error.assert_not_called()
-        self.cursor_cancel.execute.assert_not_called()
+        self.connection.cancel.assert_not_called()
 
     def test_query_disposal_failure(self):
         """Test for handling query/dispose request in case where disposal is not possible"""
@@ -669,7 +819,7 @@ class TestQueryService(unittest.TestCase):
     def test_query_disposal_with_query_executing(self):
         """Test query disposal while a query is executing"""
         uri = 'test_uri'
-        self.query_execution_service.query_results[uri] = Query(uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
+        query = self.query_execution_service.query_results[uri] = Query(uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
         self.query_execution_service.query_results[uri]._execution_state = ExecutionState.EXECUTING
         params = QueryDisposeParams()
         params.owner_uri = uri
@@ -679,15 +829,12 @@ class TestQueryService(unittest.TestCase):
         self.assertTrue(uri not in self.query_execution_service.query_results)
         self.request_context.send_response.assert_called_once_with({})
         self.request_context.send_error.assert_not_called()
-        self.cursor_cancel.execute.assert_called_once()
-        # Check the positional args for the first arg of of the first (and only) call
-        # is the query string to cancel the ongoing query
-        self.assertEqual(self.cursor_cancel.execute.call_args_list[0][0][0], CANCELATION_QUERY)
+        self.assertTrue(query.is_canceled)
 
     def test_query_disposal_with_query_not_started(self):
         """Test query disposal while a query has not started executing"""
         uri = 'test_uri'
-        self.query_execution_service.query_results[uri] = Query(uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
+        query = self.query_execution_service.query_results[uri] = Query(uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
         params = QueryDisposeParams()
         params.owner_uri = uri
 
@@ -696,10 +843,7 @@ class TestQueryService(unittest.TestCase):
         self.assertTrue(uri not in self.query_execution_service.query_results)
         self.request_context.send_response.assert_called_once_with({})
         self.request_context.send_error.assert_not_called()
-        self.cursor_cancel.execute.assert_called_once()
-        # Check the positional args for the first arg of of the first (and only) call
-        # is the query string to cancel the ongoing query
-        self.assertEqual(self.cursor_cancel.execute.call_args_list[0][0][0], CANCELATION_QUERY)
+        self.assertTrue(query.is_canceled)
 
     def test_get_query_text_from_execute_params_for_doc_statement_same_line_cur_in_first_batch(self):
         ''' Multiple batch in SAME line test with cursor on 1st batch, returns the query for first batch '''
@@ -823,69 +967,115 @@ class TestQueryService(unittest.TestCase):
         self.cursor.execute.assert_has_calls([mock.call(query_params.query), mock.call('ROLLBACK')])
 
     def test_handle_simple_execute_request(self):
-        """ Test for _handle_simple_execute_request to make sure it returns required details
-        from the first batch """
-        simple_execution_request = SimpleExecuteRequest()
-        simple_execution_request.owner_uri = 'test_uri'
-        simple_execution_request.query_string = 'Select something'
-        connection_uri = 'test_connection_url'
-
-        connection_details = ConnectionDetails.from_data({})
-        connection_info = ConnectionInfo(connection_uri, connection_details)
-
-        def get_connection_info(uri):
-            self.assertEqual(uri, simple_execution_request.owner_uri)
-            return connection_info
-
-        self.connection_service.get_connection_info = mock.Mock(side_effect=get_connection_info)
-        self.connection_service.connect = mock.MagicMock()
-
-        mock_rows = [("Result1", 53, 2.57), ("Result2", None, "foobar")]
-        new_owner_uri = str(uuid.uuid4())
-        query = Query(new_owner_uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
-        batch = Batch('', 0, SelectionData())
-        cursor = utils.MockCursor(mock_rows)
-
-        result_set = create_result_set(ResultSetStorageType.IN_MEMORY, 0, 0)
-
-        with mock.patch('pgsqltoolsservice.query.in_memory_result_set.get_columns_info', new=mock.Mock()):
-            result_set.read_result_to_end(cursor)
-
-        batch._result_set = result_set
-        batch._has_executed = True
-        query._batches = [batch]
-        self.query_execution_service.query_results = {
-            new_owner_uri: query
-        }
-        query.execute = mock.MagicMock()
-
-        def get_result_subset_mock(request_context, subset_params):
+        """Test that a simple execute sends every row of the statement, releasing the connection it leased"""
+        # If: I simple execute a statement without a maximum number of rows
+        self._send_simple_execute('SELECT * FROM t')
 
-            self.assertEqual(self.request_context, request_context)
-            self.assertEqual(subset_params.owner_uri, new_owner_uri)
-            self.assertEqual(subset_params.batch_index, 0)
-            self.assertEqual(subset_params.result_set_index, 0)
-            self.assertEqual(subset_params.rows_start_index, 0)
-            self.assertEqual(subset_params.rows_count, 2)
+        # Then: Every row should have been sent without a continuation token
+        response = self.request_context.last_response_params
+        self.assertIsInstance(response, SimpleExecuteResponse)
+        self.assertEqual([[1, 'Text 1'], [2, 'Text 2']], [[cell.raw_object for cell in row] for row in response.rows])
+        self.assertEqual(2, response.row_count)
+        self.assertEqual(self.columns_info, response.column_info)
+        self.assertIsNone(response.continuation_token)
+
+        # ... The statement should have been run on a named cursor of a connection leased for the owner URI
+        self.connection_service.lease_connection.assert_called_once_with('test_uri')
+        self.assertIsNotNone(self.connection.cursor.call_args[1]['name'])
+        self.cursor.execute.assert_called_once_with('SELECT * FROM t')
+
+        # ... And the cursor should have been closed and the connection released
+        self.cursor.close.assert_called_once_with()
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
+        self.assertEqual({}, self.query_execution_service._simple_executions)
+
+    def test_handle_simple_execute_request_paging(self):
+        """Test that the rows of a simple execute can be read in pages with continuation tokens"""
+        self.rows.append((3, 'Text 3'))
+
+        # If: I simple execute a statement with a maximum number of rows lower than its row count
+        with mock.patch('threading.Timer') as mock_timer:
+            self._send_simple_execute('SELECT * FROM t', max_rows=2)
+
+        # Then: The first page should have been sent with a continuation token, keeping the connection leased
+        response = self.request_context.last_response_params
+        self.assertEqual([1, 2], [row[0].raw_object for row in response.rows])
+        self.assertIsNotNone(response.continuation_token)
+        self.connection_service.release_connection.assert_not_called()
 
-            subset = SubsetMock()
-            subset.row_count = len(mock_rows)
-            subset.rows = mock_rows
+        # ... And the rows should be discarded if they are not read before the timeout
+        self.assertEqual(SIMPLE_EXECUTION_TIMEOUT_SECONDS, mock_timer.call_args[0][0])
 
-            result = SubsetResult(subset)
+        # If: I request the next rows with the continuation token
+        continuation_token = response.continuation_token
+        self._send_simple_execute(max_rows=2, continuation_token=continuation_token)
 
-            return result
+        # Then: The remaining rows should have been sent, continuing the row IDs, without a continuation token
+        response = self.request_context.last_response_params
+        self.assertEqual([(3, 2)], [(row[0].raw_object, row[0].row_id) for row in response.rows])
+        self.assertIsNone(response.continuation_token)
+        self.cursor.execute.assert_called_once_with('SELECT * FROM t')
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
+
+        # If: I request rows with the token again, then an error should be sent
+        self._send_simple_execute(max_rows=2, continuation_token=continuation_token)
+        self.assertEqual(SIMPLE_EXECUTE_CONTINUATION_ERROR, self.request_context.last_error_message)
+
+    def test_simple_execute_expired(self):
+        """Test that the rows left unread by a simple execute are discarded once it times out"""
+        with mock.patch('threading.Timer') as mock_timer:
+            self._send_simple_execute('SELECT * FROM t', max_rows=1)
+        continuation_token = self.request_context.last_response_params.continuation_token
+
+        # If: The simple execute times out
+        expire, expire_args = mock_timer.call_args[0][1:]
+        expire(*expire_args)
+
+        # Then: Its cursor should have been closed and its connection released
+        self.cursor.close.assert_called_once_with()
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
+
+        # ... And its rows should no longer be available
+        self._send_simple_execute(continuation_token=continuation_token)
+        self.assertEqual(SIMPLE_EXECUTE_CONTINUATION_ERROR, self.request_context.last_error_message)
+
+    def test_simple_execute_closed_on_shutdown(self):
+        """Test that the simple executes whose rows have not all been read are closed on shutdown"""
+        with mock.patch('threading.Timer'):
+            self._send_simple_execute('SELECT * FROM t', max_rows=1)
+
+        # If: The service shuts down, then the connection of the simple execute should have been released
+        self.query_execution_service._close_simple_executions()
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
+        self.assertEqual({}, self.query_execution_service._simple_executions)
+
+    def test_simple_execute_errors(self):
+        """Test that simple executes that fail send an error, releasing the connection they leased"""
+        # If: I simple execute more than one statement
+        self._send_simple_execute('SELECT 1; SELECT 2')
+
+        # Then: An error should have been sent, and the connection released without running anything
+        self.assertEqual(SIMPLE_EXECUTE_MULTIPLE_STATEMENTS_ERROR, self.request_context.last_error_message)
+        self.cursor.execute.assert_not_called()
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
 
-        self.query_execution_service._get_result_subset = mock.Mock(side_effect=get_result_subset_mock)
+        # If: I simple execute a statement that fails
+        self.connection_service.release_connection.reset_mock()
+        self.cursor.execute.side_effect = psycopg2.DatabaseError('syntax error')
+        self._send_simple_execute('SELEC 1')
 
-        def send_response_mock(args):
-            self.assertEqual(args.rows, mock_rows)
-            self.assertEqual(args.row_count, len(mock_rows))
+        # Then: The error should have been sent, and the connection released
+        self.assertEqual('syntax error', self.request_context.last_error_message)
+        self.connection_service.release_connection.assert_called_once_with(self.connection)
 
-        self.request_context.send_response = mock.Mock(side_effect=send_response_mock)
+        # If: I simple execute on an owner URI that is not connected, then its error should be sent
+        self.connection_service.lease_connection.side_effect = ValueError('No connection associated with given owner URI')
+        self._send_simple_execute('SELECT 1')
+        self.assertEqual('No connection associated with given owner URI', self.request_context.last_error_message)
 
-        with mock.patch('uuid.uuid4', new=mock.Mock(return_value=new_owner_uri)):
-            self.query_execution_service._handle_simple_execute_request(self.request_context, simple_execution_request)
+        # If: I simple execute with a maximum number of rows that is not positive, then an error should be sent
+        self._send_simple_execute('SELECT 1', max_rows=0)
+        self.assertEqual(SIMPLE_EXECUTE_MAX_ROWS_ERROR, self.request_context.last_error_message)
 
     def test_handle_save_as_csv_request(self):
 
@@ -916,6 +1106,14 @@ class TestQueryService(unittest.TestCase):
 
         self.assertEqual('Failed to save File.csv: Something went wrong', self.request_context.last_error_message)
 
+        save_as_args[4](5, 10)
+
+        self.assertEqual(SAVE_AS_PROGRESS_NOTIFICATION, self.request_context.last_notification_method)
+        progress_params = self.request_context.last_notification_params
+        self.assertIsInstance(progress_params, SaveResultsProgressParams)
+        self.assertEqual((request_params.owner_uri, request_params.file_path, 5, 10),
+                         (progress_params.owner_uri, progress_params.file_path, progress_params.rows_written, progress_params.total_rows))
+
     def test_handle_save_as_json_request(self):
 
         request_params = SaveResultsAsJsonRequestParams()
@@ -954,6 +1152,210 @@ class TestQueryService(unittest.TestCase):
 
         self.assertIsInstance(save_as_args[1], SaveAsExcelFileStreamFactory)
 
+    def test_handle_save_as_csv_request_with_server_copy(self):
+        # Setup: Create a query whose batch is a SELECT statement
+        request_params = self._get_server_copy_params()
+        mock_query = mock.MagicMock()
+        mock_query.batches = [mock.Mock(batch_text='select * from t;')]
+        self.query_execution_service.query_results[request_params.owner_uri] = mock_query
+
+        # If: I save the result as CSV with the server copy
+        copy_mock = mock.Mock(return_value=2)
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.copy_query_to_file', new=copy_mock):
+            self._run_copy_threads(lambda: self.query_execution_service._handle_save_as_csv_request(self.request_context, request_params))
+
+        # Then: The query should have been copied to the file on the export connection instead of saving the stored rows
+        mock_query.save_as.assert_not_called()
+        self.connection_service.get_connection.assert_called_once_with(request_params.owner_uri, ConnectionType.EXPORT)
+        copy_mock.assert_called_once_with(self.connection, 'select * from t', request_params.file_path, True)
+        self.assertIsInstance(self.request_context.last_response_params, SaveResultRequestResult)
+
+    def test_handle_save_as_csv_request_with_server_copy_falls_back(self):
+        # Setup: Create a query whose batch cannot be copied
+        mock_query = mock.MagicMock()
+        mock_query.batches = [mock.Mock(batch_text='insert into t values (1) returning *')]
+
+        for is_selection, query in [(False, mock_query), (True, mock.MagicMock(batches=[mock.Mock(batch_text='select 1')]))]:
+            request_params = self._get_server_copy_params()
+            if is_selection:
+                request_params.row_start_index = request_params.row_end_index = 0
+                request_params.column_start_index = request_params.column_end_index = 0
+            self.query_execution_service.query_results[request_params.owner_uri] = query
+
+            # If: I save the result, or a selection of a result, as CSV with the server copy
+            self.query_execution_service._handle_save_as_csv_request(self.request_context, request_params)
+
+            # Then: The stored rows should be saved instead
+            query.save_as.assert_called_once()
+            self.assertIsInstance(query.save_as.call_args[0][1], SaveAsCsvFileStreamFactory)
+
+    def test_handle_save_as_csv_request_with_server_copy_in_transaction(self):
+        # Setup: Create a query whose batch is a SELECT statement, run in a transaction still open on the query connection
+        request_params = self._get_server_copy_params()
+        mock_query = mock.MagicMock()
+        mock_query.batches = [mock.Mock(batch_text='select * from t;')]
+        self.query_execution_service.query_results[request_params.owner_uri] = mock_query
+        query_connection = utils.MockConnection()
+        query_connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        connection_info = ConnectionInfo(request_params.owner_uri, None)
+        connection_info.add_connection(ConnectionType.QUERY, query_connection)
+        self.connection_service.owner_to_connection_map[request_params.owner_uri] = connection_info
+
+        # If: I save the result as CSV with the server copy
+        copy_mock = mock.Mock()
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.copy_query_to_file', new=copy_mock):
+            self.query_execution_service._handle_save_as_csv_request(self.request_context, request_params)
+
+        # Then: The stored rows should be saved, as the export connection cannot see the changes of the transaction
+        copy_mock.assert_not_called()
+        mock_query.save_as.assert_called_once()
+        self.assertIsInstance(mock_query.save_as.call_args[0][1], SaveAsCsvFileStreamFactory)
+
+    def test_handle_export_query_to_file_request(self):
+        # Setup: Create the parameters of an export
+        request_params = ExportQueryToFileParams()
+        request_params.owner_uri = 'testOwner_uri'
+        request_params.query = 'select * from t'
+        request_params.file_path = r'C:\SomeFolder\File.csv'
+
+        # If: I export the query and the copy succeeds
+        copy_mock = mock.Mock(return_value=5)
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.copy_query_to_file', new=copy_mock):
+            self._run_copy_threads(lambda: self.query_execution_service._handle_export_query_to_file_request(self.request_context, request_params))
+
+        # Then: The number of rows exported should be sent back
+        copy_mock.assert_called_once_with(self.connection, request_params.query, request_params.file_path, False)
+        self.assertIsInstance(self.request_context.last_response_params, ExportQueryToFileResult)
+        self.assertEqual(self.request_context.last_response_params.row_count, 5)
+
+        # If: I export the query and the copy fails
+        copy_mock = mock.Mock(side_effect=ValueError('Only a single query can be exported'))
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.copy_query_to_file', new=copy_mock):
+            self._run_copy_threads(lambda: self.query_execution_service._handle_export_query_to_file_request(self.request_context, request_params))
+
+        # Then: An error should be sent back
+        self.assertEqual('Failed to save File.csv: Only a single query can be exported', self.request_context.last_error_message)
+
+    def test_export_query_to_file_canceled(self):
+        # Setup: Create the parameters of an export, and a request that is canceled while the query is copied
+        request_params = ExportQueryToFileParams()
+        request_params.owner_uri = 'testOwner_uri'
+        request_params.query = 'select * from t'
+        request_params.file_path = r'C:\SomeFolder\File.csv'
+        request_context = utils.MockRequestContext()
+
+        def cancel_copy(connection, query_text, file_path, include_headers):
+            request_context.cancellation_token.cancel()
+            raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+
+        # If: I export the query and the request is canceled during the copy
+        copy_mock = mock.Mock(side_effect=cancel_copy)
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.copy_query_to_file', new=copy_mock):
+            self._run_copy_threads(lambda: self.query_execution_service._handle_export_query_to_file_request(request_context, request_params))
+
+        # Then: The copy should have been canceled on the export connection, and nothing sent back
+        self.connection.cancel.assert_called_once()
+        self.assertIsNone(request_context.last_response_params)
+        self.assertIsNone(request_context.last_error_message)
+
+    def test_handle_query_execution_plan_request(self):
+        # Setup: Create a query whose batch is a statement to explain
+        request_params = QueryExecutionPlanRequest()
+        request_params.owner_uri = 'testOwner_uri'
+        request_params.batch_index = 0
+        mock_query = mock.MagicMock()
+        mock_query.batches = [mock.Mock(batch_text='select * from t;')]
+        self.query_execution_service.query_results[request_params.owner_uri] = mock_query
+
+        # If: I request the execution plan of the batch
+        execution_plan = mock.Mock()
+        explain_mock = mock.Mock(return_value=execution_plan)
+        mock_thread = utils.MockThread()
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.explain_query', new=explain_mock), \
+                mock.patch('threading.Thread', new=mock.Mock(side_effect=mock_thread.initialize_target)):
+            self.query_execution_service._handle_query_execution_plan_request(self.request_context, request_params)
+
+        # Then: The batch should have been explained on the explain connection, and its plan sent back
+        self.connection_service.get_connection.assert_called_once_with(request_params.owner_uri, ConnectionType.EXPLAIN)
+        explain_mock.assert_called_once_with(self.connection, 'select * from t;')
+        self.assertIsInstance(self.request_context.last_response_params, QueryExecutionResponse)
+        self.assertIs(execution_plan, self.request_context.last_response_params.execution_plan)
+
+        # If: I request the execution plan of a given statement and explaining it fails
+        request_params.query = 'delete from t'
+        explain_mock = mock.Mock(side_effect=ValueError('Only a single statement can be explained'))
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.explain_query', new=explain_mock), \
+                mock.patch('threading.Thread', new=mock.Mock(side_effect=mock_thread.initialize_target)):
+            self.query_execution_service._handle_query_execution_plan_request(self.request_context, request_params)
+
+        # Then: The statement should have been explained instead of the batch, and an error sent back
+        explain_mock.assert_called_once_with(self.connection, 'delete from t')
+        self.assertEqual('Failed to get the execution plan: Only a single statement can be explained', self.request_context.last_error_message)
+
+    def test_query_execution_plan_canceled(self):
+        # Setup: Create a query whose batch is a statement to explain, and a request whose plan is canceled as it runs
+        request_params = QueryExecutionPlanRequest()
+        request_params.owner_uri = 'testOwner_uri'
+        request_params.batch_index = 0
+        mock_query = mock.MagicMock()
+        mock_query.batches = [mock.Mock(batch_text='select * from t;')]
+        self.query_execution_service.query_results[request_params.owner_uri] = mock_query
+        request_context = utils.MockRequestContext()
+
+        def cancel_explain(connection, query_text):
+            request_context.cancellation_token.cancel()
+            raise psycopg2.extensions.QueryCanceledError('canceling statement due to user request')
+
+        # If: I request the execution plan of the batch and the request is canceled while explaining it
+        explain_mock = mock.Mock(side_effect=cancel_explain)
+        mock_thread = utils.MockThread()
+        with mock.patch('pgsqltoolsservice.query_execution.query_execution_service.explain_query', new=explain_mock), \
+                mock.patch('threading.Thread', new=mock.Mock(side_effect=mock_thread.initialize_target)):
+            self.query_execution_service._handle_query_execution_plan_request(request_context, request_params)
+
+        # Then: The statement should have been canceled on the explain connection, and nothing sent back
+        explain_mock.assert_called_once_with(self.connection, 'select * from t;')
+        self.connection.cancel.assert_called_once()
+        self.assertIsNone(request_context.last_response_params)
+        self.assertIsNone(request_context.last_error_message)
+
+    def test_handle_query_execution_plan_request_without_batch(self):
+        for owner_uri, batch_index in [('unknown_uri', 0), ('testOwner_uri', 1)]:
+            # If: I request the execution plan of a batch of an owner URI without a query, or of a batch that does not exist
+            request_params = QueryExecutionPlanRequest()
+            request_params.owner_uri = owner_uri
+            request_params.batch_index = batch_index
+            self.query_execution_service.query_results['testOwner_uri'] = mock.MagicMock(batches=[mock.Mock(batch_text='select 1')])
+            self.request_context.send_error = mock.Mock()
+            self.query_execution_service._handle_query_execution_plan_request(self.request_context, request_params)
+
+            # Then: An error should be sent back without explaining anything
+            self.request_context.send_error.assert_called_once()
+            self.connection_service.get_connection.assert_not_called()
+
+    def _get_server_copy_params(self) -> SaveResultsAsCsvRequestParams:
+        request_params = SaveResultsAsCsvRequestParams()
+        request_params.owner_uri = 'testOwner_uri'
+        request_params.file_path = r'C:\SomeFolder\File.csv'
+        request_params.batch_index = 0
+        request_params.include_headers = True
+        request_params.use_server_copy = True
+        return request_params
+
+    def _run_copy_threads(self, handle_request):
+        """Handles a request and waits for the copy threads it started to finish"""
+        start_copy_to_file = self.query_execution_service._start_copy_to_file
+        threads = []
+
+        def start_and_record(*args):
+            threads.append(start_copy_to_file(*args))
+            return threads[-1]
+
+        with mock.patch.object(self.query_execution_service, '_start_copy_to_file', new=start_and_record):
+            handle_request()
+        for thread in threads:
+            thread.join()
+
     @integration_test
     def test_query_execution_and_retrieval(self):
         """Perform an end-to-end test of query execution"""
@@ -1004,11 +1406,15 @@ class TestQueryService(unittest.TestCase):
                 self.assertEqual(actual_cell.display_value, str(expected_value))
 
 
-class SubsetMock:
+class SynchronousThread:
+    """Thread that runs its target as soon as it is started, on the thread starting it"""
+
+    def __init__(self, target, args=(), daemon=None):
+        self._target = target
+        self._args = args
 
-    def __init__(self):
-        self.rows = None
-        self.row_count = None
+    def start(self):
+        self._target(*self._args)
 
 
 def get_execute_string_params() -> ExecuteStringParams:
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import threading
 import unittest
 from unittest import mock
 
@@ -13,6 +14,7 @@ from pgsqltoolsservice.hosting import JSONRPCServer, ServiceProvider
 from pgsqltoolsservice.scripting.scripter import Scripter
 from pgsqltoolsservice.scripting.scripting_service import ScriptingService
 from pgsqltoolsservice.scripting.contracts.scriptas_request import ScriptOperation, ScriptAsParameters, ScriptAsResponse
+from pgsqltoolsservice.utils.cancellation import CancellationToken
 from tests.mock_request_validation import RequestFlowValidator
 from tests.pgsmo_tests.utils import MockConnection      # TODO: Replace with global
 import tests.utils as utils
@@ -141,3 +143,42 @@ class TestScriptingService(unittest.TestCase):
 
             for calls in matches.values():
                 self.assertEqual(calls, 1)
+
+    def test_handle_scriptas_canceled_behind_query(self):
+        # Setup: Create a scripting service whose owner URI's query connection is running a query of the editor
+        mock_connection = MockConnection(None)
+        mock_connection.cancel = mock.Mock()
+        cs = ConnectionService()
+        cs.get_connection = mock.MagicMock(return_value=mock_connection)
+        ss = ScriptingService()
+        ss._service_provider = utils.get_mock_service_provider({CONNECTION_SERVICE_NAME: cs})
+        query_started, query_finish = threading.Event(), threading.Event()
+
+        def run_query():
+            with CancellationToken().canceling_statements(mock_connection):
+                query_started.set()
+                query_finish.wait(5)
+
+        query_thread = threading.Thread(target=run_query, daemon=True)
+        query_thread.start()
+        query_started.wait(5)
+
+        # If: A scripting request waiting for the query to finish is canceled
+        request_context = utils.MockRequestContext()
+        params = ScriptAsParameters.from_dict({
+            'ownerUri': TestScriptingService.MOCK_URI,
+            'operation': ScriptOperation.SELECT,
+            'scripting_objects': [{'type': 'Table', 'name': 'test_table', 'schema': 'test_schema'}]
+        })
+        threading.Timer(0.05, request_context.cancellation_token.cancel).start()
+        with mock.patch('pgsqltoolsservice.scripting.scripting_service.Scripter') as scripter_patch:
+            ss._handle_scriptas_request(request_context, params)
+
+        # Then: The query of the editor should not have been canceled, and nothing should have been scripted or sent
+        mock_connection.cancel.assert_not_called()
+        scripter_patch.return_value.script.assert_not_called()
+        request_context.send_response.assert_not_called()
+        request_context.send_error.assert_not_called()
+
+        query_finish.set()
+        query_thread.join(5)
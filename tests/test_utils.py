@@ -6,11 +6,19 @@
 """Test utils.py"""
 
 import enum
+import json
 from typing import Optional
+import threading
 import unittest
+from unittest import mock
+
+import inflection
+import psycopg2
+import psycopg2.extensions
 
 import pgsqltoolsservice.utils as utils
-from pgsqltoolsservice.serialization import Serializable
+from pgsqltoolsservice.serialization import Serializable, get_class_serializer
+from pgsqltoolsservice.serialization.serializable import convert_from_dict
 
 
 class TestUtils(unittest.TestCase):
@@ -45,6 +53,136 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(len(test_object.dict), len(result.dict))
         self.assertEqual(result.enum, test_object.enum)
 
+    def test_convert_to_json(self):
+        """Test that convert_to_json produces the sorted JSON of the dictionary representation"""
+        test_object = _ConversionTestClass()
+        self.assertEqual(utils.serialization.convert_to_json(test_object), json.dumps(test_object.expected_dict(), sort_keys=True))
+
+    def test_class_serializer_caches_json_names(self):
+        """Test that attribute names are only camelized the first time each one is serialized for a class"""
+        with mock.patch('inflection.camelize', side_effect=inflection.camelize) as mock_camelize:
+            utils.serialization.convert_to_json([_CachingTestClass(), _CachingTestClass()])
+            first_call_count = mock_camelize.call_count
+            utils.serialization.convert_to_json(_CachingTestClass())
+
+        self.assertGreater(first_call_count, 0)
+        self.assertEqual(mock_camelize.call_count, first_call_count)
+
+    def test_class_serializer_caches_attribute_names(self):
+        """Test that JSON names are only converted to attribute names the first time they are seen for a class"""
+        with mock.patch('inflection.underscore', side_effect=inflection.underscore) as mock_underscore:
+            first = _CachingTestClass.from_dict({'cachedValue': 1, 'otherValue': 'a'})
+            first_call_count = mock_underscore.call_count
+            second = _CachingTestClass.from_dict({'cachedValue': 2, 'otherValue': 'b'})
+
+        self.assertLessEqual(first_call_count, 2)
+        self.assertEqual(mock_underscore.call_count, first_call_count)
+        self.assertEqual(first.cached_value, 1)
+        self.assertEqual(second.other_value, 'b')
+
+    def test_class_serializer_is_shared(self):
+        """Test that the same serializer is returned for every lookup of a class"""
+        self.assertIs(get_class_serializer(_CachingTestClass), get_class_serializer(_CachingTestClass))
+        self.assertIsNot(get_class_serializer(_CachingTestClass), get_class_serializer(_NestedTestClass))
+
+    def test_convert_from_dict_unknown_attribute(self):
+        """Test that unknown attributes raise an error every time they are seen, unless ignored"""
+        for _ in range(2):
+            with self.assertRaises(AttributeError):
+                _CachingTestClass.from_dict({'unknownValue': 1})
+
+        result = convert_from_dict(_CachingTestClass, {'unknownValue': 1, 'cachedValue': 3}, ignore_extra_attributes=True)
+        self.assertEqual(result.cached_value, 3)
+        self.assertFalse(hasattr(result, 'unknown_value'))
+
+    def test_convert_from_dict_child_types(self):
+        """Test that convert_from_dict only uses the child types it is given, not the ones declared by the class"""
+        json_to_convert = {'nestedObject': {'testInt': 2}}
+        self.assertIsInstance(_ConversionTestClass.from_dict(json_to_convert).nested_object, _NestedTestClass)
+        self.assertIsInstance(convert_from_dict(_ConversionTestClass, json_to_convert).nested_object, dict)
+        result = convert_from_dict(_ConversionTestClass, json_to_convert, nested_object=_NestedTestClass)
+        self.assertEqual(result.nested_object.test_int, 2)
+
+
+class CancellationTokenTests(unittest.TestCase):
+
+    def test_cancel_runs_callbacks(self):
+        # Setup: Create a token with a registered callback, and one that has been unregistered
+        token = utils.cancellation.CancellationToken()
+        callback = mock.Mock()
+        unregistered_callback = mock.Mock()
+        token.register(callback)
+        token.register(unregistered_callback)
+        token.unregister(unregistered_callback)
+
+        # If: I cancel the token twice
+        token.cancel()
+        token.cancel()
+
+        # Then: Only the registered callback should have been called, once
+        self.assertTrue(token.canceled)
+        callback.assert_called_once_with()
+        unregistered_callback.assert_not_called()
+
+        # If: I register a callback after the token is canceled
+        late_callback = mock.Mock()
+        token.register(late_callback)
+
+        # Then: It should be called immediately
+        late_callback.assert_called_once_with()
+
+    def test_canceling_statements(self):
+        # Setup: Create a token and a connection that fails to cancel
+        token = utils.cancellation.CancellationToken()
+        connection = mock.Mock()
+        connection.cancel.side_effect = psycopg2.OperationalError
+
+        # If: I cancel the token while in the block, and again after the block
+        with token.canceling_statements(connection):
+            token.cancel()
+        token.cancel()
+
+        # Then: The connection should have been canceled once, without the error being raised
+        connection.cancel.assert_called_once_with()
+
+        # If: I enter the block with a canceled token
+        # Then: The block should not run, and the connection should not be canceled as nothing of the token runs on it
+        with self.assertRaises(psycopg2.extensions.QueryCanceledError):
+            with token.canceling_statements(connection):
+                self.fail('The block of a canceled token should not run')
+        connection.cancel.assert_called_once_with()
+
+    def test_canceling_statements_of_other_token(self):
+        # Setup: Start a block of a token on a connection, which runs until it is told to finish
+        running_token = utils.cancellation.CancellationToken()
+        waiting_token = utils.cancellation.CancellationToken()
+        connection = mock.Mock()
+        started, finish = threading.Event(), threading.Event()
+
+        def run_statement():
+            with running_token.canceling_statements(connection):
+                started.set()
+                finish.wait(5)
+
+        thread = threading.Thread(target=run_statement, daemon=True)
+        thread.start()
+        started.wait(5)
+
+        # If: Another token's block waits for the connection, and its token is canceled
+        threading.Timer(0.05, waiting_token.cancel).start()
+        with self.assertRaises(psycopg2.extensions.QueryCanceledError):
+            with waiting_token.canceling_statements(connection):
+                self.fail('The block of a canceled token should not run')
+
+        # Then: The statement of the running block should not have been canceled
+        connection.cancel.assert_not_called()
+
+        # If: The running block finishes, then the connection should be free for the blocks of other tokens
+        finish.set()
+        thread.join(5)
+        with utils.cancellation.CancellationToken().canceling_statements(connection):
+            pass
+
 
 class _ConversionTestClass(Serializable):
     """Test class to be used for testing dictionary conversions"""
@@ -90,6 +228,14 @@ class _NestedTestClass(Serializable):
         }
 
 
+class _CachingTestClass(Serializable):
+    """Test class used only by the caching tests, so that no other test has populated its serializer"""
+
+    def __init__(self):
+        self.cached_value = 1
+        self.other_value = None
+
+
 class _TestEnum(enum.Enum):
     """Test enum to be included in the _ConversionTestClass to ensure enum conversion works"""
     FIRST_OPTION = 1
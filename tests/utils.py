@@ -3,7 +3,10 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import datetime
+import json
 import logging
+import struct
 import unittest
 import unittest.mock as mock
 import psycopg2
@@ -109,8 +112,10 @@ class MockConnection(object):
         self.server_version = '90602'
         self.cursor = mock.Mock(return_value=cursor)
         self.get_backend_pid = mock.Mock(return_value=0)
+        self.cancel = mock.Mock()
         self.notices = []
         self.autocommit = True
+        self.rollback = mock.Mock()
         self.get_transaction_status = mock.Mock(return_value=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
 
     @property
@@ -137,10 +142,12 @@ class MockCursor:
         self.execute = mock.Mock(side_effect=self.execute_success_side_effects)
         self.fetchall = mock.Mock(return_value=query_results)
         self.fetchone = mock.Mock(side_effect=self.execute_fetch_one_side_effects)
+        self.fetchmany = mock.Mock(side_effect=self.execute_fetch_many_side_effects)
         self.close = mock.Mock()
         self.connection = connection
         self.description = [self.create_column_description(name=name) for name in columns_names]
         self.rowcount = -1
+        self.statusmessage = None
         self._mogrified_value = b'Some query'
         self.mogrify = mock.Mock(return_value=self._mogrified_value)
         self._query_results = query_results
@@ -174,6 +181,11 @@ class MockCursor:
             self._fetched_count += 1
             return row
 
+    def execute_fetch_many_side_effects(self, size):
+        rows = self._query_results[self._fetched_count:self._fetched_count + size]
+        self._fetched_count += len(rows)
+        return rows
+
     def create_column_description(self, **kwargs):
         description = {
             'name': None,
@@ -211,3 +223,73 @@ class MockThread():
         self.args = args
         self.start = mock.Mock(side_effect=lambda: self.target(*self.args))
         return self
+
+
+def encode_binary_copy_numeric(value) -> bytes:
+    """Encodes a Decimal in the binary format of numeric values, as base 10000 digits aligned on the decimal point"""
+    sign, digits, exponent = value.as_tuple()
+    scale = max(0, -exponent)
+    fraction_digit_count = (scale + 3) // 4
+    coefficient = int(''.join(map(str, digits))) * 10 ** (exponent + 4 * fraction_digit_count)
+
+    numeric_digits = []
+    while coefficient:
+        coefficient, digit = divmod(coefficient, 10000)
+        numeric_digits.insert(0, digit)
+    weight = len(numeric_digits) - fraction_digit_count - 1
+    while numeric_digits and numeric_digits[-1] == 0:
+        numeric_digits.pop()
+
+    header = struct.pack('>hhHH', len(numeric_digits), weight if numeric_digits else 0, 0x4000 if sign else 0, scale)
+    return header + struct.pack('>%dH' % len(numeric_digits), *numeric_digits)
+
+
+# Encoders of values in the binary format of COPY for the types of the tests
+BINARY_COPY_ENCODERS = {
+    'bool': lambda value: struct.pack('?', value),
+    'int2': lambda value: struct.pack('>h', value),
+    'int4': lambda value: struct.pack('>i', value),
+    'int8': lambda value: struct.pack('>q', value),
+    'oid': lambda value: struct.pack('>I', value),
+    'float4': lambda value: struct.pack('>f', value),
+    'float8': lambda value: struct.pack('>d', value),
+    'numeric': encode_binary_copy_numeric,
+    'text': str.encode,
+    'varchar': str.encode,
+    'bytea': bytes,
+    'date': lambda value: struct.pack('>i', (value - datetime.date(2000, 1, 1)).days),
+    'time': lambda value: struct.pack('>q', ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond),
+    'timestamp': lambda value: struct.pack('>q', (value - datetime.datetime(2000, 1, 1)) // datetime.timedelta(microseconds=1)),
+    'uuid': lambda value: value.bytes,
+    'json': lambda value: json.dumps(value).encode(),
+    'jsonb': lambda value: b'\x01' + json.dumps(value).encode()
+}
+
+
+def create_binary_copy_data(rows, data_types) -> bytes:
+    """Creates the output of COPY ... TO STDOUT (FORMAT binary) for rows of values of the given types, None being NULL"""
+    data = bytearray(b'PGCOPY\n\xff\r\n\x00' + struct.pack('>II', 0, 0))
+    for row in rows:
+        data += struct.pack('>h', len(row))
+        for value, data_type in zip(row, data_types):
+            if value is None:
+                data += struct.pack('>i', -1)
+            else:
+                cell = BINARY_COPY_ENCODERS[data_type](value)
+                data += struct.pack('>i', len(cell)) + cell
+    data += struct.pack('>h', -1)
+    return bytes(data)
+
+
+class MockCopyCursor(MockCursor):
+    """Mock cursor whose copy_expert writes binary COPY output to the file it is given in chunks of a given size"""
+
+    def __init__(self, copy_data: bytes, chunk_size: int = 8192, connection=mock.Mock()):
+        MockCursor.__init__(self, None, connection=connection)
+        self.copy_data = copy_data
+        self.chunk_size = chunk_size
+        self.copy_expert = mock.Mock(side_effect=self._copy_expert)
+
+    def _copy_expert(self, sql, file, size=8192):
+        for start in range(0, len(self.copy_data), self.chunk_size):
+            file.write(self.copy_data[start:start + self.chunk_size])